@@ -7,11 +7,11 @@ from autograder_utils.ResultFinalizers import gradescopeResultFinalizer
 from autograder_utils.JSONTestRunner import JSONTestRunner
 
 # CLI tools should only be able to import from the CLI part of the library
-from autograder_platform.cli import AutograderCLITool
+from autograder_platform.runner_cli import AutograderTestRunnerCLITool
 from autograder_platform.config.Config import AutograderConfigurationBuilder, AutograderConfiguration
 
 
-class GradescopeAutograderCLI(AutograderCLITool):
+class GradescopeAutograderCLI(AutograderTestRunnerCLITool):
     def __init__(self):
         super().__init__("Gradescope")
 
@@ -7,19 +7,27 @@ import sys
 from typing import Dict, List, Optional
 
 import BetterPyUnitFormat
-import tomli
+from BetterPyUnitFormat.BetterPyUnitResult import BetterPyUnitFormatResult
 
-from autograder_platform.cli import AutograderCLITool
-from autograder_platform.config.Config import AutograderConfigurationBuilder, AutograderConfiguration, \
-    AutograderConfigurationProvider
+from autograder_platform.Executors.Trace import TraceRecorder, TracedTestResult, getTraceRecorder, setTraceRecorder
+from autograder_platform.StudentSubmissionImpl.Python.PythonCodeCache import setCodeCacheDirectory
+from autograder_platform.runner_cli import AutograderTestRunnerCLITool
+from autograder_platform.config.Config import AutograderConfigurationBuilder, AutograderConfiguration
+from autograder_platform.config.ConfigSnapshot import loadTOML
 
 
-class LocalAutograderCLI(AutograderCLITool):
+class TracedBetterPyUnitFormatResult(TracedTestResult, BetterPyUnitFormatResult):
+    pass
+
+
+class LocalAutograderCLI(AutograderTestRunnerCLITool):
     SUBMISSION_REGEX: re.Pattern = re.compile(r"^(\w|\s)+\.py$")
     FILE_HASHES_NAME = ".filehashes"
+    # compiled code is kept between runs, so files that haven't changed aren't compiled again
+    CODE_CACHE_NAME = ".code_cache"
 
     def __init__(self):
-        super().__init__(f"Local v{AutograderCLITool.get_version()}")
+        super().__init__(f"Local v{AutograderTestRunnerCLITool.get_version()}")
 
         self.config_location = ""
 
@@ -126,8 +134,8 @@ class LocalAutograderCLI(AutograderCLITool):
 
     @staticmethod
     def get_autograder_name(path) -> Optional[str]:
-        with open(path, 'rb') as rb:
-            data = tomli.load(rb)
+        # the config is only parsed once, no matter how many values are read from it
+        data = loadTOML(path)
 
         if "assignment_name" not in data or not data["assignment_name"]:
             return None
@@ -136,8 +144,7 @@ class LocalAutograderCLI(AutograderCLITool):
 
     @staticmethod
     def get_autograder_version(path) -> Optional[str]:
-        with open(path, 'rb') as rb:
-            data = tomli.load(rb)
+        data = loadTOML(path)
 
         if "config" not in data or "autograder_version" not in data["config"]:
             return None
@@ -222,6 +229,8 @@ class LocalAutograderCLI(AutograderCLITool):
         self.parser.add_argument("--bypass-version-check", action="store_true", default=False,
                                  help="Bypass autograder version verification. Note: This may cause the autograder to fail!")
         self.parser.add_argument("--version", action="store_true", default=False, help="Print out version and exit")
+        self.parser.add_argument("--trace", default=None,
+                                 help="Write a Chrome trace of where the time went in each test to this file")
 
     def set_config_arguments(self, configBuilder: AutograderConfigurationBuilder[AutograderConfiguration]):  # pragma: no cover
         pass
@@ -263,22 +272,39 @@ class LocalAutograderCLI(AutograderCLITool):
 
         fileChanged = self.verify_file_changed(os.path.join(root_directory, self.arguments.submission_directory))
 
-        self.config = AutograderConfigurationBuilder() \
-            .fromTOML(self.config_location) \
-            .setStudentSubmissionDirectory(os.path.join(root_directory, self.arguments.submission_directory)) \
-            .setTestDirectory(os.path.join(root_directory, self.arguments.test_directory)) \
-            .build()
+        self.set_config(AutograderConfigurationBuilder()
+                        .fromTOML(self.config_location)
+                        # the built config is kept in the user's cache between runs, so it is only parsed and
+                        #  validated again when it changes
+                        .useSnapshot()
+                        .setStudentSubmissionDirectory(os.path.join(root_directory, self.arguments.submission_directory))
+                        .setTestDirectory(os.path.join(root_directory, self.arguments.test_directory))
+                        .build())
 
-        AutograderConfigurationProvider.set(self.config)
+        setCodeCacheDirectory(os.path.join(root_directory, self.CODE_CACHE_NAME))
 
         self.discover_tests()
 
         self.print_info_message("Starting autograder")
 
-        runner = BetterPyUnitFormat.BetterPyUnitTestRunner()
+        tracePath = os.path.abspath(self.arguments.trace) if self.arguments.trace is not None else None
+
+        # the traced result tells the recorder which test each run is from
+        runner = BetterPyUnitFormat.BetterPyUnitTestRunner(
+            resultclass=TracedBetterPyUnitFormatResult if tracePath is not None else BetterPyUnitFormatResult)
+
+        if tracePath is not None:
+            setTraceRecorder(TraceRecorder())
 
         res = runner.run(self.tests)
 
+        traceRecorder = getTraceRecorder()
+
+        if tracePath is not None and traceRecorder is not None:
+            traceRecorder.write(tracePath)
+            self.print_info_message(f"Wrote trace to '{tracePath}'")
+            setTraceRecorder(None)
+
         if not fileChanged:
             self.print_warning_message("Student Submission Warning", "Student's submission may not have changed!")
 
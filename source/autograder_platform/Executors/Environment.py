@@ -1,15 +1,48 @@
+import enum
 import os
+import shutil
+import tempfile
+import uuid
+import weakref
 from typing import Callable, Generic, List, Dict, Optional, Tuple, Type, TypeVar, Union, Any
 
 import dataclasses
 
+from autograder_platform.Executors.Metrics import Metrics
+
 ImplResults = TypeVar("ImplResults")
 
 
+class Sandbox:
+    """
+    Description
+    ===========
+
+    This class owns a sandbox directory that a student's submission is run in.
+
+    The directory is removed once nothing references its sandbox anymore (or at exit), so removing it is never on the
+    hot path of running a submission.
+    """
+
+    def __init__(self, location: str):
+        self.location: str = location
+        self._finalizer = weakref.finalize(self, Sandbox._remove, location)
+
+    @staticmethod
+    def _remove(location: str) -> None:
+        shutil.rmtree(location, ignore_errors=True)
+
+    def remove(self) -> None:
+        """Removes the sandbox now rather than waiting for it to be garbage collected"""
+        self._finalizer()
+
+
 class Results(Generic[ImplResults]):
     class Files:
         def __init__(self, files: Optional[Dict[str, str]]):
             self.files = files
+            self.sandbox: Optional[Sandbox] = None
+            """The sandbox that the files are in. Holding on to this keeps the files around for as long as the results"""
 
         def __getitem__(self, file: str) -> Union[str, bytes]:
             if self.files is None:
@@ -29,13 +62,15 @@ class Results(Generic[ImplResults]):
             return readFile
 
     def __init__(self, stdout=None, return_val=None, file_out=None, exception=None, parameters=None,
-                 impl_results=None) -> None:
+                 impl_results=None, metrics=None, calls=None) -> None:
         self.stdout = stdout
         self.return_val = return_val
         self.file_out = file_out
         self.exception = exception
         self.parameter = parameters
         self.impl_results = impl_results
+        self.metrics = metrics
+        self.calls = calls
 
     @property
     def stdout(self) -> List[str]:
@@ -97,10 +132,76 @@ class Results(Generic[ImplResults]):
     def impl_results(self, value: Optional[ImplResults]):
         self._impl_results = value
 
+    @property
+    def metrics(self) -> Metrics:
+        """
+        The time and memory used by the run. These are only for finding slow tests and expensive submissions, they
+        shouldn't be graded on as they depend on the machine that the autograder is running on.
+        """
+        return self._metrics
+
+    @metrics.setter
+    def metrics(self, value: Optional[Metrics]):
+        self._metrics = value if value is not None else Metrics()
+
+    @property
+    def calls(self) -> List["Results"]:
+        """
+        The results of each call in a batch, in the order that they were added to the runner. Each call has its own
+        stdout, return value, parameters, exception, and metrics.
+        """
+        if self._calls is None:
+            raise AssertionError("No calls were made! Calls are only recorded for batch runners.")
+
+        return self._calls
+
+    @calls.setter
+    def calls(self, value: Optional[List["Results"]]):
+        self._calls = value
+
 
 ImplEnvironment = TypeVar("ImplEnvironment")
 
 
+class TimeoutMode(enum.Enum):
+    """
+    What the timeout of a run is measured in. Either way, the clock only starts once the student's code starts running.
+    """
+    WALL = "wall"
+    """Wall clock time. Time spent blocked (ie: sleeping) counts against the submission"""
+    CPU = "cpu"
+    """
+    CPU time. This isn't affected by how busy the machine is. Time spent blocked doesn't count, but blocked submissions
+    are still killed after a multiple of the timeout of wall clock time
+    """
+
+SANDBOX_ROOT: Optional[str] = None
+"""
+The directory that new sandboxes are created in. If None, the system temp directory is used. 
+See :ref:`setSandboxRoot`
+"""
+
+
+def setSandboxRoot(sandboxRoot: Optional[str]) -> None:
+    """
+    Sets the directory that new sandboxes are created in.
+
+    :param sandboxRoot: The root directory. If None, the system temp directory is used.
+    """
+    global SANDBOX_ROOT
+    SANDBOX_ROOT = sandboxRoot
+
+
+def createSandboxLocation() -> str:
+    """
+    Generates a unique sandbox location under the sandbox root so that executions never share a sandbox.
+    The directory is created by the executor.
+    """
+    root = SANDBOX_ROOT if SANDBOX_ROOT is not None else tempfile.gettempdir()
+
+    return os.path.abspath(os.path.join(root, f"sandbox_{uuid.uuid4().hex}"))
+
+
 @dataclasses.dataclass
 class ExecutionEnvironment(Generic[ImplEnvironment, ImplResults]):
     """
@@ -119,15 +220,21 @@ class ExecutionEnvironment(Generic[ImplEnvironment, ImplResults]):
     The key is the file name, and the value is the file name with its relative path"""
     impl_environment: Optional[ImplEnvironment] = None
     """The implementation environment options. Can be None"""
-    timeout: int = 10
-    """What timeout has been defined for this run of the student's submission"""
+    timeout: float = 10
+    """What timeout (in seconds) has been defined for this run of the student's submission"""
+    timeout_mode: TimeoutMode = TimeoutMode.WALL
+    """What the timeout is measured in"""
     resultData: Optional[Results[ImplResults]] = None
     """
     This dict contains the data that was generated from the student's submission. This should not be accessed
     directly, rather, use getOrAssert method
     """
 
-    SANDBOX_LOCATION: str = "./sandbox"
+    sandbox: Optional[Sandbox] = None
+    """The sandbox for this environment. This is created by the executor and shouldn't be set directly"""
+
+    SANDBOX_LOCATION: str = dataclasses.field(default_factory=createSandboxLocation)
+    """Where the student's submission will be run. Unique for each environment"""
 
 
 def getResults(environment: ExecutionEnvironment[ImplEnvironment, ImplResults]) -> Results[ImplResults]:
@@ -219,13 +326,14 @@ class ExecutionEnvironmentBuilder(Generic[ImplEnvironment, ImplResults]):
 
         return self
 
-    def setTimeout(self: Builder, timeout: int) -> Builder:
+    def setTimeout(self: Builder, timeout: float) -> Builder:
         """
         Description
         ---
         This function sets the timeout to kill the student's submission in if it doesn't end before that.
 
-        The timeout must be integer greater than 1.
+        The timeout is in seconds, and must be greater than 0. It only starts once the student's code starts running, so
+        starting the process isn't counted against the submission.
 
         :param timeout: The timeout to use.
         """
@@ -234,6 +342,21 @@ class ExecutionEnvironmentBuilder(Generic[ImplEnvironment, ImplResults]):
 
         return self
 
+    def setTimeoutMode(self: Builder, timeoutMode: TimeoutMode) -> Builder:
+        """
+        Description
+        ---
+        This function sets what the timeout is measured in. By default, it is measured in wall clock time.
+
+        See :ref:`TimeoutMode` for the options.
+
+        :param timeoutMode: The mode to use.
+        """
+
+        self.environment.timeout_mode = timeoutMode
+
+        return self
+
     def setImplEnvironment(self: Builder, implEnvironmentBuilder: Type[ImplEnvironmentBuilder],
                            builder: Callable[[ImplEnvironmentBuilder], ImplEnvironment]) -> Builder:
 
@@ -252,11 +375,14 @@ class ExecutionEnvironmentBuilder(Generic[ImplEnvironment, ImplResults]):
             if not os.path.exists(src):
                 raise EnvironmentError(f"File {src} does not exist or is not accessible!")
 
-        if not isinstance(environment.timeout, int):
-            raise AttributeError(f"Timeout MUST be an integer. Was {type(environment.timeout).__qualname__}")
+        if not isinstance(environment.timeout, (int, float)) or isinstance(environment.timeout, bool):
+            raise AttributeError(f"Timeout MUST be a number. Was {type(environment.timeout).__qualname__}")
+
+        if environment.timeout <= 0:
+            raise AttributeError(f"Timeout MUST be greater than 0. Was {environment.timeout}")
 
-        if environment.timeout < 1:
-            raise AttributeError(f"Timeout MUST be greater than 1. Was {environment.timeout}")
+        if not isinstance(environment.timeout_mode, TimeoutMode):
+            raise AttributeError(f"Timeout mode MUST be a TimeoutMode. Was {environment.timeout_mode}")
 
         # TODO - Validate requested features
 
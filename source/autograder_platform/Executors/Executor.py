@@ -2,7 +2,8 @@ import shutil
 import os
 import sys
 
-from autograder_platform.Executors.Environment import ExecutionEnvironment
+from autograder_platform.Executors.Environment import ExecutionEnvironment, Sandbox
+from autograder_platform.Executors.Trace import getTraceRecorder
 
 from autograder_platform.StudentSubmission.SubmissionProcessFactory import SubmissionProcessFactory
 from autograder_platform.Tasks.TaskRunner import TaskRunner
@@ -15,16 +16,22 @@ from autograder_platform.StudentSubmission.ISubmissionProcess import ISubmission
 class Executor:
     @classmethod
     def setup(cls, environment: ExecutionEnvironment, runner: TaskRunner, autograderConfig: AutograderConfiguration) -> ISubmissionProcess:
-        cls.cleanup(environment)
+        # Sandboxes are unique to each environment, so this only happens if an environment is executed more than once
+        if os.path.exists(environment.SANDBOX_LOCATION):
+            cls.cleanup(environment)
 
         # we are temporarily suppressing the errors with file creation should they occur.
         try:
             # create the sandbox and ensure that we have RWX permissions
-            os.mkdir(environment.SANDBOX_LOCATION)
+            os.makedirs(environment.SANDBOX_LOCATION)
         except OSError as ex:  # pragma: no coverage
             # raise EnvironmentError(f"Failed to create sandbox for test run. Error is: {ex}")
             print(f"ERROR: Failed to create sandbox folder.\n{ex}", file=sys.stderr)  # pragma: no coverage
 
+        if environment.sandbox is None or environment.sandbox.location != environment.SANDBOX_LOCATION:
+            # the sandbox is removed once the environment (and its results) are no longer used
+            environment.sandbox = Sandbox(environment.SANDBOX_LOCATION)
+
         # TODO Logging
 
         process = SubmissionProcessFactory.createProcess(environment, runner, autograderConfig)
@@ -55,6 +62,15 @@ class Executor:
 
         submissionProcess.populateResults(environment)
 
+        if environment.resultData is not None:
+            # results can outlive their environment, so they need to keep the sandbox around as well
+            environment.resultData.file_out.sandbox = environment.sandbox
+
+        traceRecorder = getTraceRecorder()
+
+        if traceRecorder is not None and environment.resultData is not None:
+            traceRecorder.record(environment.resultData.metrics)
+
         if raiseExceptions:
             # Moving this into the actual submission process allows for each process type to
             # handle their exceptions differently
@@ -0,0 +1,152 @@
+"""
+This module provides the resource accounting for runs of student submissions.
+
+Usage is measured with ``resource.getrusage``, which isn't available on every platform. When it isn't available, only
+wall time is measured.
+
+:author: Gregory Bell
+"""
+
+import dataclasses
+import math
+import sys
+import time
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no coverage
+    resource = None  # type: ignore
+
+from autograder_platform.Tasks.common import TaskTiming
+
+# Linux reports max rss in kilobytes, macOS reports it in bytes
+MAX_RSS_SCALE = 1 if sys.platform == "darwin" else 1024
+
+
+@dataclasses.dataclass
+class ResourceUsage:
+    """
+    The resources used by some portion of a run. Times are in seconds, memory is in bytes.
+    """
+    wall_time: float = 0.0
+    user_time: Optional[float] = None
+    system_time: Optional[float] = None
+    max_rss: Optional[int] = None
+    """The peak resident set size. None if it isn't known"""
+
+    @property
+    def cpu_time(self) -> Optional[float]:
+        if self.user_time is None or self.system_time is None:
+            return None
+
+        return self.user_time + self.system_time
+
+
+@dataclasses.dataclass
+class Metrics:
+    """
+    Description
+    ===========
+
+    The resources used by a run of a student's submission.
+
+    ``submission`` is measured in the child, and only covers the student's portion of the run (ie: the tasks in the
+    runner). It is None if the child didn't finish sending its results, like when it is killed.
+
+    ``run`` is measured by the parent and covers the whole run, including starting the child and collecting its
+    results. The CPU time and peak RSS are for the child process as a whole.
+
+    ``budget`` is the timeout of the run, and ``budget_used`` is how much of it the submission used, both in seconds of
+    whatever the timeout was measured in.
+
+    ``tasks`` is when each task in the runner ran in the child, which shows where the time in ``submission`` went (ie:
+    importing the submission vs running the function). It is None if the child didn't finish sending its results.
+    See :ref:`TraceRecorder` to view these.
+
+    ``result_bytes`` is the size of the results that the child sent to the parent, as they were serialized.
+    It is None if the child didn't finish sending its results.
+    """
+    submission: Optional[ResourceUsage] = None
+    run: Optional[ResourceUsage] = None
+    budget: Optional[float] = None
+    budget_used: Optional[float] = None
+    tasks: Optional[List[TaskTiming]] = None
+    result_bytes: Optional[int] = None
+
+
+class UsageMeter:
+    """
+    Measures the resources used between its construction and ``stop``.
+
+    :param children: If the children of this process should be measured rather than this process. Children are only
+    counted once they have been waited for.
+    """
+
+    def __init__(self, children: bool = False):
+        self.children: bool = children
+        self.startUsage = self._getUsage()
+        self.startTime: float = time.perf_counter()
+
+    def _getUsage(self):
+        if resource is None:  # pragma: no coverage
+            return None
+
+        return resource.getrusage(resource.RUSAGE_CHILDREN if self.children else resource.RUSAGE_SELF)
+
+    def stop(self) -> ResourceUsage:
+        wallTime = time.perf_counter() - self.startTime
+
+        usage = self._getUsage()
+
+        if usage is None or self.startUsage is None:  # pragma: no coverage
+            return ResourceUsage(wallTime)
+
+        maxRss: Optional[int] = usage.ru_maxrss * MAX_RSS_SCALE
+
+        if self.children and usage.ru_maxrss == self.startUsage.ru_maxrss:
+            # This is the peak of every child that has been waited for, so it only belongs to this run if it grew
+            maxRss = None
+
+        return ResourceUsage(wallTime,
+                             usage.ru_utime - self.startUsage.ru_utime,
+                             usage.ru_stime - self.startUsage.ru_stime,
+                             maxRss)
+
+
+def usageFromRusage(rusage, wallTime: float) -> ResourceUsage:
+    """
+    Converts the rusage of a child that was waited for (ie: with ``os.wait4``) to a ``ResourceUsage``
+    """
+    return ResourceUsage(wallTime, rusage.ru_utime, rusage.ru_stime, rusage.ru_maxrss * MAX_RSS_SCALE)
+
+
+def applyResourceLimits(memoryLimit: Optional[int], cpuTimeLimit: Optional[int]) -> None:
+    """
+    Limits the current process. This must only be called in the child.
+
+    :param memoryLimit: The max number of bytes of address space (``RLIMIT_AS``). None for no limit
+    :param cpuTimeLimit: The max number of seconds of CPU time (``RLIMIT_CPU``) from now on. Once it is hit, the process
+    is sent ``SIGXCPU``, and killed a second later if it is still running. None for no limit
+    """
+    if resource is None:  # pragma: no coverage
+        return
+
+    if memoryLimit is not None:
+        _setLimit(resource.RLIMIT_AS, memoryLimit, memoryLimit)
+
+    if cpuTimeLimit is not None:
+        # RLIMIT_CPU counts all the time that the process has used, not just the time from here on
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        limit = math.ceil(usage.ru_utime + usage.ru_stime) + cpuTimeLimit
+        _setLimit(resource.RLIMIT_CPU, limit, limit + 1)
+
+
+def _setLimit(limit: int, soft: int, hard: int) -> None:
+    # The hard limit can only be lowered, so never ask for more than what is already allowed
+    _, currentHard = resource.getrlimit(limit)
+
+    if currentHard != resource.RLIM_INFINITY:
+        soft, hard = min(soft, currentHard), min(hard, currentHard)
+
+    resource.setrlimit(limit, (soft, hard))
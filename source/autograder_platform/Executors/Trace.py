@@ -0,0 +1,147 @@
+"""
+This module records the task timings from runs of student submissions and writes them as a Chrome trace, which can be
+opened in ``chrome://tracing`` or Perfetto to see which phase of each run the time went to.
+
+Tracing is off unless a recorder is set with ``setTraceRecorder``. Once it is set, every run through the
+:ref:`Executor` is recorded. Runs are named after the test that ran them when the tests are run with a
+:ref:`TracedTestResult`.
+
+:author: Gregory Bell
+"""
+
+import json
+import os
+import unittest
+from typing import Any, Dict, List, Optional
+
+from autograder_platform.Executors.Metrics import Metrics
+
+
+class TraceRecorder:
+    """
+    Description
+    ===========
+
+    Collects the task timings of many runs in the Chrome trace event format.
+
+    Each run gets its own row (thread) in the trace, named after the test that it was run by, and each task in the run is
+    a complete event on that row, along with the size of its result if it was measured. The size of the results that
+    were sent back to the parent is recorded at the end of the row.
+    """
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.runCount: int = 0
+        self.pid: int = os.getpid()
+        self.testName: Optional[str] = None
+        """The id of the test that is currently running. Set by :ref:`TracedTestResult`"""
+
+    def setTestName(self, testName: Optional[str]) -> None:
+        self.testName = testName
+
+    def record(self, metrics: Metrics, name: Optional[str] = None) -> None:
+        """
+        Records the task timings from a single run. Runs without task timings (ie: the child was killed) are skipped.
+
+        :param metrics: The metrics from the run
+        :param name: The name of the row in the trace. If None, the test that is currently running is used.
+        """
+        if not metrics.tasks:
+            return
+
+        runId = self.runCount
+        self.runCount += 1
+
+        if name is None:
+            name = self.testName
+
+        self.events.append({
+            "name": "thread_name", "ph": "M", "pid": self.pid, "tid": runId,
+            "args": {"name": name if name is not None else f"run {runId}"},
+        })
+
+        for timing in metrics.tasks:
+            self.events.append({
+                "name": timing.name, "cat": "task", "ph": "X", "pid": self.pid, "tid": runId,
+                # chrome traces are in microseconds
+                "ts": timing.start_time / 1000, "dur": (timing.end_time - timing.start_time) / 1000,
+                "args": {"status": timing.status.name, "result_size": timing.result_size},
+            })
+
+        if metrics.result_bytes is not None:
+            self.events.append({
+                "name": "results", "cat": "channel", "ph": "i", "s": "t", "pid": self.pid, "tid": runId,
+                "ts": metrics.tasks[-1].end_time / 1000, "args": {"result_bytes": metrics.result_bytes},
+            })
+
+    def takeEvents(self) -> List[Dict[str, Any]]:
+        """
+        Removes the events that have been recorded so far, so that they can be sent to another recorder.
+        This is how runs in forked test workers (see :ref:`ParallelTestSuite`) make it back to the parent's recorder.
+        """
+        events, self.events = self.events, []
+
+        return events
+
+    def merge(self, events: List[Dict[str, Any]]) -> None:
+        """
+        Adds events from another recorder. Each run in the events is given a new row, as the rows from each recorder
+        are numbered from zero.
+        """
+        runIds: Dict[int, int] = {}
+
+        for event in events:
+            if event["tid"] not in runIds:
+                runIds[event["tid"]] = self.runCount
+                self.runCount += 1
+
+            self.events.append({**event, "pid": self.pid, "tid": runIds[event["tid"]]})
+
+    def toChromeTrace(self) -> Dict[str, Any]:
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str) -> None:
+        with open(path, "w") as w:
+            json.dump(self.toChromeTrace(), w)
+
+
+TRACE_RECORDER: Optional[TraceRecorder] = None
+"""The recorder that runs are recorded to. If None, runs aren't traced. See :ref:`setTraceRecorder`"""
+
+
+def setTraceRecorder(recorder: Optional[TraceRecorder]) -> None:
+    """
+    Sets the recorder that every run through the executor is recorded to.
+
+    :param recorder: The recorder. If None, tracing is turned off.
+    """
+    global TRACE_RECORDER
+    TRACE_RECORDER = recorder
+
+
+def getTraceRecorder() -> Optional[TraceRecorder]:
+    return TRACE_RECORDER
+
+
+class TracedTestResult(unittest.TestResult):
+    """
+    Description
+    ===========
+
+    Tells the trace recorder which test is running, so that the runs in each test are named after it.
+
+    This should be mixed in ahead of the result class that the tests are run with, ie:
+    ``class Result(TracedTestResult, TextTestResult)``.
+    """
+
+    def startTest(self, test):
+        if TRACE_RECORDER is not None:
+            TRACE_RECORDER.setTestName(test.id())
+
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+
+        if TRACE_RECORDER is not None:
+            TRACE_RECORDER.setTestName(None)
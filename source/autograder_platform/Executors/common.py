@@ -7,7 +7,6 @@ class MissingOutputDataException(Exception):
         super().__init__("Output results are NULL.\n"
                          f"Failed to parse results in output buffer: {outputFileName}.\n"
                          f"Submission possibly crashed or terminated before harness could write to output buffer: {outputFileName}.\n"
-                         f"Submission may have overrun buffer memory\n"
                          f"Likely causes: The presence of exit or quit in student's code; extra debugging print statements")
 
 def filterStdOut(stdOut: Optional[List[str]]) -> Optional[List[str]]:
@@ -25,31 +24,36 @@ def filterStdOut(stdOut: Optional[List[str]]) -> Optional[List[str]]:
 
     filteredOutput: List[str] = []
     for line in stdOut:
-        if "output " in line.lower():
-            filteredOutput.append(line[line.lower().find("output ") + 7:])
+        index = line.lower().find("output ")
+        if index != -1:
+            filteredOutput.append(line[index + 7:])
 
     return filteredOutput
 
 def detectFileSystemChanges(inFiles: Iterable[str], directoryToCheck: str) -> Dict[str, str]:
-    files = [os.path.join(directoryToCheck, file) for file in os.listdir(directoryToCheck)]
+    inFiles = set(inFiles)
 
     outputFiles: Dict[str, str] = {}
 
-    # This ignores sub folders
-    for file in files:
-        if os.path.isdir(file):
-            continue
+    # This ignores sub folders. The type of each entry comes from the listing, so this doesn't stat every file
+    with os.scandir(directoryToCheck) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                continue
 
-        if "__" in file:
-            continue
+            # only the name is checked, as the sandbox itself can be anywhere (see setSandboxRoot)
+            if "__" in entry.name:
+                continue
 
-        # ignore hidden files
-        if os.path.basename(file)[0] == ".":
-            continue
+            file = os.path.join(directoryToCheck, entry.name)
 
-        if file in inFiles:
-            continue
+            # ignore hidden files
+            if entry.name[0] == ".":
+                continue
 
-        outputFiles[os.path.basename(file)] = file
+            if file in inFiles:
+                continue
+
+            outputFiles[entry.name] = file
 
     return outputFiles
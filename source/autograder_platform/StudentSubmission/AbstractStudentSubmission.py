@@ -1,10 +1,13 @@
 import abc
-from typing import Generic, List, Set, TypeVar, Dict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Generic, List, Optional, Set, TypeVar, Dict
 
 from autograder_platform.StudentSubmission.common import ValidationError, ValidationHook
 
 from autograder_platform.StudentSubmission.AbstractValidator import AbstractValidator
-from autograder_platform.StudentSubmission.GenericValidators import SubmissionPathValidator
+from autograder_platform.StudentSubmission.GenericValidators import SubmissionPathValidator, SubmissionSizeValidator
+from autograder_platform.StudentSubmission.SubmissionCache import getSubmissionCache
+from autograder_platform.StudentSubmission.SubmissionWalker import DEFAULT_IGNORE_PATTERNS, SubmissionWalker, WalkLimits
 
 T = TypeVar("T")
 
@@ -24,6 +27,8 @@ class AbstractStudentSubmission(abc.ABC, Generic[T]):
 
     You can implement :ref:`AbstractValidator` for your purpose and assign it a hook.
     Then when we reach that phase of the submission, that hook will be validated.
+    Validators can declare the data they need (ie: the parsed files), which is prepared once and shared by every
+    validator at the hook, and independent validators are run at the same time.
 
     Subclasses must implement ``doLoad`` and ``doBuild``.
     Subclasses must also implement ``getExecutableSubmission`` which should return the submission in a state that can be executed 
@@ -31,13 +36,20 @@ class AbstractStudentSubmission(abc.ABC, Generic[T]):
 
     For an example, take a look at the Python (or coming soon, the C / C++) implementation.
     """
+    MAX_CONCURRENT_VALIDATORS: int = 8
+    """The max number of independent validators that are run at the same time"""
+
     def __init__(self):
         self.submissionRoot: str = "."
         self.validators: Dict[ValidationHook, Set[AbstractValidator]] = {}
         self.validationErrors: List[Exception] = []
+        self.ignorePatterns: List[str] = list(DEFAULT_IGNORE_PATTERNS)
+        self.walkLimits: WalkLimits = WalkLimits()
+        self.submittedFiles: Optional[List[str]] = None
 
         # default validators
         self.addValidator(SubmissionPathValidator())
+        self.addValidator(SubmissionSizeValidator())
 
 
     def setSubmissionRoot(self: TBuilder, submissionRoot: str) -> TBuilder:
@@ -55,6 +67,41 @@ class AbstractStudentSubmission(abc.ABC, Generic[T]):
         self.submissionRoot = submissionRoot
         return self
 
+    def addIgnorePattern(self: TBuilder, pattern: str) -> TBuilder:
+        """
+        Description
+        ---
+
+        Ignores files and directories in the submission that match a glob. Ignored files aren't discovered and don't
+        count towards the limits. See :ref:`SubmissionWalker`
+
+        :param pattern: The glob. This is matched against both the name and the path relative to the submission root.
+        :returns: self
+        """
+        self.ignorePatterns.append(pattern)
+        return self
+
+    def setLimits(self: TBuilder, maxDepth: Optional[int] = None, maxFiles: Optional[int] = None,
+                  maxBytes: Optional[int] = None) -> TBuilder:
+        """
+        Description
+        ---
+
+        Updates the limits on the size of the submission from the defaults in :ref:`WalkLimits`.
+        Submissions that exceed any of the limits fail validation before they are loaded.
+
+        :param maxDepth: The max number of directories that a file can be nested in
+        :param maxFiles: The max number of files
+        :param maxBytes: The max total size of the files
+        :returns: self
+        """
+        self.walkLimits = WalkLimits(
+            max_depth=maxDepth if maxDepth is not None else self.walkLimits.max_depth,
+            max_files=maxFiles if maxFiles is not None else self.walkLimits.max_files,
+            max_bytes=maxBytes if maxBytes is not None else self.walkLimits.max_bytes,
+        )
+        return self
+
     def addValidator(self: TBuilder, validator: AbstractValidator) -> TBuilder:
         """
         Description
@@ -81,13 +128,46 @@ class AbstractStudentSubmission(abc.ABC, Generic[T]):
         self.validators[hook].add(validator)
         return self
 
+    def prepareValidationData(self, data: Set[str]) -> None:
+        """
+        Description
+        ---
+
+        Prepares the data that the validators at a hook need (see :ref:`AbstractValidator.getRequiredData`), so that it
+        is computed once and shared, rather than computed by each validator.
+        Subclasses that provide data should override this. Data that isn't known should be ignored.
+
+        :param data: The data needed by all the validators at the hook
+        """
+        pass
+
     def _validate(self, validationHook: ValidationHook):
         if validationHook not in self.validators.keys():
             return
 
-        for validator in self.validators[validationHook]:
+        validators = list(self.validators[validationHook])
+
+        self.prepareValidationData(set().union(*(validator.getRequiredData() for validator in validators)))
+
+        for validator in validators:
             validator.setup(self)
-            validator.run()
+
+        independent = [validator for validator in validators if validator.isIndependent()]
+
+        if len(independent) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.MAX_CONCURRENT_VALIDATORS, len(independent))) as pool:
+                # result re-raises anything that a validator raised
+                for future in [pool.submit(validator.run) for validator in independent]:
+                    future.result()
+        else:
+            for validator in independent:
+                validator.run()
+
+        for validator in validators:
+            if not validator.isIndependent():
+                validator.run()
+
+        for validator in validators:
             self.validationErrors.extend(validator.collectErrors())
 
         if self.validationErrors:
@@ -169,6 +249,51 @@ class AbstractStudentSubmission(abc.ABC, Generic[T]):
 
         return self
 
+    def fromCache(self: TBuilder) -> TBuilder:
+        """
+        Description
+        ---
+
+        Loads, builds, and validates the submission, or gets the submission that has already been prepared with the same
+        root, files, options, and validators. This should be used in place of ``load().build().validate()`` so that
+        the submission is only prepared once, rather than once for each test class.
+
+        If the submission failed validation, the same ``ValidationError`` is raised again.
+
+        :returns: The prepared submission. This may not be ``self``!
+        """
+        return getSubmissionCache().get(self)
+
+    def getOptions(self) -> Dict[str, object]:
+        """
+        Description
+        ---
+
+        The options that change how the submission is loaded or built. Submissions with different options aren't
+        shared by :ref:`fromCache`. Subclasses with options should override this, and include these options.
+
+        :returns: The name and value of each option
+        """
+        return {
+            "ignore_patterns": self.ignorePatterns,
+            "limits": self.walkLimits,
+        }
+
+    def getSubmittedFiles(self) -> List[str]:
+        """
+        Description
+        ---
+
+        Finds every file in the submission that isn't ignored. The submission is only walked once.
+
+        :returns: The path of each file, joined to the submission root
+        :raises SubmissionTooLargeError: If the submission exceeds any of the limits
+        """
+        if self.submittedFiles is None:
+            self.submittedFiles = SubmissionWalker(self.getSubmissionRoot(), self.ignorePatterns, self.walkLimits).walk()
+
+        return self.submittedFiles
+
     @abc.abstractmethod
     def getExecutableSubmission(self) -> T:
         pass
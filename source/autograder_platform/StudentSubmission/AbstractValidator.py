@@ -1,5 +1,5 @@
 import abc
-from typing import List
+from typing import List, Set
 
 from .common import ValidationHook
 
@@ -9,6 +9,23 @@ class AbstractValidator(abc.ABC):
     def getValidationHook() -> ValidationHook:
         pass
 
+    @staticmethod
+    def getRequiredData() -> Set[str]:
+        """
+        The data that this validator reads from the submission, ie: ``ast`` for the parsed python files
+        (see :ref:`AbstractStudentSubmission.prepareValidationData`).
+        The data is prepared once before the validators at a hook run, and is shared by all of them.
+        """
+        return set()
+
+    @staticmethod
+    def isIndependent() -> bool:
+        """
+        If this validator only reads from the submission in ``run``, so it can run at the same time as the other
+        independent validators at its hook. ``setup`` is never run concurrently.
+        """
+        return False
+
     def __init__(self):
         self.errors: List[Exception] = []
 
@@ -1,5 +1,6 @@
 from .common import ValidationHook
 from .AbstractValidator import AbstractValidator
+from .SubmissionWalker import SubmissionTooLargeError
 from os import PathLike
 import os
 from typing import Union
@@ -41,3 +42,29 @@ class SubmissionPathValidator(AbstractValidator):
                 )
             )
 
+
+class SubmissionSizeValidator(AbstractValidator):
+    """
+    Rejects submissions that exceed the limits on their size before anything is loaded, so that a huge submission
+    fails with a single error instead of every later step failing on it.
+    """
+    @staticmethod
+    def getValidationHook() -> ValidationHook:
+        return ValidationHook.PRE_LOAD
+
+    def __init__(self):
+        super().__init__()
+        self.studentSubmission = None
+
+    def setup(self, studentSubmission):
+        self.studentSubmission = studentSubmission
+
+    def run(self):
+        # missing submissions are reported by the path validator
+        if self.studentSubmission is None or not os.path.isdir(self.studentSubmission.getSubmissionRoot()):
+            return
+
+        try:
+            self.studentSubmission.getSubmittedFiles()
+        except SubmissionTooLargeError as ex:
+            self.addError(ex)
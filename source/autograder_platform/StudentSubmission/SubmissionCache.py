@@ -0,0 +1,132 @@
+"""
+This module provides a process wide cache of loaded, built, and validated submissions.
+
+Each test class normally loads, builds, and validates the submission in ``setUpClass``, so the same work (and for python,
+installing requirements and checking packages) is repeated for every class. With the cache, the submission is only
+prepared once for each root, set of files, and set of options, and every other class gets the same submission.
+Submissions that fail validation are cached too, so their ``ValidationError`` is raised again without redoing the work.
+
+The cache is filled before the test classes are forked (see :ref:`ParallelTestSuite`), so the CLI can prepare the
+submission once before the tests are discovered.
+
+:author: Gregory Bell
+"""
+
+import hashlib
+import os
+from typing import TYPE_CHECKING, Dict, Optional, TypeVar, Union
+
+from autograder_platform.StudentSubmission.SubmissionWalker import SubmissionTooLargeError
+from autograder_platform.StudentSubmission.common import ValidationError
+
+if TYPE_CHECKING:
+    from autograder_platform.StudentSubmission.AbstractStudentSubmission import AbstractStudentSubmission
+
+TSubmission = TypeVar("TSubmission", bound="AbstractStudentSubmission")
+
+
+class SubmissionCache:
+    """
+    Description
+    ===========
+
+    Maps the key of a submission (see :ref:`SubmissionCache.getKey`) to the prepared submission, or to the
+    ``ValidationError`` that it failed with.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, Union["AbstractStudentSubmission", ValidationError]] = {}
+
+    @staticmethod
+    def getFingerprint(submission: "AbstractStudentSubmission") -> str:
+        """
+        Hashes the path and contents of every file in the submission. Submissions that are too large to walk are only
+        keyed on why they are too large, as they fail validation without their files being read.
+        """
+        fingerprint = hashlib.sha256()
+
+        try:
+            files = submission.getSubmittedFiles()
+        except (SubmissionTooLargeError, OSError) as ex:
+            fingerprint.update(f"{type(ex).__qualname__}: {ex}".encode(errors="surrogateescape"))
+            return fingerprint.hexdigest()
+
+        for path in files:
+            relativePath = os.path.relpath(path, submission.getSubmissionRoot())
+            fingerprint.update(relativePath.encode(errors="surrogateescape") + b"\0")
+
+            try:
+                with open(path, "rb") as r:
+                    fingerprint.update(hashlib.sha256(r.read()).digest())
+            except OSError:
+                # unreadable files can't be used by the submission, but they are still part of the key
+                fingerprint.update(b"\0")
+
+        return fingerprint.hexdigest()
+
+    @classmethod
+    def getKey(cls, submission: "AbstractStudentSubmission") -> str:
+        """
+        :returns: A key for the type of the submission, its root, the contents of its files, its options, and
+        its validators
+        """
+        key = hashlib.sha256()
+
+        key.update(f"{type(submission).__module__}.{type(submission).__qualname__}\n".encode())
+        key.update(f"{os.path.abspath(submission.getSubmissionRoot())}\n".encode(errors="surrogateescape"))
+        key.update(f"{cls.getFingerprint(submission)}\n".encode())
+        key.update(f"{sorted(submission.getOptions().items())}\n".encode())
+
+        validators = sorted(f"{hook.name}:{type(validator).__qualname__}"
+                            for hook, hookValidators in submission.validators.items()
+                            for validator in hookValidators)
+        key.update(f"{validators}\n".encode())
+
+        return key.hexdigest()
+
+    def get(self, submission: TSubmission) -> TSubmission:
+        """
+        Loads, builds, and validates the submission, unless a submission with the same key has already been prepared.
+
+        :param submission: The submission, with its root and options set
+        :returns: The prepared submission. This is the cached submission, not ``submission``, if there was one.
+        :raises ValidationError: If the submission, or the cached submission, failed validation
+        """
+        key = self.getKey(submission)
+
+        entry = self.entries.get(key)
+
+        if isinstance(entry, ValidationError):
+            raise entry.with_traceback(None)
+
+        if entry is not None:
+            return entry  # type: ignore
+
+        try:
+            submission.load().build().validate()
+        except ValidationError as ex:
+            self.entries[key] = ex
+            raise
+
+        self.entries[key] = submission
+
+        return submission
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+
+SUBMISSION_CACHE: Optional[SubmissionCache] = None
+"""The cache for this process. See :ref:`getSubmissionCache`"""
+
+
+def getSubmissionCache() -> SubmissionCache:
+    """
+    :returns: The submission cache for this process. It is created on the first call.
+    """
+    global SUBMISSION_CACHE
+
+    if SUBMISSION_CACHE is None:
+        SUBMISSION_CACHE = SubmissionCache()
+
+    return SUBMISSION_CACHE
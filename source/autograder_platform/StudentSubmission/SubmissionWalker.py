@@ -0,0 +1,110 @@
+"""
+This module provides the walker that finds the files in a student's submission.
+
+Students sometimes submit far more than their code (ie: a virtual environment or ``node_modules``), so the walk is
+bounded. It stops as soon as the submission is nested too deeply, has too many files, or is too large, so rejecting a
+huge submission is cheap.
+
+:author: Gregory Bell
+"""
+
+import dataclasses
+import fnmatch
+import os
+from typing import List, Optional, Tuple
+
+DEFAULT_IGNORE_PATTERNS: List[str] = [".*", "__pycache__", "* *", "node_modules", "venv", "site-packages"]
+"""Hidden files, caches, files with spaces in their names, and common dependency directories"""
+
+
+class SubmissionTooLargeError(Exception):
+    def __init__(self, reason: str):
+        super().__init__(
+            f"Submission is too large: {reason}.\n"
+            "Make sure that you only submitted your code and the files it needs, "
+            "and not a virtual environment or other dependencies."
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class WalkLimits:
+    max_depth: int = 10
+    """The max number of directories that a file can be nested in"""
+    max_files: int = 1000
+    """The max number of files in the submission"""
+    max_bytes: int = 100 * 2 ** 20
+    """The max total size of the files in the submission"""
+
+
+class SubmissionWalker:
+    """
+    Description
+    ===========
+
+    Walks a submission with ``os.scandir``, so the type of each entry comes from the directory listing rather than a
+    ``stat`` per entry. Symlinked directories aren't followed.
+
+    Entries matching an ignore pattern aren't walked and don't count towards the limits. Patterns are matched against
+    both the name of the entry and its path relative to the root (with ``/`` separators).
+    """
+
+    def __init__(self, root: str, ignorePatterns: Optional[List[str]] = None, limits: Optional[WalkLimits] = None):
+        self.root: str = root
+        self.ignorePatterns: List[str] = ignorePatterns if ignorePatterns is not None else list(DEFAULT_IGNORE_PATTERNS)
+        self.limits: WalkLimits = limits if limits is not None else WalkLimits()
+
+    def isIgnored(self, name: str, relativePath: str) -> bool:
+        return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relativePath, pattern)
+                   for pattern in self.ignorePatterns)
+
+    def walk(self) -> List[str]:
+        """
+        :returns: The path of each file in the submission, joined to the root. The files in each directory are in
+        order by name, and come before the files in its subdirectories.
+        :raises SubmissionTooLargeError: As soon as any of the limits are exceeded
+        """
+        files: List[str] = []
+        totalBytes = 0
+
+        # (path, path relative to the root, depth)
+        toVisit: List[Tuple[str, str, int]] = [(self.root, "", 0)]
+
+        while toVisit:
+            directory, relativeDirectory, depth = toVisit.pop()
+
+            if depth > self.limits.max_depth:
+                raise SubmissionTooLargeError(
+                    f"'{relativeDirectory}' is nested more than {self.limits.max_depth} directories deep")
+
+            with os.scandir(directory) as entries:
+                sortedEntries = sorted(entries, key=lambda entry: entry.name)
+
+            subdirectories: List[Tuple[str, str, int]] = []
+
+            for entry in sortedEntries:
+                relativePath = f"{relativeDirectory}/{entry.name}" if relativeDirectory else entry.name
+
+                if self.isIgnored(entry.name, relativePath):
+                    continue
+
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append((os.path.join(directory, entry.name), relativePath, depth + 1))
+                    continue
+
+                if not entry.is_file():
+                    continue
+
+                files.append(os.path.join(directory, entry.name))
+
+                if len(files) > self.limits.max_files:
+                    raise SubmissionTooLargeError(f"more than {self.limits.max_files} files were submitted")
+
+                totalBytes += entry.stat().st_size
+
+                if totalBytes > self.limits.max_bytes:
+                    raise SubmissionTooLargeError(f"more than {self.limits.max_bytes} bytes were submitted")
+
+            # reversed so that the subdirectories are visited in order by name
+            toVisit.extend(reversed(subdirectories))
+
+        return files
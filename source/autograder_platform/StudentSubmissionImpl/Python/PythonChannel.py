@@ -0,0 +1,240 @@
+"""
+This module provides the channel that student submissions use to send their results back to the parent.
+
+Data is sent as frames over a :ref:`multiprocessing.connection.Connection`. Every frame is a single length-prefixed
+message holding a ``(kind, data)`` pair, so the parent reads exactly the bytes that the child wrote rather than a
+buffer that was sized ahead of time. Pipes only hold a small amount of data, so the parent must keep reading while the
+child is running. Otherwise, large payloads would block the child until it times out.
+
+:author: Gregory Bell
+"""
+
+import contextlib
+import os
+import sys
+import time
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from autograder_platform.StudentSubmissionImpl.Python import PythonSerializer
+from autograder_platform.StudentSubmissionImpl.Python.PythonSerializer import DEFAULT_SERIALIZER
+
+FRAME_RESULTS = "results"
+"""The final frame sent by the child. Contains the return value, exceptions, and mocks from the run."""
+FRAME_STDOUT = "stdout"
+"""
+The OUTPUT lines printed since the last stdout frame, as the number of lines and the lines joined with newlines.
+These are streamed while the child is running.
+"""
+FRAME_DIAGNOSTICS = "diagnostics"
+"""The beginning and end of everything else that was printed. Only the most recent one matters."""
+FRAME_STARTED = "started"
+"""
+Sent by the child right before the student's code starts running. Contains the ``time.monotonic`` of when it started,
+which is system wide, so the parent can start the timeout from exactly that point.
+"""
+FRAME_CALL_STARTED = "call_started"
+"""Sent before each call in a batch. Contains the index of the call and the ``time.monotonic`` of when it started."""
+FRAME_CALL_RESULT = "call_result"
+"""
+Sent after each call in a batch. Contains the index of the call, the ``time.monotonic`` of when it finished, and the
+results of the call. All the OUTPUT printed by the call is sent before this frame.
+"""
+
+
+def sendFrame(connection: Connection, kind: str, data: object, serializer: str = DEFAULT_SERIALIZER) -> None:
+    """
+    Sends a single frame to the parent.
+
+    :param connection: The write end of the channel
+    :param kind: The kind of the frame, ie: ``FRAME_RESULTS``
+    :param data: The data in the frame. Must be serializable by the serializer.
+    :param serializer: The name of the serializer to use. See :ref:`PythonSerializer`.
+    """
+    connection.send_bytes(PythonSerializer.getSerializer(serializer).dumps((kind, data)))
+
+
+class FrameReceiver:
+    """
+    Description
+    ===========
+
+    This class reads the frames sent by a single run of a student's submission.
+
+    Frames are read until the results frame arrives or the child closes its end of the channel. Stdout frames are
+    combined in the order that they were received, call frames are kept for each call, and for every other kind, the
+    most recent frame is kept.
+
+    A frame that can't be decoded closes the channel, as nothing after it can be trusted. The error is kept in
+    ``error``.
+    """
+
+    def __init__(self, connection: Connection, paths: Optional[List[str]] = None):
+        """
+        :param connection: The read end of the channel
+        :param paths: The directories that objects in the frames can be loaded from, other than the ones on the
+        parent's path (ie: the submission's requirements layer). They are only put on the path if a frame can't be
+        decoded without them.
+        """
+        self.connection: Connection = connection
+        self.paths: List[str] = paths if paths is not None else []
+        self.error: Optional[Exception] = None
+        """The error from decoding a frame, if one couldn't be decoded"""
+        self.frames: Dict[str, Any] = {}
+        self.frameBytes: Dict[str, int] = {}
+        """The size of the most recent frame of each kind, as it was sent"""
+        self.stdout: Optional[List[str]] = None
+        self.closed: bool = False
+
+        self.callResults: Dict[int, Any] = {}
+        self.callOutput: Dict[int, Tuple[int, Optional[int]]] = {}
+        """The start and end (exclusive) of the stdout from each call. The end is None while the call is running"""
+        self.callStarts: Dict[int, float] = {}
+        """The ``time.monotonic`` of when each call started"""
+        self.activeCall: Optional[int] = None
+        """The call that has started, but hasn't finished"""
+        self.lastProgress: Optional[float] = None
+        """The ``time.monotonic`` of the last time the child started running the submission or started/finished a call"""
+
+    def receive(self, timeout: float, sentinel: Optional[int] = None, until: str = FRAME_RESULTS) -> bool:
+        """
+        Reads frames until the ``until`` frame (or the results frame) is received, the channel is closed, or
+        ``timeout`` seconds pass.
+
+        :param timeout: The max amount of time to wait for the child
+        :param sentinel: The sentinel of the child process, if there is one. A process forked by another thread while
+        the channel was being set up can hold on to a copy of the write end, so the channel isn't guaranteed to close
+        when the child exits. The sentinel is used to notice that the child exited regardless.
+        :param until: The kind of frame to stop at. Reading always stops at the results frame, as it is the last one.
+        :returns: False if the timeout was hit before the child finished sending data, True otherwise.
+        """
+        deadline = time.monotonic() + timeout
+
+        while until not in self.frames and FRAME_RESULTS not in self.frames and not self.closed:
+            if not self.receiveFrame(deadline - time.monotonic(), sentinel):
+                return False
+
+        return True
+
+    def receiveFrame(self, timeout: float, sentinel: Optional[int] = None) -> bool:
+        """
+        Reads a single frame, if the channel isn't closed.
+
+        :param timeout: The max amount of time to wait for the frame
+        :param sentinel: The sentinel of the child process, if there is one. See :ref:`FrameReceiver.receive`
+        :returns: False if the timeout was hit before a frame arrived, True otherwise.
+        """
+        if self.closed:
+            return True
+
+        waitables: List[Union[Connection, int]] = [self.connection]
+
+        if sentinel is not None:
+            waitables.append(sentinel)
+
+        try:
+            ready = wait(waitables, timeout) if timeout > 0 else []
+
+            if not ready:
+                return False
+
+            if self.connection not in ready:
+                # The child has exited and everything that it sent has been read
+                self.closed = True
+                return True
+
+            self._storeFrame(self.connection.recv_bytes())
+        except (EOFError, OSError):
+            # the child exited, with or without sending its results
+            self.closed = True
+
+        return True
+
+    def drain(self) -> None:
+        """
+        Reads the frames that are left in the channel after the child was killed.
+
+        This never blocks. If the child was killed part way through sending a frame, that frame is dropped.
+        """
+        try:
+            os.set_blocking(self.connection.fileno(), False)
+
+            while not self.closed and self.connection.poll(0):
+                self._storeFrame(self.connection.recv_bytes())
+        except (EOFError, OSError):
+            self.closed = True
+
+    @contextlib.contextmanager
+    def _onPath(self) -> Iterator[None]:
+        # put at the end, so that they never replace anything that is installed with the autograder
+        added = [path for path in self.paths if path not in sys.path]
+        sys.path.extend(added)
+
+        try:
+            yield
+        finally:
+            for path in added:
+                if path in sys.path:
+                    sys.path.remove(path)
+
+    def _loadFrame(self, frame: bytes) -> Tuple[str, Any]:
+        try:
+            return PythonSerializer.loads(frame)  # type: ignore
+        except ModuleNotFoundError:
+            if not self.paths:
+                raise
+
+        with self._onPath():
+            return PythonSerializer.loads(frame)  # type: ignore
+
+    def _storeFrame(self, frame: bytes) -> None:
+        try:
+            kind, data = self._loadFrame(frame)
+        except Exception as ex:
+            self.error = ex
+            self.closed = True
+            return
+
+        if kind == FRAME_CALL_STARTED:
+            index, self.lastProgress = data
+            self.activeCall = index
+            self.callStarts[index] = data[1]
+            self.callOutput[index] = (len(self.stdout or []), None)
+            return
+
+        if kind == FRAME_CALL_RESULT:
+            index, self.lastProgress, results = data
+            self.activeCall = None
+            self.callResults[index] = results
+            self.callOutput[index] = (self.callOutput[index][0], len(self.stdout or []))
+            return
+
+        if kind == FRAME_STARTED:
+            self.lastProgress = data
+
+        if kind != FRAME_STDOUT:
+            self.frames[kind] = data
+            self.frameBytes[kind] = len(frame)
+            return
+
+        if self.stdout is None:
+            self.stdout = []
+
+        lineCount, lines = data
+
+        if lineCount:
+            self.stdout.extend(lines.split("\n"))
+
+    def getFrame(self, kind: str) -> Optional[Any]:
+        return self.frames.get(kind)
+
+    def getCallOutput(self, index: int) -> List[str]:
+        """
+        :returns: The OUTPUT lines printed by a call. If the call didn't finish, everything it printed before it stopped
+        """
+        start, end = self.callOutput.get(index, (0, 0))
+
+        return (self.stdout or [])[start:end]
+
+    def close(self) -> None:
+        self.connection.close()
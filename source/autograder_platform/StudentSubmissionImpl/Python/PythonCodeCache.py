@@ -0,0 +1,235 @@
+"""
+This module provides a cache of compiled code objects, so that each distinct source is only compiled once.
+
+Code objects are keyed on a hash of their source, the file name that they were compiled with (which is baked into
+tracebacks), and the interpreter's bytecode version. They are kept in memory, and marshalled to a directory on disk
+so that they can be shared with children and across runs. Children memory map the files rather than reading them.
+
+If no directory has been set, a temporary directory is created for the grading session. Forked children inherit the
+cache, and spawned children are given its directory along with the rest of their arguments (see
+:ref:`adoptCodeCacheDirectory`). It isn't put in the environment, as the student's code can read that. Directories
+that outlive the session are pruned to the most recently used code objects when they are set, as every edit to a file
+adds another code object.
+
+:author: Gregory Bell
+"""
+
+import atexit
+import hashlib
+import importlib.util
+import marshal
+import mmap
+import os
+import shutil
+import sys
+import tempfile
+from types import CodeType
+from typing import Dict, Optional
+
+DEFAULT_MAX_FILES: int = 256
+"""The max number of code objects kept in a directory set with :ref:`setCodeCacheDirectory`"""
+
+
+class CodeCache:
+    """
+    Description
+    ===========
+
+    Compiles source code, reusing the code object if the same source has already been compiled, either by this process,
+    by its parent before it was forked, or by any process using the same directory.
+
+    :param directory: Where the marshalled code objects are stored. If None, code objects are only cached in memory.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory: Optional[str] = directory
+        self.codeObjects: Dict[str, CodeType] = {}
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def getKey(source: str, filename: str) -> str:
+        key = hashlib.sha256(importlib.util.MAGIC_NUMBER)
+        key.update(sys.implementation.cache_tag.encode() if sys.implementation.cache_tag else b"")
+        key.update(filename.encode(errors="surrogateescape") + b"\0")
+        key.update(source.encode(errors="surrogateescape"))
+
+        return key.hexdigest()
+
+    def compile(self, source: str, filename: str) -> CodeType:
+        """
+        Compiles the source in ``exec`` mode.
+
+        :param source: The source code
+        :param filename: The file name for the code object
+        :raises SyntaxError: If the source isn't valid. Failed compiles aren't cached.
+        :raises ValueError: If the source contains null bytes.
+        """
+        key = self.getKey(source, filename)
+
+        code = self.codeObjects.get(key)
+
+        if code is not None:
+            return code
+
+        code = self._load(key)
+
+        if code is None:
+            code = compile(source, filename, "exec")
+            self._store(key, code)
+
+        self.codeObjects[key] = code
+
+        return code
+
+    def _getPath(self, key: str) -> Optional[str]:
+        if self.directory is None:
+            return None
+
+        return os.path.join(self.directory, f"{key}.marshal")
+
+    def _load(self, key: str) -> Optional[CodeType]:
+        path = self._getPath(key)
+
+        if path is None or not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "rb") as r, mmap.mmap(r.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                code = marshal.loads(mapped)
+
+            # the modification time is when the code object was last used, so recently used ones are kept by prune
+            os.utime(path)
+        except (OSError, ValueError, EOFError, TypeError):
+            # The file is empty or corrupt, so it is just compiled again
+            return None
+
+        return code if isinstance(code, CodeType) else None
+
+    def _store(self, key: str, code: CodeType) -> None:
+        path = self._getPath(key)
+
+        if path is None:
+            return
+
+        try:
+            # Other processes may be reading this key, so the file is written under a unique name then moved into place
+            fd, tempPath = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as w:
+                w.write(marshal.dumps(code))
+
+            os.replace(tempPath, path)
+        except OSError:  # pragma: no coverage
+            # The on disk cache is only an optimization
+            pass
+
+    def clear(self) -> None:
+        """
+        Removes every cached code object, both in memory and on disk.
+        """
+        self.codeObjects.clear()
+
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+
+        for file in os.listdir(self.directory):
+            if file.endswith(".marshal"):
+                os.remove(os.path.join(self.directory, file))
+
+    def prune(self, maxFiles: int) -> None:
+        """
+        Removes the least recently used code objects on disk until at most ``maxFiles`` are left.
+        """
+        if self.directory is None or not os.path.isdir(self.directory):
+            return
+
+        files = []
+
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".marshal"):
+                    continue
+
+                try:
+                    files.append((entry.stat().st_mtime, entry.path))
+                except OSError:  # pragma: no coverage
+                    continue
+
+        files.sort(reverse=True)
+
+        for _, path in files[maxFiles:]:
+            try:
+                os.remove(path)
+            except OSError:  # pragma: no coverage
+                # another process already removed it
+                pass
+
+
+CODE_CACHE: Optional[CodeCache] = None
+"""The cache used by the submission, injected code, and file imports. See :ref:`getCodeCache`"""
+
+
+def setCodeCacheDirectory(directory: Optional[str], maxFiles: int = DEFAULT_MAX_FILES) -> None:
+    """
+    Sets the directory that compiled code is cached in. Use a directory that outlives the process (ie: next to the
+    submission) to avoid recompiling unchanged files across runs.
+
+    :param directory: The directory. If None, a temporary directory is used for the rest of the session.
+    :param maxFiles: The max number of code objects to keep in the directory. The least recently used code objects are
+    removed now, so the directory doesn't grow with every edit.
+    """
+    global CODE_CACHE
+
+    CODE_CACHE = None
+
+    if directory is None:
+        return
+
+    CODE_CACHE = CodeCache(directory)
+    CODE_CACHE.prune(maxFiles)
+
+
+def adoptCodeCacheDirectory(directory: str) -> None:
+    """
+    Uses the directory that the parent's cache is in. This is called in children that weren't forked from the parent,
+    so that they share the parent's code objects. Nothing is pruned.
+
+    :param directory: The directory of the parent's cache
+    """
+    global CODE_CACHE
+
+    # forked children already have the parent's cache, along with everything that it has in memory
+    if CODE_CACHE is not None and CODE_CACHE.directory == directory:
+        return
+
+    CODE_CACHE = CodeCache(directory)
+
+
+def getCodeCache() -> CodeCache:
+    """
+    :returns: The code cache for this process. It is created on the first call.
+    """
+    global CODE_CACHE
+
+    if CODE_CACHE is not None:
+        return CODE_CACHE
+
+    CODE_CACHE = CodeCache(_createSessionDirectory())
+
+    return CODE_CACHE
+
+
+def _createSessionDirectory() -> str:
+    directory = tempfile.mkdtemp(prefix="autograder_code_cache_")
+
+    creator = os.getpid()
+
+    def removeSessionDirectory():
+        # Forked children inherit this, but only the process that created the directory should remove it
+        if os.getpid() == creator:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    atexit.register(removeSessionDirectory)
+
+    return directory
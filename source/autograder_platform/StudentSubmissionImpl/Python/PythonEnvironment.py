@@ -1,9 +1,10 @@
 import dataclasses
-from typing import List, Dict, Optional, TypeVar
-from importlib import import_module
+import sys
+from typing import List, Dict, Optional, Set, TypeVar
 
 from autograder_platform.StudentSubmissionImpl.Python.AbstractPythonImportFactory import AbstractModuleFinder
 from autograder_platform.StudentSubmissionImpl.Python.PythonModuleMockImportFactory import MockedModuleFinder
+from autograder_platform.StudentSubmissionImpl.Python.PythonRequirementsLayers import getRequirementsLayerCache
 from autograder_platform.TestingFramework.SingleFunctionMock import SingleFunctionMock
 from autograder_platform.config.Config import AutograderConfiguration
 
@@ -21,8 +22,10 @@ class PythonResults():
 
             return self.mocks[mockName]
 
-    def __init__(self, mocks=None):
+    def __init__(self, mocks=None, diagnostic_output=None, virtual_time=None):
         self.mocks = mocks
+        self.diagnostic_output = diagnostic_output
+        self.virtual_time = virtual_time
 
     @property
     def mocks(self) -> Mocks:
@@ -32,11 +35,55 @@ class PythonResults():
     def mocks(self, value: Optional[Dict[str, SingleFunctionMock]]):
         self._mocks = PythonResults.Mocks(value)
 
+    @property
+    def diagnostic_output(self) -> str:
+        """
+        The beginning and end of everything the submission printed that wasn't an OUTPUT line.
+        Only meant for debugging failed runs
+        """
+        return self._diagnostic_output
+
+    @diagnostic_output.setter
+    def diagnostic_output(self, value: Optional[str]):
+        self._diagnostic_output = value if value is not None else ""
+
+    @property
+    def virtual_time(self) -> float:
+        """
+        The total number of seconds that the submission slept on the virtual clock
+        """
+        if self._virtual_time is None:
+            raise AssertionError("Virtual time was not enabled for this run!")
+
+        return self._virtual_time
+
+    @virtual_time.setter
+    def virtual_time(self, value: Optional[float]):
+        self._virtual_time = value
+
 
 @dataclasses.dataclass
 class PythonEnvironment():
-    buffer_size: int = 2**20
-    """Buffer size set from the config file. This shouldn't be set directly"""
+    pool_size: int = 0
+    """The number of pre-started workers to keep ready. If 0, a new process is started for each run"""
+    preload_modules: List[str] = dataclasses.field(default_factory=list)
+    """The modules that pre-started workers import before they are used"""
+    start_method: Optional[str] = None
+    """The multiprocessing start method for pre-started workers. If None, the platform default is used"""
+    use_zygote: bool = False
+    """If the submission should be imported once in a zygote process then forked for each run"""
+    max_output_size: int = 2**24
+    """The max number of bytes of OUTPUT lines that are kept from each run"""
+    serializer: str = "auto"
+    """How data is serialized when it is sent between the parent and the child. See :ref:`PythonSerializer`"""
+    memory_limit: Optional[int] = None
+    """The max number of bytes of address space that each run can use. If None, there is no limit"""
+    cpu_time_limit: Optional[int] = None
+    """The max number of seconds of CPU time that each run can use. If None, there is no limit"""
+    virtual_time: bool = False
+    """If sleeps in the submission should return immediately and advance a virtual clock. See :ref:`PythonVirtualClock`"""
+    stub_modules: List[str] = dataclasses.field(default_factory=list)
+    """The modules that are replaced by stubs rather than imported. See :ref:`MockedModuleFinder`"""
     import_loader: List[AbstractModuleFinder] = dataclasses.field(default_factory=list)
     """The import loader. This shouldn't be set directly"""
     mocks: Dict[str, Optional[SingleFunctionMock]] = dataclasses.field(default_factory=dict)
@@ -47,16 +94,40 @@ def configMapper(env: PythonEnvironment, config: AutograderConfiguration):
     if config.config.python is None:
         raise AttributeError("INVALID STATE: Implementation environment mapping FAILED! Python config is NONE when should be defined!")
 
-    env.buffer_size = config.config.python.buffer_size
+    env.pool_size = config.config.python.pool_size
+    env.preload_modules = config.config.python.preload_modules
+    env.start_method = config.config.python.start_method
+    env.use_zygote = config.config.python.use_zygote
+    env.max_output_size = config.config.python.max_output_size
+    env.serializer = config.config.python.serializer
+    env.memory_limit = config.config.python.memory_limit
+    env.cpu_time_limit = config.config.python.cpu_time_limit
+    # Virtual time can also be enabled for just some tests, so the config can't turn it off
+    env.virtual_time = env.virtual_time or config.config.python.virtual_time
+    env.stub_modules = config.config.python.stub_modules
+
+    stubbedModules = [importHandler.name for importHandler in env.import_loader
+                      if isinstance(importHandler, MockedModuleFinder) and importHandler.stub]
+
+    for moduleName in env.stub_modules:
+        # modules that were stubbed by the test (ie: to set return values) are left as they are
+        if moduleName in stubbedModules:
+            continue
+
+        env.import_loader.append(MockedModuleFinder(moduleName, {}, stub=True))
 
 
 Builder = TypeVar("Builder", bound="PythonEnvironmentBuilder")
 
+MODULE_EXISTS_CACHE: Set[str] = set()
+"""The mocked modules that were found. See :ref:`PythonEnvironmentBuilder._moduleExists`"""
+
 
 class PythonEnvironmentBuilder():
     def __init__(self) -> None:
         self.environment: PythonEnvironment = PythonEnvironment()
         self.moduleMocks: Dict[str, Dict[str, SingleFunctionMock]] = {}
+        self.stubModules: Dict[str, Dict[str, SingleFunctionMock]] = {}
 
     def addModuleMock(self: Builder, moduleName: str, mockedMethods: Dict[str, SingleFunctionMock]) -> Builder:
         """
@@ -80,6 +151,43 @@ class PythonEnvironmentBuilder():
 
         return self
 
+    def addStubModule(self: Builder, moduleName: str,
+                      mockedMethods: Optional[Dict[str, SingleFunctionMock]] = None) -> Builder:
+        """
+        Description
+        ---
+        This function replaces a module with a stub, so the real module is never imported in the child.
+        Every attribute of the stub is a :ref:`StubMock`, which records its calls and returns more stubs, so
+        ``plt.figure().add_subplot`` can be subscribed to as ``matplotlib.pyplot.figure().add_subplot``.
+
+        The module doesn't have to be installed.
+
+        :param moduleName: The name of the module that will be stubbed.
+        :param mockedMethods: Mocks for attributes that need to return something (ie: ``plt.subplots``)
+        """
+        if moduleName not in self.stubModules:
+            self.stubModules[moduleName] = {}
+
+        if mockedMethods is not None:
+            for mockName, mockObject in mockedMethods.items():
+                self.stubModules[moduleName][mockName] = mockObject
+
+        return self
+
+    def enableVirtualTime(self: Builder) -> Builder:
+        """
+        Description
+        ---
+        This function makes sleeps in the submission return immediately. The clocks that the submission can see
+        (``time.time``, ``time.monotonic``, ``time.perf_counter``, and ``datetime.now``) still advance by the time that
+        was slept, so the submission behaves as if it had slept.
+
+        The total time slept is in the results as ``virtual_time``.
+        """
+        self.environment.virtual_time = True
+
+        return self
+
     def addImportHandler(self: Builder, importHandler: AbstractModuleFinder) -> Builder:
         """
         Description
@@ -100,11 +208,73 @@ class PythonEnvironmentBuilder():
 
         return self
 
+    @staticmethod
+    def _findModule(moduleName: str) -> bool:
+        """
+        Finds a module and each of its parents with the finders in ``sys.meta_path``, without importing any of them.
+        ``importlib.util.find_spec`` would import the parent packages (and run their ``__init__``) in the parent.
+        """
+        parts = moduleName.split(".")
+        searchPath: Optional[List[str]] = None
+
+        for i in range(len(parts)):
+            name = ".".join(parts[:i + 1])
+
+            if i > 0 and searchPath is None:
+                # the parent isn't a package, so it can't have submodules
+                return False
+
+            module = sys.modules.get(name)
+
+            if module is not None:
+                searchPath = getattr(module, "__path__", None)
+                continue
+
+            spec = None
+
+            for finder in sys.meta_path:
+                if not hasattr(finder, "find_spec"):
+                    continue
+
+                try:
+                    spec = finder.find_spec(name, searchPath)
+                except (ImportError, ValueError):
+                    spec = None
+
+                if spec is not None:
+                    break
+
+            if spec is None:
+                return False
+
+            searchPath = spec.submodule_search_locations
+
+        return True
+
+    @staticmethod
+    def _moduleExists(moduleName: str) -> bool:
+        """
+        Checks that a module can be imported without importing it or any of its parents, as mocked modules are only
+        imported in the child. Modules that were found are cached, as the same modules are mocked in many tests.
+        Modules that weren't found are checked again each time, as they may be installed later.
+
+        Modules that are only installed in a requirements layer are found in the layers instead. Those aren't cached,
+        as layers can be added at any time.
+        """
+        if moduleName in MODULE_EXISTS_CACHE:
+            return True
+
+        if PythonEnvironmentBuilder._findModule(moduleName):
+            MODULE_EXISTS_CACHE.add(moduleName)
+            return True
+
+        layers = getRequirementsLayerCache()
+
+        return layers is not None and layers.containsModule(moduleName)
+
     def _processAndValidateModuleMocks(self):
         for moduleName in self.moduleMocks.keys():
-            try:
-                module = import_module(moduleName)
-            except ImportError:
+            if not self._moduleExists(moduleName):
                 raise AttributeError(f"Failed to import {moduleName}!")
 
             for methodName, mock in self.moduleMocks[moduleName].items():
@@ -114,7 +284,20 @@ class PythonEnvironmentBuilder():
 
                 self.environment.mocks[methodName] = None
 
-            self.environment.import_loader.append(MockedModuleFinder(moduleName, module, self.moduleMocks[moduleName]))
+            self.environment.import_loader.append(MockedModuleFinder(moduleName, self.moduleMocks[moduleName]))
+
+        for moduleName in self.stubModules.keys():
+            if moduleName in self.moduleMocks:
+                raise AttributeError(f"{moduleName} can't be both mocked and stubbed!")
+
+            for methodName, mock in self.stubModules[moduleName].items():
+                if not isinstance(mock, SingleFunctionMock):
+                    raise AttributeError(f"Invalid mock for {methodName}")
+
+                self.environment.mocks[methodName] = None
+
+            self.environment.import_loader.append(
+                MockedModuleFinder(moduleName, self.stubModules[moduleName], stub=True))
 
     def build(self) -> PythonEnvironment:
         self._processAndValidateModuleMocks()
@@ -7,6 +7,7 @@ from importlib.abc import Loader
 from importlib.util import spec_from_file_location
 
 from autograder_platform.StudentSubmissionImpl.Python.AbstractPythonImportFactory import AbstractModuleFinder
+from autograder_platform.StudentSubmissionImpl.Python.PythonCodeCache import getCodeCache
 
 class ModuleFinder(AbstractModuleFinder):
     def __init__(self) -> None:
@@ -41,7 +42,7 @@ class ModuleLoader(Loader):
         with open(self.filename) as r:
             data = r.read()
         
-        compiledImport: CodeType = compile(data, self.filename, "exec")
+        compiledImport: CodeType = getCodeCache().compile(data, self.filename)
         exec(compiledImport, vars(module))
     
 class PythonFileImportFactory:
@@ -1,23 +1,129 @@
+import sys
 from importlib.abc import Loader
 from importlib.machinery import ModuleSpec
+from importlib.util import module_from_spec
 from types import ModuleType
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict
 
 from autograder_platform.StudentSubmissionImpl.Python.AbstractPythonImportFactory import AbstractModuleFinder
 from autograder_platform.TestingFramework.SingleFunctionMock import SingleFunctionMock
 
 
+class StubMock(SingleFunctionMock):
+    """
+    Description
+    ===========
+
+    A mock that creates more mocks as it is used, so that it can stand in for any part of a library.
+
+    Accessing an attribute creates a mock named ``<name>.<attribute>``, and calling the mock returns a mock named
+    ``<name>()`` (unless a side effect is set). The same mock is returned each time, so every call made through
+    ``plt.figure().add_subplot`` is recorded on ``matplotlib.pyplot.figure().add_subplot``.
+    """
+
+    def __init__(self, name: str, sideEffect: List[object] | None = None):
+        super().__init__(name, sideEffect)
+        self.children: Dict[str, "StubMock"] = {}
+
+    def getChild(self, name: str) -> "StubMock":
+        """
+        Gets the mock for an attribute of this mock, or for its return value if ``name`` is ``()``.
+        """
+        if name not in self.children:
+            childName = f"{self.mockName}{name}" if name == "()" else f"{self.mockName}.{name}"
+            self.children[name] = StubMock(childName)
+
+        return self.children[name]
+
+    def __call__(self, *args, **kwargs):
+        result = super().__call__(*args, **kwargs)
+
+        if self.sideEffect is not None:
+            return result
+
+        return self.getChild("()")
+
+    def __getattr__(self, name: str) -> "StubMock":
+        # dunder lookups (ie: from pickle or copy) must fail normally, otherwise every object looks like it
+        # implements every protocol
+        if name.startswith("__") or "children" not in self.__dict__:
+            raise AttributeError(name)
+
+        return self.getChild(name)
+
+
+class StubModule(ModuleType):
+    """
+    A module that creates a :ref:`StubMock` for each attribute the first time it is accessed.
+    """
+
+    def __getattr__(self, name: str) -> StubMock:
+        if name.startswith("__"):
+            raise AttributeError(f"module '{self.__name__}' has no attribute '{name}'")
+
+        mock = StubMock(f"{self.__name__}.{name}")
+        setattr(self, name, mock)
+
+        return mock
+
+
 class MockedModuleFinder(AbstractModuleFinder, Loader):
-    def __init__(self, name: str, module: ModuleType, mocks: Dict[str, SingleFunctionMock]) -> None:
+    """
+    Description
+    ===========
+
+    Imports a module with some of its functions replaced by mocks.
+
+    Only the name of the module and the mocks are stored, so that sending the finder to the child is cheap. The real
+    module is found and loaded by the other finders when the child first imports it, then the mocks are applied.
+    If the module can't be found in the child, an empty module is created to hold the mocks.
+
+    If ``stub`` is set, the real module is never imported. Instead, the module, its submodules, and any of its parent
+    packages that haven't been imported are replaced by :ref:`StubModule` s, so every attribute is a :ref:`StubMock`.
+    This is meant for heavy libraries (ie: ``matplotlib``) where the tests only check what was called.
+    Mocks that are passed in still replace their attributes, so return values can be set where they are needed.
+    """
+
+    def __init__(self, name: str, mocks: Dict[str, SingleFunctionMock], stub: bool = False) -> None:
         self.name: str = name
-        self.module: ModuleType = module
         self.mocks: Dict[str, SingleFunctionMock] = mocks
+        self.stub: bool = stub
         self.modulesToReload: List[str] = [self.name]
+        self.realSpec: Optional[ModuleSpec] = None
+        """The spec of the unmocked module. This is only found in the child, so it isn't serialized"""
+
+    def _findRealSpec(self, path, target) -> Optional[ModuleSpec]:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec = finder.find_spec(self.name, path, target)
+
+            if spec is not None:
+                return spec
+
+        return None
+
+    def _isStubbed(self, fullname: str) -> bool:
+        return fullname == self.name or fullname.startswith(self.name + ".") or self.name.startswith(fullname + ".")
 
     def create_module(self, spec: ModuleSpec) -> ModuleType:
-        return self.module
+        if self.stub:
+            return StubModule(spec.name)
+
+        if self.realSpec is None:
+            return ModuleType(self.name)
+
+        return module_from_spec(self.realSpec)
 
     def exec_module(self, module):
+        if module.__name__ != self.name:
+            # parent packages and submodules of a stubbed module don't have any mocks of their own
+            return
+
+        if self.realSpec is not None and self.realSpec.loader is not None:
+            self.realSpec.loader.exec_module(module)
+
         for methodName, mock in self.mocks.items():
             splitName = methodName.split('.')
 
@@ -27,11 +133,66 @@ class MockedModuleFinder(AbstractModuleFinder, Loader):
             setattr(module, splitName[-1], mock)
 
     def find_spec(self, fullname, path, target=None) -> Optional[ModuleSpec]:
+        if self.stub and self._isStubbed(fullname):
+            return ModuleSpec(fullname, self, is_package=True)
+
         if self.name != fullname:
             return None
 
-        return ModuleSpec(self.name, self)
+        self.realSpec = self._findRealSpec(path, target)
+
+        if self.realSpec is None:
+            return ModuleSpec(self.name, self)
+
+        spec = ModuleSpec(self.name, self, origin=self.realSpec.origin,
+                          is_package=self.realSpec.submodule_search_locations is not None)
+        spec.submodule_search_locations = self.realSpec.submodule_search_locations
+        spec.has_location = self.realSpec.has_location
+
+        return spec
 
     def getModulesToReload(self) -> List[str]:
-        return self.modulesToReload
+        if not self.stub:
+            return self.modulesToReload
+
+        # any submodules that were already imported (ie: preloaded by a worker) have to be stubbed as well
+        return [name for name in list(sys.modules) if name == self.name or name.startswith(self.name + ".")]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        return {"name": self.name, "mocks": self.mocks, "stub": self.stub, "modulesToReload": self.modulesToReload}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self.realSpec = None
+
+
+def resolveStubMock(name: str) -> Optional[SingleFunctionMock]:
+    """
+    Finds the mock for a name in a stubbed module that has been imported, following attributes and calls, so
+    ``matplotlib.pyplot.figure().add_subplot`` is the ``add_subplot`` of whatever ``figure()`` returned.
+
+    :returns: The mock, or None if the name isn't in a stubbed module that has been imported
+    """
+    parts = name.split(".")
+
+    for i in range(len(parts) - 1, 0, -1):
+        module = sys.modules.get(".".join(parts[:i]))
+
+        if isinstance(module, StubModule):
+            break
+    else:
+        return None
+
+    current: Any = module
+
+    for part in parts[i:]:
+        attribute = part.rstrip("()")
+        current = getattr(current, attribute)
+
+        for _ in range((len(part) - len(attribute)) // 2):
+            if not isinstance(current, StubMock):
+                return None
+
+            current = current.getChild("()")
 
+    return current if isinstance(current, SingleFunctionMock) else None
@@ -0,0 +1,274 @@
+"""
+This module provides the stdout that student submissions are run with.
+
+Only the lines that contain ``OUTPUT`` are used for grading, so rather than buffering everything that a submission
+prints, each line is filtered as it is written. The OUTPUT lines are kept (up to a limit) and streamed to the parent
+as they are produced, so they are still available if the submission times out. Everything else is only kept for
+diagnostics, and only the beginning and end of it are kept.
+
+:author: Gregory Bell
+"""
+
+import io
+import re
+import threading
+from multiprocessing.connection import Connection
+from typing import List, Optional
+
+from autograder_platform.StudentSubmissionImpl.Python.PythonChannel import FRAME_DIAGNOSTICS, FRAME_STDOUT, sendFrame
+from autograder_platform.StudentSubmissionImpl.Python.PythonSerializer import DEFAULT_SERIALIZER
+
+OUTPUT_LINE_PATTERN = re.compile("^.*?output (.*)\n", re.IGNORECASE | re.MULTILINE)
+"""Matches a whole OUTPUT line. Everything after the first ``output `` marker is captured"""
+
+OTHER_LINE_BREAKS_PATTERN = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+"""Everything other than a newline that ``str.splitlines`` splits on"""
+
+ENCODING = "utf-8"
+# Students can print lone surrogates, those still need to make it through the capture
+ENCODING_ERRORS = "surrogatepass"
+
+
+class LockedTextStream(io.TextIOWrapper):
+    """
+    A text stream that can be written to and flushed from more than one thread.
+
+    ``io.TextIOWrapper`` isn't thread safe, and the capture flushes the stream from its own thread while the submission
+    is writing to it.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # reentrant, as a line buffered stream flushes itself while writing
+        self.streamLock: threading.RLock = threading.RLock()
+
+    def write(self, text: str) -> int:
+        with self.streamLock:
+            return super().write(text)
+
+    def flush(self) -> None:
+        with self.streamLock:
+            super().flush()
+
+
+class OutputCapture(io.RawIOBase):
+    """
+    Description
+    ===========
+
+    This class collects the stdout from the child.
+
+    ``sys.stdout`` is replaced with ``OutputCapture.stream``, a text stream that buffers writes before they
+    reach this class. That way lines are filtered in large chunks rather than one at a time.
+
+    Lines that contain ``OUTPUT`` are kept without the marker, just like :ref:`filterStdOut`, until
+    ``maxOutputSize`` bytes have been kept. After that, a truncation marker is added and the rest of the OUTPUT lines
+    are dropped.
+
+    The first and last ``DIAGNOSTIC_SIZE`` characters of everything else are kept for diagnostics.
+
+    Kept lines are sent to the parent every ``FLUSH_INTERVAL`` seconds, or whenever ``FLUSH_SIZE`` bytes have been
+    written.
+    """
+
+    FLUSH_INTERVAL: float = .1
+    FLUSH_SIZE: int = 2 ** 16
+    DIAGNOSTIC_SIZE: int = 2 ** 12
+
+    def __init__(self, connection: Connection, maxOutputSize: int, serializer: str = DEFAULT_SERIALIZER):
+        super().__init__()
+        self.connection: Connection = connection
+        self.maxOutputSize: int = maxOutputSize
+        self.serializer: str = serializer
+        self.lock: threading.Lock = threading.Lock()
+
+        self.partialLine: bytearray = bytearray()
+
+        self.pendingLines: List[str] = []
+        self.outputSize: int = 0
+        self.truncated: bool = False
+
+        self.head: str = ""
+        self.tail: str = ""
+        self.omittedCharacters: int = 0
+        self.diagnosticsChanged: bool = False
+
+        self.stopped: threading.Event = threading.Event()
+        self.flushThread: Optional[threading.Thread] = None
+
+        self.stream: LockedTextStream = \
+            LockedTextStream(io.BufferedWriter(self, buffer_size=self.FLUSH_SIZE),
+                             encoding=ENCODING, errors=ENCODING_ERRORS, newline="\n")
+
+    def start(self) -> None:
+        """
+        Starts periodically sending kept lines to the parent
+        """
+        self.flushThread = threading.Thread(target=self._flushPeriodically, name="Output Capture", daemon=True)
+        self.flushThread.start()
+
+    def finish(self) -> None:
+        """
+        Stops the periodic flush, and sends everything that hasn't been sent yet. Including a trailing partial line.
+
+        This always sends a stdout frame, so the parent can tell the difference between no OUTPUT and no stdout.
+        """
+        self.stopped.set()
+
+        if self.flushThread is not None:
+            self.flushThread.join()
+
+        if not self.stream.closed:
+            self.stream.flush()
+
+        with self.lock:
+            if self.partialLine:
+                self._processText(self._decode(self.partialLine) + "\n")
+                self.partialLine = bytearray()
+
+            self._send(force=True)
+
+    def sendFrame(self, kind: str, data: object) -> None:
+        """
+        Sends a frame to the parent from the child's main thread. The connection can't be written to by more than one
+        thread at a time, so this must be used instead of :ref:`sendFrame` while the capture is running.
+
+        Everything printed before this was called, including a trailing partial line, is sent before the frame, so the
+        parent can tell which OUTPUT lines came before it.
+        """
+        if not self.stream.closed:
+            self.stream.flush()
+
+        with self.lock:
+            if self.partialLine:
+                self._processText(self._decode(self.partialLine) + "\n")
+                self.partialLine = bytearray()
+
+            self._send()
+            sendFrame(self.connection, kind, data, self.serializer)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:  # type: ignore
+        size = len(data)
+
+        with self.lock:
+            self.partialLine += data
+            lastNewline = self.partialLine.rfind(b"\n")
+
+            if lastNewline == -1 and len(self.partialLine) <= self.maxOutputSize:
+                return size
+
+            if lastNewline == -1:
+                # Don't let a submission that never prints a newline grow the partial line forever
+                lastNewline = len(self.partialLine)
+
+            completed = self.partialLine[:lastNewline]
+            del self.partialLine[:lastNewline + 1]
+
+            self._processText(self._decode(completed) + "\n")
+
+            self._send()
+
+        return size
+
+    def getDiagnostics(self) -> str:
+        if not self.omittedCharacters:
+            return (self.head + self.tail).rstrip("\n")
+
+        return self.head + f"... {self.omittedCharacters} characters omitted ...\n" + self.tail.rstrip("\n")
+
+    @staticmethod
+    def _decode(data: bytearray) -> str:
+        return data.decode(ENCODING, ENCODING_ERRORS)
+
+    def _processText(self, text: str) -> None:
+        """
+        Filters complete lines. Must be called while holding ``self.lock``
+
+        :param text: One or more lines, ending with a newline
+        """
+        if OTHER_LINE_BREAKS_PATTERN.search(text) is not None:
+            # Lines are split the same way as str.splitlines
+            text = "\n".join(text.splitlines()) + "\n"
+
+        outputLines: List[str] = OUTPUT_LINE_PATTERN.findall(text)
+
+        if not outputLines:
+            self._keepDiagnostic(text)
+            return
+
+        self._keepOutput(outputLines, text.isascii())
+
+        otherLines = OUTPUT_LINE_PATTERN.sub("", text)
+
+        if otherLines:
+            self._keepDiagnostic(otherLines)
+
+    def _keepOutput(self, lines: List[str], isAscii: bool) -> None:
+        if self.truncated:
+            return
+
+        # Every line is at least as many bytes as it is characters, so only encode lines that aren't ascii
+        size = sum(map(len, lines) if isAscii else (len(line.encode(ENCODING, ENCODING_ERRORS)) for line in lines))
+        size += len(lines)
+
+        if self.outputSize + size <= self.maxOutputSize:
+            self.outputSize += size
+            self.pendingLines.extend(lines)
+            return
+
+        for line in lines:
+            size = len(line.encode(ENCODING, ENCODING_ERRORS)) + 1
+
+            if self.outputSize + size > self.maxOutputSize:
+                self.truncated = True
+                self.pendingLines.append(
+                    f"OUTPUT TRUNCATED: Submission printed more than {self.maxOutputSize} bytes of OUTPUT. "
+                    "The remaining OUTPUT was dropped.")
+                return
+
+            self.outputSize += size
+            self.pendingLines.append(line)
+
+    def _keepDiagnostic(self, text: str) -> None:
+        self.diagnosticsChanged = True
+
+        if len(self.head) < self.DIAGNOSTIC_SIZE:
+            remainingHead = self.DIAGNOSTIC_SIZE - len(self.head)
+            self.head += text[:remainingHead]
+            text = text[remainingHead:]
+
+        if not text:
+            return
+
+        self.tail += text
+
+        if len(self.tail) > self.DIAGNOSTIC_SIZE:
+            self.omittedCharacters += len(self.tail) - self.DIAGNOSTIC_SIZE
+            self.tail = self.tail[-self.DIAGNOSTIC_SIZE:]
+
+    def _send(self, force: bool = False) -> None:
+        """
+        Sends the kept lines, and the diagnostics if they changed. Must be called while holding ``self.lock``
+        """
+        if self.pendingLines or force:
+            # Lines never contain a newline, so they can be sent as one string which is much faster to serialize
+            sendFrame(self.connection, FRAME_STDOUT, (len(self.pendingLines), "\n".join(self.pendingLines)),
+                      self.serializer)
+            self.pendingLines = []
+
+        if self.diagnosticsChanged or force:
+            sendFrame(self.connection, FRAME_DIAGNOSTICS, self.getDiagnostics(), self.serializer)
+            self.diagnosticsChanged = False
+
+    def _flushPeriodically(self) -> None:
+        while not self.stopped.wait(self.FLUSH_INTERVAL):
+            try:
+                # Pushes anything buffered in the stream through write. The stream's lock keeps this from running in
+                # the middle of a write from the submission
+                self.stream.flush()
+            except (OSError, ValueError):
+                # The parent has stopped listening, or the submission closed stdout. There's nothing to flush to
+                return
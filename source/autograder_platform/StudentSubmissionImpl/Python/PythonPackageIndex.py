@@ -0,0 +1,336 @@
+"""
+This module provides the package indexes that :ref:`PackageValidator` uses to check that packages exist.
+
+Indexes are checked in order, so a local index (a simple index directory or a wheelhouse) can answer before PyPI is
+asked. Answers are kept in an on-disk cache for a while, so the same packages aren't looked up for every build.
+
+Grading nodes without outbound network access should use a local index and turn off PyPI with ``setPackageIndexes``.
+
+:author: Gregory Bell
+"""
+
+import abc
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DISTRIBUTION_EXTENSIONS = (".whl", ".tar.gz", ".tar.bz2", ".zip")
+
+
+def normalizePackageName(name: str) -> str:
+    """
+    Normalizes the name of a package, so that ``Foo_Bar`` and ``foo-bar`` are the same package (see PEP 503).
+    """
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+class AbstractPackageIndex(abc.ABC):
+    @abc.abstractmethod
+    def exists(self, package: str, version: str) -> Optional[bool]:
+        """
+        :param package: The name of the package
+        :param version: The version of the package. If empty, any version
+        :returns: If the package exists. None if this index can't tell (ie: it can't be reached).
+        """
+        raise NotImplementedError()
+
+    def getPipArguments(self) -> List[str]:
+        """
+        :returns: The arguments that make pip install from this index
+        """
+        return []
+
+
+class PyPIIndex(AbstractPackageIndex):
+    """
+    Description
+    ===========
+
+    Looks packages up with the PyPI JSON API.
+
+    A single session is shared by every lookup so that connections are reused, and every request has a timeout, so an
+    unreachable index fails quickly rather than hanging.
+    """
+
+    PYPI_BASE = "https://pypi.org/pypi/"
+
+    def __init__(self, base: str = PYPI_BASE, timeout: Tuple[float, float] = (3.05, 5), poolSize: int = 8):
+        """
+        :param base: The base url of the JSON API
+        :param timeout: The connect and read timeouts, in seconds
+        :param poolSize: The max number of connections to keep open. This should be at least the number of lookups
+        that are made at the same time.
+        """
+        self.base: str = base
+        self.timeout: Tuple[float, float] = timeout
+        self.session: requests.Session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=poolSize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def exists(self, package: str, version: str) -> Optional[bool]:
+        url = self.base + package + "/"
+
+        if version:
+            url += version + "/"
+
+        url += "json"
+
+        try:
+            statusCode = self.session.get(url=url, timeout=self.timeout).status_code
+        except requests.RequestException:
+            return None
+
+        if statusCode == 200:
+            return True
+
+        if statusCode == 404:
+            return False
+
+        return None
+
+
+class LocalIndex(AbstractPackageIndex):
+    """
+    Description
+    ===========
+
+    Looks packages up in a directory, without the network. The directory can either be a simple index (a directory for
+    each package containing its distributions) or a wheelhouse (every distribution in one directory).
+
+    Versions are read from the names of the distributions, so the directory is only listed once.
+    """
+
+    def __init__(self, directory: str):
+        self.directory: str = directory
+        self.versions: Optional[Dict[str, Set[str]]] = None
+        self.lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def parseDistribution(fileName: str) -> Optional[Tuple[str, str]]:
+        """
+        :returns: The normalized name and the version of a wheel or sdist. None if the file isn't a distribution.
+        """
+        extension = next((extension for extension in DISTRIBUTION_EXTENSIONS if fileName.endswith(extension)), None)
+
+        if extension is None:
+            return None
+
+        stem = fileName[:-len(extension)]
+
+        if extension == ".whl":
+            # name-version(-build)?-python-abi-platform.whl, where name can't contain '-'
+            parts = stem.split("-")
+            return (normalizePackageName(parts[0]), parts[1]) if len(parts) >= 5 else None
+
+        # name-version.tar.gz, where name can contain '-'
+        name, separator, version = stem.rpartition("-")
+
+        return (normalizePackageName(name), version) if separator and name else None
+
+    def _loadVersions(self) -> Dict[str, Set[str]]:
+        versions: Dict[str, Set[str]] = {}
+
+        def addFiles(directory: str):
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        # simple indexes have a directory for each package
+                        versions.setdefault(normalizePackageName(entry.name), set())
+                        addFiles(entry.path)
+                        continue
+
+                    distribution = self.parseDistribution(entry.name)
+
+                    if distribution is not None:
+                        versions.setdefault(distribution[0], set()).add(distribution[1])
+
+        if os.path.isdir(self.directory):
+            addFiles(self.directory)
+
+        return versions
+
+    def exists(self, package: str, version: str) -> Optional[bool]:
+        with self.lock:
+            if self.versions is None:
+                self.versions = self._loadVersions()
+
+        packageVersions = self.versions.get(normalizePackageName(package))
+
+        if packageVersions is None:
+            return False
+
+        return not version or version in packageVersions
+
+    def getPipArguments(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+
+        with os.scandir(self.directory) as entries:
+            isSimpleIndex = any(entry.is_dir() for entry in entries)
+
+        if isSimpleIndex:
+            # pip only reads flat directories with --find-links, so simple indexes are used as an index
+            return ["--extra-index-url", Path(os.path.abspath(self.directory)).as_uri()]
+
+        return ["--find-links", os.path.abspath(self.directory)]
+
+
+class PackageIndexCache:
+    """
+    Description
+    ===========
+
+    Keeps whether each package and version exists in a JSON file, so that lookups are shared across runs.
+
+    Packages that don't exist are only kept for ``missingTtl``, as they may be published later.
+    """
+
+    def __init__(self, path: Optional[str], ttl: float = 7 * 24 * 60 * 60, missingTtl: float = 60 * 60):
+        """
+        :param path: The file to keep the answers in. If None, answers are only kept in memory.
+        :param ttl: How long, in seconds, to keep answers for packages that exist
+        :param missingTtl: How long, in seconds, to keep answers for packages that don't exist
+        """
+        self.path: Optional[str] = path
+        self.ttl: float = ttl
+        self.missingTtl: float = missingTtl
+        self.entries: Dict[str, Tuple[bool, float]] = self._read()
+        self.lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def getKey(package: str, version: str) -> str:
+        return f"{normalizePackageName(package)}=={version}"
+
+    def _read(self) -> Dict[str, Tuple[bool, float]]:
+        if self.path is None or not os.path.exists(self.path):
+            return {}
+
+        try:
+            with open(self.path, "r") as r:
+                data = json.load(r)
+        except (OSError, ValueError):
+            # The cache is only an optimization, so a corrupt cache is just started over
+            return {}
+
+        if not isinstance(data, dict):
+            return {}
+
+        return {key: (bool(value[0]), float(value[1])) for key, value in data.items()
+                if isinstance(value, list) and len(value) == 2}
+
+    def get(self, package: str, version: str) -> Optional[bool]:
+        """
+        :returns: If the package exists, or None if it isn't known or its answer has expired
+        """
+        entry = self.entries.get(self.getKey(package, version))
+
+        if entry is None:
+            return None
+
+        exists, checkedAt = entry
+
+        if time.time() - checkedAt > (self.ttl if exists else self.missingTtl):
+            return None
+
+        return exists
+
+    def set(self, package: str, version: str, exists: bool) -> None:
+        with self.lock:
+            self.entries[self.getKey(package, version)] = (exists, time.time())
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+
+            # Other processes may be reading the cache, so it is written under a unique name then moved into place
+            fd, tempPath = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w") as w:
+                json.dump({key: list(value) for key, value in self.entries.items()}, w)
+
+            os.replace(tempPath, self.path)
+        except OSError:  # pragma: no coverage
+            pass
+
+
+def getDefaultPackageCachePath() -> str:
+    cacheHome = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+
+    return os.path.join(cacheHome, "autograder_platform", "package_index.json")
+
+
+PACKAGE_INDEXES: Optional[List[AbstractPackageIndex]] = None
+"""The indexes that packages are looked up in, in order. See :ref:`setPackageIndexes`"""
+
+PACKAGE_INDEX_CACHE: Optional[PackageIndexCache] = None
+"""The cache of package lookups. See :ref:`setPackageCacheFile`"""
+
+
+def setPackageIndexes(indexes: Optional[List[AbstractPackageIndex]]) -> None:
+    """
+    Sets the indexes that packages are looked up in.
+
+    :param indexes: The indexes, in the order that they are checked. If None, only PyPI is used.
+    """
+    global PACKAGE_INDEXES
+    PACKAGE_INDEXES = indexes
+
+
+def getPackageIndexes() -> List[AbstractPackageIndex]:
+    global PACKAGE_INDEXES
+
+    if PACKAGE_INDEXES is None:
+        PACKAGE_INDEXES = [PyPIIndex()]
+
+    return PACKAGE_INDEXES
+
+
+def setPackageCacheFile(path: Optional[str]) -> None:
+    """
+    Sets the file that package lookups are cached in.
+
+    :param path: The file. If None, lookups are only cached in memory for the rest of the session.
+    """
+    global PACKAGE_INDEX_CACHE
+    PACKAGE_INDEX_CACHE = PackageIndexCache(path)
+
+
+def getPipIndexArguments() -> List[str]:
+    """
+    :returns: The arguments that make pip install from the same indexes that packages are looked up in.
+    If PyPI isn't one of them, pip isn't allowed to use it either.
+    """
+    arguments: List[str] = []
+
+    for index in getPackageIndexes():
+        arguments.extend(index.getPipArguments())
+
+    if not any(isinstance(index, PyPIIndex) for index in getPackageIndexes()):
+        arguments.append("--no-index")
+
+    return arguments
+
+
+def getPackageIndexCache() -> PackageIndexCache:
+    """
+    :returns: The cache of package lookups. It is created in the user's cache directory on the first call.
+    """
+    global PACKAGE_INDEX_CACHE
+
+    if PACKAGE_INDEX_CACHE is None:
+        PACKAGE_INDEX_CACHE = PackageIndexCache(getDefaultPackageCachePath())
+
+    return PACKAGE_INDEX_CACHE
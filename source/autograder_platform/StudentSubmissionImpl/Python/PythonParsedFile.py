@@ -0,0 +1,83 @@
+"""
+This module provides the parsed python files that validators use to inspect the student's code.
+
+Each file in the submission is read, parsed, and analyzed at most once, no matter how many validators inspect it (see
+:ref:`PythonSubmission.getParsedFile`). Everything is computed the first time it is needed, so files that no validator
+inspects are never parsed.
+
+:author: Gregory Bell
+"""
+
+import ast
+import symtable
+import threading
+from typing import Optional
+
+
+class ParsedFile:
+    """
+    Description
+    ===========
+
+    The source, syntax tree, and symbol table of a single python file.
+
+    Validators can run at the same time, so each part is computed under a lock. Validators must not change the tree, as
+    it is shared with every other validator.
+    """
+
+    def __init__(self, path: str):
+        self.path: str = path
+        self.lock: threading.RLock = threading.RLock()
+        self.source: Optional[str] = None
+        self.tree: Optional[ast.Module] = None
+        self.symbolTable: Optional[symtable.SymbolTable] = None
+        self.error: Optional[Exception] = None
+        """The error from reading or parsing the file"""
+        self.parsed: bool = False
+
+    def getSource(self) -> str:
+        """
+        :returns: The source of the file
+        :raises OSError: If the file can't be read
+        :raises UnicodeDecodeError: If the file isn't UTF-8
+        """
+        with self.lock:
+            if self.source is None:
+                with open(self.path, 'r', encoding="UTF-8") as r:
+                    self.source = r.read()
+
+            return self.source
+
+    def getTree(self) -> Optional[ast.Module]:
+        """
+        :returns: The syntax tree of the file. None if the file couldn't be read or parsed, see :ref:`getError`
+        """
+        with self.lock:
+            if not self.parsed:
+                self.parsed = True
+
+                try:
+                    self.tree = ast.parse(self.getSource(), self.path)
+                except (SyntaxError, ValueError, OSError, UnicodeDecodeError) as ex:
+                    self.error = ex
+
+            return self.tree
+
+    def getSymbolTable(self) -> Optional[symtable.SymbolTable]:
+        """
+        :returns: The top level symbol table of the file. None if the file couldn't be read or parsed.
+        """
+        with self.lock:
+            # symtable parses the source itself, so the tree is only used to know that parsing will succeed
+            if self.symbolTable is None and self.getTree() is not None:
+                self.symbolTable = symtable.symtable(self.getSource(), self.path, "exec")
+
+            return self.symbolTable
+
+    def getError(self) -> Optional[Exception]:
+        """
+        :returns: The error from reading or parsing the file, or None if it was parsed
+        """
+        self.getTree()
+
+        return self.error
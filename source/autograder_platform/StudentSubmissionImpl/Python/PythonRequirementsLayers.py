@@ -0,0 +1,305 @@
+"""
+This module provides the layers that a submission's requirements are installed into.
+
+Rather than installing each submission's requirements into the environment that the autograder runs in, every distinct
+set of requirements is installed once into its own directory (a layer), which is put on the path of the child that runs
+the submission. Submissions with the same requirements share the layer, so they are only ever installed once, and
+submissions can't see each other's packages.
+
+Layers are keyed by a hash of their normalized requirements and the interpreter they were installed for. Once a layer is
+created it is never changed, and its files are made read-only. Layers that haven't been used recently are removed once
+all the layers together are larger than the size limit.
+
+Layers are only used once a directory is set with :ref:`setRequirementsLayerDirectory`, which the CLI does when
+``config.python.requirements_layers`` is enabled.
+
+:author: Gregory Bell
+"""
+
+import hashlib
+import os
+import shutil
+import stat
+import sys
+import tempfile
+from importlib.machinery import PathFinder
+from typing import Callable, Dict, List, Optional, Tuple
+
+from autograder_platform.StudentSubmissionImpl.Python.PythonPackageIndex import normalizePackageName
+
+try:
+    import fcntl
+except ImportError:  # pragma: no coverage
+    # windows
+    fcntl = None  # type: ignore
+
+
+class RequirementsLayerCache:
+    """
+    Description
+    ===========
+
+    Keeps a layer for each set of requirements in a directory.
+
+    Layers are installed into a temporary directory that is renamed into place once it is complete, so a layer is
+    never seen half installed, even if several processes create the same layer at the same time.
+    The modification time of each layer is updated whenever it is used, so the least recently used layers are
+    removed first.
+
+    Each process holds a shared lock on the lock file of every layer that it has used, and layers are only removed
+    while holding an exclusive lock, so a layer that another process is using is never removed. Where file locks aren't
+    supported, layers are never removed.
+    """
+
+    def __init__(self, directory: str, maxBytes: int = 2 * 2 ** 30):
+        """
+        :param directory: The directory to keep the layers in
+        :param maxBytes: The max total size of the layers. The layer that was just used is never removed, even if it is
+        larger than this on its own.
+        """
+        self.directory: str = directory
+        self.maxBytes: int = maxBytes
+        self.usedLayers: List[str] = []
+        """The layers that have been used by this process, in the order they were first used"""
+        self.layerLocks: Dict[str, int] = {}
+        """The lock files that this process holds a shared lock on, keyed by their layer"""
+
+    @staticmethod
+    def getKey(packages: Dict[str, str]) -> str:
+        """
+        :returns: A key for the packages (normalized and in order) and the current interpreter, as compiled packages
+        can only be used by the interpreter they were installed for
+        """
+        key = hashlib.sha256()
+
+        key.update(f"{sys.implementation.cache_tag}:{sys.platform}\n".encode())
+
+        for package, version in sorted((normalizePackageName(package), version) for package, version in packages.items()):
+            key.update(f"{package}=={version}\n".encode())
+
+        return key.hexdigest()
+
+    def getLayer(self, packages: Dict[str, str], install: Callable[[str], None]) -> str:
+        """
+        Gets the layer for the packages, installing it if it doesn't exist.
+
+        :param packages: The packages, mapped to their version (or an empty string for any version)
+        :param install: Installs the packages into the directory that it is passed.
+        If it raises, the layer isn't created.
+        :returns: The directory of the layer, which should be put on the path
+        """
+        key = self.getKey(packages)
+        layer = os.path.join(self.directory, key)
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        # held before checking if the layer exists, so that it can't be removed between the check and it being used
+        self._lockShared(key)
+
+        if os.path.isdir(layer):
+            os.utime(layer)
+            self._markUsed(layer)
+            return layer
+
+        # hidden, so that layers that are being installed are never evicted
+        installDirectory = tempfile.mkdtemp(dir=self.directory, prefix=f".{key}-")
+
+        try:
+            install(installDirectory)
+            self._makeReadOnly(installDirectory)
+            os.rename(installDirectory, layer)
+        except OSError:
+            if not os.path.isdir(layer):
+                raise
+
+            # another process finished the same layer first
+        finally:
+            if os.path.exists(installDirectory):
+                self._remove(installDirectory)
+
+        os.utime(layer)
+        self._markUsed(layer)
+
+        self.evict(keep=key)
+
+        return layer
+
+    def _getLockFile(self, key: str) -> str:
+        # hidden, so that it isn't seen as a layer. Lock files are never removed, as a process could be waiting on one
+        return os.path.join(self.directory, f".{key}.lock")
+
+    def _lockShared(self, key: str) -> None:
+        layer = os.path.join(self.directory, key)
+
+        if fcntl is None or layer in self.layerLocks:
+            return
+
+        fd = os.open(self._getLockFile(key), os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        self.layerLocks[layer] = fd
+
+    def _tryLockExclusive(self, key: str) -> Optional[int]:
+        """
+        :returns: The locked file, or None if the layer is being used by a process (including this one)
+        """
+        if fcntl is None:  # pragma: no coverage
+            return None
+
+        fd = os.open(self._getLockFile(key), os.O_RDWR | os.O_CREAT, 0o644)
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return None
+
+        return fd
+
+    def release(self) -> None:
+        """
+        Releases the locks on the layers that this process has used, so that they can be removed by other processes.
+        The locks are released anyway when this process exits.
+        """
+        for fd in self.layerLocks.values():
+            os.close(fd)
+
+        self.layerLocks.clear()
+        self.usedLayers.clear()
+
+    def _markUsed(self, layer: str) -> None:
+        if layer not in self.usedLayers:
+            self.usedLayers.append(layer)
+
+    def containsModule(self, moduleName: str) -> bool:
+        """
+        Checks if a module can be imported from any of the layers that have been used by this process, without
+        importing it. This is how modules that are only installed in a layer can be mocked.
+        """
+        parts = moduleName.split(".")
+        searchPath: Optional[List[str]] = [layer for layer in self.usedLayers if os.path.isdir(layer)]
+
+        for i in range(len(parts)):
+            if not searchPath:
+                return False
+
+            spec = PathFinder.find_spec(".".join(parts[:i + 1]), searchPath)
+
+            if spec is None:
+                return False
+
+            searchPath = spec.submodule_search_locations
+
+        return True
+
+    @staticmethod
+    def _makeReadOnly(directory: str) -> None:
+        # only the files are read-only, so that layers can still be removed
+        for root, _, files in os.walk(directory):
+            for file in files:
+                path = os.path.join(root, file)
+
+                if not os.path.islink(path):
+                    os.chmod(path, stat.S_IMODE(os.lstat(path).st_mode) & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+    @staticmethod
+    def _remove(directory: str) -> None:
+        def makeWritable(function, path, _):  # pragma: no coverage
+            # windows can't remove read-only files
+            os.chmod(path, stat.S_IWUSR | stat.S_IRUSR)
+            function(path)
+
+        shutil.rmtree(directory, onerror=makeWritable)
+
+    @staticmethod
+    def _getSize(directory: str) -> int:
+        size = 0
+
+        for root, _, files in os.walk(directory):
+            for file in files:
+                try:
+                    size += os.lstat(os.path.join(root, file)).st_size
+                except OSError:  # pragma: no coverage
+                    pass
+
+        return size
+
+    def getLayers(self) -> List[Tuple[str, float, int]]:
+        """
+        :returns: The key, last time used, and size of each layer, with the most recently used layers first
+        """
+        layers: List[Tuple[str, float, int]] = []
+
+        if not os.path.isdir(self.directory):
+            return layers
+
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.startswith(".") or not entry.is_dir(follow_symlinks=False):
+                    continue
+
+                layers.append((entry.name, entry.stat().st_mtime, self._getSize(entry.path)))
+
+        return sorted(layers, key=lambda layer: layer[1], reverse=True)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Removes the least recently used layers until the layers fit in ``maxBytes``.
+        Layers that are being used by any process are skipped.
+
+        :param keep: The key of a layer that must not be removed
+        """
+        layers = self.getLayers()
+        totalBytes = sum(size for _, _, size in layers)
+
+        for key, _, size in reversed(layers):
+            if totalBytes <= self.maxBytes:
+                return
+
+            if key == keep:
+                continue
+
+            fd = self._tryLockExclusive(key)
+
+            if fd is None:
+                continue
+
+            try:
+                self._remove(os.path.join(self.directory, key))
+            finally:
+                os.close(fd)
+
+            totalBytes -= size
+
+
+def getDefaultLayerDirectory() -> str:
+    cacheHome = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+
+    return os.path.join(cacheHome, "autograder_platform", "layers")
+
+
+REQUIREMENTS_LAYER_CACHE: Optional[RequirementsLayerCache] = None
+"""The layers that requirements are installed into. See :ref:`setRequirementsLayerDirectory`"""
+
+
+def setRequirementsLayerDirectory(directory: Optional[str], maxBytes: int = 2 * 2 ** 30) -> None:
+    """
+    Sets the directory that requirements layers are kept in.
+
+    :param directory: The directory. If None, layers aren't used, and requirements are installed into the current
+    environment instead.
+    :param maxBytes: The max total size of the layers
+    """
+    global REQUIREMENTS_LAYER_CACHE
+
+    if REQUIREMENTS_LAYER_CACHE is not None:
+        REQUIREMENTS_LAYER_CACHE.release()
+
+    REQUIREMENTS_LAYER_CACHE = RequirementsLayerCache(directory, maxBytes) if directory is not None else None
+
+
+def getRequirementsLayerCache() -> Optional[RequirementsLayerCache]:
+    """
+    :returns: The layers that requirements are installed into, or None if layers aren't used.
+    Layers aren't used unless a directory is set (ie: with ``config.python.requirements_layers``).
+    """
+    return REQUIREMENTS_LAYER_CACHE
@@ -0,0 +1,121 @@
+"""
+This module provides the serializers that are used to send data between the parent and student submissions.
+
+Most of what crosses the process boundary is plain data (lists of strings, ints, tuples), which the standard library's
+pickle handles several times faster and smaller than dill. Dill is only needed for things that pickle can't handle, like
+lambdas, closures, code objects, and anything defined in the student's submission.
+
+Every payload starts with a single tag byte that says how it was serialized, so the receiving side doesn't need to know
+which serializer the sender used.
+
+:author: Gregory Bell
+"""
+
+import pickle
+from typing import Dict
+
+import dill
+
+PICKLE_PROTOCOL = 5
+
+PICKLE_TAG = b"P"
+DILL_TAG = b"D"
+
+
+class Serializer:
+    """
+    Description
+    ===========
+
+    The base class for serializers. Subclasses must implement ``dumps``. ``loads`` works for payloads from any
+    serializer.
+    """
+
+    NAME: str = ""
+
+    def dumps(self, obj: object) -> bytes:
+        raise NotImplementedError()
+
+    @staticmethod
+    def loads(data: bytes) -> object:
+        return loads(data)
+
+
+class PickleSerializer(Serializer):
+    """
+    Only uses the standard library's pickle. Fails on anything that pickle can't serialize.
+    """
+
+    NAME = "pickle"
+
+    def dumps(self, obj: object) -> bytes:
+        return PICKLE_TAG + pickle.dumps(obj, protocol=PICKLE_PROTOCOL)
+
+
+class DillSerializer(Serializer):
+    """
+    Only uses dill. This is how everything was serialized before the other serializers were added.
+    """
+
+    NAME = "dill"
+
+    def dumps(self, obj: object) -> bytes:
+        return DILL_TAG + dill.dumps(obj, dill.HIGHEST_PROTOCOL)
+
+
+class AutoSerializer(Serializer):
+    """
+    Description
+    ===========
+
+    Tries the standard library's pickle first, and falls back to dill if pickle can't serialize the object.
+
+    Pickle saves functions and classes by reference, and fails if the reference can't be looked up. Functions and
+    classes defined in the student's submission live in a module that isn't importable, so pickle fails for those and
+    they are serialized by value with dill, just like before.
+    """
+
+    NAME = "auto"
+
+    def dumps(self, obj: object) -> bytes:
+        try:
+            return PICKLE_TAG + pickle.dumps(obj, protocol=PICKLE_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return DILL_TAG + dill.dumps(obj, dill.HIGHEST_PROTOCOL)
+
+
+SERIALIZERS: Dict[str, Serializer] = {
+    serializer.NAME: serializer for serializer in (AutoSerializer(), PickleSerializer(), DillSerializer())
+}
+
+DEFAULT_SERIALIZER = AutoSerializer.NAME
+
+
+def getSerializer(name: str) -> Serializer:
+    """
+    :param name: The name of the serializer, one of the keys in ``SERIALIZERS``
+    :returns: The serializer with that name
+    :raises AttributeError: If there is no serializer with that name
+    """
+    if name not in SERIALIZERS:
+        raise AttributeError(f"Unknown serializer '{name}'. Valid serializers are: {', '.join(SERIALIZERS)}")
+
+    return SERIALIZERS[name]
+
+
+def loads(data: bytes) -> object:
+    """
+    Deserializes a payload from any of the serializers.
+
+    :param data: The payload, including its tag byte
+    :raises ValueError: If the payload wasn't created by one of the serializers
+    """
+    tag, payload = data[:1], memoryview(data)[1:]
+
+    if tag == PICKLE_TAG:
+        return pickle.loads(payload)
+
+    if tag == DILL_TAG:
+        return dill.loads(payload)
+
+    raise ValueError(f"Unknown serialization tag '{tag!r}'")
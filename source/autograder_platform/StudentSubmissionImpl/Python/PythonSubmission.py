@@ -1,31 +1,23 @@
+import importlib.metadata
 import os
 import re
 import sys
 import subprocess
+import time
 from types import CodeType
-from typing import Dict, Iterable, List, Optional, TypeVar
+from typing import Dict, List, Optional, Set, TypeVar
 from autograder_platform.StudentSubmission.AbstractStudentSubmission import AbstractStudentSubmission
+from autograder_platform.StudentSubmissionImpl.Python.PythonCodeCache import getCodeCache
+from autograder_platform.StudentSubmissionImpl.Python.PythonPackageIndex import getPipIndexArguments, normalizePackageName
+from autograder_platform.StudentSubmissionImpl.Python.PythonParsedFile import ParsedFile
+from autograder_platform.StudentSubmissionImpl.Python.PythonRequirementsLayers import getRequirementsLayerCache
+from autograder_platform.StudentSubmissionImpl.Python.PythonSubmissionImportFactory import SubmissionModuleFinder
 from autograder_platform.StudentSubmissionImpl.Python.PythonValidators import PythonFileValidator, PackageValidator, RequirementsValidator
-from autograder_platform.StudentSubmissionImpl.Python.common import FileTypeMap
+from autograder_platform.StudentSubmissionImpl.Python.common import FileTypeMap, PackageInstall
 
 Builder = TypeVar("Builder", bound="PythonSubmission")
 
 
-def filterSearchResults(path: str) -> bool:
-    # ignore hidden files
-    if path[0] == '.':
-        return False
-
-    # ignore python cache files
-    if "__pycache__" in path:
-        return False
-
-    if " " in path:
-        return False
-
-    return True
-
-
 class PythonSubmission(AbstractStudentSubmission[CodeType]):
     ALLOWED_STRICT_MAIN_NAMES = ["main.py", "submission.py"]
 
@@ -38,6 +30,10 @@ class PythonSubmission(AbstractStudentSubmission[CodeType]):
     # this allows versioned and non versioned packages, but disallows local packages
     REQUIREMENTS_LINE_REGEX: re.Pattern = re.compile(r"^(\w|-)+(==)?(\d+\.?){0,3}$")
 
+    # the data that validators can require, see getParsedFile
+    DATA_AST: str = "ast"
+    DATA_SYMBOL_TABLE: str = "symtable"
+
     def __init__(self):
         super().__init__()
 
@@ -48,8 +44,12 @@ class PythonSubmission(AbstractStudentSubmission[CodeType]):
         self.discoveredFileMap: Dict[FileTypeMap, List[str]] = {}
 
         self.extraPackages: Dict[str, str] = {}
+        self.installedPackages: List[PackageInstall] = []
+        self.requirementsLayer: Optional[str] = None
+        self.parsedFiles: Dict[str, ParsedFile] = {}
 
         self.entryPoint: Optional[CodeType] = None
+        self.submissionModules: Optional[SubmissionModuleFinder] = None
 
         self.addValidator(PythonFileValidator(self.ALLOWED_STRICT_MAIN_NAMES))
         self.addValidator(RequirementsValidator())
@@ -83,27 +83,20 @@ class PythonSubmission(AbstractStudentSubmission[CodeType]):
 
         self.discoveredFileMap[fileType].append(path)
 
-    def _discoverSubmittedFiles(self, directoryToSearch: str) -> None:
-        pathesToVisit: Iterable[str] = filter(filterSearchResults, os.listdir(directoryToSearch))
-
-        if not pathesToVisit:
-            return
-
-        for path in pathesToVisit:
-            if os.path.isdir(os.path.join(directoryToSearch, path)):
-                self._discoverSubmittedFiles(os.path.join(directoryToSearch, path))
-                continue
+    def _discoverSubmittedFiles(self) -> None:
+        for file in self.getSubmittedFiles():
+            name = os.path.basename(file)
 
-            if self.getTestFilesEnabled() and self.TEST_FILE_REGEX.match(path):
-                self._addFileToMap(os.path.join(directoryToSearch, path), FileTypeMap.TEST_FILES)
+            if self.getTestFilesEnabled() and self.TEST_FILE_REGEX.match(name):
+                self._addFileToMap(file, FileTypeMap.TEST_FILES)
                 continue
 
-            if self.PYTHON_FILE_REGEX.match(path):
-                self._addFileToMap(os.path.join(directoryToSearch, path), FileTypeMap.PYTHON_FILES)
+            if self.PYTHON_FILE_REGEX.match(name):
+                self._addFileToMap(file, FileTypeMap.PYTHON_FILES)
                 continue
 
-            if self.getRequirementsEnabled() and self.REQUIREMENTS_REGEX.match(path):
-                self._addFileToMap(os.path.join(directoryToSearch, path), FileTypeMap.REQUIREMENTS)
+            if self.getRequirementsEnabled() and self.REQUIREMENTS_REGEX.match(name):
+                self._addFileToMap(file, FileTypeMap.REQUIREMENTS)
 
     def _loadRequirements(self) -> None:
         if not self.getRequirementsEnabled() or FileTypeMap.REQUIREMENTS not in self.discoveredFileMap:
@@ -121,24 +114,80 @@ class PythonSubmission(AbstractStudentSubmission[CodeType]):
 
                 self.addPackage(line[0], line[1] if len(line) == 2 else None)
 
+    @staticmethod
+    def _isInstalled(package: str, version: str) -> bool:
+        """
+        Checks if a package is already installed at the requested version, without starting pip.
+        If the version is empty, any installed version is fine.
+        """
+        try:
+            installedVersion = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            return False
+
+        return not version or installedVersion == version
+
+    @staticmethod
+    def _runPip(arguments: List[str], packages: Dict[str, str]) -> None:
+        command = [sys.executable, "-m", "pip", "install", *getPipIndexArguments(), *arguments,
+                   *(f"{package}=={version}" if version else package for package, version in packages.items())]
+
+        try:
+            subprocess.check_call(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        # this isn't testable :( – basically this reattempts install if it fails by adding the magic flag
+        except subprocess.CalledProcessError as _:  # pragma: no cover
+            try:  # pragma: no cover
+                subprocess.check_call(command + ["--break-system-packages"],  # pragma: no cover
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # pragma: no cover
+            except subprocess.CalledProcessError as error:  # pragma: no cover
+                raise Exception(f"Failed to install {', '.join(repr(package) for package in packages)}!")  # pragma: no cover
+
     def _installRequirements(self) -> None:
+        """
+        Installs every extra package that isn't already installed with a single pip call, so that pip only resolves
+        the dependencies once. Pip installs from the same indexes that the packages were checked in (see
+        :ref:`getPipIndexArguments`), so local wheelhouses are used before PyPI.
+
+        If requirements layers are enabled (see :ref:`PythonRequirementsLayers`), every extra package is installed into
+        the layer for this set of packages rather than the current environment, unless the layer already exists.
+        Packages that are installed globally are still installed in the layer, so that the layer doesn't depend on
+        what happens to be installed where it was created.
+        """
         if not self.getRequirementsEnabled() or not self.extraPackages:
             return
 
-        for package, version in self.extraPackages.items():
-            try:
-                subprocess.check_call([sys.executable, "-m", "pip", "install",
-                                       f"{package}=={version}" if version else package],
-                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            # this isn't testable :( – basically this reattempts install if it fails by adding the magic flag
-            except subprocess.CalledProcessError as _:  # pragma: no cover
-                try:  # pragma: no cover
-                    subprocess.check_call([sys.executable, "-m", "pip", "install",  # pragma: no cover
-                                           f"{package}=={version}" if version else package, "--break-system-packages"], # pragma: no cover
-
-                                          stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)  # pragma: no cover
-                except subprocess.CalledProcessError as error:  # pragma: no cover
-                    raise Exception(f"Failed to install '{package}'!")  # pragma: no cover
+        installed: List[str] = []
+        duration = 0.0
+
+        def install(arguments: List[str], packages: Dict[str, str]) -> None:
+            nonlocal duration
+
+            startTime = time.perf_counter()
+            self._runPip(arguments, packages)
+            duration = time.perf_counter() - startTime
+
+            installed.extend(normalizePackageName(package) for package in packages)
+
+        layers = getRequirementsLayerCache()
+
+        if layers is not None:
+            packages = {normalizePackageName(package): version for package, version in self.extraPackages.items()}
+
+            self.requirementsLayer = layers.getLayer(
+                packages, lambda directory: install(["--target", directory], packages))
+        else:
+            toInstall = {package: version for package, version in self.extraPackages.items()
+                         if not self._isInstalled(package, version)}
+
+            if toInstall:
+                install([], toInstall)
+
+        self.installedPackages = [
+            PackageInstall(name=package, version=version,
+                           already_installed=normalizePackageName(package) not in installed,
+                           duration=duration if normalizePackageName(package) in installed else 0.0)
+            for package, version in self.extraPackages.items()
+        ]
 
     def _identifyMainFile(self) -> str:
         if self.getLooseMainMatchingEnabled():
@@ -152,14 +201,13 @@ class PythonSubmission(AbstractStudentSubmission[CodeType]):
         raise RuntimeError("Failed to identify main file! This error should be caught by a validator")
 
     def _readMainFile(self, mainPath) -> str:
-        with open(mainPath, 'r', encoding="UTF-8") as r:
-            return r.read()
+        return self.getParsedFile(mainPath).getSource()
 
     def _compileFile(self, filePath, code: str) -> CodeType:
-        return compile(code, filePath, "exec")
+        return getCodeCache().compile(code, filePath)
 
     def doLoad(self):
-        self._discoverSubmittedFiles(self.getSubmissionRoot())
+        self._discoverSubmittedFiles()
         self._loadRequirements()
 
     def doBuild(self):
@@ -169,18 +217,26 @@ class PythonSubmission(AbstractStudentSubmission[CodeType]):
 
         self.entryPoint = self._compileFile(mainFilePath, mainFileCode)
 
-        # Huge todo here - This will be a seperate story i think
-        # Basically by creating a meta hook in the import system, we can resolve modules from the students submission.
-        # This also allows us to mock out imported libraries.
-        # Im thinking this might be a seperate module as there is a decent amount of machinary that we need to override.
+        # The other files are compiled now so that importing them in the child doesn't read or compile anything
+        otherFiles = [file for file in self.discoveredFileMap.get(FileTypeMap.PYTHON_FILES, []) if file != mainFilePath]
+        self.submissionModules = SubmissionModuleFinder.fromFiles(
+            self.getSubmissionRoot(), otherFiles, [self.requirementsLayer] if self.requirementsLayer is not None else [])
 
     def getExecutableSubmission(self) -> CodeType:
         if self.entryPoint is None:
             raise RuntimeError("Submission has not been built! No entrypoint has been defined!")
         return self.entryPoint
 
+    def getSubmissionModules(self) -> Optional[SubmissionModuleFinder]:
+        """
+        :returns: The finder for the modules in the submission other than the main module. None if the submission
+        hasn't been built.
+        """
+        return self.submissionModules
+
     def TEST_ONLY_removeRequirements(self):
-        if not self.getRequirementsEnabled() or not self.extraPackages:
+        # layers are never installed into the current environment
+        if not self.getRequirementsEnabled() or not self.extraPackages or self.requirementsLayer is not None:
             return
 
         for package in self.extraPackages.keys():
@@ -188,6 +244,15 @@ class PythonSubmission(AbstractStudentSubmission[CodeType]):
                                    "-y", package],
                                   stdout=subprocess.DEVNULL)
 
+    def getOptions(self) -> Dict[str, object]:
+        return {
+            **super().getOptions(),
+            "test_files": self.testFilesEnabled,
+            "requirements": self.requirementsEnabled,
+            "loose_main_matching": self.looseMainMatchingEnabled,
+            "extra_packages": sorted(self.extraPackages.items()),
+        }
+
     def getTestFilesEnabled(self) -> bool:
         return self.testFilesEnabled
 
@@ -202,3 +267,49 @@ class PythonSubmission(AbstractStudentSubmission[CodeType]):
 
     def getExtraPackages(self) -> Dict[str, str]:
         return self.extraPackages
+
+    def getInstalledPackages(self) -> List[PackageInstall]:
+        """
+        :returns: How each extra package was installed, and how long it took. Empty until the submission is built.
+        """
+        return self.installedPackages
+
+    def getParsedFile(self, path: str) -> ParsedFile:
+        """
+        Gets the parsed version of a file in the submission. Files are only read and parsed once, and every validator
+        shares the same parsed file, so validators should use this rather than parsing the files themselves.
+
+        :param path: The path to the file, as it is in :ref:`getDiscoveredFileMap`
+        """
+        parsedFile = self.parsedFiles.get(path)
+
+        if parsedFile is None:
+            # setdefault is atomic, so validators running at the same time always get the same parsed file
+            parsedFile = self.parsedFiles.setdefault(path, ParsedFile(path))
+
+        return parsedFile
+
+    def getParsedFiles(self) -> List[ParsedFile]:
+        """
+        :returns: The parsed version of each python file (and test file, if enabled) in the submission
+        """
+        return [self.getParsedFile(path)
+                for fileType in (FileTypeMap.PYTHON_FILES, FileTypeMap.TEST_FILES)
+                for path in self.discoveredFileMap.get(fileType, [])]
+
+    def prepareValidationData(self, data: Set[str]) -> None:
+        if self.DATA_AST not in data and self.DATA_SYMBOL_TABLE not in data:
+            return
+
+        for parsedFile in self.getParsedFiles():
+            parsedFile.getTree()
+
+            if self.DATA_SYMBOL_TABLE in data:
+                parsedFile.getSymbolTable()
+
+    def getRequirementsLayer(self) -> Optional[str]:
+        """
+        :returns: The layer that the extra packages were installed into. None if they were installed into the current
+        environment, or if nothing had to be installed.
+        """
+        return self.requirementsLayer
@@ -0,0 +1,201 @@
+"""
+This module provides the import hook that serves the student's other modules from code that was compiled when the
+submission was built.
+
+Every python file in the submission other than the main file is compiled once by :ref:`PythonSubmission`. The finder
+is installed in the child by the runner, so importing a student's module doesn't read or compile anything.
+
+:author: Gregory Bell
+"""
+
+import hashlib
+import os
+import sys
+from importlib.abc import Loader
+from importlib.machinery import ModuleSpec, PathFinder
+from types import CodeType, ModuleType
+from typing import Dict, Iterable, List, Optional, Set, Union
+
+from autograder_platform.StudentSubmissionImpl.Python.AbstractPythonImportFactory import AbstractModuleFinder
+from autograder_platform.StudentSubmissionImpl.Python.PythonCodeCache import getCodeCache
+
+
+class SubmissionModule:
+    """
+    A single module or package from the submission.
+    """
+
+    def __init__(self, name: str, path: str, code: Optional[CodeType], isPackage: bool,
+                 error: Optional[Exception] = None, sourceHash: str = ""):
+        self.name: str = name
+        self.path: str = path
+        """The file the module was compiled from. For packages without an ``__init__.py``, the package directory"""
+        self.code: Optional[CodeType] = code
+        """None for packages without an ``__init__.py`` or if the module failed to compile"""
+        self.isPackage: bool = isPackage
+        self.error: Optional[Exception] = error
+        """The error from compiling the module. This is raised when the module is imported, like it normally would be"""
+        self.sourceHash: str = sourceHash
+
+
+class SubmissionModuleFinder(AbstractModuleFinder, Loader):
+    """
+    Description
+    ===========
+
+    Finds and loads the modules in the student's submission from precompiled code.
+
+    Modules are named by their path relative to the submission root, so ``utils/helpers.py`` is imported as
+    ``utils.helpers``. Directories are packages, whether or not they have an ``__init__.py``. Files whose names aren't
+    valid module names (ie: ``1.py``) can't be imported, so they are skipped.
+
+    The directories that the submission's requirements are installed in (see :ref:`PythonRequirementsLayers`) are put
+    on the path when the finder is installed.
+    """
+
+    def __init__(self, modules: Optional[Dict[str, SubmissionModule]] = None, paths: Optional[List[str]] = None) -> None:
+        super().__init__()
+        self.modules: Dict[str, SubmissionModule] = modules if modules is not None else {}
+        self.paths: List[str] = paths if paths is not None else []
+        self.shadowed: Set[str] = set()
+        """The top level modules in the submission that are shadowed. Found when the finder is installed"""
+
+    @classmethod
+    def fromFiles(cls, submissionRoot: str, files: Iterable[str],
+                  paths: Optional[List[str]] = None) -> "SubmissionModuleFinder":
+        """
+        Compiles each of the files.
+
+        :param submissionRoot: The root of the submission. Module names are relative to this
+        :param files: The python files to compile
+        :param paths: The directories to put on the path when the finder is installed
+        """
+        modules: Dict[str, SubmissionModule] = {}
+
+        for file in sorted(files):
+            parts = os.path.normpath(os.path.relpath(file, submissionRoot)).split(os.sep)
+            parts[-1] = os.path.splitext(parts[-1])[0]
+
+            isPackage = parts[-1] == "__init__"
+
+            if isPackage:
+                parts = parts[:-1]
+
+            if not parts or not all(part.isidentifier() for part in parts):
+                continue
+
+            # Every directory above the module is a package, even without an __init__.py
+            for i in range(1, len(parts)):
+                packageName = ".".join(parts[:i])
+
+                if packageName not in modules:
+                    modules[packageName] = SubmissionModule(packageName,
+                                                            os.path.join(submissionRoot, *parts[:i]), None, True)
+
+            name = ".".join(parts)
+            modules[name] = cls._compileModule(name, file, isPackage)
+
+        return cls(modules, paths)
+
+    @staticmethod
+    def _compileModule(name: str, file: str, isPackage: bool) -> SubmissionModule:
+        with open(file, 'r', encoding="UTF-8") as r:
+            source = r.read()
+
+        sourceHash = hashlib.sha256(source.encode(errors="surrogateescape")).hexdigest()
+
+        try:
+            code = getCodeCache().compile(source, file)
+        except (SyntaxError, ValueError) as ex:
+            return SubmissionModule(name, file, None, isPackage, ex, sourceHash)
+
+        return SubmissionModule(name, file, code, isPackage, sourceHash=sourceHash)
+
+    def getKey(self) -> str:
+        """
+        :returns: A key that identifies the modules in this finder and their source
+        """
+        key = hashlib.sha256()
+
+        for name, module in sorted(self.modules.items()):
+            key.update(f"{name}:{module.isPackage}:{module.sourceHash}\n".encode())
+
+        for path in self.paths:
+            key.update(f"{path}\n".encode(errors="surrogateescape"))
+
+        return key.hexdigest()
+
+    def getModulesToReload(self) -> List[str]:
+        return list(self.modules)
+
+    def install(self) -> None:
+        """
+        Installs the finder right before the path based finder, so that the student's packages are always loaded from
+        the precompiled code.
+
+        The requirements are put at the front of the path, so they are used over anything installed with the autograder.
+        """
+        for path in reversed(self.paths):
+            if path not in sys.path:
+                sys.path.insert(0, path)
+
+        if self in sys.meta_path:
+            return
+
+        # the path doesn't change once the submission starts, so this is only worked out once rather than on every import
+        self.shadowed = {name for name in self.modules if "." not in name and self._isShadowed(name)}
+
+        for i, finder in enumerate(sys.meta_path):
+            if finder is PathFinder:
+                sys.meta_path.insert(i, self)
+                return
+
+        sys.meta_path.append(self)
+
+    @staticmethod
+    def _isShadowed(fullname: str) -> bool:
+        """
+        Checks if a top level student module has the same name as a module in the standard library or on the path
+        (ie: a student's ``random.py``). Those modules are used instead of the student's, the same as if the submission's
+        directory was at the end of the path.
+        """
+        if fullname in sys.stdlib_module_names or fullname in sys.builtin_module_names:
+            return True
+
+        return PathFinder.find_spec(fullname) is not None
+
+    def find_spec(self, fullname, path, target=None) -> Optional[ModuleSpec]:
+        module = self.modules.get(fullname)
+
+        if module is None:
+            return None
+
+        if fullname.partition(".")[0] in self.shadowed:
+            return None
+
+        spec = ModuleSpec(fullname, self, origin=module.path if module.code is not None else None,
+                          is_package=module.isPackage)
+
+        if module.isPackage:
+            spec.submodule_search_locations = [module.path if module.code is None else os.path.dirname(module.path)]
+
+        spec.has_location = module.code is not None
+
+        return spec
+
+    def create_module(self, spec: ModuleSpec) -> Optional[ModuleType]:
+        return None
+
+    def exec_module(self, module: ModuleType) -> None:
+        submissionModule: Union[SubmissionModule, None] = self.modules.get(module.__name__)
+
+        if submissionModule is None:
+            raise ImportError(f"Module '{module.__name__}' is not part of the submission!", name=module.__name__)
+
+        if submissionModule.error is not None:
+            raise submissionModule.error
+
+        if submissionModule.code is None:
+            return
+
+        exec(submissionModule.code, vars(module))
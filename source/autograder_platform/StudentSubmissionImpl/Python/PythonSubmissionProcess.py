@@ -1,35 +1,50 @@
 """
 This module provides an interface for running student submissions as processes.
 
-This module utilizes shared memory to share data from the parent and the child. The way it is currently implemented
-guarantees that no conflicts will occur with the pattern. This is because the parent waits for the child to complete
-before attempting to even connect to the object.
+The child receives its stdin along with the rest of its arguments and sends its results back to the parent as frames
+over a pipe (see :ref:`PythonChannel`). The parent reads the frames while the child is running, so the amount of data
+that can be returned isn't limited by a buffer that has to be sized ahead of time.
 
 :author: Gregory Bell
 :date: 3/7/23
 """
 
-from typing import Any, Dict, Optional, TextIO, Tuple, List, Union
-from autograder_platform.Executors.Environment import ExecutionEnvironment, Results
+from typing import Any, Callable, Dict, Optional, Tuple, List, Union
+from autograder_platform.Executors.Environment import ExecutionEnvironment, Results, TimeoutMode
 
 from autograder_platform.StudentSubmission.ISubmissionProcess import ISubmissionProcess
 
+import dataclasses
 import dill
+import hashlib
 import multiprocessing
-import multiprocessing.shared_memory as shared_memory
 import os
+import shutil
+import signal
 import sys
+import tempfile
+import time
 from io import StringIO
+from multiprocessing.connection import Connection
 
-from autograder_platform.Executors.common import MissingOutputDataException, detectFileSystemChanges, filterStdOut
+from autograder_platform.Executors.common import MissingOutputDataException, detectFileSystemChanges
+from autograder_platform.Executors.Metrics import Metrics, ResourceUsage, UsageMeter, applyResourceLimits
 from autograder_platform.StudentSubmissionImpl.Python.common import PythonTaskResult
+from autograder_platform.StudentSubmissionImpl.Python.Runners import BatchPlan
 from autograder_platform.Tasks.TaskRunner import TaskRunner
 from autograder_platform.TestingFramework.SingleFunctionMock import SingleFunctionMock
 from autograder_platform.StudentSubmissionImpl.Python.PythonEnvironment import PythonEnvironment, PythonResults
 from autograder_platform.StudentSubmissionImpl.Python.AbstractPythonImportFactory import AbstractModuleFinder
+from autograder_platform.StudentSubmissionImpl.Python.PythonCodeCache import adoptCodeCacheDirectory, getCodeCache
+from autograder_platform.StudentSubmissionImpl.Python.PythonChannel import FRAME_CALL_RESULT, FRAME_CALL_STARTED, \
+    FRAME_DIAGNOSTICS, FRAME_RESULTS, FRAME_STARTED, FrameReceiver, sendFrame
+from autograder_platform.StudentSubmissionImpl.Python.PythonOutputCapture import OutputCapture
+from autograder_platform.StudentSubmissionImpl.Python.PythonVirtualClock import getVirtualClock
+from autograder_platform.StudentSubmissionImpl.Python.PythonSerializer import DEFAULT_SERIALIZER, DillSerializer, \
+    getSerializer, loads
+from autograder_platform.StudentSubmissionImpl.Python.PythonWorkerPool import PooledWorker, WorkerPool
+from autograder_platform.StudentSubmissionImpl.Python.PythonZygote import Zygote, ZygoteJob
 
-dill.Pickler.dumps, dill.Pickler.loads = dill.dumps, dill.loads  # type: ignore
-multiprocessing.reduction.dump = dill.dump  # type: ignore
 
 class StudentSubmissionProcess(multiprocessing.Process):
     """
@@ -38,19 +53,15 @@ class StudentSubmissionProcess(multiprocessing.Process):
     (returns, stdout, and exceptions) with the parent who is able to unpack it. Currently, stderror is ignored.
 
     Depending on the platform the process will be spawned using either the 'fork' or 'spawn' methods.
-    Windows only supports the 'spawn' method and the 'spawn' method is preferred on macOS. This is why we aren't using
-    pipes; when a process is created via the 'spawn' method, a new interpreter is started which doesn't share resources
-    in the same way that a child process created via the 'fork' method. Thus, pipes fail on non Linux platforms.
+    Windows only supports the 'spawn' method and the 'spawn' method is preferred on macOS. Raw file descriptors aren't
+    shared with children created via the 'spawn' method, so the results are sent over a ``multiprocessing`` connection,
+    which is transferred to the child by multiprocessing itself. The runner and import handlers can't be pickled by
+    multiprocessing, so they are serialized with dill when the process is sent to a spawned child.
 
-    The other option of using multiprocessing.Pipe was also considered, but it ran in to similar issues as the
-    traditional pipe method. There is a way to make it work, but it would involve overriding the print function to
-    utilize the Pipe.send function, but that was a whole host of edge cases that I did not want to consider and also
-    seemed like an easy way to confuse students as to why their print function behaved weird in the autograder, but not
-    on their computers.
-
-    Please be aware that the data does not generally persist after the child is started as it is a whole new context on
-    some platforms. So data must be shared via some other mechanism. I choose multiprocessing.shared_memory due to the
-    limitations listed above.
+    Overriding the print function to send output directly over the connection was also considered, but that was a
+    whole host of edge cases that I did not want to consider and also seemed like an easy way to confuse students as to
+    why their print function behaved weird in the autograder, but not on their computers. So stdout is replaced with an
+    :ref:`OutputCapture`, which filters the OUTPUT lines as they are printed and streams them to the parent.
 
     This class is designed to a one-size-fits-all type of approach for actually *running* student submissions as I
     wanted to avoid the hodgepodge of unmaintainable that was the original autograder while still affording the
@@ -58,12 +69,11 @@ class StudentSubmissionProcess(multiprocessing.Process):
     """
 
     def __init__(self, runner: TaskRunner, executionDirectory: str, importHandlers: List[AbstractModuleFinder],
-                 timeout: int = 10):
+                 timeout: float = 10):
         """
         This constructs a new student submission process with the name "Student Submission".
 
-        It sets the default names for shared input and output.
-        Those should probably be updated.
+        The stdin and the output connection must be set before the process is started.
 
         :param runner: The submission runner to be run in a new process. Can be any callable object (lamda, function,
         etc). If there is a return value it will be shared with the parent.
@@ -77,51 +87,281 @@ class StudentSubmissionProcess(multiprocessing.Process):
         """
         super().__init__(name="Student Submission")
         self.runner: TaskRunner = runner
-        self.inputDataMemName: str = ""
-        self.outputDataMemName: str = ""
+        self.stdin: List[str] = []
+        self.outputConnection: Optional[Connection] = None
+        self.outputCapture: Optional[OutputCapture] = None
+        self.maxOutputSize: int = 2 ** 24
+        self.serializer: str = DEFAULT_SERIALIZER
+        self.memoryLimit: Optional[int] = None
+        self.cpuTimeLimit: Optional[int] = None
+        self.batchStart: int = 0
+        self.virtualTime: bool = False
         self.executionDirectory: str = executionDirectory
         self.importHandlers: List[AbstractModuleFinder] = importHandlers
-        self.timeout: int = timeout
+        self.timeout: float = timeout
+        self.timeoutMode: TimeoutMode = TimeoutMode.WALL
+        self.codeCacheDirectory: Optional[str] = None
 
-    def setInputDataMemName(self, inputSharedMemName):
+    def setStdin(self, stdin: List[str]):
         """
-        Updates the input data memory name from the default
+        Updates the stdin from the default
 
-        :param inputSharedMemName: The shared memory name (see :ref:`multiprocessing.shared_memory`) for stdin.
-        The data at this location is stored as a list
-        and must be processed into a format understood by ``StringIO``.
-        The data must exist before the child is started.
+        :param stdin: The lines of stdin. These are sent to the child with the rest of the process and are joined with
+        newlines so that ``StringIO`` is able to work with them.
         """
-        self.inputDataMemName: str = inputSharedMemName
+        self.stdin = stdin
 
-    def setOutputDataMenName(self, outputDataMemName):
+    def setOutputConnection(self, outputConnection: Connection):
         """
-        Updates the output data memory name from the default.
+        Updates the output connection from the default.
 
-        :param outputDataMemName: The shared memory name (see :ref:`multiprocessing.shared_memory`) for exceptions and
-        return values.
-        This is created by the child and will be connected to by the parent once the child exits.
+        :param outputConnection: The write end of the pipe that the results (stdout, exceptions and return values) are
+        sent over. See :ref:`PythonChannel`. The parent must close its copy once the child is started.
         """
-        self.outputDataMemName = outputDataMemName
+        self.outputConnection = outputConnection
 
-    def _setup(self) -> None:
+    def setMaxOutputSize(self, maxOutputSize: int):
         """
-        Sets up the child input output redirection. The stdin is read from the shared memory object defined in the parent
-        with the name ``self.inputDataMemName``. The stdin is formatted with newlines so that ``StringIO`` is able to
-        work with it.
+        Updates the max output size from the default.
+
+        :param maxOutputSize: The max number of bytes of OUTPUT lines that will be kept. See :ref:`OutputCapture`.
+        """
+        self.maxOutputSize = maxOutputSize
+
+    def setSerializer(self, serializer: str):
+        """
+        Updates the serializer from the default.
+
+        :param serializer: The name of the serializer that the child sends its frames with. See :ref:`PythonSerializer`.
+        :raises AttributeError: If there is no serializer with that name
+        """
+        getSerializer(serializer)
+        self.serializer = serializer
+
+    def setTimeoutMode(self, timeoutMode: TimeoutMode):
+        """
+        Updates the timeout mode from the default of wall clock time.
+
+        :param timeoutMode: If this is ``TimeoutMode.CPU``, the child kills itself once it has used ``timeout`` seconds of
+        CPU time running the submission.
+        """
+        self.timeoutMode = timeoutMode
+
+    def setBatchStart(self, batchStart: int):
+        """
+        Updates the first call in the batch to make from the default of the first one. This is used to continue a batch
+        after one of its calls timed out or crashed.
+
+        :param batchStart: The index of the first call to make. Ignored if the runner isn't a batch runner.
+        """
+        self.batchStart = batchStart
+
+    def setResourceLimits(self, memoryLimit: Optional[int], cpuTimeLimit: Optional[int]):
+        """
+        Updates the resource limits from the default of no limits.
+
+        :param memoryLimit: The max number of bytes of address space that the child can use. This includes the
+        interpreter and everything that it has imported, not just the student's submission.
+        :param cpuTimeLimit: The max number of seconds of CPU time that the child can use to run the submission.
+        """
+        self.memoryLimit = memoryLimit
+        self.cpuTimeLimit = cpuTimeLimit
+
+    def setVirtualTime(self, virtualTime: bool):
+        """
+        Updates if the submission is run with the virtual clock from the default of the real clock.
+
+        :param virtualTime: If the submission's sleeps should return immediately and advance a virtual clock instead.
+        See :ref:`PythonVirtualClock`
+        """
+        self.virtualTime = virtualTime
+
+    def setCodeCacheDirectory(self, codeCacheDirectory: Optional[str]):
+        """
+        Updates the code cache that the child uses from the default of the one that it inherited (if it was forked).
+
+        :param codeCacheDirectory: The directory of the parent's code cache. See :ref:`PythonCodeCache`
+        """
+        self.codeCacheDirectory = codeCacheDirectory
+
+    # These may contain lambdas, code objects, or the student's submission, which multiprocessing's pickler can't handle
+    DILL_SERIALIZED_ATTRIBUTES = ("runner", "importHandlers")
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = dict(self.__dict__)
+
+        for attribute in self.DILL_SERIALIZED_ATTRIBUTES:
+            state[attribute] = getSerializer(DillSerializer.NAME).dumps(state[attribute])
+
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for attribute in self.DILL_SERIALIZED_ATTRIBUTES:
+            state[attribute] = loads(state[attribute])
+
+        self.__dict__.update(state)
+
+    def getWorkerJob(self) -> Tuple[Callable[..., None], Tuple[object, ...]]:
+        """
+        Packages this process so that it can be run by a pre-started worker from a :ref:`WorkerPool`.
+
+        Process objects can't be sent to an already running process, so the worker rebuilds the process from its
+        arguments and then runs it in place.
+
+        :returns: The target and arguments to pass to :ref:`PooledWorker.assign`
+        """
+        return StudentSubmissionProcess.runInWorker, \
+            (self.runner, self.executionDirectory, self.importHandlers, (self.timeout, self.timeoutMode), self.stdin,
+             self.maxOutputSize, self.serializer, (self.memoryLimit, self.cpuTimeLimit), self.batchStart,
+             self.virtualTime, self.codeCacheDirectory)
+
+    @staticmethod
+    def runInWorker(outputConnection: Connection, runner: TaskRunner, executionDirectory: str,
+                    importHandlers: List[AbstractModuleFinder], timeout: Tuple[float, TimeoutMode], stdin: List[str],
+                    maxOutputSize: int, serializer: str,
+                    resourceLimits: Tuple[Optional[int], Optional[int]], batchStart: int, virtualTime: bool,
+                    codeCacheDirectory: Optional[str]) -> None:
+        process = StudentSubmissionProcess(runner, executionDirectory, importHandlers, timeout[0])
+        process.setTimeoutMode(timeout[1])
+        process.setStdin(stdin)
+        process.setOutputConnection(outputConnection)
+        process.setMaxOutputSize(maxOutputSize)
+        process.setSerializer(serializer)
+        process.setResourceLimits(*resourceLimits)
+        process.setBatchStart(batchStart)
+        process.setVirtualTime(virtualTime)
+        process.setCodeCacheDirectory(codeCacheDirectory)
+
+        process.run()
+
+    def getZygotePreparation(self, sandboxFiles: List[Tuple[str, str]]) -> Tuple[Callable[..., object], Tuple[object, ...]]:
+        """
+        Packages the shared tasks of this process's runner so that they can be run once in a :ref:`Zygote`.
+
+        :param sandboxFiles: The files that are put in each sandbox, as the source and the path relative to the sandbox
+        :returns: The target and arguments to pass to :ref:`Zygote.get`
+        """
+        return StudentSubmissionProcess.prepareZygote, \
+            (self.runner, sandboxFiles, self.importHandlers, self.virtualTime)
+
+    @staticmethod
+    def _listFiles(directory: str) -> List[str]:
+        files: List[str] = []
+
+        for root, directories, names in os.walk(directory):
+            # created by importing the python files in the directory, not by the submission
+            if "__pycache__" in directories:
+                directories.remove("__pycache__")
+
+            files.extend(os.path.relpath(os.path.join(root, name), directory) for name in names)
+
+        return sorted(files)
+
+    @staticmethod
+    def prepareZygote(runner: TaskRunner, sandboxFiles: List[Tuple[str, str]], importHandlers: List[AbstractModuleFinder],
+                      virtualTime: bool = False) -> Optional[Tuple[TaskRunner, str]]:
+        """
+        Runs the shared tasks of ``runner`` in the zygote.
+
+        The shared tasks are run in a directory of their own with a copy of the files that are put in each sandbox, as
+        every fork runs in a different sandbox. Anything written there is lost, so submissions that write files while
+        being imported must be run normally. Similarly, no stdin is available while the shared tasks are run, so
+        submissions that read input while being imported fail here and must be run normally.
+
+        :returns: The runner with its shared tasks completed, and any output produced by the shared tasks.
+        None if the shared tasks failed or wrote files.
+        """
+        zygoteDirectory = tempfile.mkdtemp(prefix="autograder_zygote_")
+
+        try:
+            for src, dest in sandboxFiles:
+                dest = os.path.join(zygoteDirectory, dest)
+                os.makedirs(os.path.dirname(dest), exist_ok=True)
+                shutil.copy(src, dest)
+
+            expectedFiles = StudentSubmissionProcess._listFiles(zygoteDirectory)
+
+            process = StudentSubmissionProcess(runner, zygoteDirectory, importHandlers)
+            process.setVirtualTime(virtualTime)
+            process._setupEnvironment()
+
+            # the directory that was put on the path, which the submission could change while it is being imported
+            importPath = sys.path[-1]
+
+            sys.stdin = StringIO()
+            sys.stdout = StringIO()
+
+            # The time slept while importing the submission is kept by the forks
+            process._startVirtualTime()
+            runner.runSharedTasks()
+            process._stopVirtualTime()
+
+            # Each job runs in its own sandbox, so don't leave this one on the path
+            if importPath in sys.path:
+                sys.path.remove(importPath)
 
-        This method also moves the process to the execution directory
+            filesWritten = StudentSubmissionProcess._listFiles(zygoteDirectory) != expectedFiles
+        finally:
+            os.chdir(tempfile.gettempdir())
+            shutil.rmtree(zygoteDirectory, ignore_errors=True)
 
-        stdout is also redirected here, but because we don't care about its contents, we just overwrite it completely.
+        if runner.errorOccurred or filesWritten:
+            return None
 
-        This method also injects whatever import MetaPathFinders
+        return runner, sys.stdout.getvalue()
+
+    def getZygoteJob(self) -> Tuple[Callable[..., None], Tuple[object, ...]]:
+        """
+        Packages this process so that it can be run in a fork of a :ref:`Zygote`.
+
+        :returns: The target and arguments to pass to :ref:`Zygote.createJob`
         """
+        return StudentSubmissionProcess.runInZygote, \
+            (self.runner, self.executionDirectory, (self.timeout, self.timeoutMode), self.stdin, self.maxOutputSize,
+             self.serializer, (self.memoryLimit, self.cpuTimeLimit), self.batchStart, self.virtualTime)
+
+    @staticmethod
+    def runInZygote(state: Tuple[TaskRunner, str], outputConnection: Connection, runner: TaskRunner,
+                    executionDirectory: str, timeout: Tuple[float, TimeoutMode], stdin: List[str], maxOutputSize: int,
+                    serializer: str, resourceLimits: Tuple[Optional[int], Optional[int]], batchStart: int,
+                    virtualTime: bool) -> None:
+        sharedRunner, sharedOutput = state
+
+        runner.adoptSharedTasks(sharedRunner)
+
+        # The import handlers were already installed by the zygote
+        process = StudentSubmissionProcess(runner, executionDirectory, [], timeout[0])
+        process.setTimeoutMode(timeout[1])
+        process.setStdin(stdin)
+        process.setOutputConnection(outputConnection)
+        process.setMaxOutputSize(maxOutputSize)
+        process.setSerializer(serializer)
+        process.setResourceLimits(*resourceLimits)
+        process.setBatchStart(batchStart)
+        process.setVirtualTime(virtualTime)
+
+        process._setupEnvironment()
+        process._setupIO()
+        process._applyResourceLimits()
+        sys.stdout.write(sharedOutput)
+
+        process._execute()
+
+    def _changeToExecutionDirectory(self) -> None:
         # This may error? so we are going to catch it and log the error
         try:
             os.chdir(self.executionDirectory)
         except OSError as ex:  # pragma: no coverage
             print(f"ERROR: Failed to change directory to sandbox folder.\n{ex}", file=sys.stderr)  # pragma: no coverage
 
+    def _setupEnvironment(self) -> None:
+        """
+        Moves the process to the execution directory and injects whatever import MetaPathFinders
+        """
+        if self.codeCacheDirectory is not None:
+            adoptCodeCacheDirectory(self.codeCacheDirectory)
+
+        self._changeToExecutionDirectory()
 
         sys.path.append(os.getcwd())
 
@@ -135,62 +375,134 @@ class StudentSubmissionProcess(multiprocessing.Process):
 
                 del sys.modules[mod]
 
-        sharedInput = shared_memory.SharedMemory(self.inputDataMemName)
-        deserializedData = dill.loads(sharedInput.buf.tobytes())
-        # Reformat the stdin so that we
-        sys.stdin = StringIO("".join([line + "\n" for line in deserializedData]))
+    def _setStdin(self, stdin: List[str]) -> None:
+        sys.stdin = StringIO("".join([line + "\n" for line in stdin]))
+
+    def _sendFrame(self, kind: str, data: object) -> None:
+        """
+        Sends a frame to the parent while the submission is running. See :ref:`OutputCapture.sendFrame`
+        """
+        if self.outputCapture is None:
+            raise AttributeError("INVALID STATE: Output capture is NONE. No data can be sent to the parent.")
+
+        self.outputCapture.sendFrame(kind, data)
+
+    def _setupIO(self) -> None:
+        """
+        Sets up the child input output redirection. The stdin is formatted with newlines so that ``StringIO`` is able to
+        work with it.
+
+        stdout is replaced with an :ref:`OutputCapture` that sends the OUTPUT lines to the parent as they are printed.
+        """
+        if self.outputConnection is None:
+            raise AttributeError("INVALID STATE: Output connection is NONE. No data can be sent to the parent.")
+
+        self._setStdin(self.stdin)
+
+        self.outputCapture = OutputCapture(self.outputConnection, self.maxOutputSize, self.serializer)
+        self.outputCapture.start()
+
+        sys.stdout = self.outputCapture.stream
+
+    def _applyResourceLimits(self) -> None:
+        """
+        Limits the child. This is done last so that setting up the child isn't counted against the submission.
+        """
+        applyResourceLimits(self.memoryLimit, self.cpuTimeLimit)
+
+    def _startCpuBudget(self) -> None:
+        """
+        Kills the child once it has used ``timeout`` seconds of CPU time, if the timeout is measured in CPU time.
+
+        The default action of SIGPROF is to terminate the process. Unlike a Python signal handler, that can't be caught
+        by the submission, and works even if the submission is stuck in C code.
+        """
+        if self.timeoutMode is not TimeoutMode.CPU or not hasattr(signal, "setitimer"):
+            return
+
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+        signal.setitimer(signal.ITIMER_PROF, self.timeout)
 
-        sys.stdout = StringIO()
+    def _stopCpuBudget(self) -> None:
+        if self.timeoutMode is not TimeoutMode.CPU or not hasattr(signal, "setitimer"):
+            return
+
+        signal.setitimer(signal.ITIMER_PROF, 0)
 
-    def _teardown(self, stdout: Union[StringIO, TextIO], exception: Optional[Exception],
-                  returnValue: object, parameters: Optional[Tuple[object, ...]],
-                  mocks: Optional[Dict[str, Optional[SingleFunctionMock]]]) -> None:
+    def _startVirtualTime(self) -> None:
+        """
+        Installs the virtual clock while the student's code is running, if virtual time is enabled.
         """
-        This function takes the results from the child process and serializes them.
-        Then is stored in the shared memory object that the parent is able to access.
+        if not self.virtualTime:
+            return
+
+        getVirtualClock().install()
+
+    def _stopVirtualTime(self) -> None:
+        if not self.virtualTime:
+            return
+
+        getVirtualClock().uninstall()
+
+    def _setup(self) -> None:
+        self._setupEnvironment()
+        self._setupIO()
+        self._applyResourceLimits()
+
+    def _teardown(self, exception: Optional[Exception], returnValue: object, parameters: Optional[Tuple[object, ...]],
+                  mocks: Optional[Dict[str, Optional[SingleFunctionMock]]], usage: ResourceUsage) -> None:
+        """
+        This function sends the rest of the stdout to the parent, then sends the results from the child as the results
+        frame.
 
-        :param stdout: The raw io from the stdout.
         :param exception: Any exceptions that were thrown
         :param returnValue: The return value from the function
         :param mocks: The mocks from the submission after they have been hydrated
+        :param usage: The resources used while running the runner
         """
+        if self.outputConnection is None or self.outputCapture is None:
+            raise AttributeError("INVALID STATE: Output connection is NONE. No data can be sent to the parent.")
 
-        if isinstance(stdout, TextIO):
-            stdout.seek(0)
-            stdout = StringIO(stdout.read())
+        self.outputCapture.finish()
 
         # Pickle both the exceptions and the return value
         dataToSerialize: Dict[str, Any] = {
-            "stdout": stdout.getvalue().splitlines(),
             "parameters": parameters,
             "return_val": returnValue,
             "exception": exception,
             "impl_results": {
                 "mocks": mocks,
+                "virtual_time": getVirtualClock().slept if self.virtualTime else None,
             },
+            "metrics": usage,
+            "tasks": self.runner.getTimings(),
         }
 
         for importHandler in self.importHandlers:
             sys.meta_path.remove(importHandler)
 
-        serializedData = dill.dumps(dataToSerialize, dill.HIGHEST_PROTOCOL)
-        sharedOutput = shared_memory.SharedMemory(self.outputDataMemName)
-
-        if sharedOutput.size < sys.getsizeof(serializedData):
-            print(f"FATAL ERROR: Submission generated output is LARGER than buffer size of {sharedOutput.size} bytes. Output size is {sys.getsizeof(serializedData)} bytes!", file=sys.stderr)
-            sharedOutput.close()
-            return
-
-        sharedOutput.buf[:len(serializedData)] = serializedData
-        sharedOutput.close()
+        sendFrame(self.outputConnection, FRAME_RESULTS, dataToSerialize, self.serializer)
+        self.outputConnection.close()
 
     def run(self):
         self._setup()
+        self._execute()
 
+    def _execute(self) -> None:
         exception: Optional[Exception] = None
 
+        # Everything up to this point was setting up the child, the timeout starts now
+        self._sendFrame(FRAME_STARTED, time.monotonic())
+        self._startCpuBudget()
+        meter = UsageMeter()
+        self._startVirtualTime()
+
         results: PythonTaskResult = self.runner.run()  # type: ignore
 
+        self._stopVirtualTime()
+        usage = meter.stop()
+        self._stopCpuBudget()
+
         if not self.runner.wasSuccessful():
             exceptions = self.runner.getAllErrors()
             if exceptions:
@@ -203,7 +515,66 @@ class StudentSubmissionProcess(multiprocessing.Process):
                 "mocks": {},
             }
 
-        self._teardown(sys.stdout, exception, results["return_val"], results["parameters"], results["mocks"])
+        batch: Optional[BatchPlan] = results.get("batch")  # type: ignore
+
+        if batch is not None and exception is None:
+            self._runBatch(batch)
+
+        self._teardown(exception, results["return_val"], results["parameters"], results["mocks"], usage)
+
+    def _runBatch(self, batch: BatchPlan) -> None:
+        """
+        Makes each call in the batch, starting at ``batchStart``. The results of each call are sent as soon as the call
+        finishes, so that the parent can kill the child if a call times out without losing the calls before it.
+        """
+        for index in range(self.batchStart, len(batch.calls)):
+            call = batch.calls[index]
+
+            self._setStdin(call.stdin if call.stdin is not None else self.stdin)
+
+            self._sendFrame(FRAME_CALL_STARTED, (index, time.monotonic()))
+            self._startCpuBudget()
+            meter = UsageMeter()
+            self._startVirtualTime()
+
+            exception: Optional[BaseException] = None
+            returnValue: object = None
+            parameters: Optional[Tuple[object, ...]] = None
+
+            try:
+                parameters = tuple([parameter.get(batch.module) for parameter in call.parameters])
+                returnValue = batch.method(*parameters)
+            except (Exception, SystemExit) as ex:
+                # An exit in one call shouldn't stop the rest of the batch
+                exception = ex
+
+            self._stopVirtualTime()
+            usage = meter.stop()
+            self._stopCpuBudget()
+
+            self._sendFrame(FRAME_CALL_RESULT, (index, time.monotonic(), {
+                "return_val": returnValue,
+                "parameters": parameters,
+                "exception": exception,
+                "metrics": usage,
+            }))
+
+    def copy(self) -> "StudentSubmissionProcess":
+        """
+        Creates a new process with the same runner and settings. Processes can only be started once, so this is used
+        to run the same submission again.
+        """
+        process = StudentSubmissionProcess(self.runner, self.executionDirectory, self.importHandlers, self.timeout)
+        process.setStdin(self.stdin)
+        process.setTimeoutMode(self.timeoutMode)
+        process.setMaxOutputSize(self.maxOutputSize)
+        process.setSerializer(self.serializer)
+        process.setResourceLimits(self.memoryLimit, self.cpuTimeLimit)
+        process.setBatchStart(self.batchStart)
+        process.setVirtualTime(self.virtualTime)
+        process.setCodeCacheDirectory(self.codeCacheDirectory)
+
+        return process
 
     def join(self, *args, **kwargs):
         multiprocessing.Process.join(self, timeout=self.timeout)
@@ -218,109 +589,332 @@ class StudentSubmissionProcess(multiprocessing.Process):
 
 
 class RunnableStudentSubmission(ISubmissionProcess):
+    STARTUP_TIMEOUT: float = 60
+    """How long the child has to start running the submission. This isn't counted against the submission's timeout"""
+    CPU_TIMEOUT_WALL_FACTOR: float = 4
+    """
+    Submissions that are blocked (ie: sleeping) don't use CPU time. So when the timeout is measured in CPU time, they are
+    still killed after this many times the timeout of wall clock time
+    """
 
     def __init__(self):
-        self.inputSharedMem: Optional[shared_memory.SharedMemory] = None
-        self.outputSharedMem: Optional[shared_memory.SharedMemory] = None
+        self.receiver: Optional[FrameReceiver] = None
 
         self.runner: Optional[TaskRunner] = None
         self.executionDirectory: str = "."
         self.studentSubmissionProcess: Optional[StudentSubmissionProcess] = None
+        self.workerPool: Optional[WorkerPool] = None
+        self.zygote: Optional[Zygote] = None
         self.exception: Optional[Exception] = None
         self.outputData: Dict[str, Any] = {}
         self.timeoutOccurred: bool = False
-        self.timeoutTime: int = 0
-        self.bufferSize: int = 0
+        self.timeoutTime: float = 0
+        self.timeoutMode: TimeoutMode = TimeoutMode.WALL
+        self.startedAt: Optional[float] = None
+        """The ``time.monotonic`` of when the student's code started running in the child"""
+        self.endedAt: Optional[float] = None
+        self.exitCode: Optional[int] = None
+        self.cpuTimeLimit: Optional[int] = None
+        self.runUsage: Optional[ResourceUsage] = None
+        self.jobUsages: List[ResourceUsage] = []
+        self.receivers: List[FrameReceiver] = []
+        """The receivers for every child that was started. There is more than one if a batch had to be restarted"""
+        self.resultPaths: List[str] = []
+        self.calls: Dict[int, Results] = {}
 
     def setup(self, environment: ExecutionEnvironment[PythonEnvironment, PythonResults], runner: TaskRunner):
         """
         Description
         ---
 
-        This function allocates the shared memory that will be passed to the student's submission
-
-        Setting up the data here then tearing it down in the ref:`RunnableStudentSubmission.cleanup` fixes
-        the issue with windows GC cleaning up the memory before we are done with it as there will be at least one
-        active hook for each memory resource til ``cleanup`` is called.
-
+        This function creates the process that will run the student's submission and decides where it will be run.
 
+        The stdin is sent with the process, so it is exactly as large as it needs to be.
+        The channel for the results is created in :ref:`RunnableStudentSubmission.run` once it is known where the
+        submission is being run.
         """
         self.studentSubmissionProcess = \
             StudentSubmissionProcess(runner, environment.SANDBOX_LOCATION,
                                      environment.impl_environment.import_loader,
                                      environment.timeout)
 
-        self.bufferSize = environment.impl_environment.buffer_size
+        self.studentSubmissionProcess.setStdin(environment.stdin)
+        self.studentSubmissionProcess.setTimeoutMode(environment.timeout_mode)
+        self.studentSubmissionProcess.setMaxOutputSize(environment.impl_environment.max_output_size)
+        self.studentSubmissionProcess.setSerializer(environment.impl_environment.serializer)
+        self.studentSubmissionProcess.setResourceLimits(environment.impl_environment.memory_limit,
+                                                        environment.impl_environment.cpu_time_limit)
+        self.studentSubmissionProcess.setVirtualTime(environment.impl_environment.virtual_time)
+        # children that aren't forked don't have the cache, and it isn't in the environment for them to find
+        self.studentSubmissionProcess.setCodeCacheDirectory(getCodeCache().directory)
+
+        self.resultPaths = runner.getResultPaths()
+        self.timeoutTime = environment.timeout
+        self.timeoutMode = environment.timeout_mode
+        self.cpuTimeLimit = environment.impl_environment.cpu_time_limit
+
+        self.workerPool = None
+        self.zygote = None
 
-        if self.bufferSize <= 0:
-            raise AttributeError("INVALID STATE: Buffer size is ZERO. No data can be collected from the student's submission.")
+        if environment.impl_environment.use_zygote:
+            self.zygote = self._getZygote(environment, runner)
 
-        self.inputSharedMem = shared_memory.SharedMemory(create=True, size=self.bufferSize)
-        self.outputSharedMem = shared_memory.SharedMemory(create=True, size=self.bufferSize)
+        if self.zygote is None and environment.impl_environment.pool_size > 0:
+            self.workerPool = WorkerPool.get(environment.impl_environment.pool_size,
+                                             environment.impl_environment.preload_modules,
+                                             environment.impl_environment.start_method)
 
-        self.studentSubmissionProcess.setInputDataMemName(self.inputSharedMem.name)
-        self.studentSubmissionProcess.setOutputDataMenName(self.outputSharedMem.name)
+    def _getZygote(self, environment: ExecutionEnvironment[PythonEnvironment, PythonResults],
+                   runner: TaskRunner) -> Optional[Zygote]:
+        """
+        Gets the zygote that has already run the shared tasks for this runner.
 
-        serializedStdin = dill.dumps(environment.stdin, dill.HIGHEST_PROTOCOL)
+        Zygotes are keyed on the runner's shared tasks and the import environment (including which files are in the
+        sandbox), so runners that differ in their import phase get their own zygote.
 
-        self.inputSharedMem.buf[:len(serializedStdin)] = serializedStdin
+        :returns: The zygote, or None if this runner can't be run from a zygote.
+        """
+        if self.studentSubmissionProcess is None or not Zygote.isSupported():
+            return None
 
-        self.timeoutTime = environment.timeout
+        sharedKey = runner.getSharedKey()
+
+        if sharedKey is None:
+            return None
+
+        sandboxFiles = sorted((src, os.path.relpath(dest, environment.SANDBOX_LOCATION))
+                              for src, dest in environment.files.items())
+
+        importEnvironment = (environment.impl_environment.import_loader, sandboxFiles,
+                             environment.impl_environment.virtual_time)
+
+        key = hashlib.sha256(sharedKey.encode() + dill.dumps(importEnvironment, dill.HIGHEST_PROTOCOL)).hexdigest()
+
+        return Zygote.get(key, self.studentSubmissionProcess.getZygotePreparation(sandboxFiles), environment.timeout)
 
     def run(self):
         if self.studentSubmissionProcess is None:
             raise AttributeError("Process has not be initialized!")
 
-        self.studentSubmissionProcess.start()
+        # Children are only counted once they are waited for, which happens in join or terminate
+        meter = UsageMeter(children=True)
+
+        interruptedCall = self._runProcess(self.studentSubmissionProcess)
+
+        # A call in the batch timed out or crashed, so the rest of the batch is run in a new process
+        while interruptedCall is not None:
+            process = self.studentSubmissionProcess.copy()
+            process.setBatchStart(interruptedCall + 1)
+
+            interruptedCall = self._runProcess(process)
+
+        self.runUsage = meter.stop()
+
+        if self.jobUsages:
+            # The children were waited for by the zygote rather than us
+            self.runUsage = dataclasses.replace(
+                self.runUsage,
+                user_time=sum(usage.user_time or 0 for usage in self.jobUsages),
+                system_time=sum(usage.system_time or 0 for usage in self.jobUsages),
+                max_rss=max(usage.max_rss or 0 for usage in self.jobUsages))
+
+    def _runProcess(self, studentSubmissionProcess: StudentSubmissionProcess) -> Optional[int]:
+        """
+        Runs the submission once, wherever it is being run.
+
+        :returns: The index of the batch call that was running when the child was killed or crashed, if there was one.
+        """
+        process: Union[StudentSubmissionProcess, PooledWorker, ZygoteJob] = studentSubmissionProcess
+        outputConnection: Optional[Connection] = None
+        # The zygote creates the pipe for each job itself, so only the job can hold the write end
+        sentinel: Optional[int] = None
+
+        if self.zygote is not None:
+            job = self.zygote.createJob(*studentSubmissionProcess.getZygoteJob(), timeout=self.timeoutTime)
+            job.start()
+            process, outputConnection = job, job.output
+        elif self.workerPool is not None:
+            worker = self.workerPool.acquire()
+            worker.assign(*studentSubmissionProcess.getWorkerJob(), timeout=self.timeoutTime)
+            worker.start()
+            process, outputConnection, sentinel = worker, worker.output, worker.process.sentinel
+        else:
+            outputConnection, childConnection = multiprocessing.Pipe(duplex=False)
+            studentSubmissionProcess.setOutputConnection(childConnection)
+            studentSubmissionProcess.start()
+            # the child has its own copy, closing ours means that we see EOF as soon as the child exits
+            childConnection.close()
+            sentinel = studentSubmissionProcess.sentinel
+
+        if outputConnection is None:
+            raise EnvironmentError("Failed to open the output channel for the student's submission.")
+
+        self.receiver = FrameReceiver(outputConnection, self.resultPaths)
+        self.receivers.append(self.receiver)
+
+        # The results have to be read while the child is running, otherwise large results would block the child.
+        # If a frame couldn't be decoded, nothing else is read, so the child is killed rather than waited for
+        if self._receive(sentinel) and self.receiver.error is None:
+            process.join()
+
+        self.endedAt = time.monotonic()
+
+        killed = process.is_alive()
+
+        if killed:
+            process.terminate()
+            # Keep whatever OUTPUT was printed before the submission was killed
+            self.receiver.drain()
+
+        self.exitCode = process.exitcode
+
+        if isinstance(process, ZygoteJob) and process.usage is not None:
+            self.jobUsages.append(process.usage)
+
+        self._collectCalls(self.receiver, killed)
 
-        self.studentSubmissionProcess.join()
+        if self.receiver.activeCall is not None:
+            return self.receiver.activeCall
 
-        if self.studentSubmissionProcess.is_alive():
-            self.studentSubmissionProcess.terminate()
-            self.timeoutOccurred = True
+        # If the results were already sent, the child was only slow to exit
+        self.timeoutOccurred = killed and self.receiver.getFrame(FRAME_RESULTS) is None
 
-    def _deallocate(self):
-        if self.inputSharedMem is None or self.outputSharedMem is None:
+        return None
+
+    def _receive(self, sentinel: Optional[int]) -> bool:
+        """
+        Reads the frames from the child. The timeout starts once the child starts running the student's code, rather
+        than when the child was started. For batch runners, each call gets its own timeout.
+
+        :returns: False if the child didn't start or didn't finish in time, True otherwise.
+        """
+        if self.receiver is None:
+            raise AttributeError("INVALID STATE: Receiver is NONE.")
+
+        if not self.receiver.receive(self.STARTUP_TIMEOUT, sentinel, until=FRAME_STARTED):
+            return False
+
+        self.startedAt = self.receiver.getFrame(FRAME_STARTED)
+
+        if self.startedAt is None:
+            # The child exited before it started running the submission
+            return True
+
+        while self.receiver.getFrame(FRAME_RESULTS) is None and not self.receiver.closed:
+            deadline = (self.receiver.lastProgress or self.startedAt) + self._getWallTimeout()
+
+            if not self.receiver.receiveFrame(deadline - time.monotonic(), sentinel):
+                return False
+
+        return True
+
+    def _collectCalls(self, receiver: FrameReceiver, killed: bool) -> None:
+        """
+        Collects the results of the batch calls that were made by a single child.
+
+        :param receiver: The receiver for the child
+        :param killed: If the child was killed by the parent
+        """
+        for index, callResults in receiver.callResults.items():
+            usage: Optional[ResourceUsage] = callResults.pop("metrics")
+
+            self.calls[index] = Results(**callResults, stdout=receiver.getCallOutput(index),
+                                        metrics=Metrics(usage, None, self.timeoutTime, self._getBudgetUsed(usage)))
+
+        index = receiver.activeCall
+
+        if index is None:
             return
 
-        # `close` closes the current hook
-        self.inputSharedMem.close()
-        # `unlink` tells the gc that it is ok to clean up this resource
-        #  On windows, `unlink` is a noop
-        self.inputSharedMem.unlink()
+        budgetUsed: Optional[float] = None
+        exception: Exception
 
-        self.outputSharedMem.close()
-        self.outputSharedMem.unlink()
+        if killed:
+            budgetUsed = self.endedAt - receiver.callStarts[index] if self.endedAt is not None else None
+            exception = TimeoutError(f"Call timed out after {self._getWallTimeout()} seconds")
+        elif self._exceededCpuBudget():
+            budgetUsed = self.timeoutTime
+            exception = TimeoutError(f"Call used more than {self.timeoutTime} seconds of CPU time")
+        else:
+            exception = MissingOutputDataException("submission output channel")
 
-    def cleanup(self):
+        self.calls[index] = Results(stdout=receiver.getCallOutput(index), exception=exception,
+                                    metrics=Metrics(None, None, self.timeoutTime, budgetUsed))
+
+    def _getWallTimeout(self) -> float:
+        if self.timeoutMode is TimeoutMode.CPU:
+            return self.timeoutTime * self.CPU_TIMEOUT_WALL_FACTOR
+
+        return self.timeoutTime
+
+    def _exceededCpuBudget(self) -> bool:
+        # The child kills itself with SIGPROF once it has used its CPU time budget
+        return self.timeoutMode is TimeoutMode.CPU and hasattr(signal, "SIGPROF") and \
+            self.exitCode == -signal.SIGPROF
+
+    def _getBudgetUsed(self, submissionUsage: Optional[ResourceUsage]) -> Optional[float]:
+        """
+        :returns: How much of the timeout the submission used. None if it isn't known
         """
-        This function cleans up the shared memory object by closing the parent hook and then unlinking it.
+        if submissionUsage is not None:
+            return submissionUsage.cpu_time if self.timeoutMode is TimeoutMode.CPU else submissionUsage.wall_time
+
+        if self._exceededCpuBudget():
+            return self.timeoutTime
 
-        After it is unlinked, the python garbage collector cleans it up.
-        On windows, the GC runs as soon as the last hook is closed and `unlink` is a noop
+        if self.timeoutMode is TimeoutMode.WALL and self.startedAt is not None and self.endedAt is not None:
+            return self.endedAt - self.startedAt
+
+        return None
+
+    def cleanup(self):
         """
+        This function closes the parent's end of the output channel and unpacks the results that were received.
+        """
+
+        if self.receiver is None:
+            return
 
-        if self.inputSharedMem is None or self.outputSharedMem is None:
+        for receiver in self.receivers:
+            receiver.close()
+
+        decodeError = next((receiver.error for receiver in self.receivers if receiver.error is not None), None)
+
+        if decodeError is not None:
+            # the child was likely killed as it was no longer being read, so this isn't a timeout
+            self.exception = decodeError
+            return
+
+        if self.timeoutOccurred and self.startedAt is None:
+            self.exception = TimeoutError(f"Submission failed to start within {self.STARTUP_TIMEOUT} seconds")
             return
 
         if self.timeoutOccurred:
-            self.exception = TimeoutError(f"Submission timed out after {self.timeoutTime} seconds")
-            self._deallocate()
+            self.exception = TimeoutError(f"Submission timed out after {self._getWallTimeout()} seconds")
             return
 
-        # This prolly isn't the best memory wise, but according to some chuckle head on reddit, this is superfast
-        outputBytes = self.outputSharedMem.buf.tobytes()
+        results: Optional[Dict[str, Any]] = self.receiver.getFrame(FRAME_RESULTS)
 
-        if outputBytes == bytearray(self.bufferSize):
-            self.exception = MissingOutputDataException(self.outputSharedMem.name)
-            self._deallocate()
+        if results is None and self._exceededCpuBudget():
+            self.exception = TimeoutError(f"Submission used more than {self.timeoutTime} seconds of CPU time")
             return
 
-        deserializedData: Dict[str, Any] = dill.loads(outputBytes)
+        if results is None and self._exceededCpuTimeLimit():
+            self.exception = TimeoutError(f"Submission used more than {self.cpuTimeLimit} seconds of CPU time")
+            return
 
-        self.outputData = deserializedData
+        if results is None:
+            self.exception = MissingOutputDataException("submission output channel")
+            return
+
+        self.outputData = results
+
+    def _exceededCpuTimeLimit(self) -> bool:
+        if self.cpuTimeLimit is None or self.runUsage is None or self.runUsage.cpu_time is None:
+            return False
 
-        self._deallocate()
+        # Setting up the child isn't counted against the limit, so the child as a whole used at least this much
+        return self.runUsage.cpu_time >= self.cpuTimeLimit
 
     def populateResults(self, environment: ExecutionEnvironment):
         if not self.outputData:
@@ -334,14 +928,43 @@ class RunnableStudentSubmission(ISubmissionProcess):
                 },
             }
 
+        submissionUsage: Optional[ResourceUsage] = self.outputData.get("metrics")
+        resultBytes = self.receiver.frameBytes.get(FRAME_RESULTS) if self.receiver is not None else None
+        self.outputData["metrics"] = Metrics(submissionUsage, self.runUsage, self.timeoutTime,
+                                             self._getBudgetUsed(submissionUsage), self.outputData.pop("tasks", None),
+                                             resultBytes)
+
         self.outputData["file_out"] = detectFileSystemChanges(environment.files.values(), environment.SANDBOX_LOCATION)
-        self.outputData["stdout"] = filterStdOut(self.outputData["stdout"])
+
+        if self.receivers:
+            # The OUTPUT lines were filtered in the child as they were printed
+            self.outputData["stdout"] = self._getStdout()
+            diagnostics = [receiver.getFrame(FRAME_DIAGNOSTICS) for receiver in self.receivers]
+            self.outputData["impl_results"]["diagnostic_output"] = \
+                "\n".join(filter(None, diagnostics)) if any(diagnostics) else diagnostics[-1]
+
+        if self.calls:
+            self.outputData["calls"] = [self.calls[index] for index in sorted(self.calls)]
 
         if "impl_results" in self.outputData:
             self.outputData["impl_results"] = PythonResults(**self.outputData["impl_results"])
 
         environment.resultData = Results(**self.outputData)
 
+    def _getStdout(self) -> Optional[List[str]]:
+        if len(self.receivers) == 1:
+            return self.receivers[0].stdout
+
+        stdout: Optional[List[str]] = None
+
+        for receiver in self.receivers:
+            if receiver.stdout is None:
+                continue
+
+            stdout = (stdout or []) + receiver.stdout
+
+        return stdout
+
     @classmethod
     def processAndRaiseExceptions(cls, environment: ExecutionEnvironment):
         if environment.resultData is None:
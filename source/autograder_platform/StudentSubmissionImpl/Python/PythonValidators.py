@@ -1,10 +1,11 @@
 import importlib.util
-from typing import Callable, Dict, List
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
 import os
 from autograder_platform.StudentSubmission.AbstractValidator import AbstractValidator
 from autograder_platform.StudentSubmission.common import ValidationHook
-from autograder_platform.StudentSubmissionImpl.Python.common import FileTypeMap, InvalidPackageError, InvalidRequirementsFileError, MissingMainFileError, NoPyFilesError, TooManyFilesError
+from autograder_platform.StudentSubmissionImpl.Python.common import FileTypeMap, InvalidPackageError, InvalidRequirementsFileError, MissingMainFileError, NoPyFilesError, PackageIndexUnavailableError, TooManyFilesError
+from autograder_platform.StudentSubmissionImpl.Python.PythonPackageIndex import getPackageIndexCache, getPackageIndexes
 
 class PythonFileValidator(AbstractValidator):
 
@@ -93,13 +94,25 @@ class RequirementsValidator(AbstractValidator):
             )
 
 class PackageValidator(AbstractValidator):
+    """
+    Checks that each extra package exists before anything is installed.
 
-    PYPI_BASE = "https://pypi.org/pypi/"
+    Packages are looked up in the indexes from ``getPackageIndexes`` at the same time, and the answers are cached (see
+    :ref:`PythonPackageIndex`), so only packages that haven't been seen recently are looked up at all.
+    """
+
+    MAX_LOOKUPS: int = 8
+    """The max number of packages that are looked up at the same time"""
 
     @staticmethod
     def getValidationHook() -> ValidationHook:
         return ValidationHook.PRE_BUILD
 
+    @staticmethod
+    def isIndependent() -> bool:
+        # lookups wait on the network, so this should overlap with the other validators
+        return True
+
     def __init__(self):
         super().__init__()
         self.packages: Dict[str, str] = {}
@@ -107,24 +120,54 @@ class PackageValidator(AbstractValidator):
     def setup(self, studentSubmission):
         self.packages = studentSubmission.getExtraPackages()
 
+    @staticmethod
+    def _lookUp(package: str, version: str) -> Optional[bool]:
+        unknown = False
+
+        for index in getPackageIndexes():
+            exists = index.exists(package, version)
+
+            if exists:
+                return True
+
+            unknown = unknown or exists is None
+
+        return None if unknown else False
+
     def run(self):
+        cache = getPackageIndexCache()
+
+        results: Dict[str, Optional[bool]] = {}
+        toLookUp: List[str] = []
 
         for package, version in self.packages.items():
             if importlib.util.find_spec(package) != None:
+                results[package] = True
                 continue
 
-            url = self.PYPI_BASE + package + "/"
+            results[package] = cache.get(package, version)
 
-            if version:
-                url += version + "/"
+            if results[package] is None:
+                toLookUp.append(package)
 
-            url += "json"
+        if toLookUp:
+            with ThreadPoolExecutor(max_workers=min(self.MAX_LOOKUPS, len(toLookUp))) as pool:
+                answers = pool.map(lambda package: self._lookUp(package, self.packages[package]), toLookUp)
 
-            if requests.get(url=url).status_code == 200:
-                continue
+                for package, exists in zip(toLookUp, answers):
+                    results[package] = exists
 
-            self.addError(InvalidPackageError(package, version))
+                    if exists is not None:
+                        cache.set(package, self.packages[package], exists)
 
+            cache.save()
 
-        
+        for package, version in self.packages.items():
+            if results[package]:
+                continue
+
+            if results[package] is None:
+                self.addError(PackageIndexUnavailableError(package, version))
+                continue
 
+            self.addError(InvalidPackageError(package, version))
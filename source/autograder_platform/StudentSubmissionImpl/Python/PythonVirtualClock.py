@@ -0,0 +1,145 @@
+"""
+This module provides the virtual clock that lets submissions sleep without waiting.
+
+While the clock is installed, ``time.sleep`` returns immediately and adds the time to the clock instead. Every clock the
+submission can read (``time.time``, ``time.monotonic``, ``time.perf_counter``, their ``_ns`` variants, and
+``datetime.now``) is the real clock plus the time that has been slept, so the submission sees time pass as it would if it
+had actually slept.
+
+The clock is only installed while the student's code is running, so the autograder's own timing in the child isn't
+affected.
+
+:author: Gregory Bell
+"""
+
+import datetime
+import time
+from typing import Any, Dict, Optional
+
+
+class VirtualClock:
+    """
+    Description
+    ===========
+
+    Tracks how long the submission has slept, and replaces the functions in ``time`` and ``datetime`` while installed.
+
+    Functions that the submission imported directly (ie: ``from time import sleep``) while the clock was installed keep
+    using the clock after it is uninstalled, which is fine as the clock is only ever read by the submission.
+    """
+
+    def __init__(self):
+        self.slept: float = 0.0
+        """The total number of seconds that the submission has slept"""
+        self.originals: Optional[Dict[str, Any]] = None
+        self.realTime = time.time
+        self.realMonotonic = time.monotonic
+        self.realPerfCounter = time.perf_counter
+
+    def sleep(self, seconds: float) -> None:
+        seconds = float(seconds)
+
+        if seconds < 0:
+            raise ValueError("sleep length must be non-negative")
+
+        self.slept += seconds
+
+    def time(self) -> float:
+        return self.realTime() + self.slept
+
+    def time_ns(self) -> int:
+        return int(self.time() * 1e9)
+
+    def monotonic(self) -> float:
+        return self.realMonotonic() + self.slept
+
+    def monotonic_ns(self) -> int:
+        return int(self.monotonic() * 1e9)
+
+    def perf_counter(self) -> float:
+        return self.realPerfCounter() + self.slept
+
+    def perf_counter_ns(self) -> int:
+        return int(self.perf_counter() * 1e9)
+
+    def isInstalled(self) -> bool:
+        return self.originals is not None
+
+    def install(self) -> None:
+        """
+        Replaces the clocks in ``time`` and ``datetime``. Does nothing if the clock is already installed.
+        """
+        if self.originals is not None:
+            return
+
+        self.originals = {
+            "sleep": time.sleep, "time": time.time, "time_ns": time.time_ns,
+            "monotonic": time.monotonic, "monotonic_ns": time.monotonic_ns,
+            "perf_counter": time.perf_counter, "perf_counter_ns": time.perf_counter_ns,
+        }
+
+        for name in self.originals:
+            setattr(time, name, getattr(self, name))
+
+        self.originals["datetime"] = datetime.datetime
+        self.originals["date"] = datetime.date
+
+        datetime.datetime = VirtualDatetime  # type: ignore
+        datetime.date = VirtualDate  # type: ignore
+
+    def uninstall(self) -> None:
+        if self.originals is None:
+            return
+
+        datetime.datetime = self.originals.pop("datetime")  # type: ignore
+        datetime.date = self.originals.pop("date")  # type: ignore
+
+        for name, function in self.originals.items():
+            setattr(time, name, function)
+
+        self.originals = None
+
+
+VIRTUAL_CLOCK: Optional[VirtualClock] = None
+"""The clock for this process. See :ref:`getVirtualClock`"""
+
+
+def getVirtualClock() -> VirtualClock:
+    """
+    :returns: The clock for this process. It is created on the first call. Forked children (ie: from a zygote) keep
+    the time that was slept before they were forked.
+    """
+    global VIRTUAL_CLOCK
+
+    if VIRTUAL_CLOCK is None:
+        VIRTUAL_CLOCK = VirtualClock()
+
+    return VIRTUAL_CLOCK
+
+
+class VirtualDatetime(datetime.datetime):
+    """
+    ``datetime.datetime``, but ``now``, ``today``, and ``utcnow`` are read from the virtual clock.
+    """
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.fromtimestamp(getVirtualClock().time(), tz)
+
+    @classmethod
+    def today(cls):
+        return cls.now()
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class VirtualDate(datetime.date):
+    """
+    ``datetime.date``, but ``today`` is read from the virtual clock.
+    """
+
+    @classmethod
+    def today(cls):
+        return cls.fromtimestamp(getVirtualClock().time())
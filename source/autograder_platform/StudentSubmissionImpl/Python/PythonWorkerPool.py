@@ -0,0 +1,281 @@
+"""
+This module provides a pool of pre-started worker processes for running student submissions.
+
+Starting a new process for every run means that each test pays for the process start (and on platforms that use
+'spawn' a whole new interpreter and all of its imports) before any student code is run. The workers in this pool are
+started ahead of time in the background, have already imported a set of commonly used modules, and then block until
+they are assigned a single job.
+
+Workers are one-shot. Once a worker has run its job it exits, so every run of the student's submission still gets a
+clean process. The pool replaces used workers in the background.
+
+:author: Gregory Bell
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from collections import deque
+from importlib import import_module
+from multiprocessing.connection import Connection
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import dill
+
+
+def _workerMain(connection: Connection, output: Connection, preloadModules: List[str]) -> None:
+    """
+    The entrypoint for the worker processes.
+
+    This imports all the modules that should be preloaded, then blocks until a job is received from the parent.
+
+    :param connection: The read end of the pipe that the job will be sent over
+    :param output: The write end of the pipe that the job sends its results over. This is passed to the job.
+    :param preloadModules: The modules to import before waiting for a job
+    """
+    for module in preloadModules:
+        try:
+            import_module(module)
+        except ImportError:
+            # preloading is only an optimization, the submission will still import what it needs
+            continue
+
+    try:
+        payload = connection.recv_bytes()
+    except EOFError:
+        # the pool was shut down before this worker was assigned a job
+        output.close()
+        return
+    finally:
+        connection.close()
+
+    target, args = dill.loads(payload)
+
+    target(output, *args)
+
+
+class PooledWorker:
+    """
+    A single pre-started worker.
+
+    This mirrors the parts of the ``multiprocessing.Process`` interface that are used to run student submissions,
+    so that a worker can be driven the same way as a freshly created :ref:`StudentSubmissionProcess`.
+    """
+
+    def __init__(self, context: multiprocessing.context.BaseContext, preloadModules: List[str]):
+        reader, self.connection = context.Pipe(duplex=False)
+        self.output, writer = context.Pipe(duplex=False)
+        self.process: multiprocessing.process.BaseProcess = \
+            context.Process(target=_workerMain, args=(reader, writer, preloadModules),
+                            name="Student Submission")  # type: ignore
+
+        self.process.start()
+
+        # the child has its own copy of these ends now.
+        # Closing the write end here means that the output reaches EOF as soon as the worker exits
+        reader.close()
+        writer.close()
+
+        self.job: Optional[Tuple[Callable[..., None], Tuple[object, ...]]] = None
+        self.timeout: float = 10
+
+    def assign(self, target: Callable[..., None], args: Tuple[object, ...], timeout: float) -> None:
+        """
+        Assigns the job that this worker will run once it is started.
+
+        :param target: The callable to run in the worker. It is called with the write end of ``output``, then ``args``.
+        Must be serializable by dill.
+        :param args: The arguments to pass to target
+        :param timeout: The max amount of time that ``join`` will wait for the worker
+        """
+        self.job = (target, args)
+        self.timeout = timeout
+
+    def start(self) -> None:
+        if self.job is None:
+            raise AttributeError("INVALID STATE: Worker was started without a job!")
+
+        try:
+            self.connection.send_bytes(dill.dumps(self.job, dill.HIGHEST_PROTOCOL))
+        except OSError as ex:
+            raise EnvironmentError(f"Failed to send job to worker process.\n{ex}")
+        finally:
+            self.connection.close()
+
+    def join(self, *args, **kwargs) -> None:
+        self.process.join(timeout=self.timeout)
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    @property
+    def exitcode(self) -> Optional[int]:
+        return self.process.exitcode
+
+    def terminate(self) -> None:
+        # SigKill - cant be caught
+        self.process.kill()
+        # Clean up the zombie. SIGKILL is delivered asynchronously, so give it a moment to land
+        self.process.join(timeout=1)
+
+    def shutdown(self) -> None:
+        """
+        Releases a worker that was never assigned a job.
+        Closing the connection causes the worker to exit on its own.
+        """
+        self.connection.close()
+        self.output.close()
+        self.process.join(timeout=1)
+
+        if self.process.is_alive():
+            self.terminate()
+
+
+def getDefaultStartMethod() -> Optional[str]:
+    """
+    :returns: ``forkserver`` if it is supported on this platform (POSIX), as it keeps starting a worker cheap no matter
+    how large the parent is. Otherwise, None for the platform default.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return "forkserver"
+
+    return None
+
+
+class WorkerPool:
+    """
+    Description
+    ===========
+
+    This class maintains ``size`` idle workers that are ready to run a student's submission.
+
+    Pools are shared across the whole process; use :ref:`WorkerPool.get` rather than constructing them directly so
+    that runs with the same configuration reuse the same pool.
+
+    When ``startMethod`` is ``forkserver`` (the default where it is available), workers are forked from a small server
+    process that has imported the preloaded modules, so the cost of starting a worker doesn't grow as the parent process
+    grows. With ``fork``, each worker is a copy of the whole parent, and with ``spawn``, each worker starts a new
+    interpreter and imports the preloaded modules itself.
+    """
+    pools: Dict[Tuple[int, Tuple[str, ...], Optional[str]], "WorkerPool"] = {}
+    poolsLock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def get(cls, size: int, preloadModules: List[str], startMethod: Optional[str] = None) -> "WorkerPool":
+        """
+        Gets the pool for this configuration, creating it if it doesn't exist yet.
+
+        :param size: The number of idle workers to keep ready.
+        :param preloadModules: The modules that each worker should import before it is used.
+        :param startMethod: The multiprocessing start method. If None, see :ref:`getDefaultStartMethod`.
+        """
+        key = (size, tuple(preloadModules), startMethod)
+
+        with cls.poolsLock:
+            if key not in cls.pools:
+                cls.pools[key] = WorkerPool(size, preloadModules, startMethod)
+
+            return cls.pools[key]
+
+    @classmethod
+    def shutdownAll(cls) -> None:
+        with cls.poolsLock:
+            for pool in cls.pools.values():
+                pool.shutdown()
+
+            cls.pools = {}
+
+    @classmethod
+    def _forgetAll(cls) -> None:
+        """
+        Drops the pools without shutting them down. Used in forked children, as the workers belong to the parent.
+        """
+        cls.pools = {}
+        cls.poolsLock = threading.Lock()
+
+    def __init__(self, size: int, preloadModules: List[str], startMethod: Optional[str] = None):
+        if size < 1:
+            raise AttributeError(f"Worker pool size must be at least 1. Was {size}")
+
+        self.size: int = size
+        self.preloadModules: List[str] = list(preloadModules)
+        self.context: multiprocessing.context.BaseContext = \
+            multiprocessing.get_context(startMethod if startMethod is not None else getDefaultStartMethod())
+
+        if self.context.get_start_method() == "forkserver":
+            self.context.set_forkserver_preload(self.preloadModules)  # type: ignore
+
+        self.idleWorkers: Deque[PooledWorker] = deque()
+        self.condition: threading.Condition = threading.Condition()
+        self.isShutdown: bool = False
+
+        self.replenishThread: threading.Thread = \
+            threading.Thread(target=self._replenish, name="Worker Pool Replenisher", daemon=True)
+        self.replenishThread.start()
+
+    def _replenish(self) -> None:
+        while True:
+            with self.condition:
+                while not self.isShutdown and len(self.idleWorkers) >= self.size:
+                    self.condition.wait()
+
+                if self.isShutdown:
+                    return
+
+            # starting the worker is the slow part, so it is done without holding the lock
+            worker = PooledWorker(self.context, self.preloadModules)
+
+            with self.condition:
+                if self.isShutdown:
+                    worker.shutdown()
+                    return
+
+                self.idleWorkers.append(worker)
+                self.condition.notify_all()
+
+    def acquire(self) -> PooledWorker:
+        """
+        Takes an idle worker from the pool.
+        If no workers are ready, a new one is started immediately rather than waiting on the background thread.
+
+        The pool is replenished in the background.
+        """
+        worker: Optional[PooledWorker] = None
+
+        with self.condition:
+            if self.isShutdown:
+                raise EnvironmentError("Worker pool has already been shutdown!")
+
+            while self.idleWorkers:
+                candidate = self.idleWorkers.popleft()
+
+                if candidate.is_alive():
+                    worker = candidate
+                    break
+
+                # The worker died before it was used. This can happen if a preloaded module crashes the interpreter
+                candidate.shutdown()
+
+            self.condition.notify_all()
+
+        if worker is None:
+            worker = PooledWorker(self.context, self.preloadModules)
+
+        return worker
+
+    def shutdown(self) -> None:
+        with self.condition:
+            self.isShutdown = True
+            workers = list(self.idleWorkers)
+            self.idleWorkers.clear()
+            self.condition.notify_all()
+
+        for worker in workers:
+            worker.shutdown()
+
+
+# Idle workers have to be released before multiprocessing tries to join them at exit
+atexit.register(WorkerPool.shutdownAll)
+# Forked children (ie: parallel test workers) must start their own pools
+os.register_at_fork(after_in_child=WorkerPool._forgetAll)
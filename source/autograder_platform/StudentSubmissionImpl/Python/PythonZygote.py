@@ -0,0 +1,331 @@
+"""
+This module provides zygote processes for running student submissions.
+
+A zygote runs the expensive part of a run that is the same for every test (importing the submission, for example)
+exactly once. Each run then gets a copy-on-write fork of the zygote, so every test still starts from the same clean
+state without paying for the shared work again.
+
+Zygotes require ``os.fork`` and are only supported on POSIX platforms.
+
+:author: Gregory Bell
+"""
+
+import atexit
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import reduction
+from multiprocessing.connection import Connection
+from typing import Callable, Dict, Optional, Tuple
+
+import dill
+
+from autograder_platform.Executors.Metrics import ResourceUsage, usageFromRusage
+
+
+def _zygoteMain(connection: Connection, preparation: bytes) -> None:
+    """
+    The entrypoint for the zygote process.
+
+    This runs the preparation job once and reports to the parent whether it succeeded.
+    Then, for each job received from the parent, a child is forked to run it. The pid of the child is sent to the parent
+    so that it can be killed if it times out, followed by the read end of a new pipe that the child sends its results
+    over. The resources that the child used and its exit code are sent once it exits.
+
+    :param connection: The zygote's end of the duplex pipe to the parent
+    :param preparation: The serialized target and arguments for the preparation job. The target must return the state
+    that will be passed to every job, or None if the preparation failed.
+    """
+    target, args = dill.loads(preparation)
+
+    state = target(*args)
+
+    connection.send(state is not None)
+
+    if state is None:
+        connection.close()
+        return
+
+    while True:
+        try:
+            payload = connection.recv_bytes()
+        except EOFError:
+            # parent has shut us down
+            break
+
+        job, jobArgs = dill.loads(payload)
+
+        # Each job gets its own pipe so that the parent sees EOF when the child exits, no matter how it exits
+        reader, writer = multiprocessing.Pipe(duplex=False)
+
+        startTime = time.perf_counter()
+        pid = os.fork()
+
+        if pid == 0:  # pragma: no coverage
+            connection.close()
+            reader.close()
+            try:
+                job(state, writer, *jobArgs)
+            finally:
+                # Skip all the interpreter teardown, this child shares all of that with the zygote
+                os._exit(0)
+
+        writer.close()
+
+        connection.send(pid)
+        reduction.send_handle(connection, reader.fileno(), os.getppid())
+        reader.close()
+
+        # The parent can't wait for the child itself, so it can't measure it
+        _, status, rusage = os.wait4(pid, 0)
+        connection.send((usageFromRusage(rusage, time.perf_counter() - startTime), os.waitstatus_to_exitcode(status)))
+
+    connection.close()
+
+
+class ZygoteJob:
+    """
+    A single run that is forked from a zygote.
+
+    This mirrors the parts of the ``multiprocessing.Process`` interface that are used to run student submissions,
+    so that a job can be driven the same way as a freshly created :ref:`StudentSubmissionProcess`.
+    """
+
+    def __init__(self, zygote: "Zygote", target: Callable[..., None], args: Tuple[object, ...], timeout: float):
+        self.zygote: Zygote = zygote
+        self.job: Tuple[Callable[..., None], Tuple[object, ...]] = (target, args)
+        self.timeout: float = timeout
+        self.pid: Optional[int] = None
+        self.output: Optional[Connection] = None
+        self.finished: bool = False
+        self.usage: Optional[ResourceUsage] = None
+        """The resources that the child used. Only set once the child has exited"""
+        self.exitcode: Optional[int] = None
+        """The exit code of the child, negative if it was killed by a signal. Only set once the child has exited"""
+
+    def start(self) -> None:
+        # the zygote runs one job at a time and answers on the shared connection, so the connection belongs to this job
+        # until the zygote says that the child has exited
+        self.zygote.jobLock.acquire()
+
+        try:
+            self.zygote.connection.send_bytes(dill.dumps(self.job, dill.HIGHEST_PROTOCOL))
+            self.pid = self.zygote.connection.recv()
+            self.output = Connection(reduction.recv_handle(self.zygote.connection), writable=False)
+        except (OSError, EOFError) as ex:
+            self._setFinished()
+            self.zygote.shutdown()
+            raise EnvironmentError(f"Failed to send job to zygote process.\n{ex}")
+
+    def _setFinished(self) -> None:
+        if self.finished:
+            return
+
+        self.finished = True
+        self.zygote.jobLock.release()
+
+    def _waitForExit(self, timeout: float) -> None:
+        if self.finished:
+            return
+
+        try:
+            if self.zygote.connection.poll(timeout):
+                self.usage, self.exitcode = self.zygote.connection.recv()
+                self._setFinished()
+        except (OSError, EOFError):
+            # if the zygote died, so did the child
+            self._setFinished()
+
+    def join(self, *args, **kwargs) -> None:
+        self._waitForExit(self.timeout)
+
+    def is_alive(self) -> bool:
+        return not self.finished
+
+    def terminate(self) -> None:
+        if self.pid is not None and not self.finished:
+            try:
+                # SigKill - cant be caught
+                os.kill(self.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+        # the zygote reaps the child, then tells us that it is done
+        self._waitForExit(1)
+
+        if not self.finished:
+            # The zygote is in an unknown state, so it can't be reused
+            self.zygote.shutdown()
+            self._setFinished()
+
+
+class Zygote:
+    """
+    Description
+    ===========
+
+    This class manages a single zygote process.
+
+    Zygotes are shared across the whole process; use :ref:`Zygote.get` rather than constructing them directly so that
+    runs with the same preparation reuse the same zygote. At most ``MAX_ZYGOTES`` zygotes are kept alive at a time, the
+    least recently used zygote is shut down first.
+
+    Jobs are run one at a time. Jobs started from other threads wait for the running job to finish.
+    """
+    MAX_ZYGOTES: int = 8
+
+    zygotes: "OrderedDict[str, Optional[Zygote]]" = OrderedDict()
+    zygotesLock: threading.Lock = threading.Lock()
+    preparationLocks: Dict[str, threading.Lock] = {}
+    """The locks for the zygotes that are being prepared, so each one is only prepared once"""
+
+    @staticmethod
+    def isSupported() -> bool:
+        return hasattr(os, "fork")
+
+    @classmethod
+    def get(cls, key: str, preparation: Tuple[Callable[..., object], Tuple[object, ...]],
+            timeout: float) -> Optional["Zygote"]:
+        """
+        Gets the zygote for ``key``, creating it if it doesn't exist yet.
+
+        :param key: The key that uniquely identifies the preparation.
+        :param preparation: The target and arguments that will be run once in the zygote.
+        :param timeout: The max amount of time to wait for the preparation to finish.
+        :returns: The zygote, or None if the preparation failed or timed out for this key.
+        In that case, the caller should run normally.
+        """
+        with cls.zygotesLock:
+            found, zygote = cls._getExisting(key)
+
+            if found:
+                return zygote
+
+            keyLock = cls.preparationLocks.setdefault(key, threading.Lock())
+
+        # Preparing can take as long as the timeout, so only runs with the same key wait for it
+        with keyLock:
+            with cls.zygotesLock:
+                found, zygote = cls._getExisting(key)
+
+            if found:
+                return zygote
+
+            zygote = Zygote(preparation)
+
+            if not zygote.waitUntilReady(timeout):
+                zygote.shutdown()
+                zygote = None
+
+            with cls.zygotesLock:
+                cls.zygotes[key] = zygote
+                cls.preparationLocks.pop(key, None)
+
+                while len(cls.zygotes) > cls.MAX_ZYGOTES:
+                    _, evicted = cls.zygotes.popitem(last=False)
+
+                    if evicted is not None:
+                        evicted.shutdown()
+
+            return zygote
+
+    @classmethod
+    def _getExisting(cls, key: str) -> Tuple[bool, Optional["Zygote"]]:
+        """
+        Must be called while holding ``zygotesLock``.
+
+        :returns: If there is a zygote for ``key``, and the zygote (None if its preparation failed)
+        """
+        if key not in cls.zygotes:
+            return False, None
+
+        cls.zygotes.move_to_end(key)
+        zygote = cls.zygotes[key]
+
+        if zygote is None or zygote.isAlive():
+            return True, zygote
+
+        del cls.zygotes[key]
+
+        return False, None
+
+    @classmethod
+    def shutdownAll(cls) -> None:
+        with cls.zygotesLock:
+            for zygote in cls.zygotes.values():
+                if zygote is not None:
+                    zygote.shutdown()
+
+            cls.zygotes = OrderedDict()
+
+    @classmethod
+    def _forgetAll(cls) -> None:
+        """
+        Drops the zygotes without shutting them down. Used in forked children, as the zygotes belong to the parent.
+        """
+        cls.zygotes = OrderedDict()
+        cls.zygotesLock = threading.Lock()
+        cls.preparationLocks = {}
+
+    def __init__(self, preparation: Tuple[Callable[..., object], Tuple[object, ...]]):
+        if not Zygote.isSupported():
+            raise EnvironmentError("Zygotes are not supported on this platform!")
+
+        context = multiprocessing.get_context("fork")
+
+        self.connection, child = context.Pipe(duplex=True)
+        self.process: multiprocessing.process.BaseProcess = \
+            context.Process(target=_zygoteMain, args=(child, dill.dumps(preparation, dill.HIGHEST_PROTOCOL)),
+                            name="Student Submission Zygote")  # type: ignore
+
+        self.process.start()
+
+        child.close()
+
+        self.isShutdown: bool = False
+        self.jobLock: threading.Lock = threading.Lock()
+        """Held by the job that is using the connection. See :ref:`ZygoteJob.start`"""
+
+    def waitUntilReady(self, timeout: float) -> bool:
+        try:
+            return bool(self.connection.poll(timeout) and self.connection.recv())
+        except (OSError, EOFError):
+            return False
+
+    def isAlive(self) -> bool:
+        return not self.isShutdown and self.process.is_alive()
+
+    def createJob(self, target: Callable[..., None], args: Tuple[object, ...], timeout: float) -> ZygoteJob:
+        """
+        Creates a job that will be run in a fork of this zygote.
+
+        :param target: The callable to run in the fork. It is called with the zygote's state, the write end of the job's
+        output pipe, then ``args``.
+        Must be serializable by dill.
+        :param args: The arguments to pass to target
+        :param timeout: The max amount of time that ``join`` will wait for the job
+        """
+        if not self.isAlive():
+            raise EnvironmentError("Zygote has already been shutdown!")
+
+        return ZygoteJob(self, target, args, timeout)
+
+    def shutdown(self) -> None:
+        if self.isShutdown:
+            return
+
+        self.isShutdown = True
+        self.connection.close()
+        self.process.join(timeout=1)
+
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=1)
+
+
+atexit.register(Zygote.shutdownAll)
+# Forked children (ie: parallel test workers) must start their own zygotes
+os.register_at_fork(after_in_child=Zygote._forgetAll)
@@ -1,12 +1,19 @@
+import hashlib
 from importlib import import_module
 from types import CodeType, ModuleType
-from typing import TypeVar, Tuple, List, Final, Optional, Dict, Callable, TypedDict
+from typing import TypeVar, Tuple, List, Final, Optional, Dict, Callable, TypedDict, Union
 
+import dill
+
+from autograder_platform.Executors.Trace import getTraceRecorder
 from autograder_platform.StudentSubmission.common import InvalidRunner, MissingFunctionDefinition
 from autograder_platform.StudentSubmissionImpl.Python import PythonSubmission
+from autograder_platform.StudentSubmissionImpl.Python.PythonCodeCache import getCodeCache
+from autograder_platform.StudentSubmissionImpl.Python.PythonSubmissionImportFactory import SubmissionModuleFinder
+from autograder_platform.StudentSubmissionImpl.Python.PythonModuleMockImportFactory import resolveStubMock
 from autograder_platform.StudentSubmissionImpl.Python.common import PythonTaskResult
 from autograder_platform.Tasks.TaskRunner import TaskRunner
-from autograder_platform.Tasks.Task import Task
+from autograder_platform.Tasks.Task import ResultOf, Task, Value
 from autograder_platform.TestingFramework.SingleFunctionMock import SingleFunctionMock
 
 Builder = TypeVar('Builder', bound="PythonRunnerBuilder")
@@ -46,10 +53,18 @@ class Parameter:
             raise AttributeError("Attempt to access value when value is null!")
         return self._value
 
-    def get(self, module: ModuleType) -> object:
+    def get(self, module: ModuleType, stepValues: Optional[Dict[str, object]] = None) -> object:
+        """
+        :param module: The module to look up autowired parameters in
+        :param stepValues: The values of the steps that have already run in a sequence. Autowired names are looked up in
+        these before the module.
+        """
         if not self.useAutowire:
             return self.value
 
+        if stepValues is not None and self.autowire in stepValues:
+            return stepValues[self.autowire]
+
         autowiredParam: Optional[object] = getattr(module, self.autowire, None)
 
         if autowiredParam is None:
@@ -59,8 +74,133 @@ class Parameter:
         return autowiredParam
 
 
+class BatchCall:
+    """
+    A single call in a batch. See :ref:`PythonRunnerBuilder.addParameterSet`.
+    """
+
+    def __init__(self, parameters: List[Parameter], stdin: Optional[List[str]]):
+        self.parameters: List[Parameter] = parameters
+        self.stdin: Optional[List[str]] = stdin
+        """The stdin for this call. If None, the stdin from the environment is used"""
+
+
+class BatchPlan:
+    """
+    Description
+    ===========
+
+    The calls that are left to make once a batch runner has been run.
+
+    Each call is run by the submission process rather than as a task, as the process has to handle the stdin, stdout,
+    and timeout of each call.
+    """
+
+    def __init__(self, module: ModuleType, method: Callable[..., object], calls: List[BatchCall]):
+        self.module: ModuleType = module
+        self.method: Callable[..., object] = method
+        self.calls: List[BatchCall] = calls
+
+
+class Step:
+    """
+    Description
+    ===========
+
+    A single step in a sequence. See :ref:`PythonRunnerBuilder.addConstructorStep`.
+
+    Steps refer to the values of earlier steps by name, either as the ``target`` of the step or as an autowired
+    :ref:`Parameter`.
+    """
+
+    def __init__(self, name: str, target: Optional[str] = None, parameters: Optional[List[Parameter]] = None):
+        self.name: str = name
+        self.target: Optional[str] = target
+        """The name of the step whose value this step acts on. None if the step acts on the module"""
+        self.parameters: List[Parameter] = parameters if parameters is not None else []
+
+    def run(self, module: ModuleType, stepValues: Dict[str, object]) -> RunMethodResult:
+        raise NotImplementedError()
+
+
+class ConstructorStep(Step):
+    """
+    Creates an instance of a class from the submission.
+    """
+
+    def __init__(self, name: str, className: str, parameters: List[Parameter]):
+        super().__init__(name, parameters=parameters)
+        self.className: str = className
+
+    def run(self, module: ModuleType, stepValues: Dict[str, object]) -> RunMethodResult:
+        cls: Optional[Callable[..., object]] = getattr(module, self.className, None)
+
+        if cls is None:
+            raise MissingFunctionDefinition(self.className)
+
+        processedParameters = tuple([parameter.get(module, stepValues) for parameter in self.parameters])
+
+        return {"return_val": cls(*processedParameters), "parameters": processedParameters}
+
+
+class MethodStep(Step):
+    """
+    Calls a method on the value of an earlier step.
+    """
+
+    def __init__(self, name: str, target: str, method: str, parameters: List[Parameter]):
+        super().__init__(name, target, parameters)
+        self.method: str = method
+
+    def run(self, module: ModuleType, stepValues: Dict[str, object]) -> RunMethodResult:
+        method: Optional[Callable[..., object]] = getattr(stepValues[self.target], self.method, None)  # type: ignore
+
+        if method is None:
+            raise MissingFunctionDefinition(self.method)
+
+        processedParameters = tuple([parameter.get(module, stepValues) for parameter in self.parameters])
+
+        return {"return_val": method(*processedParameters), "parameters": processedParameters}
+
+
+class AttributeStep(Step):
+    """
+    Reads an attribute from the value of an earlier step.
+    """
+
+    def __init__(self, name: str, target: str, attribute: str):
+        super().__init__(name, target)
+        self.attribute: str = attribute
+
+    def run(self, module: ModuleType, stepValues: Dict[str, object]) -> RunMethodResult:
+        return {"return_val": getattr(stepValues[self.target], self.attribute), "parameters": ()}  # type: ignore
+
+
+class StepResult:
+    """
+    The result of a single step in a sequence.
+    """
+
+    def __init__(self, name: str, return_val: object = None, parameters: Optional[Tuple[object, ...]] = None,
+                 exception: Optional[BaseException] = None):
+        self.name: str = name
+        self.return_val: object = return_val
+        self.parameters: Optional[Tuple[object, ...]] = parameters
+        self.exception: Optional[BaseException] = exception
+
+    def __repr__(self) -> str:
+        return f"StepResult({self.name!r}, return_val={self.return_val!r}, exception={self.exception!r})"
+
+
 class PythonTaskLibrary:
 
+    @staticmethod
+    def installSubmissionModules(submissionModules: Optional[SubmissionModuleFinder]) -> None:
+        if submissionModules is None:
+            return
+
+        submissionModules.install()
+
     @staticmethod
     def attemptToImport(submission: CodeType) -> ModuleType:
         module = ModuleType("submission")
@@ -75,12 +215,13 @@ class PythonTaskLibrary:
             exec(code, vars(module))
 
     @staticmethod
-    def applyMocks(module: ModuleType, mocks: Dict[str, Optional[SingleFunctionMock]]) -> None:
+    def applyMocks(module: ModuleType, mocks: Dict[str, Optional[SingleFunctionMock]]) -> Dict[str, Optional[SingleFunctionMock]]:
         """
         This function applies the mocks to the student's submission at the module level.
 
         :param module: the module to apply mocks to
         :param mocks: the dictionary of mocks to apply
+        :returns: the mocks that were applied. These are the instances that will record calls from the submission.
 
         :raises AttributeError: If a mock name cannot be resolved
         """
@@ -93,6 +234,8 @@ class PythonTaskLibrary:
 
             setattr(module, mockName, mock)
 
+        return mocks
+
     @staticmethod
     def getMethod(module: ModuleType, methodToRun: str) -> Callable:
         method: Optional[Callable] = getattr(module, methodToRun, None)
@@ -111,6 +254,34 @@ class PythonTaskLibrary:
 
         return {"return_val": returnVal, "parameters": processedParameters}
 
+    @staticmethod
+    def createBatch(module: ModuleType, methodToRun: Callable[..., object], calls: List[BatchCall]) -> BatchPlan:
+        return BatchPlan(module, methodToRun, calls)
+
+    @staticmethod
+    def runSequence(module: ModuleType, steps: List[Step]) -> RunMethodResult:
+        """
+        Runs each step in order. If a step fails, the steps after it aren't run, as they likely depend on the state
+        that the failed step was supposed to create.
+
+        :returns: The results of the steps that were run, keyed by the name of the step, as the return value.
+        """
+        stepValues: Dict[str, object] = {}
+        stepResults: Dict[str, StepResult] = {}
+
+        for step in steps:
+            try:
+                result = step.run(module, stepValues)
+            except (Exception, SystemExit) as ex:
+                # An exit in a step should be reported like any other failed step
+                stepResults[step.name] = StepResult(step.name, exception=ex)
+                break
+
+            stepValues[step.name] = result["return_val"]
+            stepResults[step.name] = StepResult(step.name, result["return_val"], result["parameters"])
+
+        return {"return_val": stepResults, "parameters": ()}
+
     @staticmethod
     def runMain(submission: CodeType) -> None:
         # Currently parameters are unsupported :(
@@ -119,11 +290,28 @@ class PythonTaskLibrary:
 
     @staticmethod
     def resolveMocks(mocks: Dict[str, Optional[SingleFunctionMock]]) -> Dict[str, SingleFunctionMock]:
-        subscribedMocks = [mockName for mockName, mock in mocks.items() if mock is None]
+        """
+        Finds the mocks that were subscribed to (ie: mocks of modules that the submission imports) now that the
+        submission has run.
+
+        :param mocks: The mocks that were applied. This isn't changed, as it is the runner's config.
+        :returns: A new dictionary with every mock resolved
+        """
+        resolvedMocks: Dict[str, SingleFunctionMock] = {}
         # TODO logging
 
-        for mock in subscribedMocks:
-            splitName = mock.split('.')
+        for mockName, mock in mocks.items():
+            if mock is not None:
+                resolvedMocks[mockName] = mock
+                continue
+
+            stubMock = resolveStubMock(mockName)
+
+            if stubMock is not None:
+                resolvedMocks[mockName] = stubMock
+                continue
+
+            splitName = mockName.split('.')
             functionName = splitName[-1]
 
             try:
@@ -138,17 +326,18 @@ class PythonTaskLibrary:
                 raise ImportError(
                     f"Failed to locate '{functionName}' in '{splitName[:-1]}' during mock resolution. This is likely an autograder error.")
 
-            mocks[mock] = mockedFunction
+            resolvedMocks[mockName] = mockedFunction
 
-        return mocks
+        return resolvedMocks
 
     @staticmethod
     def aggregateResults(runMethodResults: Optional[RunMethodResult],
-                         mocks: Dict[str, SingleFunctionMock]) -> PythonTaskResult:
+                         mocks: Dict[str, SingleFunctionMock], batch: Optional[BatchPlan] = None) -> PythonTaskResult:
         return {
             "return_val": runMethodResults["return_val"] if runMethodResults is not None else None,
             "parameters": runMethodResults["parameters"] if runMethodResults is not None else None,
             "mocks": mocks,
+            "batch": batch,
         }
 
 
@@ -157,7 +346,10 @@ class PythonRunnerBuilder:
 
     def __init__(self: Builder, submission: PythonSubmission):
         self.submission: Final[CodeType] = submission.getExecutableSubmission()
+        self.submissionModules: Final[Optional[SubmissionModuleFinder]] = submission.getSubmissionModules()
         self.parameters: List[Parameter] = []
+        self.batchCalls: List[BatchCall] = []
+        self.steps: List[Step] = []
         self.mocks: Dict[str, Optional[SingleFunctionMock]] = {}
         self.injectedMethods: Dict[str, CodeType] = {}
         self.setupMethods: List[str] = []
@@ -172,6 +364,89 @@ class PythonRunnerBuilder:
 
         return self
 
+    def addParameterSet(self: Builder, *parameters: object, stdin: Optional[Union[List[str], str]] = None) -> Builder:
+        """
+        Description
+        ---
+        Adds a call to the entrypoint to the batch. Every call in the batch is made in the same process after the
+        submission has been imported once, which is much faster than building a runner for each call.
+
+        Each call has its own stdin, stdout, and timeout. If a call times out or crashes, the process is restarted and
+        the batch continues with the next call. Calls do share the module that they are in, so changes to module
+        globals in one call are seen by the calls after it.
+
+        The results of each call are in ``Results.calls``, in the order that the calls were added.
+
+        :param parameters: The parameters for the call. Each one is either a value or a :ref:`Parameter`.
+        :param stdin: The stdin for the call, either a list of lines or a string seperated by newlines.
+        If None, the stdin from the environment is used.
+        """
+        if isinstance(stdin, str):
+            stdin = stdin.splitlines()
+
+        self.batchCalls.append(BatchCall(self._toParameters(parameters), stdin))
+
+        return self
+
+    def _addStep(self: Builder, step: Step) -> Builder:
+        stepNames = [existingStep.name for existingStep in self.steps]
+
+        if step.name in stepNames:
+            raise InvalidRunner(f"Step '{step.name}' has already been added to the runner.")
+
+        if step.target is not None and step.target not in stepNames:
+            raise InvalidRunner(f"Step '{step.name}' targets '{step.target}', which isn't an earlier step.")
+
+        self.steps.append(step)
+
+        return self
+
+    @staticmethod
+    def _toParameters(parameters: Tuple[object, ...]) -> List[Parameter]:
+        return [parameter if isinstance(parameter, Parameter) else Parameter(parameter) for parameter in parameters]
+
+    def addConstructorStep(self: Builder, name: str, className: str, *parameters: object) -> Builder:
+        """
+        Description
+        ---
+        Adds a step that creates an instance of a class from the submission. Steps are run in order in a single
+        process, and act as the entrypoint of the runner, so they can't be combined with ``setEntrypoint``.
+
+        The results of each step are the return value of the runner, as a dictionary from the name of each step to its
+        :ref:`StepResult`. If a step fails, the steps after it aren't run.
+
+        :param name: The name of the step. Later steps refer to the instance by this name.
+        :param className: The name of the class in the submission
+        :param parameters: The parameters for the constructor. Each one is either a value or a :ref:`Parameter`.
+        Autowired parameters are resolved from earlier steps first, then the module.
+        """
+        return self._addStep(ConstructorStep(name, className, self._toParameters(parameters)))
+
+    def addMethodStep(self: Builder, name: str, target: str, method: str, *parameters: object) -> Builder:
+        """
+        Description
+        ---
+        Adds a step that calls a method on the value of an earlier step. See ``addConstructorStep``.
+
+        :param name: The name of the step. Later steps refer to the return value by this name.
+        :param target: The name of the earlier step whose value has the method.
+        :param method: The name of the method
+        :param parameters: The parameters for the method. Each one is either a value or a :ref:`Parameter`.
+        """
+        return self._addStep(MethodStep(name, target, method, self._toParameters(parameters)))
+
+    def addAttributeStep(self: Builder, name: str, target: str, attribute: str) -> Builder:
+        """
+        Description
+        ---
+        Adds a step that reads an attribute from the value of an earlier step. See ``addConstructorStep``.
+
+        :param name: The name of the step. Later steps refer to the attribute by this name.
+        :param target: The name of the earlier step whose value has the attribute.
+        :param attribute: The name of the attribute
+        """
+        return self._addStep(AttributeStep(name, target, attribute))
+
     def addMock(self: Builder, name: str, mock: SingleFunctionMock) -> Builder:
         if name in self.mocks:
             raise InvalidRunner(f"Mock '{name}' has already been added to the runner.")
@@ -205,7 +480,7 @@ class PythonRunnerBuilder:
 
         if src is not None:
             try:
-                code = compile(src, name, "exec")
+                code = getCodeCache().compile(src, name)
             except SyntaxError as syntaxError:
                 raise InvalidRunner(
                     f"Syntax Error when compiling injected method!\nEnsure that you are using dill.getsource(..., lstrip=True,...)\n{syntaxError}")
@@ -230,8 +505,24 @@ class PythonRunnerBuilder:
 
         return self
 
+    def _getImportPhaseKey(self) -> str:
+        """
+        Generates a key that identifies the import phase (import, injection, and mocks) of this runner.
+        Runners with the same key will produce the same module after the import phase.
+        """
+        importPhase = (self.submission, list(self.injectedMethods.items()), list(self.mocks.items()),
+                       self.submissionModules.getKey() if self.submissionModules is not None else None)
+
+        return hashlib.sha256(dill.dumps(importPhase, dill.HIGHEST_PROTOCOL)).hexdigest()
+
     def build(self) -> TaskRunner:
-        if not self.functionEntrypoint and not self.useModuleEntrypoint:
+        if self.steps and (self.functionEntrypoint or self.useModuleEntrypoint):
+            raise InvalidRunner(f"Incompatible options! Steps are the entrypoint of the runner, no other entrypoint can be defined.")
+
+        if self.steps and (self.parameters or self.batchCalls):
+            raise InvalidRunner(f"Incompatible options! Parameters and parameter sets can't be used with steps. Pass the parameters to each step instead.")
+
+        if not self.functionEntrypoint and not self.useModuleEntrypoint and not self.steps:
             raise InvalidRunner(f"No entrypoint defined!")
 
         if self.functionEntrypoint and (
@@ -242,37 +533,78 @@ class PythonRunnerBuilder:
             raise InvalidRunner(
                 f"Incompatible options! No parameters can be defined when using module entrypoint. Use a environment mock of the 'sys' module instead.")
 
+        if self.useModuleEntrypoint and len(self.batchCalls) != 0:
+            raise InvalidRunner(f"Incompatible options! Parameter sets can only be used with a function entrypoint.")
+
+        if len(self.parameters) != 0 and len(self.batchCalls) != 0:
+            raise InvalidRunner(f"Incompatible options! Use either parameters or parameter sets, not both.")
+
         taskRunner = TaskRunner(PythonSubmission)
 
+        if self.submissionModules is not None:
+            taskRunner.setResultPaths(self.submissionModules.paths)
+
+        # the sizes are only looked at in traces
+        taskRunner.setMeasureResultSizes(getTraceRecorder() is not None)
+
         if self.useModuleEntrypoint:
-            taskRunner.add(Task("main", PythonTaskLibrary.runMain, [lambda: self.submission]))
-            taskRunner.add(Task("resolve_mocks", PythonTaskLibrary.resolveMocks, [lambda: self.mocks]))
+            taskRunner.add(Task("install_modules", PythonTaskLibrary.installSubmissionModules,
+                                [Value(self.submissionModules)]))
+            taskRunner.add(Task("main", PythonTaskLibrary.runMain, [Value(self.submission)], after=["install_modules"]))
+            taskRunner.add(Task("resolve_mocks", PythonTaskLibrary.resolveMocks, [Value(self.mocks)]))
             taskRunner.add(Task("results", PythonTaskLibrary.aggregateResults,
-                                [lambda: None, lambda: taskRunner.getResult("resolve_mocks")]), isOverallResultTask=True)
+                                [Value(None), ResultOf("resolve_mocks")]), isOverallResultTask=True)
             return taskRunner
 
-        taskRunner.add(Task("import", PythonTaskLibrary.attemptToImport, [lambda: self.submission]))
+        # The import phase only depends on the submission, the injected code, and the mocks,
+        # so it can be shared with any other runner that has the same import phase
+        taskRunner.add(Task("install_modules", PythonTaskLibrary.installSubmissionModules,
+                            [Value(self.submissionModules)]), isShared=True)
+        taskRunner.add(Task("import", PythonTaskLibrary.attemptToImport, [Value(self.submission)],
+                            after=["install_modules"]), isShared=True)
         taskRunner.add(Task("injection", PythonTaskLibrary.applyInjectedCode,
-                            [lambda: taskRunner.getResult("import"), lambda: self.injectedMethods.values()]))
-        taskRunner.add(Task("apply_mock", PythonTaskLibrary.applyMocks, [lambda: taskRunner.getResult("import"), lambda: self.mocks]))
-        methodOrder = self.setupMethods
+                            [ResultOf("import"), Value(list(self.injectedMethods.values()))]), isShared=True)
+        taskRunner.add(Task("apply_mock", PythonTaskLibrary.applyMocks,
+                            [ResultOf("import"), Value(self.mocks)]), isShared=True)
+        taskRunner.setSharedKey(self._getImportPhaseKey())
+
+        # Setup methods don't return anything that the entrypoint uses, so they are ordered explicitly
+        previousTask = "apply_mock"
 
-        for method in methodOrder:
+        for method in self.setupMethods:
             taskRunner.add(Task(f"get_{method}", PythonTaskLibrary.getMethod,
-                                [lambda: taskRunner.getResult("import"), lambda: method]))
+                                [ResultOf("import"), Value(method)], after=[previousTask]))
             taskRunner.add(Task(f"run_{method}", PythonTaskLibrary.runMethod,
-                                [lambda: taskRunner.getResult("import"), lambda: taskRunner.getResult(f"get_{method}"),
-                                 lambda: []]))
+                                [ResultOf("import"), ResultOf(f"get_{method}"), Value([])]))
+            previousTask = f"run_{method}"
+
+        if self.steps:
+            taskRunner.add(Task("sequence", PythonTaskLibrary.runSequence,
+                                [ResultOf("import"), Value(self.steps)], after=[previousTask]))
+            taskRunner.add(Task("resolve_mocks", PythonTaskLibrary.resolveMocks, [ResultOf("apply_mock")]))
+            taskRunner.add(Task("results", PythonTaskLibrary.aggregateResults,
+                                [ResultOf("sequence"), ResultOf("resolve_mocks")]), isOverallResultTask=True)
+            return taskRunner
 
         taskRunner.add(Task(f"get_{self.functionEntrypoint}", PythonTaskLibrary.getMethod,
-                            [lambda: taskRunner.getResult("import"), lambda: self.functionEntrypoint]))
+                            [ResultOf("import"), Value(self.functionEntrypoint)], after=[previousTask]))
+
+        if self.batchCalls:
+            taskRunner.add(Task("batch", PythonTaskLibrary.createBatch,
+                                [ResultOf("import"), ResultOf(f"get_{self.functionEntrypoint}"),
+                                 Value(self.batchCalls)]))
+            taskRunner.add(Task("resolve_mocks", PythonTaskLibrary.resolveMocks, [ResultOf("apply_mock")]))
+            taskRunner.add(Task("results", PythonTaskLibrary.aggregateResults,
+                                [Value(None), ResultOf("resolve_mocks"), ResultOf("batch")]), isOverallResultTask=True)
+            return taskRunner
+
         taskRunner.add(Task(f"run_{self.functionEntrypoint}", PythonTaskLibrary.runMethod,
-                            [lambda: taskRunner.getResult("import"),
-                             lambda: taskRunner.getResult(f"get_{self.functionEntrypoint}"), lambda: self.parameters]))
+                            [ResultOf("import"), ResultOf(f"get_{self.functionEntrypoint}"), Value(self.parameters)]))
 
-        taskRunner.add(Task("resolve_mocks", PythonTaskLibrary.resolveMocks, [lambda: self.mocks]))
+        # Resolve the mocks that were actually applied, these may have come from a different runner
+        taskRunner.add(Task("resolve_mocks", PythonTaskLibrary.resolveMocks, [ResultOf("apply_mock")]))
         taskRunner.add(Task("results", PythonTaskLibrary.aggregateResults,
-                            [lambda: taskRunner.getResult(f"run_{self.functionEntrypoint}"),
-                             lambda: taskRunner.getResult("resolve_mocks")]), isOverallResultTask=True)
+                            [ResultOf(f"run_{self.functionEntrypoint}"), ResultOf("resolve_mocks")]),
+                       isOverallResultTask=True)
 
         return taskRunner
@@ -1,3 +1,4 @@
+import dataclasses
 from enum import Enum
 from typing import Iterable, TypedDict, Tuple, Dict, Optional
 
@@ -9,10 +10,30 @@ class FileTypeMap(Enum):
     PYTHON_FILES = 2
     REQUIREMENTS = 3
 
-class PythonTaskResult(TypedDict):
+@dataclasses.dataclass(frozen=True)
+class PackageInstall:
+    """
+    How an extra package was installed
+    """
+    name: str
+    version: str
+    already_installed: bool
+    """
+    If the package was already installed at the requested version (or is in a requirements layer that already existed),
+    so it wasn't installed again
+    """
+    duration: float
+    """
+    The seconds spent installing the package. Packages are installed together, so this is the time of the install that
+    the package was part of. 0 if the package was already installed
+    """
+
+class PythonTaskResult(TypedDict, total=False):
     return_val: object
     parameters: Optional[Tuple[object, ...]]
     mocks: Dict[str, SingleFunctionMock]
+    batch: object
+    """The :ref:`BatchPlan` if the runner is a batch runner"""
 
 class NoPyFilesError(Exception):
     def __init__(self) -> None:
@@ -41,6 +62,13 @@ class InvalidPackageError(Exception):
             f"{version if version else 'any version'}"
         )
 
+class PackageIndexUnavailableError(Exception):
+    def __init__(self, packageName: str, version: str):
+        super().__init__(
+            f"Unable to check if package, '{packageName}' at version "
+            f"{version if version else 'any version'} exists. The package index could not be reached"
+        )
+
 class InvalidRequirementsFileError(Exception):
     def __init__(self, msg: str):
         super().__init__(msg)
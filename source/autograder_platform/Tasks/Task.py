@@ -1,25 +1,113 @@
-from typing import Callable, Final, List, Optional, Tuple
-from autograder_platform.Tasks.common import TaskStatus, FailedToLoadSuppliers, AttemptToGetInvalidResults
+import pickle
+# Bound when imported, so that the virtual clock (see PythonVirtualClock) doesn't change the timings of tasks
+from time import monotonic_ns
+from typing import TYPE_CHECKING, Callable, Final, List, Optional, Tuple, Union
+from autograder_platform.Tasks.common import TaskStatus, TaskTiming, FailedToLoadSuppliers, AttemptToGetInvalidResults
+
+if TYPE_CHECKING:
+    from autograder_platform.Tasks.TaskRunner import TaskRunner
+
+
+class TaskInput:
+    """
+    Description
+    ===========
+
+    An input to a task that is declared as data rather than as a lambda.
+
+    Declared inputs let the runner work out the order of the tasks from their dependencies, and keep the task
+    picklable as long as its step is a module level function (ie: a ``PythonTaskLibrary`` function), which is pickled
+    by its qualified name.
+    """
+
+    def get(self, runner: Optional["TaskRunner"]) -> object:
+        raise NotImplementedError()
+
+    def getDependency(self) -> Optional[str]:
+        """
+        :returns: The name of the task that this input depends on, if it depends on one
+        """
+        return None
+
+
+class Value(TaskInput):
+    """
+    A constant input.
+    """
+
+    def __init__(self, value: object):
+        self.value: Final[object] = value
+
+    def get(self, runner: Optional["TaskRunner"]) -> object:
+        return self.value
+
+
+class ResultOf(TaskInput):
+    """
+    The result of another task in the same runner.
+    """
+
+    def __init__(self, taskName: str):
+        self.taskName: Final[str] = taskName
+
+    def get(self, runner: Optional["TaskRunner"]) -> object:
+        if runner is None:
+            raise AttributeError(f"INVALID STATE: Unable to get the result of '{self.taskName}' outside of a task runner!")
+
+        return runner.getResult(self.taskName)
+
+    def getDependency(self) -> Optional[str]:
+        return self.taskName
 
 
 class Task:
-    def __init__(self, taskName: str, step: Callable[..., object], inputs: List[Callable[[], object]]):
+    def __init__(self, taskName: str, step: Callable[..., object],
+                 inputs: List[Union[TaskInput, Callable[[], object]]], after: Optional[List[str]] = None):
+        """
+        :param taskName: The name of the task. This is also the name that other tasks use to get its result.
+        :param step: The function to run
+        :param inputs: The inputs to the step, in order. Each one is either a :ref:`TaskInput` or a supplier function.
+        The dependencies of suppliers can't be known, so a task with a supplier is run after every task that was added
+        before it.
+        :param after: The names of tasks that must run before this one, even though this task doesn't use their results
+        """
         self.taskName: Final[str] = taskName
         self.step: Final[Callable[..., object]] = step
-        self.inputs: Final[List[Callable[[], object]]] = inputs
+        self.inputs: Final[List[Union[TaskInput, Callable[[], object]]]] = inputs
+        self.after: Final[List[str]] = after if after is not None else []
         self.result: object = None
         self.status: TaskStatus = TaskStatus.NOT_STARTED
         self.error: Optional[Exception] = None
+        self.timing: Optional[TaskTiming] = None
+
+    def doTask(self, runner: Optional["TaskRunner"] = None):
+        startTime = monotonic_ns()
+
+        self._run(runner)
+
+        endTime = monotonic_ns()
+        resultSize: Optional[int] = None
+
+        if runner is not None and runner.getMeasureResultSizes() and self.status == TaskStatus.COMPLETE:
+            resultSize = Task._measure(self.result)
+
+        self.timing = TaskTiming(self.taskName, self.status, startTime, endTime, resultSize)
 
-    def doTask(self):
-        # TODO logging
+    @staticmethod
+    def _measure(result: object) -> Optional[int]:
+        try:
+            return len(pickle.dumps(result, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            # ie: modules and open files
+            return None
 
+    def _run(self, runner: Optional["TaskRunner"]):
         self.status = TaskStatus.RUNNING
 
         try:
-            inputs: Tuple[object, ...] = tuple([getInput() for getInput in self.inputs])
+            inputs: Tuple[object, ...] = tuple([getInput.get(runner) if isinstance(getInput, TaskInput) else getInput()
+                                                for getInput in self.inputs])
         except Exception as ex:
-            # TODO logging
             self.status = TaskStatus.ERROR
             self.error = FailedToLoadSuppliers(ex)
             return
@@ -27,13 +115,38 @@ class Task:
         try:
             self.result = self.step(*inputs)
         except Exception as ex:
-            # TODO logging
             self.status = TaskStatus.ERROR
             self.error = ex
             return
 
         self.status = TaskStatus.COMPLETE
-        # TODO logging
+
+    def reset(self) -> None:
+        """
+        Clears the result of the task so that it can be run again.
+        """
+        self.result = None
+        self.status = TaskStatus.NOT_STARTED
+        self.error = None
+        self.timing = None
+
+    def getDependencies(self) -> Optional[List[str]]:
+        """
+        :returns: The names of the tasks that this task depends on. None if the task has supplier inputs, as their
+        dependencies can't be known.
+        """
+        dependencies: List[str] = list(self.after)
+
+        for getInput in self.inputs:
+            if not isinstance(getInput, TaskInput):
+                return None
+
+            dependency = getInput.getDependency()
+
+            if dependency is not None:
+                dependencies.append(dependency)
+
+        return dependencies
 
     def getResult(self) -> object:
         if self.error or self.status != TaskStatus.COMPLETE:
@@ -49,3 +162,9 @@ class Task:
 
     def getError(self) -> Optional[Exception]:
         return self.error
+
+    def getTiming(self) -> Optional[TaskTiming]:
+        """
+        :returns: When the task last ran. None if it hasn't run
+        """
+        return self.timing
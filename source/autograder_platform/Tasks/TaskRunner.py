@@ -1,42 +1,121 @@
-from collections import deque
-from typing import Dict, List, Optional, Type, Deque
+from typing import Dict, List, Optional, Set, Type
 
 from autograder_platform.StudentSubmission.AbstractStudentSubmission import AbstractStudentSubmission
 from autograder_platform.Tasks.Task import Task
-from autograder_platform.Tasks.common import TaskAlreadyExists, TaskDoesNotExist, TaskStatus
+from autograder_platform.Tasks.common import TaskAlreadyExists, TaskDoesNotExist, TaskStatus, TaskTiming
 
 
 class TaskRunner:
+    """
+    Description
+    ===========
+
+    Runs a graph of tasks. Tasks declare the results that they depend on with :ref:`ResultOf` inputs, and the runner
+    runs each task after its dependencies, keeping the order that the tasks were added where it can.
+
+    Running doesn't consume the runner, so one built runner can be run any number of times. Each run starts from
+    scratch, except for shared tasks that were already run with ``runSharedTasks`` or adopted from another runner.
+    """
+
     def __init__(self, submissionType: Type[AbstractStudentSubmission]):
         self.tasks: Dict[str, Task] = {}
-        self.order: Deque[str] = deque()
+        self.order: Optional[List[str]] = None
+        """The order to run the tasks in. Worked out on the first run after a task is added"""
         self.overallResultTask: Optional[str] = None
         self.errorOccurred = False
+        self.hasRun = False
         self.submissionType: Type[AbstractStudentSubmission] = submissionType
-
-    def add(self, task: Task, isOverallResultTask: bool = False):
+        self.sharedTasks: List[str] = []
+        self.sharedKey: Optional[str] = None
+        self.sharedTasksRun = False
+        """If the shared tasks have already been run (or adopted), in which case they aren't run again"""
+        self.sharedTasksFailed = False
+        self.resultPaths: List[str] = []
+        """The directories that objects in the results can be loaded from, other than the ones on the parent's path"""
+        self.measureResultSizes: bool = False
+
+    def add(self, task: Task, isOverallResultTask: bool = False, isShared: bool = False):
+        """
+        Adds a task to the runner.
+
+        :param task: The task to add
+        :param isOverallResultTask: If the result of this task is the result of the whole runner
+        :param isShared: If the result of this task can be shared between runners with the same shared key.
+        Shared tasks must be added before any other tasks.
+        """
         if task.getName() in self.tasks:
             raise TaskAlreadyExists(task.getName())
 
+        if isShared and len(self.sharedTasks) != len(self.tasks):
+            raise AttributeError(f"Shared task '{task.getName()}' must be added before any non shared tasks!")
+
         self.tasks[task.getName()] = task
-        self.order.append(task.getName())
+        self.order = None
 
         if isOverallResultTask:
             self.overallResultTask = task.getName()
 
+        if isShared:
+            self.sharedTasks.append(task.getName())
+
     def getResult(self, taskName: str) -> object:
         if taskName not in self.tasks:
             raise TaskDoesNotExist(taskName)
 
         return self.tasks[taskName].getResult()
 
+    def getOrder(self) -> List[str]:
+        """
+        Works out the order to run the tasks in. Each task is placed after the tasks that it depends on, and otherwise
+        in the order that it was added. Tasks with supplier inputs depend on every task that was added before them.
+
+        Tasks that are part of a cycle are placed at the end, where they fail as their inputs aren't available.
+        """
+        if self.order is not None:
+            return self.order
+
+        names = list(self.tasks)
+        dependencies: Dict[str, List[str]] = {}
+
+        for i, name in enumerate(names):
+            taskDependencies = self.tasks[name].getDependencies()
+            dependencies[name] = names[:i] if taskDependencies is None else \
+                [dependency for dependency in taskDependencies if dependency in self.tasks]
+
+        order: List[str] = []
+        placed: Set[str] = set()
+        remaining = names
+
+        while remaining:
+            ready = next((name for name in remaining if all(dependency in placed for dependency in dependencies[name])),
+                         None)
+
+            if ready is None:
+                order.extend(remaining)
+                break
+
+            order.append(ready)
+            placed.add(ready)
+            remaining = [name for name in remaining if name != ready]
+
+        self.order = order
+
+        return order
 
     def run(self) -> object:
         result: object = None
-        while self.order:
-            task: Task = self.tasks[self.order.popleft()]
+        self.hasRun = True
+        self.errorOccurred = self.sharedTasksFailed
+
+        if self.errorOccurred:
+            return result
+
+        for taskName in self.getOrder():
+            task: Task = self.tasks[taskName]
 
-            task.doTask()
+            if not (self.sharedTasksRun and taskName in self.sharedTasks):
+                task.reset()
+                task.doTask(self)
 
             if task.getStatus() != TaskStatus.COMPLETE:
                 self.errorOccurred = True
@@ -47,8 +126,80 @@ class TaskRunner:
 
         return result
 
+    def runSharedTasks(self) -> None:
+        """
+        Runs only the shared tasks. The remaining tasks can then be run with ``run``.
+
+        This allows a runner to do the expensive shared work once, then have copies of itself
+        (ie: forked processes) adopt the results with ``adoptSharedTasks``.
+        """
+        self.sharedTasksRun = True
+
+        for taskName in self.sharedTasks:
+            task: Task = self.tasks[taskName]
+
+            task.reset()
+            task.doTask(self)
+
+            if task.getStatus() != TaskStatus.COMPLETE:
+                self.errorOccurred = True
+                self.sharedTasksFailed = True
+                break
+
+    def adoptSharedTasks(self, sharedRunner: "TaskRunner") -> None:
+        """
+        Replaces the shared tasks in this runner with the already completed tasks from ``sharedRunner``.
+        Both runners must have the same shared key.
+
+        :param sharedRunner: A runner that has already run its shared tasks.
+        """
+        if self.sharedKey is None or self.sharedKey != sharedRunner.sharedKey:
+            raise AttributeError("INVALID STATE: Unable to adopt shared tasks from a runner with a different shared key!")
+
+        for taskName in self.sharedTasks:
+            self.tasks[taskName] = sharedRunner.tasks[taskName]
+
+        self.sharedTasksRun = True
+        self.sharedTasksFailed = sharedRunner.sharedTasksFailed or sharedRunner.errorOccurred
+
+        if self.sharedTasksFailed:
+            self.errorOccurred = True
+
+    def setSharedKey(self, sharedKey: str) -> None:
+        """
+        Sets the key that identifies the shared tasks in this runner.
+        Runners with the same key must produce the same results from their shared tasks.
+        """
+        self.sharedKey = sharedKey
+
+    def getSharedKey(self) -> Optional[str]:
+        if not self.sharedTasks:
+            return None
+
+        return self.sharedKey
+
+    def setResultPaths(self, resultPaths: List[str]) -> None:
+        """
+        Sets the directories that the parent needs to load the results of this runner, ie: the directories that the
+        submission's requirements are installed in.
+        """
+        self.resultPaths = resultPaths
+
+    def getResultPaths(self) -> List[str]:
+        return self.resultPaths
+
+    def setMeasureResultSizes(self, measureResultSizes: bool) -> None:
+        """
+        Sets if the size of each task's result is recorded in its timing.
+        The results are pickled to measure them, so this should only be on when the timings are being looked at.
+        """
+        self.measureResultSizes = measureResultSizes
+
+    def getMeasureResultSizes(self) -> bool:
+        return self.measureResultSizes
+
     def wasSuccessful(self):
-        return not self.order and not self.errorOccurred
+        return self.hasRun and not self.errorOccurred
 
     def getAllErrors(self) -> List[Exception]:
         errors: List[Exception] = []
@@ -62,14 +213,32 @@ class TaskRunner:
 
         return errors
 
+    def getTimings(self) -> List[TaskTiming]:
+        """
+        :returns: When each task that has run ran, in the order that they were run. Shared tasks that were adopted keep
+        the timings from the runner that ran them.
+        """
+        timings = [self.tasks[taskName].getTiming() for taskName in self.getOrder()]
+
+        return [timing for timing in timings if timing is not None]
+
     def getSubmissionType(self) -> Type[AbstractStudentSubmission]:
         return self.submissionType
 
     def __getstate__(self):
-        return {"tasks": self.tasks, "order": self.order, "overallResultTask": self.overallResultTask, "errorOccurred": self.errorOccurred}
+        return {"tasks": self.tasks, "order": self.order, "overallResultTask": self.overallResultTask, "errorOccurred": self.errorOccurred,
+                "hasRun": self.hasRun, "sharedTasks": self.sharedTasks, "sharedKey": self.sharedKey,
+                "sharedTasksRun": self.sharedTasksRun, "sharedTasksFailed": self.sharedTasksFailed,
+                "measureResultSizes": self.measureResultSizes}
 
     def __setstate__(self, state):
         self.tasks = state["tasks"]
         self.order = state["order"]
         self.overallResultTask = state["overallResultTask"]
         self.errorOccurred = state["errorOccurred"]
+        self.hasRun = state["hasRun"]
+        self.sharedTasks = state["sharedTasks"]
+        self.sharedKey = state["sharedKey"]
+        self.sharedTasksRun = state["sharedTasksRun"]
+        self.sharedTasksFailed = state["sharedTasksFailed"]
+        self.measureResultSizes = state["measureResultSizes"]
@@ -1,4 +1,6 @@
+import dataclasses
 import enum
+from typing import Optional
 
 
 class TaskStatus(enum.Enum):
@@ -8,6 +10,26 @@ class TaskStatus(enum.Enum):
     ERROR = 4
 
 
+@dataclasses.dataclass
+class TaskTiming:
+    """
+    When a task ran and how it finished. Times are from ``time.monotonic_ns``, which is system wide, so timings from
+    different processes can be compared.
+    """
+    name: str
+    status: TaskStatus
+    start_time: int
+    end_time: int
+    result_size: Optional[int] = None
+    """The size of the result in bytes when it is pickled. None if sizes weren't measured (see
+    :ref:`TaskRunner.setMeasureResultSizes`), the task didn't complete, or the result can't be pickled"""
+
+    @property
+    def duration(self) -> float:
+        """The time the task took, in seconds"""
+        return (self.end_time - self.start_time) / 1e9
+
+
 class FailedToLoadSuppliers(Exception):
     def __init__(self, ex: Exception):
         super().__init__(f"Failed to process input suppliers.\n{ex}")
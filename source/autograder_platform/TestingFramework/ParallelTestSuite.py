@@ -0,0 +1,472 @@
+"""
+This module provides a test suite that runs its tests in parallel.
+
+Autograder tests spend most of their time waiting for the student's submission to finish running in a child process,
+so running them one at a time leaves the grading machine mostly idle. This suite splits the tests up by test case class
+so that ``setUpClass`` and ``tearDownClass`` are still run exactly once around each class, runs the classes in forked
+worker processes, then replays each test's outcome in to the result that the test runner provided.
+
+Outcomes are replayed in the same order that the tests would have run in serially, along with each test's output and
+any attributes that decorators set on the test method while it ran (``set_score``, ``set_output``, etc.), so runners
+that build their output from the result (ie: the JSON runners) produce exactly the same output.
+
+:author: Gregory Bell
+"""
+
+import json
+import multiprocessing
+import os
+import sys
+import time
+import unittest
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+import dill
+
+from autograder_platform.Executors.Trace import TracedTestResult, getTraceRecorder
+
+# (event, test reference, arguments, stdout, stderr, test method attributes)
+Event = Tuple[str, Tuple[Any, ...], Tuple[Any, ...], str, str, Dict[str, bytes]]
+
+_SUBTEST_MESSAGE_SENTINEL = "__subtest_msg_sentinel__"
+
+
+def getUsableCores() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+
+    return os.cpu_count() or 1
+
+
+def _getTestMethod(test: unittest.TestCase) -> Optional[object]:
+    methodName = vars(test).get("_testMethodName", None)
+
+    if methodName is None:
+        return None
+
+    return getattr(type(test), methodName, None)
+
+
+def _serializeError(err: Tuple[Any, ...]) -> bytes:
+    exceptionType, exceptionValue = err[0], err[1]
+
+    try:
+        serialized = dill.dumps((exceptionType, exceptionValue), dill.HIGHEST_PROTOCOL)
+        dill.loads(serialized)
+        return serialized
+    except Exception:
+        # the exception cant be sent back to the parent, so just send enough to rebuild the message
+        return dill.dumps((None, (exceptionType.__qualname__, exceptionType.__module__, str(exceptionValue))))
+
+
+def _deserializeError(serialized: bytes) -> Tuple[Any, ...]:
+    exceptionType, exceptionValue = dill.loads(serialized)
+
+    if exceptionType is None:
+        qualname, module, message = exceptionValue
+        exceptionType = type(qualname.split(".")[-1], (Exception,), {"__qualname__": qualname, "__module__": module})
+        exceptionValue = exceptionType(message)
+
+    return exceptionType, exceptionValue, None
+
+
+class _RecordingResult(TracedTestResult):
+    """
+    A result that records everything that happens to it so that it can be replayed in to another result.
+
+    Output is always buffered so that it can be replayed along with the events that it occurred between.
+    Runs are traced under the test that ran them, as the parent's result never sees the tests start.
+    """
+
+    def __init__(self, tests: List[unittest.TestCase]):
+        super().__init__()
+        self.buffer = True
+        self.events: List[Event] = []
+        self.testIndices: Dict[int, int] = {id(test): i for i, test in enumerate(tests)}
+        self.stdoutPosition: int = 0
+        self.stderrPosition: int = 0
+        self.inTest: bool = False
+
+    def _getOutput(self) -> Tuple[str, str]:
+        stdout, stderr = "", ""
+
+        if self._stdout_buffer is not None:
+            stdout = self._stdout_buffer.getvalue()[self.stdoutPosition:]
+            self.stdoutPosition += len(stdout)
+
+        if self._stderr_buffer is not None:
+            stderr = self._stderr_buffer.getvalue()[self.stderrPosition:]
+            self.stderrPosition += len(stderr)
+
+        return stdout, stderr
+
+    def _getReference(self, test: Any) -> Tuple[Any, ...]:
+        if id(test) in self.testIndices:
+            return "case", self.testIndices[id(test)]
+
+        if isinstance(test, unittest.case._SubTest):
+            message = test._message
+
+            if message is unittest.case._subtest_msg_sentinel:
+                message = _SUBTEST_MESSAGE_SENTINEL
+
+            try:
+                details = dill.dumps((message, test.params), dill.HIGHEST_PROTOCOL)
+            except Exception:
+                details = dill.dumps((str(message), {}))
+
+            return "subtest", self.testIndices[id(test.test_case)], details
+
+        # class and module level errors are reported against a placeholder
+        return "holder", str(test)
+
+    @staticmethod
+    def _getAttributes(test: Any) -> Dict[str, bytes]:
+        method = _getTestMethod(test)
+
+        if method is None:
+            return {}
+
+        attributes: Dict[str, bytes] = {}
+
+        for name, value in vars(method).items():
+            if name == "__wrapped__":
+                continue
+
+            try:
+                attributes[name] = dill.dumps(value, dill.HIGHEST_PROTOCOL)
+            except Exception:
+                continue
+
+        return attributes
+
+    def _record(self, event: str, test: Any, *args) -> None:
+        stdout, stderr = self._getOutput()
+        self.events.append((event, self._getReference(test), args, stdout, stderr, self._getAttributes(test)))
+
+    def startTest(self, test):
+        self.inTest = True
+        super().startTest(test)
+        self._record("startTest", test)
+
+    def stopTest(self, test):
+        self._record("stopTest", test)
+        # the output is replayed by the parent, it shouldn't also be printed here
+        self._mirrorOutput = False
+        super().stopTest(test)
+        self.inTest = False
+
+    def _setupStdout(self):
+        super()._setupStdout()
+
+        # Output redirection around tests is handled by startTest and stopTest in the parent,
+        # only the redirection around class and module fixtures needs to be replayed
+        if not self.inTest:
+            self.events.append(("_setupStdout", (), (), "", "", {}))
+
+    def _restoreStdout(self):
+        if not self.inTest:
+            stdout, stderr = self._getOutput()
+            self.events.append(("_restoreStdout", (), (), stdout, stderr, {}))
+
+        self._mirrorOutput = False
+        super()._restoreStdout()
+        self.stdoutPosition, self.stderrPosition = 0, 0
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record("addSuccess", test)
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self._record("addError", test, _serializeError(err))
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record("addFailure", test, _serializeError(err))
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record("addSkip", test, reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record("addExpectedFailure", test, _serializeError(err))
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record("addUnexpectedSuccess", test)
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        self._record("addSubTest", subtest, None if err is None else _serializeError(err))
+
+
+def _workerMain(connection: Connection, groups: List[List[unittest.TestCase]]) -> None:
+    """
+    The entrypoint for the worker processes.
+
+    Each worker runs the groups that it is sent one at a time and sends back the recorded events, how long the
+    group took to run, and the trace events from the runs in the group (if tracing is on).
+    """
+    try:
+        while True:
+            try:
+                index = connection.recv()
+            except EOFError:
+                break
+
+            if index is None:
+                break
+
+            result = _RecordingResult(groups[index])
+
+            startTime = time.perf_counter()
+            unittest.TestSuite(groups[index]).run(result)
+            duration = time.perf_counter() - startTime
+
+            # the recorder was inherited from the parent, but anything it records here is lost with the worker
+            traceRecorder = getTraceRecorder()
+            traceEvents = traceRecorder.takeEvents() if traceRecorder is not None else []
+
+            connection.send_bytes(dill.dumps((index, result.events, duration, traceEvents), dill.HIGHEST_PROTOCOL))
+    finally:
+        connection.close()
+
+
+class ParallelTestSuite(unittest.TestSuite):
+    """
+    Description
+    ===========
+
+    This suite runs its test case classes in parallel across ``jobs`` forked worker processes.
+
+    Classes are scheduled longest first using the durations that were recorded on previous runs in ``durationsFile``,
+    so that one slow class doesn't get started last. The durations file is updated after every run.
+
+    If parallel execution isn't possible (only one job, only one class, or no ``fork``), the tests are run serially.
+
+    Module level fixtures (``setUpModule``) are run once for each class rather than once for each module.
+    """
+
+    def __init__(self, tests=(), jobs: Optional[int] = None, durationsFile: Optional[str] = None):
+        super().__init__(tests)
+        self.jobs: int = jobs if jobs is not None else getUsableCores()
+        self.durationsFile: Optional[str] = durationsFile
+
+        if self.jobs < 1:
+            raise AttributeError(f"Jobs must be at least 1. Was {self.jobs}")
+
+    @staticmethod
+    def _flatten(suite: unittest.TestSuite, tests: List[unittest.TestCase]) -> None:
+        for test in suite:
+            if isinstance(test, unittest.TestSuite):
+                ParallelTestSuite._flatten(test, tests)
+                continue
+
+            tests.append(test)
+
+    def _group(self) -> List[List[unittest.TestCase]]:
+        """Groups the tests by test case class, in the order that they would be run"""
+        tests: List[unittest.TestCase] = []
+        self._flatten(self, tests)
+
+        groups: Dict[type, List[unittest.TestCase]] = {}
+
+        for test in tests:
+            groups.setdefault(type(test), []).append(test)
+
+        return list(groups.values())
+
+    @staticmethod
+    def _getGroupName(group: List[unittest.TestCase]) -> str:
+        testClass = type(group[0])
+        return f"{testClass.__module__}.{testClass.__qualname__}"
+
+    def _loadDurations(self) -> Dict[str, float]:
+        if self.durationsFile is None or not os.path.exists(self.durationsFile):
+            return {}
+
+        try:
+            with open(self.durationsFile, 'r') as r:
+                durations = json.load(r)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+        if not isinstance(durations, dict):
+            return {}
+
+        return durations
+
+    def _saveDurations(self, durations: Dict[str, float]) -> None:
+        if self.durationsFile is None:
+            return
+
+        try:
+            with open(self.durationsFile, 'w') as w:
+                json.dump(durations, w, indent=2)
+        except OSError:
+            # recording durations is only an optimization
+            pass
+
+    def _schedule(self, groups: List[List[unittest.TestCase]], durations: Dict[str, float]) -> List[int]:
+        """
+        Orders the groups longest first. Groups that haven't been run before are assumed to take the average time
+        """
+        knownDurations = [durations[self._getGroupName(group)]
+                          for group in groups if self._getGroupName(group) in durations]
+
+        averageDuration = sum(knownDurations) / len(knownDurations) if knownDurations else 0
+
+        return sorted(range(len(groups)),
+                      key=lambda i: durations.get(self._getGroupName(groups[i]), averageDuration),
+                      reverse=True)
+
+    @staticmethod
+    def _replay(result: unittest.TestResult, group: List[unittest.TestCase], events: List[Event]) -> None:
+        for event, reference, args, stdout, stderr, attributes in events:
+            test: Any = None
+
+            if reference and reference[0] == "case":
+                test = group[reference[1]]
+            elif reference and reference[0] == "subtest":
+                message, params = dill.loads(reference[2])
+
+                if message == _SUBTEST_MESSAGE_SENTINEL:
+                    message = unittest.case._subtest_msg_sentinel
+
+                test = unittest.case._SubTest(group[reference[1]], message, params)
+            elif reference and reference[0] == "holder":
+                test = unittest.suite._ErrorHolder(reference[1])
+
+            if event == "_setupStdout":
+                getattr(result, "_setupStdout", lambda: None)()
+                continue
+
+            if stdout:
+                sys.stdout.write(stdout)
+            if stderr:
+                sys.stderr.write(stderr)
+
+            if event == "_restoreStdout":
+                getattr(result, "_restoreStdout", lambda: None)()
+                continue
+
+            method = _getTestMethod(test.test_case if isinstance(test, unittest.case._SubTest) else test)
+
+            if method is not None:
+                for name, value in attributes.items():
+                    setattr(method, name, dill.loads(value))
+
+            if event in ("addError", "addFailure", "addExpectedFailure"):
+                getattr(result, event)(test, _deserializeError(args[0]))
+            elif event == "addSubTest":
+                result.addSubTest(test.test_case, test, None if args[0] is None else _deserializeError(args[0]))
+            else:
+                getattr(result, event)(test, *args)
+
+    @staticmethod
+    def _replayCrash(result: unittest.TestResult, group: List[unittest.TestCase]) -> None:
+        error = EnvironmentError("Test worker exited unexpectedly while running this test!")
+
+        for test in group:
+            result.startTest(test)
+            result.addError(test, (type(error), error, None))
+            result.stopTest(test)
+
+    def _startWorker(self, context: multiprocessing.context.BaseContext,
+                     groups: List[List[unittest.TestCase]]) -> Tuple[Connection, multiprocessing.process.BaseProcess]:
+        connection, child = context.Pipe(duplex=True)
+        worker = context.Process(target=_workerMain, args=(child, groups), name="Autograder Test Worker")  # type: ignore
+        worker.start()
+        child.close()
+
+        return connection, worker
+
+    def run(self, result, debug=False):
+        groups = self._group()
+
+        if debug or self.jobs == 1 or len(groups) < 2 or not hasattr(os, "fork"):
+            return super().run(result, debug)
+
+        context = multiprocessing.get_context("fork")
+        durations = self._loadDurations()
+        pending = self._schedule(groups, durations)
+
+        workers: Dict[Connection, Tuple[multiprocessing.process.BaseProcess, Optional[int]]] = {}
+
+        for _ in range(min(self.jobs, len(groups))):
+            connection, worker = self._startWorker(context, groups)
+            workers[connection] = (worker, None)
+
+        completed: Dict[int, Optional[List[Event]]] = {}
+        nextToReplay = 0
+
+        try:
+            while nextToReplay < len(groups):
+                for connection, (worker, assigned) in list(workers.items()):
+                    if assigned is not None:
+                        continue
+
+                    if not pending or result.shouldStop:
+                        connection.send(None)
+                        connection.close()
+                        worker.join(timeout=1)
+                        del workers[connection]
+                        continue
+
+                    index = pending.pop(0)
+                    connection.send(index)
+                    workers[connection] = (worker, index)
+
+                busy = [connection for connection, (_, assigned) in workers.items() if assigned is not None]
+
+                if not busy:
+                    # nothing is running and nothing else will be, so we are stopping early
+                    break
+
+                for connection in wait(busy):
+                    worker, assigned = workers[connection]
+
+                    try:
+                        index, events, duration, traceEvents = dill.loads(connection.recv_bytes())
+                        completed[index] = events
+
+                        traceRecorder = getTraceRecorder()
+
+                        if traceRecorder is not None:
+                            traceRecorder.merge(traceEvents)
+
+                        durations[self._getGroupName(groups[index])] = duration
+                        workers[connection] = (worker, None)
+                    except (EOFError, OSError):
+                        # The worker died, so everything that it was running is lost
+                        completed[assigned] = None  # type: ignore
+                        del workers[connection]
+                        worker.join(timeout=1)
+
+                        newConnection, newWorker = self._startWorker(context, groups)
+                        workers[newConnection] = (newWorker, None)
+
+                while nextToReplay in completed:
+                    events = completed.pop(nextToReplay)
+
+                    if events is None:
+                        self._replayCrash(result, groups[nextToReplay])
+                    else:
+                        self._replay(result, groups[nextToReplay], events)
+
+                    nextToReplay += 1
+        finally:
+            for connection, (worker, _) in workers.items():
+                connection.close()
+                worker.join(timeout=1)
+
+                if worker.is_alive():
+                    worker.kill()
+                    worker.join(timeout=1)
+
+        self._saveDurations(durations)
+
+        return result
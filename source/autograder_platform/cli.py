@@ -6,6 +6,7 @@ from typing import List, Callable, Dict, Optional
 from unittest import TestSuite
 
 import autograder_platform
+from autograder_platform.Executors.Environment import setSandboxRoot
 from autograder_platform.config.Config import AutograderConfigurationBuilder, AutograderConfigurationProvider, \
     AutograderConfiguration
 
@@ -67,6 +68,15 @@ class AutograderCLITool(abc.ABC):
     def run(self) -> bool:
         raise NotImplementedError()
 
+    def set_config(self, config: AutograderConfiguration):  # pragma: no cover
+        """
+        Sets the config for the whole autograder
+        """
+        self.config = config
+
+        AutograderConfigurationProvider.set(self.config)
+        setSandboxRoot(self.config.config.sandbox_root)
+
     def load_config(self):  # pragma: no cover
         self.arguments = self.parser.parse_args()
 
@@ -76,10 +86,7 @@ class AutograderCLITool(abc.ABC):
 
         self.set_config_arguments(builder)
 
-        self.config = builder.build()
-
-        AutograderConfigurationProvider.set(self.config)
+        self.set_config(builder.build())
 
     def discover_tests(self):  # pragma: no cover
         self.tests = unittest.loader.defaultTestLoader.discover(self.config.config.test_directory)
-
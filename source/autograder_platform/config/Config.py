@@ -1,11 +1,14 @@
 import importlib
+import multiprocessing
 import os
 from typing import Dict, Generic, List, Optional as OptionalType, TypeVar, Any
 from dataclasses import dataclass
 
 from schema import And, Optional, Or, Regex, Schema, SchemaError
 
-from autograder_platform.config.common import BaseSchema, MissingParsingLibrary, InvalidConfigException
+from autograder_platform.config.ConfigSnapshot import ConfigSnapshot, ConfigSource, getDefaultSnapshotDirectory, \
+    parseTOML, readConfigSource
+from autograder_platform.config.common import BaseSchema, InvalidConfigException
 
 
 @dataclass(frozen=True)
@@ -55,7 +58,76 @@ class PythonConfiguration:
     """
     buffer_size: int
     """
-    The size of the output buffer when the autograder runs
+    Deprecated. Results are now sent over a pipe that grows with the output, so this is no longer used.
+    It is still accepted so that existing configs continue to load.
+    """
+    pool_size: int
+    """
+    The number of pre-started worker processes to keep ready to run student submissions.
+    If 0, a new process is started for each run
+    """
+    preload_modules: List[str]
+    """
+    The modules that each pre-started worker should import before it is used. 
+    Only used if ``pool_size`` is greater than 0
+    """
+    start_method: OptionalType[str]
+    """
+    The multiprocessing start method to use for the pre-started workers. Must be one of 'fork', 'spawn', or 'forkserver'.
+    If not set, 'forkserver' is used where it is supported, otherwise the platform default is used
+    """
+    max_output_size: int
+    """
+    The max number of bytes of OUTPUT lines that are kept from each run of the student's submission.
+    Once this is reached, a truncation marker is added and the rest of the OUTPUT is dropped
+    """
+    serializer: str
+    """
+    How data is serialized when it is sent between the autograder and the student's submission. Must be one of 'auto',
+    'pickle', or 'dill'. 'auto' uses pickle, and only falls back to dill for data that pickle can't handle
+    """
+    memory_limit: OptionalType[int]
+    """
+    The max number of bytes of address space (RLIMIT_AS) that each run of the student's submission can use. This includes
+    the interpreter and everything that it imports. If not set, there is no limit
+    """
+    cpu_time_limit: OptionalType[int]
+    """
+    The max number of seconds of CPU time (RLIMIT_CPU) that each run of the student's submission can use.
+    If not set, there is no limit
+    """
+    use_zygote: bool
+    """
+    If the submission should be imported once in a zygote process, then forked for each test that uses a function 
+    entrypoint. Tests with different mocks or injected code get their own zygote. 
+    Submissions that read input or write files while being imported are run normally.
+    Only supported on platforms with ``fork``
+    """
+    virtual_time: bool
+    """
+    If sleeps in the student's submission should return immediately, rather than waiting. The clocks that the submission
+    can see still advance by the time that was slept
+    """
+    package_index: OptionalType[str]
+    """
+    A directory that extra packages are looked up in and installed from before PyPI. Can either be a simple index (a directory for each 
+    package) or a wheelhouse (every wheel and sdist in one directory)
+    """
+    offline: bool
+    """
+    If PyPI should never be used to check that extra packages exist or to install them. Packages must be installed or in the ``package_index``
+    """
+    stub_modules: List[str]
+    """
+    The modules that are replaced by stubs in the student's submission, rather than imported (ie: ``matplotlib``).
+    Every attribute of a stubbed module records its calls, so tests can still subscribe to them, 
+    but the real module is never imported
+    """
+    requirements_layers: bool
+    """
+    If the submission's requirements should be installed into a layer (a directory for each distinct set of requirements
+    in the user's cache directory) rather than the environment that the autograder runs in.
+    See :ref:`PythonRequirementsLayers`
     """
 
 
@@ -117,6 +189,11 @@ class BasicConfiguration:
     """Extra python spefic configuration. See :ref:`PythonConfiguration` for options"""
     c: OptionalType[CConfiguration] = None
     """Extra C/C-like spefic configuration. See :ref:`CConfiguration` for options"""
+    sandbox_root: OptionalType[str] = None
+    """
+    The directory that each run of the student's submission gets its own sandbox in. 
+    If not set, the system temp directory is used
+    """
 
 
 @dataclass(frozen=True)
@@ -181,8 +258,23 @@ class AutograderConfigurationSchema(BaseSchema[AutograderConfiguration]):
                             "name": str,
                             "version": str,
                         }],
-                        Optional("buffer_size", default=2 ** 20): And(int, lambda x: x >= 2 ** 20)
+                        Optional("buffer_size", default=2 ** 20): And(int, lambda x: x >= 2 ** 20),
+                        Optional("pool_size", default=0): And(int, lambda x: x >= 0),
+                        Optional("preload_modules", default=lambda: ["dill", "autograder_platform"]): [str],
+                        Optional("start_method", default=None):
+                            And(str, lambda x: x in multiprocessing.get_all_start_methods()),
+                        Optional("use_zygote", default=False): bool,
+                        Optional("max_output_size", default=2 ** 24): And(int, lambda x: x >= 1),
+                        Optional("serializer", default="auto"): And(str, lambda x: x in ["auto", "pickle", "dill"]),
+                        Optional("memory_limit", default=None): Or(And(int, lambda x: x >= 2 ** 20), None),
+                        Optional("cpu_time_limit", default=None): Or(And(int, lambda x: x >= 1), None),
+                        Optional("virtual_time", default=False): bool,
+                        Optional("package_index", default=None): Or(And(str, os.path.isdir), None),
+                        Optional("offline", default=False): bool,
+                        Optional("stub_modules", default=lambda: []): [And(str, lambda x: len(x) >= 1)],
+                        Optional("requirements_layers", default=False): bool,
                     }, None),
+                    Optional("sandbox_root", default=None): Or(And(str, os.path.isdir), None),
                     Optional("c", default=None): Or({
                         "use_makefile": bool,
                         "clean_target": str,
@@ -236,6 +328,30 @@ class AutograderConfigurationSchema(BaseSchema[AutograderConfiguration]):
 
         return validated
 
+    def checkSnapshot(self, config: AutograderConfiguration) -> bool:
+        """
+        Description
+        ---
+        Runs the path checks from the schema again on a config that was loaded from a snapshot.
+        Relative paths depend on the working directory, and directories can be removed after the snapshot was created.
+
+        :param config: The config from the snapshot
+        :returns: True if every path in the config still exists
+        """
+        basic = config.config
+
+        if not os.path.isdir(basic.student_submission_directory) or not os.path.exists(basic.test_directory):
+            return False
+
+        if basic.sandbox_root is not None and not os.path.isdir(basic.sandbox_root):
+            return False
+
+        if basic.python is not None and basic.python.package_index is not None \
+                and not os.path.isdir(basic.python.package_index):
+            return False
+
+        return True
+
     def build(self, data: Dict) -> AutograderConfiguration:
         """
         Description
@@ -278,6 +394,9 @@ class AutograderConfigurationBuilder(Generic[T]):
 
     ``.build`` should always be the last thing called.
 
+    With ``useSnapshot``, the built config is kept on disk, and the next build with the same config file and overrides
+    loads it instead of parsing and validating the config again. See :ref:`ConfigSnapshot`.
+
     In the future, configuration will be allowed with this builder, but I would need to see the use case.
     """
     DEFAULT_CONFIG_FILE = "./config.toml"
@@ -285,25 +404,39 @@ class AutograderConfigurationBuilder(Generic[T]):
     def __init__(self, configSchema: BaseSchema[T] = AutograderConfigurationSchema()):
         self.schema: BaseSchema[T] = configSchema
         self.data: Dict = {}
+        self.source: OptionalType[ConfigSource] = None
+        """The config file. It is only parsed if the config isn't loaded from a snapshot"""
+        self.overrides: Dict[str, Any] = {}
+        """The values that replace the ones in the config file, keyed by their path in the config (ie: ``config.test_directory``)"""
+        self.snapshot: OptionalType[ConfigSnapshot] = None
 
     def fromTOML(self: Builder, file=DEFAULT_CONFIG_FILE, merge=True) -> Builder:
         """
         Attempt to load the autograder config from the TOML config file.
         This file is assumed to be located in the same directory as the actual test cases
         """
-        try:
-            from tomli import load
-        except ModuleNotFoundError:
-            raise MissingParsingLibrary("tomlkit", "AutograderConfigurationBuilder.fromTOML")
-
-        with open(file, 'rb') as rb:
-            self.data = load(rb)
+        # the file is only parsed when the config is built, as it isn't parsed at all if there is a snapshot
+        self.source = readConfigSource(file)
 
         return self
 
     # Really easy to add support for other file formats.
     # YAML or JSON would work as well
 
+    def useSnapshot(self: Builder, directory: OptionalType[str] = None) -> Builder:
+        """
+        Description
+        ---
+
+        Keeps the built config in a snapshot, and loads the snapshot rather than parsing and validating the config if
+        neither the config file nor the overrides have changed since it was created.
+
+        :param directory: The directory to keep snapshots in. If None, the user's cache directory is used.
+        :returns: self
+        """
+        self.snapshot = ConfigSnapshot(directory if directory is not None else getDefaultSnapshotDirectory())
+        return self
+
     @staticmethod
     def _createKeyIfDoesntExist(source: Dict[str, Any], key: str):
         if key in source:
@@ -311,13 +444,23 @@ class AutograderConfigurationBuilder(Generic[T]):
 
         source[key] = {}
 
+    def _setOverride(self, path: str, value: Any) -> None:
+        self.overrides[path] = value
+
+        *tables, key = path.split(".")
+        data = self.data
+
+        for table in tables:
+            self._createKeyIfDoesntExist(data, table)
+            data = data[table]
+
+        data[key] = value
+
     def setStudentSubmissionDirectory(self: Builder, studentSubmissionDirectory: OptionalType[str]) -> Builder:
         if studentSubmissionDirectory is None:
             return self
 
-        self._createKeyIfDoesntExist(self.data, "config")
-
-        self.data["config"]["student_submission_directory"] = studentSubmissionDirectory
+        self._setOverride("config.student_submission_directory", studentSubmissionDirectory)
 
         return self
 
@@ -325,15 +468,34 @@ class AutograderConfigurationBuilder(Generic[T]):
         if testDirectory is None:
             return self
 
-        self._createKeyIfDoesntExist(self.data, "config")
-
-        self.data["config"]["test_directory"] = testDirectory
+        self._setOverride("config.test_directory", testDirectory)
 
         return self
 
     def build(self) -> T:
+        snapshotKey: OptionalType[str] = None
+
+        if self.snapshot is not None and self.source is not None:
+            snapshotKey = ConfigSnapshot.getKey(self.source, self.overrides, type(self.schema).__qualname__)
+            config = self.snapshot.load(self.source, snapshotKey)
+
+            if config is not None and self.schema.checkSnapshot(config):
+                return config
+
+        if self.source is not None:
+            overrides = self.overrides
+            self.data, self.overrides = parseTOML(self.source), {}
+
+            for path, value in overrides.items():
+                self._setOverride(path, value)
+
         self.data = self.schema.validate(self.data)
-        return self.schema.build(self.data)
+        config = self.schema.build(self.data)
+
+        if snapshotKey is not None:
+            self.snapshot.save(self.source, snapshotKey, config)  # type: ignore
+
+        return config
 
 
 class AutograderConfigurationProvider:
@@ -0,0 +1,158 @@
+"""
+This module provides the caches that make loading the same config again cheap.
+
+Parsing a config is cached for the rest of the process, so tools that read a few values from the config before building
+it (ie: ``run_local``) only parse it once. Built configs are kept in snapshots on disk, so the next run with the same
+config skips parsing and validating it (see :ref:`AutograderConfigurationBuilder.useSnapshot`).
+
+Snapshots are keyed by the path, modification time, size, and hash of the config, along with anything that was
+overridden by the CLI, the working directory (relative paths in the config depend on it), and the versions of the
+autograder and Python, so any change to the config is picked up.
+
+:author: Gregory Bell
+"""
+
+import copy
+import dataclasses
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import Any, Dict, Optional, Tuple
+
+import autograder_platform
+from autograder_platform.config.common import MissingParsingLibrary
+
+
+@dataclasses.dataclass(frozen=True)
+class ConfigSource:
+    """
+    The contents of a config file, and what it was read from.
+    """
+    path: str
+    """The absolute path of the config"""
+    mtime_ns: int
+    size: int
+    digest: str
+    """The sha256 of the contents"""
+    contents: bytes
+
+
+def readConfigSource(file: str) -> ConfigSource:
+    """
+    Reads a config file. The file is only read once, even though it is both hashed and parsed.
+
+    :raises OSError: If the file can't be read
+    """
+    with open(file, 'rb') as rb:
+        stat = os.fstat(rb.fileno())
+        contents = rb.read()
+
+    return ConfigSource(os.path.abspath(file), stat.st_mtime_ns, stat.st_size,
+                        hashlib.sha256(contents).hexdigest(), contents)
+
+
+PARSED_TOML: Dict[Tuple[str, str], Dict[str, Any]] = {}
+"""The parsed configs for this process, keyed by their path and hash"""
+
+
+def parseTOML(source: ConfigSource) -> Dict[str, Any]:
+    """
+    Parses a TOML config, unless it was already parsed by this process.
+
+    :returns: A copy of the parsed config, so that it can be changed
+    """
+    key = (source.path, source.digest)
+
+    if key not in PARSED_TOML:
+        try:
+            from tomli import loads
+        except ModuleNotFoundError:
+            raise MissingParsingLibrary("tomli", "AutograderConfigurationBuilder.fromTOML")
+
+        PARSED_TOML[key] = loads(source.contents.decode("utf-8"))
+
+    return copy.deepcopy(PARSED_TOML[key])
+
+
+def loadTOML(file: str) -> Dict[str, Any]:
+    """
+    Reads and parses a TOML config. See :ref:`parseTOML`
+    """
+    return parseTOML(readConfigSource(file))
+
+
+class ConfigSnapshot:
+    """
+    Description
+    ===========
+
+    Keeps the last config that was built from each config file.
+
+    Each config file has a single snapshot, which is replaced whenever the config is built with a different key, so
+    snapshots don't pile up as the config is edited.
+
+    Snapshots aren't validated again when they are loaded, only the paths in them are checked
+    (see :ref:`BaseSchema.checkSnapshot`).
+    """
+
+    def __init__(self, directory: str):
+        self.directory: str = directory
+
+    @staticmethod
+    def getKey(source: ConfigSource, overrides: Dict[str, Any], schemaName: str) -> str:
+        """
+        :returns: A key for the config file, the overrides, the schema, the working directory, and the versions of
+        the autograder and Python, as the built config changes with any of them
+        """
+        key = hashlib.sha256()
+
+        key.update(f"{source.path}\n{source.mtime_ns}\n{source.size}\n{source.digest}\n".encode(errors="surrogateescape"))
+        key.update(f"{sorted(overrides.items())}\n".encode(errors="surrogateescape"))
+        key.update(f"{schemaName}\n{autograder_platform.__version__}\n{sys.version}\n{sys.platform}\n".encode())
+        key.update(f"{os.getcwd()}\n".encode(errors="surrogateescape"))
+
+        return key.hexdigest()
+
+    def getPath(self, source: ConfigSource) -> str:
+        return os.path.join(self.directory, hashlib.sha256(source.path.encode(errors="surrogateescape")).hexdigest()
+                            + ".pickle")
+
+    def load(self, source: ConfigSource, key: str) -> Optional[Any]:
+        """
+        :returns: The config from the snapshot, or None if there isn't a snapshot with the key
+        """
+        try:
+            with open(self.getPath(source), 'rb') as rb:
+                snapshotKey, config = pickle.load(rb)
+        except Exception:
+            # snapshots are only an optimization, so any snapshot that can't be loaded is just rebuilt
+            return None
+
+        return config if snapshotKey == key else None
+
+    def save(self, source: ConfigSource, key: str, config: Any) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+
+            # other processes may be loading the snapshot, so it is written under a unique name then moved into place
+            fd, tempPath = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        except OSError:  # pragma: no coverage
+            return
+
+        try:
+            with os.fdopen(fd, 'wb') as wb:
+                pickle.dump((key, config), wb, pickle.HIGHEST_PROTOCOL)
+
+            os.replace(tempPath, self.getPath(source))
+        except Exception:  # pragma: no coverage
+            # configs that can't be pickled just aren't snapshotted
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+
+
+def getDefaultSnapshotDirectory() -> str:
+    cacheHome = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+
+    return os.path.join(cacheHome, "autograder_platform", "config")
@@ -13,6 +13,15 @@ class BaseSchema(Generic[T], ABC):
     def build(self, data: Dict) -> T:
         raise NotImplementedError()
 
+    def checkSnapshot(self, config: T) -> bool:
+        """
+        Checks that a config that was loaded from a snapshot is still valid, ie: that the directories that it refers to
+        still exist. Only the checks that don't depend on the config file itself need to be run again.
+
+        :returns: True if the config can be used, False if it must be built again
+        """
+        return True
+
 class InvalidConfigException(Exception):
     def __init__(self, msg):
         super().__init__(msg)
@@ -0,0 +1,86 @@
+from typing import List
+
+from autograder_platform.StudentSubmission.common import ValidationError
+from autograder_platform.StudentSubmissionImpl.Python import PythonSubmission
+from autograder_platform.StudentSubmissionImpl.Python.PythonPackageIndex import AbstractPackageIndex, LocalIndex, \
+    PyPIIndex, setPackageIndexes
+from autograder_platform.StudentSubmissionImpl.Python.PythonRequirementsLayers import getDefaultLayerDirectory, \
+    setRequirementsLayerDirectory
+from autograder_platform.TestingFramework.ParallelTestSuite import ParallelTestSuite
+from autograder_platform.cli import AutograderCLITool
+from autograder_platform.config.Config import AutograderConfiguration, PythonConfiguration
+
+
+class AutograderTestRunnerCLITool(AutograderCLITool):
+    """
+    The base for the CLI tools that run the autograder's tests.
+
+    Adds the options for how the tests are run, and sets up the submission implementation from the config.
+    """
+
+    def __init__(self, tool_name: str):
+        super().__init__(tool_name)
+
+        self.parser.add_argument("--jobs", type=int, default=1,
+                                 help="The number of test classes to run at the same time. "
+                                      "Each class is run in its own forked process. Defaults to 1, which runs the tests serially")
+        self.parser.add_argument("--durations-file", default=None,
+                                 help="Read and record how long each test class took in this file, so that the slowest "
+                                      "classes are started first. Only used when running with more than 1 job")
+        self.parser.add_argument("--prebuild", action="store_true", default=False,
+                                 help="Load, build, and validate the submission once before the tests are discovered. "
+                                      "Only used by tests that get the submission with 'fromCache' and the default options")
+
+    def set_config(self, config: AutograderConfiguration):  # pragma: no cover
+        super().set_config(config)
+
+        if config.config.python is not None:
+            self.configure_python(config.config.python)
+
+    @staticmethod
+    def configure_python(pythonConfig: PythonConfiguration):  # pragma: no cover
+        """
+        Sets where the submission's requirements are looked up and installed
+        """
+        indexes: List[AbstractPackageIndex] = []
+
+        if pythonConfig.package_index is not None:
+            indexes.append(LocalIndex(pythonConfig.package_index))
+
+        if not pythonConfig.offline:
+            indexes.append(PyPIIndex())
+
+        setPackageIndexes(indexes)
+
+        if pythonConfig.requirements_layers:
+            setRequirementsLayerDirectory(getDefaultLayerDirectory())
+
+    def prebuild_submission(self):  # pragma: no cover
+        """
+        Prepares the submission with the default options so that test classes using ``fromCache`` (including the ones
+        run in forked workers) don't each prepare it.
+        Validation errors are cached, and are reported by the tests.
+        """
+        if self.config is None or self.config.config.python is None:
+            return
+
+        try:
+            PythonSubmission() \
+                .setSubmissionRoot(self.config.config.student_submission_directory) \
+                .fromCache()
+        except ValidationError:
+            pass
+
+    def discover_tests(self):  # pragma: no cover
+        if self.arguments is not None and self.arguments.prebuild:
+            self.prebuild_submission()
+
+        super().discover_tests()
+
+        jobs = self.arguments.jobs if self.arguments is not None else 1
+
+        if jobs == 1 or self.tests is None:
+            return
+
+        self.tests = ParallelTestSuite(self.tests, jobs=jobs,
+                                       durationsFile=self.arguments.durations_file if self.arguments is not None else None)
@@ -1,7 +1,8 @@
 import os
 import shutil
+import sys
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import dill.source
 
@@ -10,6 +11,9 @@ from autograder_platform.Executors.Environment import ExecutionEnvironmentBuilde
 from autograder_platform.StudentSubmissionImpl.Python.PythonEnvironment import PythonEnvironment, PythonResults, PythonEnvironmentBuilder
 from autograder_platform.StudentSubmissionImpl.Python.PythonFileImportFactory import PythonFileImportFactory
 from autograder_platform.StudentSubmissionImpl.Python import PythonSubmission
+from autograder_platform.StudentSubmissionImpl.Python.PythonPackageIndex import LocalIndex, setPackageCacheFile, \
+    setPackageIndexes
+from autograder_platform.StudentSubmissionImpl.Python.PythonRequirementsLayers import setRequirementsLayerDirectory
 from autograder_platform.StudentSubmissionImpl.Python.Runners import PythonRunnerBuilder, Parameter
 from autograder_platform.TestingFramework.SingleFunctionMock import SingleFunctionMock
 from autograder_platform.config.Config import AutograderConfigurationProvider
@@ -20,7 +24,16 @@ class TestFullExecutions(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
         configMock = MagicMock()
-        configMock.config.python.buffer_size = 2 ** 20
+        configMock.config.python.pool_size = 0
+        configMock.config.python.preload_modules = []
+        configMock.config.python.start_method = None
+        configMock.config.python.use_zygote = False
+        configMock.config.python.max_output_size = 2 ** 24
+        configMock.config.python.serializer = "auto"
+        configMock.config.python.memory_limit = None
+        configMock.config.python.cpu_time_limit = None
+        configMock.config.python.virtual_time = False
+        configMock.config.python.stub_modules = []
         AutograderConfigurationProvider.set(configMock)
 
     @classmethod
@@ -48,9 +61,6 @@ class TestFullExecutions(unittest.TestCase):
         if os.path.exists(self.DATA_DIRECTORY):
             shutil.rmtree(self.DATA_DIRECTORY)
 
-        if os.path.exists(ExecutionEnvironment.SANDBOX_LOCATION):
-            shutil.rmtree(ExecutionEnvironment.SANDBOX_LOCATION)
-
         if os.path.exists(self.PYTHON_PROGRAM_DIRECTORY):
             shutil.rmtree(self.PYTHON_PROGRAM_DIRECTORY)
 
@@ -60,6 +70,38 @@ class TestFullExecutions(unittest.TestCase):
         with open(path, 'w') as w:
             w.write(contents)
 
+    def testResultsKeepSandbox(self):
+        program = \
+            "with open('out.txt', 'w') as w:\n" \
+            "    w.write('written by the submission')\n"
+
+        self.writePythonFile("test_code.py", program)
+
+        submission = PythonSubmission() \
+            .setSubmissionRoot(self.PYTHON_PROGRAM_DIRECTORY) \
+            .enableLooseMainMatching() \
+            .load() \
+            .build() \
+            .validate()
+
+        runner = PythonRunnerBuilder(submission) \
+            .setEntrypoint(module=True) \
+            .build()
+
+        environment = ExecutionEnvironmentBuilder().build()
+
+        Executor.execute(environment, runner)
+
+        sandboxLocation = environment.SANDBOX_LOCATION
+        results = getResults(environment)
+        del environment
+
+        self.assertEqual("written by the submission", results.file_out["out.txt"])
+
+        del results
+
+        self.assertFalse(os.path.exists(sandboxLocation))
+
     def testFileIOFullExecution(self):
         # Because file io relies on the sandbox that the executor creates
         #  I am testing it as part of the executor tests
@@ -171,6 +213,68 @@ class TestFullExecutions(unittest.TestCase):
 
         self.assertEqual(expectedOutput, actualOutput)
 
+    def testImportSubmissionModulesFullExecution(self):
+        os.mkdir(os.path.join(self.PYTHON_PROGRAM_DIRECTORY, "pkg"))
+
+        with open(os.path.join(self.PYTHON_PROGRAM_DIRECTORY, "helpers.py"), 'w') as w:
+            w.writelines("def add(a, b):\n"
+                         "  return a + b\n")
+        with open(os.path.join(self.PYTHON_PROGRAM_DIRECTORY, "pkg", "__init__.py"), 'w') as w:
+            w.writelines("VALUE = 2\n")
+        with open(os.path.join(self.PYTHON_PROGRAM_DIRECTORY, "pkg", "sub.py"), 'w') as w:
+            w.writelines("from . import VALUE\n"
+                         "def double(x):\n"
+                         "  return x * VALUE\n")
+        with open(os.path.join(self.PYTHON_PROGRAM_DIRECTORY, "main.py"), 'w') as w:
+            w.writelines(
+                "from helpers import add\n" \
+                "from pkg.sub import double\n" \
+                "def run():\n" \
+                "    return double(add(1, 2))\n"
+            )
+
+        submission = PythonSubmission() \
+            .setSubmissionRoot(self.PYTHON_PROGRAM_DIRECTORY) \
+            .load() \
+            .build() \
+            .validate()
+
+        runner = PythonRunnerBuilder(submission) \
+            .setEntrypoint(function="run") \
+            .build()
+
+        environment = ExecutionEnvironmentBuilder().build()
+
+        Executor.execute(environment, runner)
+
+        self.assertEqual(6, getResults(environment).return_val)
+
+    def testSubmissionModulesDontShadowStandardLibrary(self):
+        # modules named like the standard library were never imported over it when running from the submission root
+        self.writePythonFile("random.py", "def randint(a, b):\n    return -1\n")
+        self.writePythonFile("statistics.py", "def mean(data):\n    return -1\n")
+        self.writePythonFile("main.py",
+                             "import random\n"
+                             "import statistics\n"
+                             "def run():\n"
+                             "    return random.randint(1, 1), statistics.mean([2, 4])\n")
+
+        submission = PythonSubmission() \
+            .setSubmissionRoot(self.PYTHON_PROGRAM_DIRECTORY) \
+            .load() \
+            .build() \
+            .validate()
+
+        runner = PythonRunnerBuilder(submission) \
+            .setEntrypoint(function="run") \
+            .build()
+
+        environment = ExecutionEnvironmentBuilder().build()
+
+        Executor.execute(environment, runner)
+
+        self.assertEqual((1, 3), getResults(environment).return_val)
+
     def testMockedImportFullExecution(self):
         # This test is flaky on windows - rerunning it helps.
         # It seems to be due to how windows implements the package cache when installing
@@ -216,6 +320,98 @@ class TestFullExecutions(unittest.TestCase):
         actualOutput.assertCalledWith([1, 2, 3, 4])
         actualOutput.assertCalledWith("illegal!")
 
+    def testRequirementsLayerFullExecution(self):
+        wheelhouse = os.path.abspath(os.path.join(self.DATA_DIRECTORY, "wheelhouse"))
+        os.mkdir(wheelhouse)
+        with open(os.path.join(wheelhouse, "layered_pkg-1.0-py3-none-any.whl"), 'w') as w:
+            w.write("")
+
+        setPackageIndexes([LocalIndex(wheelhouse)])
+        setPackageCacheFile(None)
+        setRequirementsLayerDirectory(os.path.abspath(os.path.join(self.DATA_DIRECTORY, "layers")))
+        self.addCleanup(setPackageIndexes, None)
+        self.addCleanup(setRequirementsLayerDirectory, None)
+
+        def fakePip(command, **_):
+            # stands in for pip, so that the package only exists in the layer
+            target = command[command.index("--target") + 1]
+            os.mkdir(os.path.join(target, "layered_pkg"))
+            with open(os.path.join(target, "layered_pkg", "__init__.py"), 'w') as w:
+                w.write("VALUE = 42\n")
+
+        self.writePythonFile("requirements.txt", "layered-pkg==1.0\n")
+        self.writePythonFile("test_code.py", "import layered_pkg\nprint('OUTPUT', layered_pkg.VALUE)\n")
+
+        with patch("subprocess.check_call", side_effect=fakePip):
+            submission = PythonSubmission() \
+                .setSubmissionRoot(self.PYTHON_PROGRAM_DIRECTORY) \
+                .enableLooseMainMatching() \
+                .enableRequirements() \
+                .load() \
+                .build() \
+                .validate()
+
+        self.assertIsNotNone(submission.getRequirementsLayer())
+
+        environment = ExecutionEnvironmentBuilder[PythonEnvironment, PythonResults]() \
+            .setTimeout(10) \
+            .build()
+
+        runner = PythonRunnerBuilder(submission) \
+            .setEntrypoint(module=True) \
+            .build()
+
+        Executor.execute(environment, runner)
+
+        results = getResults(environment)
+
+        self.assertIsNone(results.exception)
+        self.assertEqual(["42"], results.stdout)
+        self.assertNotIn(submission.getRequirementsLayer(), sys.path)
+
+    def testStubModuleFullExecution(self):
+        # this module doesn't exist, so the stub is the only way it can be imported
+        program = \
+            "import not_a_real_plotting_lib.pyplot as plt\n" \
+            "fig = plt.figure()\n" \
+            "ax = fig.add_subplot(111)\n" \
+            "ax.plot([1, 2, 3])\n" \
+            "plt.show()\n"
+
+        self.writePythonFile("test_code.py", program)
+
+        submission = PythonSubmission() \
+            .setSubmissionRoot(self.PYTHON_PROGRAM_DIRECTORY) \
+            .enableLooseMainMatching() \
+            .load() \
+            .build() \
+            .validate()
+
+        environment = ExecutionEnvironmentBuilder[PythonEnvironment, PythonResults]() \
+            .setTimeout(10) \
+            .setImplEnvironment(PythonEnvironmentBuilder, lambda x: x \
+                                .addStubModule("not_a_real_plotting_lib") \
+                                .build()
+                                ) \
+            .build()
+
+        runner = PythonRunnerBuilder(submission) \
+            .subscribeToMock("not_a_real_plotting_lib.pyplot.show") \
+            .subscribeToMock("not_a_real_plotting_lib.pyplot.figure().add_subplot().plot") \
+            .subscribeToMock("not_a_real_plotting_lib.pyplot.close") \
+            .setEntrypoint(module=True) \
+            .build()
+
+        Executor.execute(environment, runner)
+
+        results = getResults(environment)
+
+        self.assertIsNone(results.exception)
+        results.impl_results.mocks["not_a_real_plotting_lib.pyplot.show"].assertCalledTimes(1)
+        results.impl_results.mocks["not_a_real_plotting_lib.pyplot.figure().add_subplot().plot"]\
+            .assertCalledWith([1, 2, 3])
+        results.impl_results.mocks["not_a_real_plotting_lib.pyplot.close"].assertNotCalled()
+
     def testSpyImportFullExecution(self):
         # This test is flaky on windows - rerunning it helps.
         # It seems to be due to how windows implements the package cache when installing
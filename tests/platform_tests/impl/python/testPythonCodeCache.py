@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from autograder_platform.StudentSubmissionImpl.Python.PythonCodeCache import CodeCache, adoptCodeCacheDirectory, \
+    getCodeCache, setCodeCacheDirectory
+
+
+class TestPythonCodeCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.cache = CodeCache(self.directory)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def testSameSourceCompiledOnce(self):
+        first = self.cache.compile("x = 1", "main.py")
+        second = self.cache.compile("x = 1", "main.py")
+
+        self.assertIs(first, second)
+
+    def testDifferentFileNames(self):
+        first = self.cache.compile("x = 1", "main.py")
+        second = self.cache.compile("x = 1", "other.py")
+
+        self.assertIsNot(first, second)
+        self.assertEqual("other.py", second.co_filename)
+
+    def testLoadedFromDisk(self):
+        code = self.cache.compile("x = 1 + 1", "main.py")
+
+        # a new cache has nothing in memory, so it must be loaded from the directory
+        otherCache = CodeCache(self.directory)
+
+        self.assertIsNotNone(otherCache._load(CodeCache.getKey("x = 1 + 1", "main.py")))
+
+        namespace = {}
+        exec(otherCache.compile("x = 1 + 1", "main.py"), namespace)
+
+        self.assertEqual(2, namespace["x"])
+        self.assertEqual(code.co_code, otherCache.compile("x = 1 + 1", "main.py").co_code)
+
+    def testCorruptFileIsRecompiled(self):
+        key = CodeCache.getKey("x = 3", "main.py")
+
+        with open(os.path.join(self.directory, f"{key}.marshal"), "wb") as w:
+            w.write(b"not marshal data")
+
+        namespace = {}
+        exec(self.cache.compile("x = 3", "main.py"), namespace)
+
+        self.assertEqual(3, namespace["x"])
+
+    def testSyntaxErrorNotCached(self):
+        with self.assertRaises(SyntaxError):
+            self.cache.compile("x = ", "main.py")
+
+        self.assertEqual([], os.listdir(self.directory))
+
+    def testMemoryOnly(self):
+        cache = CodeCache()
+
+        self.assertIs(cache.compile("x = 1", "main.py"), cache.compile("x = 1", "main.py"))
+
+    def testPruneKeepsMostRecentlyUsed(self):
+        for i in range(4):
+            self.cache.compile(f"x = {i}", "main.py")
+
+            path = os.path.join(self.directory, f"{CodeCache.getKey(f'x = {i}', 'main.py')}.marshal")
+            os.utime(path, (time.time() - 60 + i, time.time() - 60 + i))
+
+        # loading the oldest one makes it the most recently used
+        CodeCache(self.directory).compile("x = 0", "main.py")
+
+        self.cache.prune(2)
+
+        self.assertEqual(sorted([f"{CodeCache.getKey('x = 0', 'main.py')}.marshal",
+                                 f"{CodeCache.getKey('x = 3', 'main.py')}.marshal"]),
+                         sorted(os.listdir(self.directory)))
+
+    def testSetDirectoryPrunes(self):
+        for i in range(3):
+            self.cache.compile(f"x = {i}", "main.py")
+
+        try:
+            setCodeCacheDirectory(self.directory, maxFiles=1)
+
+            self.assertEqual(self.directory, getCodeCache().directory)
+            self.assertEqual(1, len(os.listdir(self.directory)))
+        finally:
+            setCodeCacheDirectory(None)
+
+    def testAdoptKeepsSameCache(self):
+        try:
+            setCodeCacheDirectory(self.directory)
+            cache = getCodeCache()
+
+            adoptCodeCacheDirectory(self.directory)
+            self.assertIs(cache, getCodeCache())
+
+            otherDirectory = tempfile.mkdtemp()
+            self.addCleanup(shutil.rmtree, otherDirectory, True)
+
+            adoptCodeCacheDirectory(otherDirectory)
+            self.assertEqual(otherDirectory, getCodeCache().directory)
+            # the student's code can read the environment
+            self.assertNotIn(otherDirectory, os.environ.values())
+        finally:
+            setCodeCacheDirectory(None)
@@ -1,7 +1,11 @@
+import os
+import sys
+import tempfile
 import unittest
 from autograder_platform.Executors.Environment import ExecutionEnvironment, Results, getResults
 
-from autograder_platform.StudentSubmissionImpl.Python.PythonEnvironment import PythonEnvironment, PythonResults
+from autograder_platform.StudentSubmissionImpl.Python.PythonEnvironment import PythonEnvironment, PythonResults, \
+    PythonEnvironmentBuilder, MODULE_EXISTS_CACHE
 from autograder_platform.TestingFramework.SingleFunctionMock import SingleFunctionMock
 
 class TestPythonEnvironmentGetResults(unittest.TestCase):
@@ -16,3 +20,49 @@ class TestPythonEnvironmentGetResults(unittest.TestCase):
         actualMock = getResults(self.environment).impl_results.mocks["mock"]
 
         self.assertIsNotNone(actualMock)
+
+
+class TestPythonEnvironmentBuilder(unittest.TestCase):
+    def testModuleMockValidated(self):
+        with self.assertRaises(AttributeError):
+            PythonEnvironmentBuilder() \
+                .addModuleMock("not_a_real_module", {"fun": SingleFunctionMock("fun")}) \
+                .build()
+
+        # modules that weren't found may be installed later, so they aren't cached
+        self.assertNotIn("not_a_real_module", MODULE_EXISTS_CACHE)
+
+    def testModuleMockDoesNotImportModule(self):
+        environment = PythonEnvironmentBuilder() \
+            .addModuleMock("colorsys", {"colorsys.rgb_to_hsv": SingleFunctionMock("rgb_to_hsv")}) \
+            .build()
+
+        self.assertEqual(1, len(environment.import_loader))
+        self.assertIn("colorsys", MODULE_EXISTS_CACHE)
+        self.assertNotIn("module", vars(environment.import_loader[0]))
+
+    def testModuleMockDoesNotImportParent(self):
+        with tempfile.TemporaryDirectory() as directory:
+            os.mkdir(os.path.join(directory, "mocked_parent"))
+
+            with open(os.path.join(directory, "mocked_parent", "__init__.py"), 'w') as w:
+                w.write("raise Exception('The parent was imported!')\n")
+
+            with open(os.path.join(directory, "mocked_parent", "child.py"), 'w') as w:
+                w.write("def fun():\n    pass\n")
+
+            sys.path.append(directory)
+
+            try:
+                PythonEnvironmentBuilder() \
+                    .addModuleMock("mocked_parent.child", {"mocked_parent.child.fun": SingleFunctionMock("fun")}) \
+                    .build()
+
+                with self.assertRaises(AttributeError):
+                    PythonEnvironmentBuilder() \
+                        .addModuleMock("mocked_parent.missing", {"fun": SingleFunctionMock("fun")}) \
+                        .build()
+            finally:
+                sys.path.remove(directory)
+
+        self.assertNotIn("mocked_parent", sys.modules)
@@ -3,8 +3,15 @@ import os
 import shutil
 import sys
 import unittest
+from unittest.mock import patch
+
+import dill
 
 from autograder_platform.StudentSubmissionImpl.Python.PythonFileImportFactory import PythonFileImportFactory
+from autograder_platform.StudentSubmissionImpl.Python.PythonModuleMockImportFactory import MockedModuleFinder, StubMock, \
+    StubModule, resolveStubMock
+from autograder_platform.StudentSubmissionImpl.Python.PythonSubmissionImportFactory import SubmissionModuleFinder
+from autograder_platform.TestingFramework.SingleFunctionMock import SingleFunctionMock
 
 class TestPythonImportFactory(unittest.TestCase):
     TEST_FILE_DIRECTORY: str = "./sandbox"
@@ -48,3 +55,98 @@ class TestPythonImportFactory(unittest.TestCase):
 
         del sys.meta_path[0]
 
+    def testMockedModuleLoadedLazily(self):
+        finder = MockedModuleFinder("colorsys", {"rgb_to_hsv": SingleFunctionMock("rgb_to_hsv", [(1, 2, 3)])})
+
+        # only the name and the mocks are sent to the child
+        self.assertLess(len(dill.dumps(finder)), 2048)
+
+        originalModule = sys.modules.pop("colorsys", None)
+        sys.meta_path.insert(0, dill.loads(dill.dumps(finder)))
+
+        try:
+            importedModule = importlib.import_module("colorsys")
+        finally:
+            del sys.meta_path[0]
+            sys.modules.pop("colorsys", None)
+
+            if originalModule is not None:
+                sys.modules["colorsys"] = originalModule
+
+        self.assertEqual((1, 2, 3), importedModule.rgb_to_hsv(0, 0, 0))
+        # the rest of the module is the real module
+        self.assertEqual((0.0, 0.0, 0.0), importedModule.hsv_to_rgb(0, 0, 0))
+
+    def testStubModuleNeverImportsRealModule(self):
+        finder = MockedModuleFinder("colorsys", {"hsv_to_rgb": SingleFunctionMock("hsv_to_rgb", [(1, 2, 3)])}, stub=True)
+
+        originalModule = sys.modules.pop("colorsys", None)
+        sys.meta_path.insert(0, dill.loads(dill.dumps(finder)))
+
+        try:
+            importedModule = importlib.import_module("colorsys")
+        finally:
+            del sys.meta_path[0]
+            sys.modules.pop("colorsys", None)
+
+            if originalModule is not None:
+                sys.modules["colorsys"] = originalModule
+
+        self.assertIsInstance(importedModule, StubModule)
+        self.assertEqual((1, 2, 3), importedModule.hsv_to_rgb(0, 0, 0))
+        # the real function would return a tuple
+        self.assertIsInstance(importedModule.rgb_to_hsv(0, 0, 0), StubMock)
+
+    def testStubModuleRecordsAtDepth(self):
+        finder = MockedModuleFinder("not_a_real_plotting_lib", {}, stub=True)
+        sys.meta_path.insert(0, finder)
+
+        try:
+            plt = importlib.import_module("not_a_real_plotting_lib.pyplot")
+
+            plt.figure().add_subplot(111)
+            plt.figure(figsize=(2, 2)).add_subplot(121)
+
+            addSubplot = resolveStubMock("not_a_real_plotting_lib.pyplot.figure().add_subplot")
+            figure = resolveStubMock("not_a_real_plotting_lib.pyplot.figure")
+            show = resolveStubMock("not_a_real_plotting_lib.pyplot.show")
+        finally:
+            del sys.meta_path[0]
+            sys.modules.pop("not_a_real_plotting_lib.pyplot", None)
+            sys.modules.pop("not_a_real_plotting_lib", None)
+
+        self.assertIsNotNone(addSubplot)
+        self.assertIsNotNone(figure)
+        self.assertIsNotNone(show)
+
+        addSubplot.assertCalledWith(111)
+        addSubplot.assertCalledWith(121)
+        figure.assertCalledWith(figsize=(2, 2))
+        show.assertNotCalled()
+
+        # the recorded calls are sent back to the parent
+        self.assertEqual(2, dill.loads(dill.dumps(addSubplot)).calledTimes)
+
+    def testResolveStubMockNotStubbed(self):
+        self.assertIsNone(resolveStubMock("colorsys.rgb_to_hsv"))
+
+    def testShadowedModulesFoundOnInstall(self):
+        for filename in ["random.py", "helper.py"]:
+            self.writeTestFile(filename)
+
+        finder = SubmissionModuleFinder.fromFiles(self.TEST_FILE_DIRECTORY, [
+            os.path.join(self.TEST_FILE_DIRECTORY, "random.py"), os.path.join(self.TEST_FILE_DIRECTORY, "helper.py")])
+
+        finder.install()
+
+        try:
+            self.assertEqual({"random"}, finder.shadowed)
+
+            # imports are served from memory, without searching the path again
+            with patch("importlib.machinery.PathFinder.find_spec") as findSpec:
+                self.assertIsNone(finder.find_spec("random", None))
+                self.assertIsNotNone(finder.find_spec("helper", None))
+
+            findSpec.assert_not_called()
+        finally:
+            sys.meta_path.remove(finder)
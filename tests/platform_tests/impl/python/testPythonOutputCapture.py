@@ -0,0 +1,123 @@
+import multiprocessing
+import threading
+import unittest
+
+from autograder_platform.StudentSubmissionImpl.Python.PythonChannel import FRAME_DIAGNOSTICS, FrameReceiver
+from autograder_platform.StudentSubmissionImpl.Python.PythonOutputCapture import OutputCapture
+
+
+class TestPythonOutputCapture(unittest.TestCase):
+    def setUp(self) -> None:
+        reader, self.writer = multiprocessing.Pipe(duplex=False)
+        self.receiver = FrameReceiver(reader)
+
+    def tearDown(self) -> None:
+        self.receiver.close()
+        self.writer.close()
+
+    def finish(self, capture: OutputCapture) -> None:
+        capture.finish()
+        self.writer.close()
+        self.receiver.receive(5)
+
+    def testKeepsOnlyOutputLines(self):
+        capture = OutputCapture(self.writer, 2 ** 20)
+
+        print("Enter a number: OUTPUT 5", file=capture.stream)
+        print("debugging", file=capture.stream)
+        print("output", "lowercase", file=capture.stream)
+
+        self.finish(capture)
+
+        self.assertEqual(["5", "lowercase"], self.receiver.stdout)
+        self.assertEqual("debugging", self.receiver.getFrame(FRAME_DIAGNOSTICS))
+
+    def testUndecodableFrameClosesChannel(self):
+        self.writer.send_bytes(b"not a frame")
+
+        self.assertTrue(self.receiver.receive(5))
+        self.assertTrue(self.receiver.closed)
+        self.assertIsNotNone(self.receiver.error)
+
+    def testPartialLines(self):
+        capture = OutputCapture(self.writer, 2 ** 20)
+
+        capture.stream.write("OUT")
+        capture.stream.write("PUT 1\nOUTPUT 2\r\nOUTPUT")
+        capture.stream.write(" 3")
+
+        self.finish(capture)
+
+        self.assertEqual(["1", "2", "3"], self.receiver.stdout)
+
+    def testFlushedWhileWriting(self):
+        capture = OutputCapture(self.writer, 2 ** 20)
+        # flush as often as possible, so the flushes land in the middle of writes
+        capture.FLUSH_INTERVAL = 0
+        capture.start()
+
+        def write(thread: int):
+            for i in range(200):
+                # a single write, as print writes the newline separately
+                capture.stream.write(f"OUTPUT {thread}-{i}\n")
+
+        threads = [threading.Thread(target=write, args=(thread,)) for thread in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.finish(capture)
+
+        self.assertEqual(sorted(f"{thread}-{i}" for thread in range(4) for i in range(200)),
+                         sorted(self.receiver.stdout))
+
+    def testNoOutput(self):
+        capture = OutputCapture(self.writer, 2 ** 20)
+
+        self.finish(capture)
+
+        self.assertEqual([], self.receiver.stdout)
+
+    def testOutputTruncated(self):
+        # each line is 2 bytes including the newline, so only 10 lines fit
+        capture = OutputCapture(self.writer, 20)
+
+        for i in range(20):
+            print(f"OUTPUT {i}", file=capture.stream)
+
+        self.finish(capture)
+
+        self.assertEqual(11, len(self.receiver.stdout))
+        self.assertEqual([str(i) for i in range(10)], self.receiver.stdout[:10])
+        self.assertIn("OUTPUT TRUNCATED", self.receiver.stdout[-1])
+
+    def testDiagnosticsAreBounded(self):
+        capture = OutputCapture(self.writer, 2 ** 20)
+
+        for i in range(10000):
+            print(f"debug line {i}", file=capture.stream)
+
+        self.finish(capture)
+
+        diagnostics = self.receiver.getFrame(FRAME_DIAGNOSTICS)
+
+        self.assertLess(len(diagnostics), 3 * OutputCapture.DIAGNOSTIC_SIZE)
+        self.assertTrue(diagnostics.startswith("debug line 0\n"))
+        self.assertTrue(diagnostics.endswith("debug line 9999"))
+        self.assertIn("characters omitted", diagnostics)
+
+    def testStreamsWhileRunning(self):
+        capture = OutputCapture(self.writer, 2 ** 20)
+        capture.start()
+
+        print("OUTPUT streamed", file=capture.stream)
+
+        # finish was never called, so the line must have been sent by the periodic flush
+        self.receiver.receive(OutputCapture.FLUSH_INTERVAL * 10)
+
+        self.assertEqual(["streamed"], self.receiver.stdout)
+
+        capture.finish()
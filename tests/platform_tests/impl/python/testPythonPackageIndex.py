@@ -0,0 +1,123 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from typing import Optional
+
+from autograder_platform.StudentSubmissionImpl.Python.PythonPackageIndex import AbstractPackageIndex, LocalIndex, \
+    PackageIndexCache, PyPIIndex, getPipIndexArguments, setPackageCacheFile, setPackageIndexes
+from autograder_platform.StudentSubmissionImpl.Python.PythonValidators import PackageValidator
+from autograder_platform.StudentSubmissionImpl.Python.common import InvalidPackageError, PackageIndexUnavailableError
+
+
+class UnreachableIndex(AbstractPackageIndex):
+    def __init__(self):
+        self.lookups = 0
+
+    def exists(self, package: str, version: str) -> Optional[bool]:
+        self.lookups += 1
+        return None
+
+
+class TestPythonPackageIndex(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.cacheFile = os.path.join(self.directory, "cache", "packages.json")
+        self.wheelhouse = os.path.join(self.directory, "wheelhouse")
+        os.mkdir(self.wheelhouse)
+
+        setPackageCacheFile(self.cacheFile)
+
+    def tearDown(self) -> None:
+        setPackageIndexes(None)
+        setPackageCacheFile(None)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def addDistribution(self, *path: str):
+        with open(os.path.join(self.wheelhouse, *path), 'w') as w:
+            w.write("")
+
+    def runValidator(self, packages):
+        validator = PackageValidator()
+        validator.packages = packages
+        validator.run()
+
+        return validator.collectErrors()
+
+    def testParseDistribution(self):
+        self.assertEqual(("pip-install-test", "0.5"),
+                         LocalIndex.parseDistribution("pip_install_test-0.5-py3-none-any.whl"))
+        self.assertEqual(("pip-install-test", "0.5"), LocalIndex.parseDistribution("pip-install-test-0.5.tar.gz"))
+        self.assertIsNone(LocalIndex.parseDistribution("README.md"))
+
+    def testWheelhouse(self):
+        self.addDistribution("pip_install_test-0.5-py3-none-any.whl")
+
+        index = LocalIndex(self.wheelhouse)
+
+        self.assertTrue(index.exists("pip-install-test", "0.5"))
+        self.assertTrue(index.exists("Pip_Install_Test", ""))
+        self.assertFalse(index.exists("pip-install-test", "0.6"))
+        self.assertFalse(index.exists("does-not-exist", ""))
+
+    def testSimpleIndex(self):
+        os.mkdir(os.path.join(self.wheelhouse, "minimal"))
+        self.addDistribution("minimal", "minimal-1.0.tar.gz")
+
+        index = LocalIndex(self.wheelhouse)
+
+        self.assertTrue(index.exists("minimal", "1.0"))
+        self.assertFalse(index.exists("minimal", "2.0"))
+
+    def testPipArguments(self):
+        self.assertEqual([], getPipIndexArguments())
+
+        setPackageIndexes([LocalIndex(self.wheelhouse)])
+        self.assertEqual(["--find-links", os.path.abspath(self.wheelhouse), "--no-index"], getPipIndexArguments())
+
+        os.mkdir(os.path.join(self.wheelhouse, "pip-install-test"))
+        setPackageIndexes([LocalIndex(self.wheelhouse), PyPIIndex()])
+        self.assertEqual(["--extra-index-url", "file://" + os.path.abspath(self.wheelhouse)], getPipIndexArguments())
+
+    def testValidatorOffline(self):
+        self.addDistribution("pip_install_test-0.5-py3-none-any.whl")
+        setPackageIndexes([LocalIndex(self.wheelhouse)])
+
+        errors = self.runValidator({"pip-install-test": "0.5", "does-not-exist": ""})
+
+        self.assertEqual(1, len(errors))
+        self.assertIsInstance(errors[0], InvalidPackageError)
+
+    def testAnswersCached(self):
+        self.addDistribution("pip_install_test-0.5-py3-none-any.whl")
+        setPackageIndexes([LocalIndex(self.wheelhouse)])
+
+        self.runValidator({"pip-install-test": "0.5"})
+
+        # a new cache reads the answer from disk, so no index is needed
+        setPackageCacheFile(self.cacheFile)
+        unreachable = UnreachableIndex()
+        setPackageIndexes([unreachable])
+
+        self.assertEqual([], self.runValidator({"pip-install-test": "0.5"}))
+        self.assertEqual(0, unreachable.lookups)
+
+    def testUnreachableIndex(self):
+        unreachable = UnreachableIndex()
+        setPackageIndexes([unreachable])
+
+        errors = self.runValidator({"does-not-exist": "", "does-not-exist2": "2.0"})
+
+        self.assertEqual(2, len(errors))
+        self.assertIsInstance(errors[0], PackageIndexUnavailableError)
+        # unknown answers aren't cached
+        self.runValidator({"does-not-exist": ""})
+        self.assertEqual(3, unreachable.lookups)
+
+    def testMissingPackagesExpire(self):
+        cache = PackageIndexCache(self.cacheFile, ttl=60, missingTtl=60)
+        cache.set("does-not-exist", "", False)
+        cache.entries[cache.getKey("does-not-exist", "")] = (False, time.time() - 120)
+
+        self.assertIsNone(cache.get("does-not-exist", ""))
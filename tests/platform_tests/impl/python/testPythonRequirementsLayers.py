@@ -0,0 +1,170 @@
+import importlib
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from autograder_platform.StudentSubmissionImpl.Python.PythonChannel import FRAME_RESULTS, FrameReceiver
+from autograder_platform.StudentSubmissionImpl.Python.PythonRequirementsLayers import RequirementsLayerCache
+from autograder_platform.StudentSubmissionImpl.Python.PythonSerializer import getSerializer
+from autograder_platform.StudentSubmissionImpl.Python.PythonSubmissionImportFactory import SubmissionModuleFinder
+
+
+class TestPythonRequirementsLayers(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.mkdtemp()
+        self.layers = RequirementsLayerCache(os.path.join(self.directory, "layers"))
+        self.installs = 0
+
+    def tearDown(self) -> None:
+        self.layers.release()
+        RequirementsLayerCache._remove(self.directory)
+
+    def listLayerDirectory(self):
+        # the lock files are hidden
+        return [name for name in os.listdir(self.layers.directory) if not name.startswith(".")]
+
+    def install(self, size: int = 10):
+        def install(directory: str):
+            self.installs += 1
+            os.mkdir(os.path.join(directory, "layered_pkg"))
+
+            with open(os.path.join(directory, "layered_pkg", "__init__.py"), 'w') as w:
+                w.write("#" * size)
+
+        return install
+
+    def testKeyNormalized(self):
+        self.assertEqual(RequirementsLayerCache.getKey({"Pip_Install_Test": "0.5", "numpy": ""}),
+                         RequirementsLayerCache.getKey({"numpy": "", "pip-install-test": "0.5"}))
+        self.assertNotEqual(RequirementsLayerCache.getKey({"numpy": "1.26"}),
+                            RequirementsLayerCache.getKey({"numpy": "2.0"}))
+
+    def testLayerReused(self):
+        layer = self.layers.getLayer({"layered-pkg": "1.0"}, self.install())
+
+        self.assertEqual(layer, self.layers.getLayer({"Layered_Pkg": "1.0"}, self.install()))
+        self.assertEqual(1, self.installs)
+        self.assertTrue(os.path.isfile(os.path.join(layer, "layered_pkg", "__init__.py")))
+
+        # there shouldn't be anything left over from the install
+        self.assertEqual([os.path.basename(layer)], self.listLayerDirectory())
+
+    def testLayerReadOnly(self):
+        layer = self.layers.getLayer({"layered-pkg": "1.0"}, self.install())
+
+        self.assertEqual(0, os.stat(os.path.join(layer, "layered_pkg", "__init__.py")).st_mode & 0o222)
+
+    def testFailedInstall(self):
+        def install(directory: str):
+            self.install()(directory)
+            raise Exception("Failed to install 'layered-pkg'!")
+
+        with self.assertRaises(Exception):
+            self.layers.getLayer({"layered-pkg": "1.0"}, install)
+
+        self.assertEqual([], self.listLayerDirectory())
+
+        self.layers.getLayer({"layered-pkg": "1.0"}, self.install())
+        self.assertEqual(2, self.installs)
+
+    def testLeastRecentlyUsedEvicted(self):
+        self.layers.maxBytes = 250
+
+        # stands in for other processes that are done with their layers
+        other = RequirementsLayerCache(self.layers.directory, self.layers.maxBytes)
+        first = other.getLayer({"first": ""}, self.install(100))
+        second = other.getLayer({"second": ""}, self.install(100))
+        other.release()
+
+        # make sure that the first layer is the most recently used
+        os.utime(second, (time.time() - 60, time.time() - 60))
+        self.layers.getLayer({"first": ""}, self.install(100))
+
+        third = self.layers.getLayer({"third": ""}, self.install(100))
+
+        self.assertTrue(os.path.isdir(first))
+        self.assertFalse(os.path.isdir(second))
+        self.assertTrue(os.path.isdir(third))
+
+    @unittest.skipIf(sys.platform == "win32", "Layers are never evicted on windows")
+    def testLayerInUseNotEvicted(self):
+        self.layers.maxBytes = 150
+
+        other = RequirementsLayerCache(self.layers.directory, self.layers.maxBytes)
+        self.addCleanup(other.release)
+        used = other.getLayer({"used": ""}, self.install(100))
+        os.utime(used, (time.time() - 60, time.time() - 60))
+
+        layer = self.layers.getLayer({"new": ""}, self.install(100))
+
+        self.assertTrue(os.path.isdir(used))
+        self.assertTrue(os.path.isdir(layer))
+
+        other.release()
+        self.layers.evict()
+
+        self.assertFalse(os.path.isdir(used))
+        self.assertTrue(os.path.isdir(layer))
+
+    def testNewLayerNeverEvicted(self):
+        self.layers.maxBytes = 50
+
+        layer = self.layers.getLayer({"large": ""}, self.install(100))
+
+        self.assertTrue(os.path.isdir(layer))
+
+    def testContainsModule(self):
+        self.assertFalse(self.layers.containsModule("layered_pkg"))
+
+        self.layers.getLayer({"layered-pkg": "1.0"}, self.install())
+
+        self.assertTrue(self.layers.containsModule("layered_pkg"))
+        self.assertFalse(self.layers.containsModule("layered_pkg.missing"))
+        self.assertFalse(self.layers.containsModule("not_layered"))
+
+    def testReceiverLoadsFromLayer(self):
+        def install(directory: str):
+            with open(os.path.join(directory, "layered_value.py"), 'w') as w:
+                w.write("class Value:\n    pass\n")
+
+        layer = self.layers.getLayer({"layered-value": "1.0"}, install)
+
+        # stands in for the child, which has the layer on its path
+        sys.path.append(layer)
+        try:
+            frame = getSerializer("pickle").dumps((FRAME_RESULTS, importlib.import_module("layered_value").Value()))
+        finally:
+            sys.path.remove(layer)
+            sys.modules.pop("layered_value")
+
+        for paths, loaded in [([], False), ([layer], True)]:
+            reader, writer = multiprocessing.Pipe(duplex=False)
+            receiver = FrameReceiver(reader, paths)
+
+            writer.send_bytes(frame)
+            receiver.receiveFrame(5)
+
+            self.assertEqual(loaded, receiver.getFrame(FRAME_RESULTS) is not None)
+            self.assertEqual(loaded, receiver.error is None)
+            self.assertEqual(not loaded, receiver.closed)
+            self.assertNotIn(layer, sys.path)
+
+            sys.modules.pop("layered_value", None)
+            receiver.close()
+            writer.close()
+
+    def testFinderAddsLayerToPath(self):
+        layer = self.layers.getLayer({"layered-pkg": "1.0"}, self.install())
+
+        finder = SubmissionModuleFinder({}, [layer])
+        self.assertNotEqual(SubmissionModuleFinder({}).getKey(), finder.getKey())
+
+        try:
+            finder.install()
+            self.assertEqual(layer, sys.path[0])
+        finally:
+            sys.meta_path.remove(finder)
+            sys.path.remove(layer)
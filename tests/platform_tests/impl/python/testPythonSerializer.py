@@ -0,0 +1,81 @@
+import pickle
+import sys
+import timeit
+import unittest
+from types import ModuleType
+
+from autograder_platform.StudentSubmissionImpl.Python.PythonSerializer import AutoSerializer, DillSerializer, \
+    PickleSerializer, getSerializer, loads, DILL_TAG, PICKLE_PROTOCOL, PICKLE_TAG
+
+
+class TestPythonSerializer(unittest.TestCase):
+    def testPlainDataUsesPickle(self):
+        data = {"stdout": ["OUTPUT 1", "OUTPUT 2"], "return_val": (1, 2.5, None), "raw": bytearray(10)}
+
+        serialized = AutoSerializer().dumps(data)
+
+        self.assertEqual(PICKLE_TAG, serialized[:1])
+        self.assertEqual(data, loads(serialized))
+
+    def testLambdaFallsBackToDill(self):
+        offset = 3
+        serialized = AutoSerializer().dumps(lambda x: x + offset)
+
+        self.assertEqual(DILL_TAG, serialized[:1])
+        self.assertEqual(5, loads(serialized)(2))  # type: ignore
+
+    def testSubmissionClassFallsBackToDill(self):
+        # This is how submissions are imported by the runners
+        submission = ModuleType("submission")
+        exec("class Point:\n"
+             "   def __init__(self, x):\n"
+             "       self.x = x\n", vars(submission))
+
+        serialized = AutoSerializer().dumps([submission.Point(4)])
+
+        self.assertEqual(DILL_TAG, serialized[:1])
+        self.assertEqual(4, loads(serialized)[0].x)  # type: ignore
+
+    def testPickleDoesNotFallBack(self):
+        with self.assertRaises((pickle.PicklingError, AttributeError)):
+            PickleSerializer().dumps(lambda: None)
+
+    def testDillAlwaysUsesDill(self):
+        serialized = DillSerializer().dumps([1, 2, 3])
+
+        self.assertEqual(DILL_TAG, serialized[:1])
+        self.assertEqual([1, 2, 3], loads(serialized))
+
+    def testGetSerializer(self):
+        self.assertIsInstance(getSerializer("auto"), AutoSerializer)
+        self.assertIsInstance(getSerializer("pickle"), PickleSerializer)
+        self.assertIsInstance(getSerializer("dill"), DillSerializer)
+
+    def testUnknownSerializer(self):
+        with self.assertRaises(AttributeError):
+            getSerializer("json")
+
+    def testUnknownTag(self):
+        with self.assertRaises(ValueError):
+            loads(b"X" + pickle.dumps(1))
+
+    def testPickleBenchmark(self):
+        # shaped like the results of a run: the stdout, and a return value of plain data
+        data = {
+            "stdout": [f"OUTPUT {i}" for i in range(10_000)],
+            "return_val": [(i, i / 2, None) for i in range(10_000)],
+            "exception": None,
+        }
+
+        report = {}
+
+        for serializer in (PickleSerializer(), DillSerializer()):
+            # the best of several runs, so that a busy machine doesn't make this flaky
+            seconds = min(timeit.repeat(lambda: loads(serializer.dumps(data)), number=3, repeat=5)) / 3
+            report[serializer.NAME] = (len(serializer.dumps(data)), seconds)
+
+        message = ", ".join(f"{name}: {size} bytes in {seconds * 1000:.2f}ms" for name, (size, seconds) in report.items())
+        print(f"\nSerializer benchmark ({PICKLE_PROTOCOL=}) - {message}", file=sys.stderr)
+
+        self.assertLessEqual(report["pickle"][0], report["dill"][0], message)
+        self.assertLess(report["pickle"][1], report["dill"][1], message)
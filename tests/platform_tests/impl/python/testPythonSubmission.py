@@ -1,3 +1,4 @@
+import ast
 import os
 import shutil
 import string
@@ -5,12 +6,46 @@ import unittest
 from unittest.mock import patch
 from io import StringIO
 import random
-from autograder_platform.StudentSubmission.common import ValidationError
+from typing import Set
+
+from autograder_platform.StudentSubmission.AbstractValidator import AbstractValidator
+from autograder_platform.StudentSubmission.common import ValidationError, ValidationHook
 
 from autograder_platform.StudentSubmissionImpl.Python import PythonSubmission
+from autograder_platform.StudentSubmissionImpl.Python.PythonPackageIndex import LocalIndex, setPackageCacheFile, \
+    setPackageIndexes
+from autograder_platform.StudentSubmissionImpl.Python.PythonRequirementsLayers import setRequirementsLayerDirectory
 from autograder_platform.StudentSubmissionImpl.Python.common import FileTypeMap
 
 
+class BannedCallValidator(AbstractValidator):
+    @staticmethod
+    def getValidationHook() -> ValidationHook:
+        return ValidationHook.VALIDATION
+
+    @staticmethod
+    def getRequiredData() -> Set[str]:
+        return {PythonSubmission.DATA_AST}
+
+    @staticmethod
+    def isIndependent() -> bool:
+        return True
+
+    def __init__(self, name: str):
+        super().__init__()
+        self.name = name
+        self.parsedFiles = []
+
+    def setup(self, studentSubmission):
+        self.parsedFiles = studentSubmission.getParsedFiles()
+
+    def run(self):
+        for parsedFile in self.parsedFiles:
+            for node in ast.walk(parsedFile.getTree()):
+                if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id == self.name:
+                    self.addError(Exception(f"'{self.name}' can't be called!"))
+
+
 class TestStudentSubmission(unittest.TestCase):
     TEST_FILE_DIRECTORY: str = "./sandbox"
     TEST_FILE_MAIN: str = "\n" \
@@ -214,6 +249,38 @@ class TestStudentSubmission(unittest.TestCase):
                     .build()\
                     .validate()
 
+    def testOversizeSubmissionRejected(self):
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, "main.py"), 'w') as w:
+            w.writelines(self.TEST_FILE_MAIN)
+
+        os.makedirs(os.path.join(self.TEST_FILE_DIRECTORY, "my_env", "lib"))
+
+        for i in range(20):
+            with open(os.path.join(self.TEST_FILE_DIRECTORY, "my_env", "lib", f"module{i}.py"), 'w') as w:
+                w.writelines(self.TEST_FILE_NON_MAIN)
+
+        submission = PythonSubmission() \
+            .setSubmissionRoot(self.TEST_FILE_DIRECTORY) \
+            .setLimits(maxFiles=10)
+
+        with self.assertRaises(ValidationError) as error:
+            submission.load()
+
+        # only the size is reported, and nothing was discovered
+        self.assertEqual(1, len(submission.validationErrors))
+        self.assertIn("too large", str(error.exception))
+        self.assertEqual({}, submission.getDiscoveredFileMap())
+
+        submission = PythonSubmission() \
+            .setSubmissionRoot(self.TEST_FILE_DIRECTORY) \
+            .setLimits(maxFiles=10) \
+            .addIgnorePattern("my_env") \
+            .load() \
+            .build() \
+            .validate()
+
+        self.assertEqual(1, len(submission.getDiscoveredFileMap()[FileTypeMap.PYTHON_FILES]))
+
     @patch('sys.stdout', new_callable=StringIO)
     def testDiscoverEntrypointManyPy(self, capturedStdout):
         with open(os.path.join(self.TEST_FILE_DIRECTORY, "main.py"), 'w') as w:
@@ -300,6 +367,132 @@ class TestStudentSubmission(unittest.TestCase):
 
         submission.TEST_ONLY_removeRequirements()
 
+    def testPackagesInstalledTogether(self):
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, "main.py"), 'w') as w:
+            w.writelines(self.TEST_FILE_MAIN)
+
+        wheelhouse = os.path.join(self.TEST_FILE_DIRECTORY, ".wheelhouse")
+        os.mkdir(wheelhouse)
+        for distribution in ["does_not_exist-1.0-py3-none-any.whl", "does_not_exist2-2.0-py3-none-any.whl"]:
+            with open(os.path.join(wheelhouse, distribution), 'w') as w:
+                w.write("")
+
+        setPackageIndexes([LocalIndex(wheelhouse)])
+        setPackageCacheFile(None)
+        self.addCleanup(setPackageIndexes, None)
+
+        submission = PythonSubmission()\
+                .setSubmissionRoot(self.TEST_FILE_DIRECTORY)\
+                .enableRequirements()\
+                .addPackage("does-not-exist", "1.0")\
+                .addPackage("does-not-exist2")\
+                .load()
+
+        with patch("subprocess.check_call") as checkCall:
+            submission.build()
+
+        checkCall.assert_called_once()
+        command = checkCall.call_args.args[0]
+        self.assertIn(os.path.abspath(wheelhouse), command)
+        self.assertIn("--no-index", command)
+        self.assertEqual(["install"], [arg for arg in command if arg == "install"])
+        self.assertIn("does-not-exist==1.0", command)
+        self.assertIn("does-not-exist2", command)
+
+        installed = submission.getInstalledPackages()
+        self.assertEqual(["does-not-exist", "does-not-exist2"], [package.name for package in installed])
+        self.assertFalse(any(package.already_installed for package in installed))
+
+    def testInstalledPackagesSkipped(self):
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, "main.py"), 'w') as w:
+            w.writelines(self.TEST_FILE_MAIN)
+
+        submission = PythonSubmission()\
+                .setSubmissionRoot(self.TEST_FILE_DIRECTORY)\
+                .enableRequirements()\
+                .addPackage("requests")\
+                .load()
+
+        with patch("subprocess.check_call") as checkCall:
+            submission.build()
+
+        checkCall.assert_not_called()
+
+        installed = submission.getInstalledPackages()
+        self.assertEqual(1, len(installed))
+        self.assertTrue(installed[0].already_installed)
+        self.assertEqual(0, installed[0].duration)
+
+    def testInstalledPackagesInstalledInLayer(self):
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, "main.py"), 'w') as w:
+            w.writelines(self.TEST_FILE_MAIN)
+
+        setRequirementsLayerDirectory(os.path.abspath(os.path.join(self.TEST_FILE_DIRECTORY, ".layers")))
+        self.addCleanup(setRequirementsLayerDirectory, None)
+
+        submission = PythonSubmission()\
+                .setSubmissionRoot(self.TEST_FILE_DIRECTORY)\
+                .enableRequirements()\
+                .addPackage("Requests")\
+                .load()
+
+        with patch("subprocess.check_call") as checkCall:
+            submission.build()
+
+        # the layer can't depend on requests being installed globally
+        checkCall.assert_called_once()
+        command = checkCall.call_args.args[0]
+        self.assertIn("--target", command)
+        self.assertIn("requests", command)
+
+        installed = submission.getInstalledPackages()
+        self.assertEqual(["Requests"], [package.name for package in installed])
+        self.assertFalse(installed[0].already_installed)
+
+    def testValidatorsShareParsedFiles(self):
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, "main.py"), 'w') as w:
+            w.writelines("import helper\nexit(helper.value())\n")
+
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, "helper.py"), 'w') as w:
+            w.writelines("def value():\n    return eval('1')\n")
+
+        submission = PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY)
+
+        for name in ["exit", "eval", "quit", "exec", "compile", "open", "input", "globals", "locals", "vars"]:
+            submission.addValidator(BannedCallValidator(name))
+
+        with patch("ast.parse", wraps=ast.parse) as parse, self.assertRaises(ValidationError) as error:
+            submission.load().build().validate()
+
+        # once for each file, no matter how many validators there are
+        self.assertEqual(2, parse.call_count)
+        self.assertIn("'exit' can't be called!", str(error.exception))
+        self.assertIn("'eval' can't be called!", str(error.exception))
+        self.assertNotIn("'open' can't be called!", str(error.exception))
+
+    def testParsedFileSyntaxError(self):
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, "main.py"), 'w') as w:
+            w.writelines("def broken(:\n")
+
+        submission = PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY).load()
+
+        parsedFile = submission.getParsedFiles()[0]
+
+        self.assertIsNone(parsedFile.getTree())
+        self.assertIsNone(parsedFile.getSymbolTable())
+        self.assertIsInstance(parsedFile.getError(), SyntaxError)
+
+    def testParsedFileSymbolTable(self):
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, "main.py"), 'w') as w:
+            w.writelines("import math\n\ndef area(r):\n    return math.pi * r ** 2\n")
+
+        submission = PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY).load()
+
+        symbolTable = submission.getParsedFile(os.path.join(self.TEST_FILE_DIRECTORY, "main.py")).getSymbolTable()
+
+        self.assertTrue(symbolTable.lookup("math").is_imported())
+        self.assertEqual(("r",), symbolTable.lookup("area").get_namespace().get_parameters())
+
     def testNonExistentPackageInRequirements(self):
         with open(os.path.join(self.TEST_FILE_DIRECTORY, "requirements.txt"), 'w') as w:
             w.writelines("does-not-exist\ndoes-not-exist2==2.0\n")
@@ -336,3 +529,28 @@ class TestStudentSubmission(unittest.TestCase):
 
         self.assertIn("Unable to locate package, 'pip-install-test' at version -1", exceptionText)
 
+    def testSubmissionModulesCompiled(self):
+        os.mkdir(os.path.join(self.TEST_FILE_DIRECTORY, "pkg"))
+
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, "main.py"), 'w') as w:
+            w.writelines(self.TEST_FILE_MAIN)
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, "helpers.py"), 'w') as w:
+            w.writelines("x = 1\n")
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, "pkg", "sub.py"), 'w') as w:
+            w.writelines("x = (\n")
+
+        submission = PythonSubmission() \
+            .setSubmissionRoot(self.TEST_FILE_DIRECTORY) \
+            .load() \
+            .build()
+
+        modules = submission.getSubmissionModules()
+
+        if modules is None:
+            self.fail("Submission modules were not compiled!")
+
+        self.assertEqual({"helpers", "pkg", "pkg.sub"}, set(modules.modules))
+        self.assertTrue(modules.modules["pkg"].isPackage)
+        self.assertIsNotNone(modules.modules["helpers"].code)
+        # syntax errors are raised when the module is imported, not when the submission is built
+        self.assertIsInstance(modules.modules["pkg.sub"].error, SyntaxError)
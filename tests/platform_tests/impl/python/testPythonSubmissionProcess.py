@@ -1,19 +1,24 @@
 import shutil
-from importlib import import_module
+import multiprocessing
 import os
+import tempfile
+import threading
 import unittest
 
 from autograder_platform.StudentSubmissionImpl.Python import PythonSubmission
 from autograder_platform.StudentSubmissionImpl.Python.PythonEnvironment import PythonEnvironment, PythonResults
 
-from autograder_platform.StudentSubmissionImpl.Python.PythonSubmissionProcess import RunnableStudentSubmission
-from autograder_platform.Executors.Environment import ExecutionEnvironment, Results, getResults
-from autograder_platform.StudentSubmissionImpl.Python.Runners import PythonRunnerBuilder, Parameter
+from autograder_platform.StudentSubmissionImpl.Python.PythonSubmissionProcess import RunnableStudentSubmission, \
+    StudentSubmissionProcess
+from autograder_platform.Executors.Environment import ExecutionEnvironment, Results, TimeoutMode, getResults
+from autograder_platform.StudentSubmissionImpl.Python.Runners import PythonRunnerBuilder, PythonTaskLibrary, Parameter
 from autograder_platform.Tasks.TaskRunner import TaskRunner
 from autograder_platform.TestingFramework.SingleFunctionMock import SingleFunctionMock
-from autograder_platform.StudentSubmission.common import MissingFunctionDefinition
+from autograder_platform.StudentSubmission.common import InvalidRunner, MissingFunctionDefinition
 from autograder_platform.Executors.common import MissingOutputDataException
 from autograder_platform.StudentSubmissionImpl.Python.PythonModuleMockImportFactory import MockedModuleFinder
+from autograder_platform.StudentSubmissionImpl.Python.PythonChannel import FRAME_RESULTS, FrameReceiver
+from autograder_platform.StudentSubmissionImpl.Python.PythonCodeCache import getCodeCache
 
 
 class TestPythonSubmissionProcess(unittest.TestCase):
@@ -106,6 +111,268 @@ class TestPythonSubmissionProcess(unittest.TestCase):
 
         self.assertEqual([strInput], results.stdout)
 
+    def testFunctionParameterStdIOWithWorkerPool(self):
+        program = \
+             "def runMe(value: str):\n"\
+             "  print('OUTPUT', value)\n"
+
+        strInput = "this was passed as a parameter"
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .addParameter(strInput)\
+            .build()
+
+        self.environment.impl_environment.pool_size = 1
+
+        results = self.runSubmission(runner)
+
+        self.assertIsNotNone(self.runnableSubmission.workerPool)
+        self.assertEqual([strInput], results.stdout)
+
+    def testCodeCacheNotInEnvironment(self):
+        program = \
+            "import os\n" \
+            "from autograder_platform.StudentSubmissionImpl.Python.PythonCodeCache import getCodeCache\n" \
+            "def runMe():\n" \
+            "   return [value for value in os.environ.values() if value == getCodeCache().directory], " \
+            "getCodeCache().directory\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        # workers aren't forked from this process, so they are given the cache's directory
+        self.environment.impl_environment.pool_size = 1
+
+        results = self.runSubmission(runner)
+
+        self.assertEqual(([], getCodeCache().directory), results.return_val)
+
+    def testTerminateInfiniteLoopWithWorkerPool(self):
+        program = \
+                "while True:\n"\
+                "   pass\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(module=True) \
+            .build()
+
+        self.environment.timeout = 1
+        self.environment.impl_environment.pool_size = 1
+
+        results: Results = self.runSubmission(runner)
+
+        with self.assertRaises(TimeoutError):
+            raise results.exception
+
+    def testZygoteImportsOnce(self):
+        importsFile = os.path.abspath("zygote_imports.txt")
+
+        if os.path.exists(importsFile):
+            os.remove(importsFile)
+
+        program = \
+            f"with open({importsFile!r}, 'a') as w:\n" \
+            "   w.write('imported\\n')\n" \
+            "print('OUTPUT imported')\n" \
+            "def runMe(value: int):\n" \
+            "   print('OUTPUT', value)\n" \
+            "   return value\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        self.environment.impl_environment.use_zygote = True
+
+        for value in [1, 2]:
+            runner = PythonRunnerBuilder(self.submission) \
+                .setEntrypoint(function="runMe") \
+                .addParameter(value) \
+                .build()
+
+            self.runnableSubmission = RunnableStudentSubmission()
+            results = self.runSubmission(runner)
+
+            self.assertIsNotNone(self.runnableSubmission.zygote)
+            self.assertEqual(value, results.return_val)
+            self.assertEqual(["imported", str(value)], results.stdout)
+
+        with open(importsFile, 'r') as r:
+            imports = r.read().splitlines()
+
+        os.remove(importsFile)
+
+        self.assertEqual(["imported"], imports)
+
+    def testZygoteJobsFromThreads(self):
+        program = \
+            "import time\n" \
+            "def runMe(value: int):\n" \
+            "   time.sleep(0.1)\n" \
+            "   print('OUTPUT', value)\n" \
+            "   return value\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        results = {}
+
+        def run(value: int):
+            environment = ExecutionEnvironment()
+            environment.SANDBOX_LOCATION = "."
+            environment.impl_environment = PythonEnvironment()
+            environment.impl_environment.use_zygote = True
+
+            runner = PythonRunnerBuilder(self.submission) \
+                .setEntrypoint(function="runMe") \
+                .addParameter(value) \
+                .build()
+
+            runnableSubmission = RunnableStudentSubmission()
+            runnableSubmission.setup(environment, runner)
+            runnableSubmission.run()
+            runnableSubmission.cleanup()
+            runnableSubmission.populateResults(environment)
+
+            results[value] = getResults(environment)
+
+        # every thread shares the same zygote
+        threads = [threading.Thread(target=run, args=(value,), daemon=True) for value in range(4)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join(60)
+
+        for value in range(4):
+            self.assertIsNone(results[value].exception)
+            self.assertEqual(value, results[value].return_val)
+            self.assertEqual([str(value)], results[value].stdout)
+
+    def testZygoteImportReadsSandboxFiles(self):
+        with tempfile.TemporaryDirectory() as directory:
+            dataFile = os.path.join(directory, "zygote_data.txt")
+
+            with open(dataFile, 'w') as w:
+                w.write("data from the sandbox")
+
+            program = \
+                "with open('zygote_data.txt', 'r') as r:\n" \
+                "   data = r.read()\n" \
+                "def runMe():\n" \
+                "   return data\n"
+
+            self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+            self.environment.impl_environment.use_zygote = True
+            self.environment.files = {dataFile: os.path.join(self.environment.SANDBOX_LOCATION, "zygote_data.txt")}
+
+            runner = PythonRunnerBuilder(self.submission) \
+                .setEntrypoint(function="runMe") \
+                .build()
+
+            results = self.runSubmission(runner)
+
+        self.assertIsNotNone(self.runnableSubmission.zygote)
+        self.assertEqual("data from the sandbox", results.return_val)
+
+    def testZygoteFallsBackWhenImportWritesFiles(self):
+        if os.path.exists("zygote_written.txt"):
+            os.remove("zygote_written.txt")
+
+        program = \
+            "with open('zygote_written.txt', 'w') as w:\n" \
+            "   w.write('written while importing')\n" \
+            "def runMe():\n" \
+            "   return 1\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        self.environment.impl_environment.use_zygote = True
+
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        results = self.runSubmission(runner)
+
+        written = os.path.exists("zygote_written.txt")
+
+        if written:
+            os.remove("zygote_written.txt")
+
+        # the file has to be written to this run's sandbox, not the zygote's directory
+        self.assertIsNone(self.runnableSubmission.zygote)
+        self.assertTrue(written)
+        self.assertEqual(1, results.return_val)
+
+    def testZygoteDifferentMocks(self):
+        program = \
+            "def mockMe():\n" \
+            "   pass\n" \
+            "def runMe():\n" \
+            "   mockMe()\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        self.environment.impl_environment.use_zygote = True
+
+        zygotes = []
+
+        for mockName in ["mockMe", "runMe"]:
+            runner = PythonRunnerBuilder(self.submission) \
+                .setEntrypoint(function="runMe") \
+                .addMock(mockName, SingleFunctionMock(mockName, None)) \
+                .build()
+
+            self.runnableSubmission = RunnableStudentSubmission()
+            results: Results[PythonResults] = self.runSubmission(runner)
+
+            results.impl_results.mocks[mockName].assertCalledTimes(1)
+            zygotes.append(self.runnableSubmission.zygote)
+
+        self.assertIsNot(zygotes[0], zygotes[1])
+
+    def testZygoteFallsBackWhenImportReadsInput(self):
+        program = \
+            "userIn = input()\n" \
+            "def runMe():\n" \
+            "   return userIn\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        self.environment.impl_environment.use_zygote = True
+        self.environment.stdin = ["this is input"]
+
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        results = self.runSubmission(runner)
+
+        self.assertIsNone(self.runnableSubmission.zygote)
+        self.assertEqual("this is input", results.return_val)
+
+    def testZygoteTerminateInfiniteLoop(self):
+        program = \
+            "def runMe():\n" \
+            "   while True:\n" \
+            "       pass\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        self.environment.impl_environment.use_zygote = True
+        self.environment.timeout = 1
+
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        results = self.runSubmission(runner)
+
+        with self.assertRaises(TimeoutError):
+            raise results.exception
+
+        self.assertTrue(self.runnableSubmission.zygote.isAlive())
+
     def testFunctionParameterReturn(self):
         program = \
              "def runMe(value: int):\n"\
@@ -220,15 +487,28 @@ class TestPythonSubmissionProcess(unittest.TestCase):
         with self.assertRaises(TimeoutError) as ex:
             raise results.exception
 
-        res = None
-        with self.assertRaises(AssertionError):
-            res = results.stdout
-
         exceptionText = str(ex.exception)
         self.assertIn("timed out after 5 seconds", exceptionText)
 
+        # The output is streamed to the parent, so everything printed before the timeout is still available
+        self.assertEqual("LOOP:)", results.stdout[0])
+        self.assertLessEqual(len(results.stdout), self.environment.impl_environment.max_output_size // 7 + 1)
 
-        self.assertIsNone(res)
+    def testDiagnosticOutput(self):
+        program = \
+            "print('this is debugging output')\n" \
+            "print('OUTPUT 1')\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(module=True) \
+            .build()
+
+        results: Results[PythonResults] = self.runSubmission(runner)
+
+        self.assertEqual(["1"], results.stdout)
+        self.assertEqual("this is debugging output", results.impl_results.diagnostic_output)
 
     def testTerminateInfiniteLoopWithInput(self):
         program = \
@@ -341,17 +621,16 @@ class TestPythonSubmissionProcess(unittest.TestCase):
         runnableSubmission = RunnableStudentSubmission()
         runnableSubmission.setup(self.environment, runner)
         runnableSubmission.run()
-        memToDeallocate = runnableSubmission.inputSharedMem, runnableSubmission.outputSharedMem
+        receiverToClose = runnableSubmission.receiver
 
         runnableSubmission.setup(self.environment, runner)
         runnableSubmission.run()
         runnableSubmission.cleanup()
-        
-        if memToDeallocate[0] is None or memToDeallocate[1] is None:
+
+        if receiverToClose is None:
             return
 
-        memToDeallocate[0].close(); memToDeallocate[0].unlink()
-        memToDeallocate[1].close(); memToDeallocate[1].unlink()
+        receiverToClose.close()
 
     def testImportedFunction(self):
         program = \
@@ -434,17 +713,28 @@ class TestPythonSubmissionProcess(unittest.TestCase):
 
         self.environment.timeout = 5
 
-        randMod = import_module("random")
         randIntMock = SingleFunctionMock("randint", [1])
 
         self.environment.impl_environment = PythonEnvironment()
 
-        self.environment.impl_environment.import_loader.append(MockedModuleFinder("random", randMod, {"randint": randIntMock}))
+        self.environment.impl_environment.import_loader.append(MockedModuleFinder("random", {"randint": randIntMock}))
 
         results: Results = self.runSubmission(runner)
 
         self.assertEqual(1, results.return_val)
 
+    def testResolveMocksLeavesRunnerMocks(self):
+        import random
+
+        mocks = {"random.randint": None, "mockMe": SingleFunctionMock("mockMe", [1])}
+
+        resolved = PythonTaskLibrary.resolveMocks(mocks)
+
+        self.assertIs(random.randint, resolved["random.randint"])
+        self.assertIs(mocks["mockMe"], resolved["mockMe"])
+        # the mocks are the runner's config, so they must still be subscribed to on the next run
+        self.assertIsNone(mocks["random.randint"])
+
     def testFunctionCallsOtherFunction(self):
         program = \
             "def test1():\n" \
@@ -546,11 +836,28 @@ class TestPythonSubmissionProcess(unittest.TestCase):
 
         self.assertIn("Failed to map 'autowireMe'", exceptionText)
 
-    def testOverrunDataBuffer(self):
+    def testLargeReturnValue(self):
+        # Larger than the pipe buffer, so the parent must be reading while the child is writing
         program = \
             "def runMe():" \
-            f"   return bytearray({self.environment.impl_environment.buffer_size + 1})"
+            f"   return bytearray({2 ** 24})"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        results: Results = self.runSubmission(runner)
 
+        self.assertIsNone(results.exception)
+        self.assertEqual(2 ** 24, len(results.return_val))
+
+    def testLargeReturnValueWithZygote(self):
+        self.environment.impl_environment.use_zygote = True
+
+        program = \
+            "def runMe():" \
+            f"   return bytearray({2 ** 24})"
 
         self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
         runner = PythonRunnerBuilder(self.submission) \
@@ -559,8 +866,540 @@ class TestPythonSubmissionProcess(unittest.TestCase):
 
         results: Results = self.runSubmission(runner)
 
-        self.assertIsNotNone(results.exception)
+        self.assertIsNotNone(self.runnableSubmission.zygote)
+        self.assertIsNone(results.exception)
+        self.assertEqual(2 ** 24, len(results.return_val))
 
-        with self.assertRaises(MissingOutputDataException):
-            raise results.exception
+    def testReturnSubmissionDefinedObject(self):
+        # Classes defined in the submission can't be pickled by reference, so these have to fall back to dill
+        program = \
+            "class Point:\n" \
+            "   def __init__(self, x, y):\n" \
+            "       self.x, self.y = x, y\n" \
+            "def runMe():\n" \
+            "   return Point(1, 2)\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        results: Results = self.runSubmission(runner)
+
+        self.assertIsNone(results.exception)
+        self.assertEqual((1, 2), (results.return_val.x, results.return_val.y))
+
+    def testFunctionParameterStdIOWithEachSerializer(self):
+        program = \
+             "def runMe(value: str):\n"\
+             "  print('OUTPUT', value)\n"\
+             "  return [value]\n"
+
+        strInput = "this was passed as a parameter"
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+
+        for serializer in ["auto", "pickle", "dill"]:
+            with self.subTest(serializer=serializer):
+                runner = PythonRunnerBuilder(self.submission) \
+                    .setEntrypoint(function="runMe") \
+                    .addParameter(strInput) \
+                    .build()
+
+                self.environment.impl_environment.serializer = serializer
+                self.runnableSubmission = RunnableStudentSubmission()
+
+                results = self.runSubmission(runner)
+
+                self.assertIsNone(results.exception)
+                self.assertEqual([strInput], results.stdout)
+                self.assertEqual([strInput], results.return_val)
+
+    def testProcessCanBeSentToSpawnedChild(self):
+        program = \
+             "def runMe(value: str):\n"\
+             "  print('OUTPUT', value)\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .addParameter("spawned") \
+            .build()
+
+        process = StudentSubmissionProcess(runner, ".", [])
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        process.setOutputConnection(writer)
+
+        # Starts the process the same way that the spawn start method would, which pickles it with multiprocessing
+        popen = multiprocessing.get_context("spawn").Process._Popen(process)
+        writer.close()
+
+        receiver = FrameReceiver(reader)
+        receiver.receive(60, popen.sentinel)
+        popen.wait(60)
+        receiver.close()
+
+        self.assertEqual(0, popen.returncode)
+        self.assertEqual(["spawned"], receiver.stdout)
+        self.assertIsNone(receiver.getFrame(FRAME_RESULTS)["exception"])
+
+    def testMetrics(self):
+        program = \
+            "def runMe():\n" \
+            "   total = 0\n" \
+            "   for i in range(10 ** 6):\n" \
+            "       total += i\n" \
+            "   return total\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        results: Results = self.runSubmission(runner)
+
+        submissionUsage = results.metrics.submission
+        runUsage = results.metrics.run
+
+        if submissionUsage is None or runUsage is None:
+            self.fail("Metrics were not collected!")
+
+        self.assertGreater(submissionUsage.cpu_time, 0)
+        self.assertGreater(submissionUsage.max_rss, 0)
+        self.assertGreaterEqual(runUsage.wall_time, submissionUsage.wall_time)
+        self.assertGreaterEqual(runUsage.cpu_time, submissionUsage.cpu_time)
+
+    def testTaskTimings(self):
+        program = \
+            "def runMe():\n" \
+            "   return 1\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        results: Results = self.runSubmission(runner)
+
+        if results.metrics.tasks is None:
+            self.fail("Task timings were not collected!")
+
+        taskNames = [timing.name for timing in results.metrics.tasks]
+
+        self.assertEqual(["install_modules", "import", "injection", "apply_mock", "get_runMe", "run_runMe", "resolve_mocks", "results"],
+                         taskNames)
+        self.assertTrue(all(timing.end_time >= timing.start_time for timing in results.metrics.tasks))
+
+    def testResultBytes(self):
+        program = \
+            "def runMe():\n" \
+            "   return [str(i) * 1000 for i in range(1000)]\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        results: Results = self.runSubmission(runner)
+
+        if results.metrics.result_bytes is None:
+            self.fail("Result size was not collected!")
+
+        # the whole list is sent, not just the list object itself
+        self.assertGreater(results.metrics.result_bytes, 1000 * 1000)
+
+    def testMetricsWithZygote(self):
+        self.environment.impl_environment.use_zygote = True
+
+        program = \
+            "def runMe():\n" \
+            "   return sum(range(10 ** 6))\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        results: Results = self.runSubmission(runner)
+
+        runUsage = results.metrics.run
+
+        if runUsage is None or results.metrics.submission is None:
+            self.fail("Metrics were not collected!")
+
+        self.assertIsNotNone(self.runnableSubmission.zygote)
+        self.assertGreaterEqual(runUsage.cpu_time, results.metrics.submission.cpu_time)
+        self.assertGreater(runUsage.max_rss, 0)
+
+    def testCpuTimeLimit(self):
+        program = \
+            "def runMe():\n" \
+            "   while True:\n" \
+            "       pass\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        self.environment.timeout = 30
+        self.environment.impl_environment.cpu_time_limit = 1
+
+        results: Results = self.runSubmission(runner)
+
+        self.assertIsInstance(results.exception, TimeoutError)
+        self.assertIn("CPU time", str(results.exception))
+        self.assertFalse(self.runnableSubmission.timeoutOccurred)
+
+    def testVirtualTime(self):
+        program = \
+            "import time\n" \
+            "from datetime import datetime\n" \
+            "def runMe():\n" \
+            "   start = time.monotonic()\n" \
+            "   startDate = datetime.now()\n" \
+            "   for _ in range(200):\n" \
+            "       time.sleep(0.5)\n" \
+            "   return time.monotonic() - start, (datetime.now() - startDate).total_seconds()\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        self.environment.timeout = 5
+        self.environment.impl_environment.virtual_time = True
+
+        results: Results = self.runSubmission(runner)
+
+        self.assertIsNone(results.exception)
+        self.assertEqual(100, results.impl_results.virtual_time)
+        self.assertGreaterEqual(results.return_val[0], 100)
+        self.assertGreaterEqual(results.return_val[1], 100)
+
+    def testVirtualTimeInZygote(self):
+        program = \
+            "from time import sleep\n" \
+            "sleep(10)\n" \
+            "def runMe():\n" \
+            "   sleep(20)\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        self.environment.timeout = 5
+        self.environment.impl_environment.use_zygote = True
+        self.environment.impl_environment.virtual_time = True
+
+        results: Results = self.runSubmission(runner)
+
+        self.assertIsNotNone(self.runnableSubmission.zygote)
+        self.assertIsNone(results.exception)
+        self.assertEqual(30, results.impl_results.virtual_time)
+
+    def testVirtualTimeNotEnabled(self):
+        self.submission.getExecutableSubmission = lambda: compile("def runMe():\n   pass\n", "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        results: Results = self.runSubmission(runner)
+
+        with self.assertRaises(AssertionError):
+            _ = results.impl_results.virtual_time
+
+    def testMemoryLimit(self):
+        program = \
+            "def runMe():\n" \
+            f"   return len(bytearray({2 ** 32}))\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        self.environment.impl_environment.memory_limit = 2 ** 30
+
+        results: Results = self.runSubmission(runner)
+
+        self.assertIsInstance(results.exception, MemoryError)
+
+    def testSubSecondTimeout(self):
+        program = \
+            "def runMe():\n" \
+            "   while True:\n" \
+            "       pass\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        self.environment.timeout = .25
+
+        results: Results = self.runSubmission(runner)
+
+        if results.metrics.budget_used is None:
+            self.fail("Budget used was not reported!")
+
+        self.assertIsInstance(results.exception, TimeoutError)
+        self.assertTrue(self.runnableSubmission.timeoutOccurred)
+        self.assertEqual(.25, results.metrics.budget)
+        self.assertGreaterEqual(results.metrics.budget_used, .25)
+
+    def testBudgetUsed(self):
+        program = \
+            "def runMe():\n" \
+            "   return sum(range(10 ** 5))\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        self.environment.timeout = .5
+
+        results: Results = self.runSubmission(runner)
+
+        if results.metrics.submission is None:
+            self.fail("Metrics were not collected!")
+
+        self.assertIsNone(results.exception)
+        self.assertEqual(results.metrics.submission.wall_time, results.metrics.budget_used)
+
+    def testCpuTimeout(self):
+        program = \
+            "def runMe():\n" \
+            "   while True:\n" \
+            "       pass\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        self.environment.timeout = .25
+        self.environment.timeout_mode = TimeoutMode.CPU
+
+        results: Results = self.runSubmission(runner)
+
+        self.assertIsInstance(results.exception, TimeoutError)
+        self.assertIn("CPU time", str(results.exception))
+        self.assertFalse(self.runnableSubmission.timeoutOccurred)
+        self.assertEqual(.25, results.metrics.budget_used)
+
+    def testCpuTimeoutWithZygote(self):
+        self.environment.impl_environment.use_zygote = True
+
+        program = \
+            "def runMe():\n" \
+            "   while True:\n" \
+            "       pass\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        self.environment.timeout = .25
+        self.environment.timeout_mode = TimeoutMode.CPU
+
+        results: Results = self.runSubmission(runner)
+
+        self.assertIsNotNone(self.runnableSubmission.zygote)
+        self.assertIsInstance(results.exception, TimeoutError)
+        self.assertIn("CPU time", str(results.exception))
+
+    def testCpuTimeoutIgnoresBlockedTime(self):
+        program = \
+            "import time\n" \
+            "def runMe():\n" \
+            "   time.sleep(.5)\n" \
+            "   print('OUTPUT done')\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .build()
+
+        self.environment.timeout = .25
+        self.environment.timeout_mode = TimeoutMode.CPU
+
+        results: Results = self.runSubmission(runner)
+
+        if results.metrics.budget_used is None:
+            self.fail("Budget used was not reported!")
+
+        self.assertIsNone(results.exception)
+        self.assertEqual(["done"], results.stdout)
+        self.assertLess(results.metrics.budget_used, .25)
+
+    def testBatch(self):
+        program = \
+            "def runMe(value: int):\n" \
+            "   userIn = input()\n" \
+            "   print('OUTPUT', userIn)\n" \
+            "   return value * 2\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .addParameterSet(1, stdin=["one"]) \
+            .addParameterSet(2, stdin="two") \
+            .addParameterSet(3, stdin=["three"]) \
+            .build()
+
+        results = self.runSubmission(runner)
+
+        self.assertIsNone(results.exception)
+        self.assertEqual(3, len(results.calls))
+        self.assertEqual([2, 4, 6], [call.return_val for call in results.calls])
+        self.assertEqual([["one"], ["two"], ["three"]], [call.stdout for call in results.calls])
+        self.assertEqual(["one", "two", "three"], results.stdout)
+        self.assertEqual((2,), results.calls[1].parameter)
+        self.assertIsNotNone(results.calls[0].metrics.submission)
+
+    def testBatchTimedOutCallIsIsolated(self):
+        program = \
+            "def runMe(value: int):\n" \
+            "   print('OUTPUT', value)\n" \
+            "   while value == 2:\n" \
+            "       pass\n" \
+            "   return value\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .addParameterSet(1) \
+            .addParameterSet(2) \
+            .addParameterSet(3) \
+            .build()
+
+        self.environment.timeout = 1
+
+        results = self.runSubmission(runner)
+
+        self.assertIsNone(results.exception)
+        self.assertEqual(2, len(self.runnableSubmission.receivers))
+        self.assertEqual(1, results.calls[0].return_val)
+        self.assertIsInstance(results.calls[1].exception, TimeoutError)
+        self.assertEqual(["2"], results.calls[1].stdout)
+        self.assertEqual(3, results.calls[2].return_val)
+        self.assertEqual(["1", "2", "3"], results.stdout)
+
+    def testBatchCallRaises(self):
+        program = \
+            "def runMe(value: int):\n" \
+            "   return 10 // value\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .addParameterSet(0) \
+            .addParameterSet(5) \
+            .build()
+
+        results = self.runSubmission(runner)
+
+        self.assertIsNone(results.exception)
+        self.assertIsInstance(results.calls[0].exception, ZeroDivisionError)
+        self.assertEqual(2, results.calls[1].return_val)
+
+    def testBatchCallExits(self):
+        program = \
+            "def runMe(value: int):\n" \
+            "   if value == 1:\n" \
+            "       exit(0)\n" \
+            "   return value\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .addParameterSet(1) \
+            .addParameterSet(2) \
+            .build()
+
+        results = self.runSubmission(runner)
+
+        self.assertIsInstance(results.calls[0].exception, SystemExit)
+        self.assertEqual(2, results.calls[1].return_val)
+
+    def testBatchWithZygote(self):
+        self.environment.impl_environment.use_zygote = True
+
+        program = \
+            "def runMe(value: int):\n" \
+            "   while value == 1:\n" \
+            "       pass\n" \
+            "   return value\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .setEntrypoint(function="runMe") \
+            .addParameterSet(1) \
+            .addParameterSet(2) \
+            .build()
+
+        self.environment.timeout = 1
+
+        results = self.runSubmission(runner)
+
+        self.assertIsNotNone(self.runnableSubmission.zygote)
+        self.assertIsInstance(results.calls[0].exception, TimeoutError)
+        self.assertEqual(2, results.calls[1].return_val)
+
+    def testSequence(self):
+        program = \
+            "class Stack:\n" \
+            "   def __init__(self, items):\n" \
+            "       self.items = list(items)\n" \
+            "   def push(self, item):\n" \
+            "       self.items.append(item)\n" \
+            "   def pop(self):\n" \
+            "       return self.items.pop()\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .addConstructorStep("stack", "Stack", [1]) \
+            .addMethodStep("push", "stack", "push", 2) \
+            .addMethodStep("pop", "stack", "pop") \
+            .addMethodStep("push_popped", "stack", "push", Parameter(autowiredName="pop")) \
+            .addAttributeStep("items", "stack", "items") \
+            .build()
+
+        results = self.runSubmission(runner)
+
+        self.assertIsNone(results.exception)
+        self.assertEqual(["stack", "push", "pop", "push_popped", "items"], list(results.return_val))
+        self.assertEqual(2, results.return_val["pop"].return_val)
+        self.assertEqual((2,), results.return_val["push_popped"].parameters)
+        self.assertEqual([1, 2], results.return_val["items"].return_val)
+
+    def testSequenceStopsAtFailedStep(self):
+        program = \
+            "class Stack:\n" \
+            "   def __init__(self):\n" \
+            "       self.items = []\n" \
+            "   def pop(self):\n" \
+            "       return self.items.pop()\n"
+
+        self.submission.getExecutableSubmission = lambda: compile(program, "test_code", "exec")
+        runner = PythonRunnerBuilder(self.submission) \
+            .addConstructorStep("stack", "Stack") \
+            .addMethodStep("pop", "stack", "pop") \
+            .addMethodStep("peek", "stack", "peek") \
+            .build()
+
+        results = self.runSubmission(runner)
+
+        self.assertIsNone(results.exception)
+        self.assertEqual(["stack", "pop"], list(results.return_val))
+        self.assertIsInstance(results.return_val["pop"].exception, IndexError)
+
+    def testSequenceInvalidTarget(self):
+        self.submission.getExecutableSubmission = lambda: compile("", "test_code", "exec")
 
+        with self.assertRaises(InvalidRunner):
+            PythonRunnerBuilder(self.submission) \
+                .addMethodStep("pop", "stack", "pop")
@@ -0,0 +1,55 @@
+import datetime
+import time
+import unittest
+
+from autograder_platform.StudentSubmissionImpl.Python.PythonVirtualClock import VirtualClock
+
+
+class TestPythonVirtualClock(unittest.TestCase):
+    def setUp(self) -> None:
+        self.clock = VirtualClock()
+
+    def tearDown(self) -> None:
+        self.clock.uninstall()
+
+    def testSleepAdvancesClocks(self):
+        self.clock.install()
+
+        start = time.monotonic()
+        startWall = time.time()
+        realStart = self.clock.realMonotonic()
+
+        for _ in range(100):
+            time.sleep(0.5)
+
+        self.assertEqual(50, self.clock.slept)
+        self.assertGreaterEqual(time.monotonic() - start, 50)
+        self.assertGreaterEqual(time.time() - startWall, 50)
+        self.assertLess(self.clock.realMonotonic() - realStart, 5)
+
+    def testDatetimeAdvances(self):
+        self.clock.install()
+
+        start = datetime.datetime.now()
+        time.sleep(3600)
+
+        self.assertGreaterEqual(datetime.datetime.now() - start, datetime.timedelta(hours=1))
+        self.assertIsInstance(datetime.datetime.now(), datetime.datetime)
+
+    def testNegativeSleep(self):
+        self.clock.install()
+
+        with self.assertRaises(ValueError):
+            time.sleep(-1)
+
+    def testUninstallRestores(self):
+        originalSleep = time.sleep
+        originalDatetime = datetime.datetime
+
+        self.clock.install()
+        self.clock.install()
+        self.clock.uninstall()
+
+        self.assertIs(originalSleep, time.sleep)
+        self.assertIs(originalDatetime, datetime.datetime)
+        self.assertFalse(self.clock.isInstalled())
@@ -0,0 +1,111 @@
+import multiprocessing
+import os
+import shutil
+import time
+import unittest
+
+from autograder_platform.StudentSubmissionImpl.Python.PythonWorkerPool import WorkerPool, getDefaultStartMethod
+
+
+def writeFile(_, path: str, contents: str):
+    with open(path, 'w') as w:
+        w.write(contents)
+
+
+def sendMessage(output, message: bytes):
+    output.send_bytes(message)
+
+
+def loopForever(_):
+    while True:
+        time.sleep(.1)
+
+
+class TestPythonWorkerPool(unittest.TestCase):
+    DATA_DIRECTORY: str = "./testData"
+
+    def setUp(self) -> None:
+        if os.path.exists(self.DATA_DIRECTORY):
+            shutil.rmtree(self.DATA_DIRECTORY)
+
+        os.mkdir(self.DATA_DIRECTORY)
+
+        self.pool = WorkerPool(2, ["dill"])
+
+    def tearDown(self) -> None:
+        self.pool.shutdown()
+
+        if os.path.exists(self.DATA_DIRECTORY):
+            shutil.rmtree(self.DATA_DIRECTORY)
+
+    def testForkserverByDefault(self):
+        if "forkserver" not in multiprocessing.get_all_start_methods():
+            self.assertIsNone(getDefaultStartMethod())
+            return
+
+        self.assertEqual("forkserver", self.pool.context.get_start_method())
+
+    def testWorkerRunsJob(self):
+        path = os.path.join(self.DATA_DIRECTORY, "out.txt")
+
+        worker = self.pool.acquire()
+        worker.assign(writeFile, (path, "hello from the worker"), timeout=10)
+        worker.start()
+        worker.join()
+
+        self.assertFalse(worker.is_alive())
+
+        with open(path, 'r') as r:
+            self.assertEqual("hello from the worker", r.read())
+
+    def testWorkerSendsOutput(self):
+        worker = self.pool.acquire()
+        worker.assign(sendMessage, (b"hello from the worker",), timeout=10)
+        worker.start()
+
+        self.assertEqual(b"hello from the worker", worker.output.recv_bytes())
+
+        worker.join()
+        worker.output.close()
+
+        self.assertFalse(worker.is_alive())
+
+    def testWorkersAreOneShot(self):
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+
+        self.assertIsNot(first, second)
+
+        first.shutdown()
+        second.shutdown()
+
+    def testPoolReplenishes(self):
+        self.pool.acquire().shutdown()
+
+        deadline = time.time() + 10
+        while len(self.pool.idleWorkers) < self.pool.size and time.time() < deadline:
+            time.sleep(.05)
+
+        self.assertEqual(self.pool.size, len(self.pool.idleWorkers))
+
+    def testWorkerTimeout(self):
+        worker = self.pool.acquire()
+        worker.assign(loopForever, (), timeout=1)
+        worker.start()
+        worker.join()
+
+        self.assertTrue(worker.is_alive())
+
+        worker.terminate()
+
+        self.assertFalse(worker.is_alive())
+
+    def testAcquireAfterShutdown(self):
+        self.pool.shutdown()
+
+        with self.assertRaises(EnvironmentError):
+            self.pool.acquire()
+
+    def testInvalidSize(self):
+        with self.assertRaises(AttributeError):
+            WorkerPool(0, [])
@@ -1,6 +1,8 @@
+import threading
 import unittest
 import os
 import shutil
+from typing import List, Set
 
 from autograder_platform.StudentSubmission.AbstractStudentSubmission import AbstractStudentSubmission
 from autograder_platform.StudentSubmission.AbstractValidator import AbstractValidator
@@ -11,6 +13,10 @@ class StudentSubmission(AbstractStudentSubmission[str]):
     def __init__(self):
         super().__init__()
         self.studentCode: str = "No code"
+        self.preparedData: List[Set[str]] = []
+
+    def prepareValidationData(self, data: Set[str]) -> None:
+        self.preparedData.append(data)
 
     def doLoad(self):
         self.studentCode = "Loaded code!"
@@ -57,6 +63,31 @@ class FileExistsValidator(AbstractValidator):
             self.errors.append(Exception(f"{self.fileName} does not exist!"))
 
 
+class IndependentValidator(AbstractValidator):
+    @staticmethod
+    def getValidationHook() -> ValidationHook:
+        return ValidationHook.VALIDATION
+
+    @staticmethod
+    def getRequiredData() -> Set[str]:
+        return {"code"}
+
+    @staticmethod
+    def isIndependent() -> bool:
+        return True
+
+    def __init__(self, barrier: threading.Barrier):
+        super().__init__()
+        self.barrier = barrier
+
+    def setup(self, studentSubmission):
+        pass
+
+    def run(self):
+        # this only passes if the other validator is running at the same time
+        self.barrier.wait()
+
+
 class TestAbstractStudentSubmission(unittest.TestCase):
     @classmethod
     def setUpClass(cls) -> None:
@@ -124,4 +155,21 @@ class TestAbstractStudentSubmission(unittest.TestCase):
 
     
 
+    def testIndependentValidatorsRunConcurrently(self):
+        os.mkdir("./submission")
+        with open("./submission/file.txt", 'w') as w:
+            w.write("")
+
+        barrier = threading.Barrier(2, timeout=5)
+
+        submission = StudentSubmission()\
+            .setSubmissionRoot("./submission")\
+            .addValidator(IndependentValidator(barrier))\
+            .addValidator(IndependentValidator(barrier))\
+            .load()\
+            .build()\
+            .validate()
 
+        self.assertFalse(barrier.broken)
+        # the data is prepared once for both validators, and only at the hooks that have validators
+        self.assertEqual([set(), {"code"}], submission.preparedData)
@@ -3,8 +3,12 @@ import os
 import shutil
 from typing import Dict, List
 import unittest
+from unittest.mock import patch
+
+import tomli
 
 from autograder_platform.config.Config import AutograderConfigurationBuilder, AutograderConfigurationProvider
+from autograder_platform.config.ConfigSnapshot import loadTOML
 from autograder_platform.config.common import BaseSchema
 
 
@@ -133,6 +137,119 @@ class TestAutograderConfigurationBuilder(unittest.TestCase):
         self.assertEqual(actual.list_of_tables, expectedNested)
 
 
+class CountingSchema(MockSchema):
+    def __init__(self) -> None:
+        super().__init__()
+        self.validations = 0
+        self.snapshotValid = True
+
+    def checkSnapshot(self, config) -> bool:
+        return self.snapshotValid
+
+    def validate(self, data):
+        self.validations += 1
+        return data
+
+
+class TestConfigSnapshot(unittest.TestCase):
+    DATA_DIRECTORY: str = "./testData/"
+    DATA_FILE: str = os.path.join(DATA_DIRECTORY, "config.toml")
+    SNAPSHOT_DIRECTORY: str = os.path.join(DATA_DIRECTORY, "snapshots")
+
+    def setUp(self) -> None:
+        if os.path.exists(self.DATA_DIRECTORY):
+            shutil.rmtree(self.DATA_DIRECTORY)
+
+        os.mkdir(self.DATA_DIRECTORY)
+
+        with open(self.DATA_FILE, 'w') as w:
+            w.write(
+                f"string_property = 'snapshot'\n" \
+                f"int_property = 0\n"
+            )
+
+    def tearDown(self) -> None:
+        if os.path.exists(self.DATA_DIRECTORY):
+            shutil.rmtree(self.DATA_DIRECTORY)
+
+    def build(self, schema: CountingSchema, testDirectory=None) -> MockConfiguration:
+        return AutograderConfigurationBuilder(configSchema=schema) \
+            .fromTOML(file=self.DATA_FILE) \
+            .useSnapshot(self.SNAPSHOT_DIRECTORY) \
+            .setTestDirectory(testDirectory) \
+            .build()
+
+    def testSnapshotSkipsValidation(self):
+        schema = CountingSchema()
+
+        first = self.build(schema)
+        second = self.build(schema)
+
+        self.assertEqual(1, schema.validations)
+        self.assertEqual(first, second)
+
+    def testSnapshotRebuiltWhenConfigChanges(self):
+        schema = CountingSchema()
+
+        self.build(schema)
+
+        with open(self.DATA_FILE, 'w') as w:
+            w.write(
+                f"string_property = 'changed'\n" \
+                f"int_property = 0\n"
+            )
+
+        actual = self.build(schema)
+
+        self.assertEqual(2, schema.validations)
+        self.assertEqual("changed", actual.string_property)
+
+    def testSnapshotKeyedByOverrides(self):
+        schema = CountingSchema()
+
+        self.build(schema, "./first")
+        actual = self.build(schema, "./second")
+
+        self.assertEqual(2, schema.validations)
+        self.assertEqual("./second", actual.config["test_directory"])
+
+        self.build(schema, "./second")
+        self.assertEqual(2, schema.validations)
+
+    def testSnapshotRebuiltWhenCheckFails(self):
+        schema = CountingSchema()
+
+        self.build(schema)
+
+        # ie: a directory in the config was removed
+        schema.snapshotValid = False
+        self.build(schema)
+
+        self.assertEqual(2, schema.validations)
+
+    def testSnapshotKeyedByWorkingDirectory(self):
+        schema = CountingSchema()
+
+        self.build(schema)
+
+        with patch("os.getcwd", return_value=os.path.abspath(self.DATA_DIRECTORY)):
+            self.build(schema)
+
+        self.assertEqual(2, schema.validations)
+
+    def testParsedOncePerProcess(self):
+        with open(self.DATA_FILE, 'w') as w:
+            w.write(f"assignment_name = 'parsed_once_{os.getpid()}'\n")
+
+        with patch("tomli.loads", wraps=tomli.loads) as loads:
+            self.assertEqual(f"parsed_once_{os.getpid()}", loadTOML(self.DATA_FILE)["assignment_name"])
+            loadTOML(self.DATA_FILE)["assignment_name"] = "changed"
+
+            self.assertEqual(f"parsed_once_{os.getpid()}", loadTOML(self.DATA_FILE)["assignment_name"])
+
+        self.assertEqual(1, loads.call_count)
+
+
 class TestAutograderConfigurationProvider(unittest.TestCase):
     # Ig i need tests for this??
     CONFIG = MockConfiguration("string!", 10)
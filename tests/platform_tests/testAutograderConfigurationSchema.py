@@ -1,3 +1,4 @@
+import dataclasses
 import unittest
 
 from autograder_platform.config.Config import AutograderConfigurationSchema, InvalidConfigException
@@ -66,6 +67,86 @@ class TestAutograderConfigurationSchema(unittest.TestCase):
         self.assertEqual(packages, actual["config"]["python"]["extra_packages"])
         self.assertEqual(2*2**20, actual["config"]["python"]["buffer_size"])
 
+    def testWorkerPoolDefaults(self):
+        schema = self.createAutograderConfigurationSchema()
+
+        actual = schema.build(schema.validate(self.configFile))
+
+        if actual.config.python is None:
+            self.fail("config.python was None when it shouldn't be!")
+
+        self.assertEqual(0, actual.config.python.pool_size)
+        self.assertIn("dill", actual.config.python.preload_modules)
+        self.assertIsNone(actual.config.python.start_method)
+        self.assertFalse(actual.config.python.use_zygote)
+        self.assertEqual(2 ** 24, actual.config.python.max_output_size)
+        self.assertEqual("auto", actual.config.python.serializer)
+        self.assertIsNone(actual.config.python.memory_limit)
+        self.assertIsNone(actual.config.python.cpu_time_limit)
+        self.assertFalse(actual.config.python.virtual_time)
+        self.assertIsNone(actual.config.python.package_index)
+        self.assertFalse(actual.config.python.offline)
+        self.assertEqual([], actual.config.python.stub_modules)
+        self.assertFalse(actual.config.python.requirements_layers)
+
+    def testInvalidSandboxRoot(self):
+        schema = self.createAutograderConfigurationSchema()
+
+        self.configFile["config"]["sandbox_root"] = "./this/does/not/exist"
+
+        with self.assertRaises(InvalidConfigException):
+            schema.validate(self.configFile)
+
+    def testSnapshotPathsChecked(self):
+        schema = self.createAutograderConfigurationSchema()
+
+        self.configFile["config"]["python"] = {"package_index": "."}
+        self.configFile["config"]["sandbox_root"] = "."
+
+        actual = schema.build(schema.validate(self.configFile))
+
+        self.assertTrue(schema.checkSnapshot(actual))
+
+        # ie: a relative path that was loaded from somewhere else
+        removed = dataclasses.replace(actual.config, sandbox_root="./this/does/not/exist")
+        self.assertFalse(schema.checkSnapshot(dataclasses.replace(actual, config=removed)))
+
+        removed = dataclasses.replace(actual.config, python=dataclasses.replace(actual.config.python,
+                                                                                package_index="./this/does/not/exist"))
+        self.assertFalse(schema.checkSnapshot(dataclasses.replace(actual, config=removed)))
+
+    def testInvalidMaxOutputSize(self):
+        schema = self.createAutograderConfigurationSchema()
+
+        self.configFile["config"]["python"]["max_output_size"] = 0
+
+        with self.assertRaises(InvalidConfigException):
+            schema.validate(self.configFile)
+
+    def testInvalidSerializer(self):
+        schema = self.createAutograderConfigurationSchema()
+
+        self.configFile["config"]["python"]["serializer"] = "json"
+
+        with self.assertRaises(InvalidConfigException):
+            schema.validate(self.configFile)
+
+    def testInvalidCpuTimeLimit(self):
+        schema = self.createAutograderConfigurationSchema()
+
+        self.configFile["config"]["python"]["cpu_time_limit"] = 0
+
+        with self.assertRaises(InvalidConfigException):
+            schema.validate(self.configFile)
+
+    def testInvalidStartMethod(self):
+        schema = self.createAutograderConfigurationSchema()
+
+        self.configFile["config"]["python"]["start_method"] = "teleport"
+
+        with self.assertRaises(InvalidConfigException):
+            schema.validate(self.configFile)
+
     def testExtraFields(self):
         schema = self.createAutograderConfigurationSchema()
 
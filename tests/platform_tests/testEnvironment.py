@@ -2,7 +2,8 @@ import os
 import shutil
 import unittest
 
-from autograder_platform.Executors.Environment import ExecutionEnvironment, ExecutionEnvironmentBuilder, Results, getResults
+from autograder_platform.Executors.Environment import ExecutionEnvironment, ExecutionEnvironmentBuilder, Results, TimeoutMode, \
+    getResults
 
 
 class TestEnvironmentBuilder(unittest.TestCase):
@@ -60,6 +61,21 @@ class TestEnvironmentBuilder(unittest.TestCase):
 
         self.assertEqual(10, environment.timeout)
 
+    def testSubSecondTimeout(self):
+        environment = ExecutionEnvironmentBuilder() \
+            .setTimeout(.25) \
+            .setTimeoutMode(TimeoutMode.CPU) \
+            .build()
+
+        self.assertEqual(.25, environment.timeout)
+        self.assertEqual(TimeoutMode.CPU, environment.timeout_mode)
+
+    def testNonNumericTimeout(self):
+        with self.assertRaises(AttributeError):
+            ExecutionEnvironmentBuilder() \
+                .setTimeout("10") \
+                .build()
+
     def test0Timeout(self):
         with self.assertRaises(AttributeError):
             ExecutionEnvironmentBuilder() \
@@ -8,7 +8,8 @@ from autograder_platform.StudentSubmission.AbstractStudentSubmission import Abst
 from autograder_platform.StudentSubmission.ISubmissionProcess import ISubmissionProcess
 from autograder_platform.StudentSubmission.SubmissionProcessFactory import SubmissionProcessFactory
 from autograder_platform.Executors.Executor import Executor
-from autograder_platform.Executors.Environment import ExecutionEnvironment, Results
+from autograder_platform.Executors.common import detectFileSystemChanges
+from autograder_platform.Executors.Environment import ExecutionEnvironment, Results, setSandboxRoot
 from autograder_platform.Tasks.Task import Task
 from autograder_platform.Tasks.TaskRunner import TaskRunner
 from autograder_platform.config.Config import AutograderConfigurationProvider
@@ -81,8 +82,6 @@ SubmissionProcessFactory.register(MockSubmission, MockSubmissionProcess)
 class TestExecutor(unittest.TestCase):
     TEST_FILE_ROOT = "./test_data"
     TEST_FILE_LOCATION = os.path.join(TEST_FILE_ROOT, "sub", "test.txt")
-    OUTPUT_FILE_LOCATION = os.path.join(ExecutionEnvironment.SANDBOX_LOCATION,
-                                        os.path.basename(TEST_FILE_LOCATION))
 
     def setUp(self) -> None:
         os.makedirs(os.path.dirname(self.TEST_FILE_LOCATION), exist_ok=True)
@@ -102,11 +101,62 @@ class TestExecutor(unittest.TestCase):
     def testCreateSandbox(self):
         Executor.setup(self.environment, self.runner, self.config)
 
-        self.assertIn(os.path.basename(self.environment.SANDBOX_LOCATION), os.listdir("."))
+        self.assertTrue(os.path.isdir(self.environment.SANDBOX_LOCATION))
+
+    def testSandboxesAreUnique(self):
+        otherEnvironment = ExecutionEnvironment()
+
+        Executor.setup(self.environment, self.runner, self.config)
+        Executor.setup(otherEnvironment, self.runner, self.config)
+
+        self.assertNotEqual(self.environment.SANDBOX_LOCATION, otherEnvironment.SANDBOX_LOCATION)
+        self.assertTrue(os.path.isdir(self.environment.SANDBOX_LOCATION))
+        self.assertTrue(os.path.isdir(otherEnvironment.SANDBOX_LOCATION))
+
+    def testSandboxRemovedWithEnvironment(self):
+        environment = ExecutionEnvironment()
+        Executor.setup(environment, self.runner, self.config)
+
+        sandboxLocation = environment.SANDBOX_LOCATION
+        self.assertTrue(os.path.isdir(sandboxLocation))
+
+        del environment
+
+        self.assertFalse(os.path.exists(sandboxLocation))
+
+    def testSandboxRoot(self):
+        setSandboxRoot(self.TEST_FILE_ROOT)
+
+        try:
+            environment = ExecutionEnvironment()
+        finally:
+            setSandboxRoot(None)
+
+        Executor.setup(environment, self.runner, self.config)
+
+        self.assertEqual(os.path.abspath(self.TEST_FILE_ROOT), os.path.dirname(environment.SANDBOX_LOCATION))
+
+    def testDetectFileSystemChangesInDunderRoot(self):
+        setSandboxRoot(os.path.join(self.TEST_FILE_ROOT, "__sandboxes__"))
+
+        try:
+            environment = ExecutionEnvironment()
+        finally:
+            setSandboxRoot(None)
+
+        Executor.setup(environment, self.runner, self.config)
+
+        for name in ["output.txt", "__pycache__.txt", ".hidden"]:
+            with open(os.path.join(environment.SANDBOX_LOCATION, name), 'w') as w:
+                w.write("")
+
+        self.assertEqual({"output.txt": os.path.join(environment.SANDBOX_LOCATION, "output.txt")},
+                         detectFileSystemChanges([], environment.SANDBOX_LOCATION))
 
     def testMoveFiles(self):
         self.environment.files = {
-            self.TEST_FILE_LOCATION: self.OUTPUT_FILE_LOCATION
+            self.TEST_FILE_LOCATION: os.path.join(self.environment.SANDBOX_LOCATION,
+                                                  os.path.basename(self.TEST_FILE_LOCATION))
         }
 
         with open(self.TEST_FILE_LOCATION, 'w') as w:
@@ -0,0 +1,245 @@
+import io
+import json
+import os
+import shutil
+import unittest
+from typing import List
+from unittest.mock import MagicMock
+
+from autograder_utils.Decorators import Weight, PartialCredit
+from autograder_utils.JSONTestRunner import JSONTestRunner
+
+from autograder_platform.Executors.Environment import ExecutionEnvironment, Results
+from autograder_platform.Executors.Executor import Executor
+from autograder_platform.Executors.Metrics import Metrics
+from autograder_platform.Executors.Trace import TraceRecorder, setTraceRecorder
+from autograder_platform.StudentSubmission.AbstractStudentSubmission import AbstractStudentSubmission
+from autograder_platform.StudentSubmission.ISubmissionProcess import ISubmissionProcess
+from autograder_platform.StudentSubmission.SubmissionProcessFactory import SubmissionProcessFactory
+from autograder_platform.Tasks.Task import Task
+from autograder_platform.Tasks.TaskRunner import TaskRunner
+from autograder_platform.TestingFramework.ParallelTestSuite import ParallelTestSuite
+from autograder_platform.config.Config import AutograderConfigurationProvider
+
+
+DATA_DIRECTORY = "./testData"
+
+
+def createSampleTests() -> unittest.TestSuite:
+    # The classes are created here so that discovery doesn't pick them up and so that each run gets fresh methods
+
+    class FirstSample(unittest.TestCase):
+        @classmethod
+        def setUpClass(cls) -> None:
+            with open(os.path.join(DATA_DIRECTORY, "setup.txt"), 'a') as w:
+                w.write("FirstSample\n")
+
+        @Weight(5)
+        def testPasses(self):
+            print("this is output from a passing test")
+
+        @Weight(5)
+        def testFails(self):
+            print("this is output from a failing test")
+            self.assertEqual(1, 2)
+
+        @PartialCredit(10)
+        def testPartialCredit(self, set_score=None):
+            set_score(4)
+
+    class SecondSample(unittest.TestCase):
+        @classmethod
+        def setUpClass(cls) -> None:
+            with open(os.path.join(DATA_DIRECTORY, "setup.txt"), 'a') as w:
+                w.write("SecondSample\n")
+
+        def testErrors(self):
+            raise KeyError("missing")
+
+        @unittest.skip("Skipped for a reason")
+        def testSkipped(self):
+            pass
+
+        @Weight(1)
+        def testStdErr(self):
+            import sys
+            print("this is on stderr", file=sys.stderr)
+
+    class BrokenSetupSample(unittest.TestCase):
+        @classmethod
+        def setUpClass(cls) -> None:
+            raise RuntimeError("setUpClass failed")
+
+        def testNeverRuns(self):
+            pass
+
+    loader = unittest.defaultTestLoader
+
+    return unittest.TestSuite([loader.loadTestsFromTestCase(FirstSample),
+                               loader.loadTestsFromTestCase(SecondSample),
+                               loader.loadTestsFromTestCase(BrokenSetupSample)])
+
+
+class TracedSubmission(AbstractStudentSubmission[List[str]]):
+    def doLoad(self):
+        pass
+
+    def doBuild(self):
+        pass
+
+    def getExecutableSubmission(self) -> List[str]:
+        return []
+
+
+class TracedSubmissionProcess(ISubmissionProcess):
+    """Runs the tasks in the current process, and reports their timings like a real submission process"""
+
+    def __init__(self):
+        self.runner = None
+
+    def setup(self, _, runner: TaskRunner):
+        self.runner = runner
+
+    def run(self):
+        self.runner.run()
+
+    def populateResults(self, environment: ExecutionEnvironment):
+        environment.resultData = Results(metrics=Metrics(tasks=self.runner.getTimings()))
+
+    def cleanup(self):
+        pass
+
+    @classmethod
+    def processAndRaiseExceptions(cls, environment: ExecutionEnvironment):
+        pass
+
+
+SubmissionProcessFactory.register(TracedSubmission, TracedSubmissionProcess)
+
+
+def createExecutingTests() -> unittest.TestSuite:
+    def execute():
+        runner = TaskRunner(TracedSubmission)
+        runner.add(Task("run", lambda: None, []))
+
+        Executor.execute(ExecutionEnvironment(), runner)
+
+    class FirstExecuting(unittest.TestCase):
+        def testExecutes(self):
+            execute()
+
+    class SecondExecuting(unittest.TestCase):
+        def testExecutes(self):
+            execute()
+
+    loader = unittest.defaultTestLoader
+
+    return unittest.TestSuite([loader.loadTestsFromTestCase(FirstExecuting),
+                               loader.loadTestsFromTestCase(SecondExecuting)])
+
+
+def runWithJSON(suite: unittest.TestSuite) -> dict:
+    stream = io.StringIO()
+    JSONTestRunner(visibility='visible', stream=stream).run(suite)
+
+    results = json.loads(stream.getvalue())
+    results.pop("execution_time")
+
+    return results
+
+
+class TestParallelTestSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        if os.path.exists(DATA_DIRECTORY):
+            shutil.rmtree(DATA_DIRECTORY)
+
+        os.mkdir(DATA_DIRECTORY)
+
+        self.durationsFile = os.path.join(DATA_DIRECTORY, "durations.json")
+
+    def tearDown(self) -> None:
+        if os.path.exists(DATA_DIRECTORY):
+            shutil.rmtree(DATA_DIRECTORY)
+
+    def testMatchesSerialResults(self):
+        expected = runWithJSON(createSampleTests())
+
+        actual = runWithJSON(ParallelTestSuite(createSampleTests(), jobs=3, durationsFile=self.durationsFile))
+
+        self.assertEqual(expected, actual)
+
+    def testSetUpClassRunsOncePerClass(self):
+        result = unittest.TestResult()
+
+        ParallelTestSuite(createSampleTests(), jobs=2).run(result)
+
+        with open(os.path.join(DATA_DIRECTORY, "setup.txt"), 'r') as r:
+            setups = sorted(r.read().splitlines())
+
+        self.assertEqual(["FirstSample", "SecondSample"], setups)
+        self.assertEqual(6, result.testsRun)
+        self.assertEqual(1, len(result.failures))
+        # testErrors and BrokenSetupSample.setUpClass
+        self.assertEqual(2, len(result.errors))
+        self.assertEqual(1, len(result.skipped))
+
+    def testDurationsAreRecorded(self):
+        ParallelTestSuite(createSampleTests(), jobs=2, durationsFile=self.durationsFile).run(unittest.TestResult())
+
+        with open(self.durationsFile, 'r') as r:
+            durations = json.load(r)
+
+        self.assertEqual(3, len(durations))
+        self.assertTrue(any(name.endswith("FirstSample") for name in durations))
+
+    def testScheduleLongestFirst(self):
+        suite = ParallelTestSuite(createSampleTests(), jobs=2)
+        groups = suite._group()
+
+        durations = {
+            suite._getGroupName(groups[0]): 1,
+            suite._getGroupName(groups[1]): 10,
+        }
+
+        # the last group hasn't been run before so it is assumed to take the average time
+        self.assertEqual([1, 2, 0], suite._schedule(groups, durations))
+
+    def testWorkerCrash(self):
+        class CrashingSample(unittest.TestCase):
+            def testCrashes(self):
+                os._exit(1)
+
+        suite = createSampleTests()
+        suite.addTest(unittest.defaultTestLoader.loadTestsFromTestCase(CrashingSample))
+
+        result = unittest.TestResult()
+        ParallelTestSuite(suite, jobs=2).run(result)
+
+        self.assertEqual(7, result.testsRun)
+        self.assertTrue(any("exited unexpectedly" in error for _, error in result.errors))
+
+    def testTraceFromWorkers(self):
+        recorder = TraceRecorder()
+        setTraceRecorder(recorder)
+        AutograderConfigurationProvider.set(MagicMock())
+
+        try:
+            result = unittest.TestResult()
+            ParallelTestSuite(createExecutingTests(), jobs=2).run(result)
+        finally:
+            setTraceRecorder(None)
+            AutograderConfigurationProvider.reset()
+
+        self.assertTrue(result.wasSuccessful(), result.errors)
+
+        rows = [event["args"]["name"] for event in recorder.events if event["ph"] == "M"]
+        tasks = [event for event in recorder.events if event["ph"] == "X"]
+
+        self.assertEqual(2, len(rows))
+        self.assertTrue(any(row.endswith("FirstExecuting.testExecutes") for row in rows))
+        self.assertEqual(2, len(tasks))
+        self.assertEqual(2, len({event["tid"] for event in tasks}))
+
+    def testInvalidJobs(self):
+        with self.assertRaises(AttributeError):
+            ParallelTestSuite(jobs=0)
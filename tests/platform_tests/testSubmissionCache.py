@@ -0,0 +1,79 @@
+import os
+import shutil
+import unittest
+
+from autograder_platform.StudentSubmission.SubmissionCache import SubmissionCache
+from autograder_platform.StudentSubmission.common import ValidationError
+from autograder_platform.StudentSubmissionImpl.Python import PythonSubmission
+
+
+class TestSubmissionCache(unittest.TestCase):
+    TEST_FILE_DIRECTORY: str = "./testData"
+
+    def setUp(self) -> None:
+        if os.path.exists(self.TEST_FILE_DIRECTORY):
+            shutil.rmtree(self.TEST_FILE_DIRECTORY)
+
+        os.mkdir(self.TEST_FILE_DIRECTORY)
+
+        self.cache = SubmissionCache()
+
+    def tearDown(self) -> None:
+        if os.path.exists(self.TEST_FILE_DIRECTORY):
+            shutil.rmtree(self.TEST_FILE_DIRECTORY)
+
+    def writeFile(self, filename: str, contents: str):
+        with open(os.path.join(self.TEST_FILE_DIRECTORY, filename), 'w') as w:
+            w.write(contents)
+
+    def testSubmissionBuiltOnce(self):
+        self.writeFile("main.py", "print('hello')\n")
+
+        first = self.cache.get(PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY))
+        second = self.cache.get(PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY))
+
+        self.assertIs(first, second)
+        self.assertIsNotNone(first.getExecutableSubmission())
+
+    def testDifferentOptions(self):
+        self.writeFile("main.py", "print('hello')\n")
+
+        first = self.cache.get(PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY))
+        second = self.cache.get(PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY)
+                                .enableLooseMainMatching())
+
+        self.assertIsNot(first, second)
+
+    def testChangedFiles(self):
+        self.writeFile("main.py", "print('hello')\n")
+
+        first = self.cache.get(PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY))
+
+        self.writeFile("main.py", "print('goodbye')\n")
+
+        second = self.cache.get(PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY))
+
+        self.assertIsNot(first, second)
+
+    def testValidationErrorCached(self):
+        self.writeFile("not_main.py", "print('hello')\n")
+
+        with self.assertRaises(ValidationError) as first:
+            self.cache.get(PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY))
+
+        submission = PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY)
+        # the submission isn't loaded again, it is just raised
+        submission.doLoad = lambda: self.fail("Submission was loaded again!")
+
+        with self.assertRaises(ValidationError) as second:
+            self.cache.get(submission)
+
+        self.assertIs(first.exception, second.exception)
+
+    def testFromCache(self):
+        self.writeFile("main.py", "print('hello')\n")
+
+        first = PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY).fromCache()
+        second = PythonSubmission().setSubmissionRoot(self.TEST_FILE_DIRECTORY).fromCache()
+
+        self.assertIs(first, second)
@@ -0,0 +1,69 @@
+import os
+import shutil
+import unittest
+
+from autograder_platform.StudentSubmission.SubmissionWalker import SubmissionTooLargeError, SubmissionWalker, \
+    WalkLimits
+
+
+class TestSubmissionWalker(unittest.TestCase):
+    TEST_FILE_DIRECTORY: str = "./testData"
+
+    def setUp(self) -> None:
+        if os.path.exists(self.TEST_FILE_DIRECTORY):
+            shutil.rmtree(self.TEST_FILE_DIRECTORY)
+
+        os.mkdir(self.TEST_FILE_DIRECTORY)
+
+    def tearDown(self) -> None:
+        if os.path.exists(self.TEST_FILE_DIRECTORY):
+            shutil.rmtree(self.TEST_FILE_DIRECTORY)
+
+    def writeFile(self, path: str, contents: str = ""):
+        path = os.path.join(self.TEST_FILE_DIRECTORY, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, 'w') as w:
+            w.write(contents)
+
+    def testWalkOrder(self):
+        self.writeFile("b.py")
+        self.writeFile("a.py")
+        self.writeFile(os.path.join("pkg", "c.py"))
+
+        files = SubmissionWalker(self.TEST_FILE_DIRECTORY).walk()
+
+        self.assertEqual([os.path.join(self.TEST_FILE_DIRECTORY, "a.py"),
+                          os.path.join(self.TEST_FILE_DIRECTORY, "b.py"),
+                          os.path.join(self.TEST_FILE_DIRECTORY, "pkg", "c.py")], files)
+
+    def testIgnoredEntriesNotWalked(self):
+        self.writeFile("main.py")
+        self.writeFile(".hidden")
+        self.writeFile(os.path.join("node_modules", "left-pad", "index.js"))
+        self.writeFile(os.path.join("data", "big.csv"))
+
+        files = SubmissionWalker(self.TEST_FILE_DIRECTORY, ["node_modules", ".*", "data/*.csv"]).walk()
+
+        self.assertEqual([os.path.join(self.TEST_FILE_DIRECTORY, "main.py")], files)
+
+    def testTooManyFiles(self):
+        for i in range(5):
+            self.writeFile(f"file{i}.py")
+
+        with self.assertRaises(SubmissionTooLargeError):
+            SubmissionWalker(self.TEST_FILE_DIRECTORY, limits=WalkLimits(max_files=4)).walk()
+
+    def testTooManyBytes(self):
+        self.writeFile("main.py", "a" * 1024)
+
+        with self.assertRaises(SubmissionTooLargeError):
+            SubmissionWalker(self.TEST_FILE_DIRECTORY, limits=WalkLimits(max_bytes=1023)).walk()
+
+    def testTooDeep(self):
+        self.writeFile(os.path.join("a", "b", "c", "main.py"))
+
+        SubmissionWalker(self.TEST_FILE_DIRECTORY, limits=WalkLimits(max_depth=3)).walk()
+
+        with self.assertRaises(SubmissionTooLargeError):
+            SubmissionWalker(self.TEST_FILE_DIRECTORY, limits=WalkLimits(max_depth=2)).walk()
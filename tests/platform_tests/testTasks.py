@@ -1,5 +1,6 @@
+import pickle
 import unittest
-from autograder_platform.Tasks.Task import Task
+from autograder_platform.Tasks.Task import ResultOf, Task, Value
 from autograder_platform.Tasks.TaskRunner import TaskRunner
 from autograder_platform.Tasks.common import TaskStatus, FailedToLoadSuppliers, TaskAlreadyExists
 
@@ -97,3 +98,154 @@ class TestTasks(unittest.TestCase):
         self.assertEqual(None, actual)
         self.assertFalse(runner.wasSuccessful())
         self.assertEqual(1, len(runner.getAllErrors()))
+
+    def testAdoptSharedTasks(self):
+        shared = TaskRunner(None)  # type: ignore
+        shared.add(Task("1", TestTasks.returnBoi, [lambda: [1, 2]]), isShared=True)
+        shared.add(Task("2", TestTasks.returnBoi, [lambda: shared.getResult("1")]), isOverallResultTask=True)
+        shared.setSharedKey("key")
+
+        shared.runSharedTasks()
+
+        runner = TaskRunner(None)  # type: ignore
+        runner.add(Task("1", TestTasks.raiseBoi, []), isShared=True)
+        runner.add(Task("2", TestTasks.returnBoi, [lambda: runner.getResult("1")]), isOverallResultTask=True)
+        runner.setSharedKey("key")
+
+        runner.adoptSharedTasks(shared)
+
+        actual = runner.run()
+
+        self.assertTrue(runner.wasSuccessful())
+        self.assertEqual([1, 2], actual)
+
+    def testAdoptFailedSharedTasks(self):
+        shared = TaskRunner(None)  # type: ignore
+        shared.add(Task("1", TestTasks.raiseBoi, []), isShared=True)
+        shared.setSharedKey("key")
+
+        shared.runSharedTasks()
+
+        runner = TaskRunner(None)  # type: ignore
+        runner.add(Task("1", TestTasks.raiseBoi, []), isShared=True)
+        runner.add(Task("2", TestTasks.returnBoi, [lambda: 1]), isOverallResultTask=True)
+        runner.setSharedKey("key")
+
+        runner.adoptSharedTasks(shared)
+        runner.run()
+
+        self.assertFalse(runner.wasSuccessful())
+
+        with self.assertRaises(AttributeError):
+            raise runner.getAllErrors()[0]
+
+    def testSharedTasksMustBeFirst(self):
+        runner = TaskRunner(None)  # type: ignore
+        runner.add(Task("1", TestTasks.returnBoi, [lambda: 1]))
+
+        with self.assertRaises(AttributeError):
+            runner.add(Task("2", TestTasks.returnBoi, [lambda: 1]), isShared=True)
+
+    def testAdoptSharedTasksDifferentKey(self):
+        shared = TaskRunner(None)  # type: ignore
+        shared.add(Task("1", TestTasks.returnBoi, [lambda: 1]), isShared=True)
+        shared.setSharedKey("key")
+
+        runner = TaskRunner(None)  # type: ignore
+        runner.add(Task("1", TestTasks.returnBoi, [lambda: 1]), isShared=True)
+        runner.setSharedKey("other key")
+
+        with self.assertRaises(AttributeError):
+            runner.adoptSharedTasks(shared)
+
+    @staticmethod
+    def addBoi(first: int, second: int) -> int:
+        return first + second
+
+    def testTasksRunAfterDependencies(self):
+        runner = TaskRunner(None)  # type: ignore
+
+        runner.add(Task("sum", TestTasks.addBoi, [ResultOf("1"), ResultOf("2")]), isOverallResultTask=True)
+        runner.add(Task("1", TestTasks.returnBoi, [Value(1)]))
+        runner.add(Task("2", TestTasks.returnBoi, [Value(2)]))
+
+        actual = runner.run()
+
+        self.assertTrue(runner.wasSuccessful())
+        self.assertEqual(3, actual)
+        self.assertEqual(["1", "2", "sum"], runner.getOrder())
+
+    def testTasksRunAfter(self):
+        runner = TaskRunner(None)  # type: ignore
+
+        runner.add(Task("2", TestTasks.returnBoi, [Value(2)], after=["1"]))
+        runner.add(Task("1", TestTasks.returnBoi, [Value(1)]))
+
+        self.assertEqual(["1", "2"], runner.getOrder())
+
+    def testCircularDependencies(self):
+        runner = TaskRunner(None)  # type: ignore
+
+        runner.add(Task("1", TestTasks.returnBoi, [ResultOf("2")]))
+        runner.add(Task("2", TestTasks.returnBoi, [ResultOf("1")]))
+
+        runner.run()
+
+        self.assertFalse(runner.wasSuccessful())
+        with self.assertRaises(FailedToLoadSuppliers):
+            raise runner.getAllErrors()[0]
+
+    def testRunnerCanBeRunAgain(self):
+        runner = TaskRunner(None)  # type: ignore
+
+        runner.add(Task("1", TestTasks.returnBoi, [Value([1, 2])]))
+        runner.add(Task("2", TestTasks.returnBoi, [ResultOf("1")]), isOverallResultTask=True)
+
+        self.assertEqual([1, 2], runner.run())
+        self.assertEqual([1, 2], runner.run())
+        self.assertTrue(runner.wasSuccessful())
+
+    def testDeclaredRunnerIsPicklable(self):
+        runner = TaskRunner(None)  # type: ignore
+
+        runner.add(Task("1", TestTasks.returnBoi, [Value(1)]))
+        runner.add(Task("2", TestTasks.addBoi, [ResultOf("1"), Value(2)]), isOverallResultTask=True)
+
+        copiedRunner: TaskRunner = pickle.loads(pickle.dumps(runner))
+
+        self.assertEqual(3, copiedRunner.run())
+
+    def testTaskTimings(self):
+        runner = TaskRunner(None)  # type: ignore
+
+        runner.add(Task("1", TestTasks.returnBoi, [Value([1, 2])]))
+        runner.add(Task("2", TestTasks.raiseBoi, []))
+        runner.add(Task("3", TestTasks.returnBoi, [Value(3)]))
+
+        runner.run()
+
+        timings = runner.getTimings()
+
+        self.assertEqual(["1", "2"], [timing.name for timing in timings])
+        self.assertEqual([TaskStatus.COMPLETE, TaskStatus.ERROR], [timing.status for timing in timings])
+        self.assertIsNone(timings[0].result_size)
+        self.assertGreaterEqual(timings[0].duration, 0)
+
+    def testTaskResultSizes(self):
+        runner = TaskRunner(None)  # type: ignore
+        runner.setMeasureResultSizes(True)
+
+        runner.add(Task("1", TestTasks.returnBoi, [Value(["a" * 1000] * 10)]))
+        runner.add(Task("2", TestTasks.raiseBoi, []))
+
+        copiedRunner: TaskRunner = pickle.loads(pickle.dumps(runner))
+        copiedRunner.run()
+
+        timings = copiedRunner.getTimings()
+
+        if timings[0].result_size is None:
+            self.fail("Result size was not measured!")
+
+        # the whole list is measured, not just the list object itself
+        self.assertGreater(timings[0].result_size, 1000)
+        self.assertIsNone(timings[1].result_size)
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import unittest
+
+from autograder_platform.Executors.Metrics import Metrics
+from autograder_platform.Executors.Trace import TraceRecorder, TracedTestResult, getTraceRecorder, setTraceRecorder
+from autograder_platform.Tasks.common import TaskStatus, TaskTiming
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self) -> None:
+        self.recorder = TraceRecorder()
+
+    def testRecordRun(self):
+        metrics = Metrics(tasks=[TaskTiming("import", TaskStatus.COMPLETE, 1_000_000, 3_000_000, 72),
+                                 TaskTiming("run", TaskStatus.ERROR, 3_000_000, 4_000_000)], result_bytes=72)
+
+        self.recorder.record(metrics)
+
+        events = self.recorder.toChromeTrace()["traceEvents"]
+
+        self.assertEqual(4, len(events))
+        self.assertEqual("run 0", events[0]["args"]["name"])
+        self.assertEqual({"name": "import", "ts": 1000, "dur": 2000},
+                         {key: events[1][key] for key in ("name", "ts", "dur")})
+        self.assertEqual(72, events[1]["args"]["result_size"])
+        self.assertEqual("ERROR", events[2]["args"]["status"])
+        self.assertEqual({"name": "results", "ts": 4000, "args": {"result_bytes": 72}},
+                         {key: events[3][key] for key in ("name", "ts", "args")})
+
+    def testRunsWithoutTimingsAreSkipped(self):
+        self.recorder.record(Metrics())
+
+        self.assertEqual([], self.recorder.toChromeTrace()["traceEvents"])
+
+    def testEachRunHasItsOwnRow(self):
+        metrics = Metrics(tasks=[TaskTiming("import", TaskStatus.COMPLETE, 0, 1000)])
+
+        self.recorder.record(metrics, "first")
+        self.recorder.record(metrics, "second")
+
+        rows = {event["tid"] for event in self.recorder.events}
+
+        self.assertEqual(2, len(rows))
+
+    def testMergeGivesEachRunANewRow(self):
+        metrics = Metrics(tasks=[TaskTiming("import", TaskStatus.COMPLETE, 0, 1000)])
+
+        other = TraceRecorder()
+        other.record(metrics, "from worker")
+
+        self.recorder.record(metrics, "from parent")
+        self.recorder.merge(other.takeEvents())
+
+        self.assertEqual([], other.events)
+        self.assertEqual(4, len(self.recorder.events))
+        self.assertEqual(2, len({event["tid"] for event in self.recorder.events}))
+
+    def testWrite(self):
+        self.recorder.record(Metrics(tasks=[TaskTiming("import", TaskStatus.COMPLETE, 0, 1000)]))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            self.recorder.write(path)
+
+            with open(path, "r") as r:
+                trace = json.load(r)
+
+        self.assertEqual(2, len(trace["traceEvents"]))
+
+    def testTracedResultNamesRuns(self):
+        metrics = Metrics(tasks=[TaskTiming("import", TaskStatus.COMPLETE, 0, 1000)])
+
+        class TracedTest(unittest.TestCase):
+            def runTest(self):
+                recorder = getTraceRecorder()
+
+                if recorder is not None:
+                    recorder.record(metrics)
+
+        setTraceRecorder(self.recorder)
+        self.addCleanup(setTraceRecorder, None)
+
+        test = TracedTest()
+        test.run(TracedTestResult())
+        self.recorder.record(metrics)
+
+        names = [event["args"]["name"] for event in self.recorder.events if event["ph"] == "M"]
+
+        self.assertEqual([test.id(), "run 1"], names)